@@ -0,0 +1,202 @@
+"""Batch workflow execution for the flexible agent API.
+
+A batch submits many user requests against one workflow configuration. Every
+item becomes an ordinary workflow record, so the status, result and cancel
+endpoints work on items as usual. Items are handed to the scheduler with a
+bounded number in flight and all run on one compiled workflow, so the
+configuration is loaded and compiled once for the whole batch.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Workflow statuses after which a batch item is finished
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class BatchError(Exception):
+    """Custom exception for invalid batch submissions."""
+    pass
+
+
+@dataclass
+class BatchItem:
+    """A single request of a batch.
+
+    Attributes:
+        index: Position of the request in the submission
+        workflow_id: Workflow execution ID created for the request
+        user_request: The request to process
+        priority: Scheduling priority class
+        status: Last known workflow status
+        reuse_from: Identical workflow whose result the item reuses instead of running
+    """
+    index: int
+    workflow_id: str
+    user_request: str
+    priority: str = "low"
+    status: str = "queued"
+    reuse_from: Optional[str] = None
+
+
+def parse_jsonl(text: str) -> List[Any]:
+    """Parse a JSONL batch upload.
+
+    Args:
+        text: One JSON value per line; blank lines are skipped
+
+    Returns:
+        Parsed entries
+
+    Raises:
+        BatchError: If a line is not valid JSON
+    """
+    entries = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise BatchError(f"Line {line_number} is not valid JSON: {e}") from e
+    return entries
+
+
+def parse_batch_entries(
+    entries: List[Any],
+    default_priority: str,
+    priorities: List[str],
+    max_items: int
+) -> List[Dict[str, str]]:
+    """Validate batch entries and normalize them to request dictionaries.
+
+    Args:
+        entries: Request strings or objects with ``user_request`` and optional ``priority``
+        default_priority: Priority for entries that don't set one
+        priorities: Valid priority classes
+        max_items: Maximum number of entries in one batch
+
+    Returns:
+        List of {"user_request", "priority"} dictionaries
+
+    Raises:
+        BatchError: If the batch is empty, too large or has invalid entries
+    """
+    if not entries:
+        raise BatchError("Batch contains no requests")
+    if len(entries) > max_items:
+        raise BatchError(f"Batch contains {len(entries)} requests, the limit is {max_items}")
+
+    requests = []
+    for index, entry in enumerate(entries):
+        if isinstance(entry, str):
+            entry = {"user_request": entry}
+        if not isinstance(entry, dict):
+            raise BatchError(f"Entry {index} must be a string or an object")
+        user_request = entry.get("user_request")
+        if not isinstance(user_request, str) or not user_request.strip():
+            raise BatchError(f"Entry {index} has no user_request")
+        priority = entry.get("priority") or default_priority
+        if priority not in priorities:
+            raise BatchError(f"Entry {index} has invalid priority '{priority}'. Must be one of: {priorities}")
+        requests.append({"user_request": user_request, "priority": priority})
+    return requests
+
+
+def summarize_batch(batch_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate the progress of a batch.
+
+    Args:
+        batch_id: Batch ID
+        items: Item dictionaries with at least ``status`` and optionally ``progress``
+
+    Returns:
+        Summary with per-status counts, overall progress and the items
+    """
+    counts = Counter(item["status"] for item in items)
+    finished = sum(counts[status] for status in FINISHED_STATUSES)
+    progress = sum(
+        100.0 if item["status"] in FINISHED_STATUSES else float(item.get("progress") or 0.0)
+        for item in items
+    )
+    return {
+        "batch_id": batch_id,
+        "total": len(items),
+        "finished": finished,
+        "counts": dict(counts),
+        "progress": round(progress / len(items), 1) if items else 100.0,
+        "complete": finished == len(items),
+        "items": items,
+    }
+
+
+@dataclass
+class WorkflowBatch:
+    """A batch being executed by this process.
+
+    Attributes:
+        batch_id: Batch ID
+        items: Items in submission order
+        max_concurrency: Maximum number of items handed to the scheduler at once
+        manager: Workflow manager shared by the batch's in-process runs
+        configs: Configuration snapshot the batch runs with
+        created_at: Time the batch was submitted
+        cancelled: Whether the batch was cancelled
+        changed: Event set (and replaced) whenever an item's status changes
+        task: Task running the batch
+    """
+    batch_id: str
+    items: List[BatchItem]
+    max_concurrency: int
+    manager: Any = None
+    configs: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    cancelled: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def set_status(self, item: BatchItem, status: str) -> None:
+        """Record an item's status and wake up waiters on ``changed``.
+
+        Args:
+            item: Batch item
+            status: New workflow status
+        """
+        item.status = status
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate progress from the items' last known statuses."""
+        return summarize_batch(self.batch_id, [
+            {"index": item.index, "workflow_id": item.workflow_id, "status": item.status}
+            for item in self.items
+        ])
+
+    async def run(self, execute_item: Callable[[BatchItem], Awaitable[None]]) -> None:
+        """Execute all items with at most ``max_concurrency`` in flight.
+
+        Args:
+            execute_item: Coroutine function running one item to completion
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run_item(item: BatchItem) -> None:
+            async with semaphore:
+                try:
+                    await execute_item(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Batch {self.batch_id} item {item.index} failed: {e}")
+
+        logger.info(f"📦 Running batch {self.batch_id}: {len(self.items)} items, {self.max_concurrency} at a time")
+        await asyncio.gather(*(run_item(item) for item in self.items))
+        logger.info(f"✅ Batch {self.batch_id} finished: {self.summary()['counts']}")
@@ -0,0 +1,217 @@
+"""Incremental index of interim workflow outputs.
+
+This module tracks the markdown files a workflow run writes to its incremental
+directory. Each directory scan only stats the files; a file is assigned a new
+sequence number whenever it appears or changes, so clients can poll with a
+cursor and receive only new or changed outputs, and unchanged directories can
+be answered with a cheap ETag comparison.
+
+Runs using the bundle artifact format keep their outputs in one
+``artifacts.bundle``; its index is read incrementally from the last offset
+seen, and outputs are read from it by random access.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle
+
+logger = logging.getLogger(__name__)
+
+
+def agent_name_for(filename: str) -> str:
+    """Derive a display name for an interim output file.
+
+    Args:
+        filename: Output file name such as ``01_requirementanalyzer.md``
+
+    Returns:
+        Human readable agent name
+    """
+    if filename.startswith("00_"):
+        return "Workflow Metadata"
+    if filename.startswith("99_"):
+        return "Final Summary"
+    parts = filename.split('_', 1)
+    if len(parts) > 1:
+        return parts[1].replace('.md', '').replace('_', ' ').title()
+    return filename.replace('.md', '')
+
+
+@dataclass
+class OutputFile:
+    """A tracked interim output file.
+
+    Attributes:
+        filename: File name inside the incremental directory
+        mtime_ns: Modification time seen at the last scan
+        size: Size in bytes seen at the last scan
+        seq: Sequence number assigned when this version was first seen
+        bundled: Whether the output is stored in the directory's bundle
+    """
+    filename: str
+    mtime_ns: int
+    size: int
+    seq: int
+    bundled: bool = False
+
+
+@dataclass
+class _DirectoryIndex:
+    """Known output files of one incremental directory."""
+    files: Dict[str, OutputFile] = field(default_factory=dict)
+    seq: int = 0
+    final: bool = False
+    bundle: Optional[ArtifactBundle] = None
+
+
+class InterimOutputIndex:
+    """Per-directory index of interim outputs with cursor support.
+
+    Cursors have the form ``<epoch>:<seq>``. The epoch changes when the process
+    restarts or a directory's index is evicted, in which case an old cursor is
+    treated as absent and the client receives the full listing again.
+    """
+
+    def __init__(self, max_directories: int = 256):
+        """Initialize the index.
+
+        Args:
+            max_directories: Number of directory indexes kept in memory
+        """
+        self.max_directories = max_directories
+        self._epoch = uuid.uuid4().hex[:8]
+        self._indexes: "OrderedDict[str, Tuple[str, _DirectoryIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_index(self, directory: Path) -> Tuple[str, _DirectoryIndex]:
+        """Get or create the index of a directory, keeping LRU order."""
+        key = str(directory)
+        entry = self._indexes.get(key)
+        if entry is None:
+            entry = (f"{self._epoch}{uuid.uuid4().hex[:4]}", _DirectoryIndex())
+            self._indexes[key] = entry
+            while len(self._indexes) > self.max_directories:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(key)
+        return entry
+
+    def _scan(self, directory: Path, index: _DirectoryIndex) -> None:
+        """Stat the directory's markdown files and version new or changed ones."""
+        seen = set()
+        try:
+            with os.scandir(directory) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith(".md") or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    seen.add(dir_entry.name)
+                    known = index.files.get(dir_entry.name)
+                    if known and known.mtime_ns == stat.st_mtime_ns and known.size == stat.st_size:
+                        continue
+                    index.seq += 1
+                    index.files[dir_entry.name] = OutputFile(
+                        dir_entry.name, stat.st_mtime_ns, stat.st_size, index.seq
+                    )
+        except FileNotFoundError:
+            pass
+
+        bundle_path = directory / BUNDLE_FILENAME
+        if index.bundle is None and bundle_path.exists():
+            index.bundle = ArtifactBundle(bundle_path)
+        if index.bundle is not None:
+            index.bundle.refresh()
+            for entry in index.bundle.entries.values():
+                if not entry.name.endswith(".md") or entry.name in seen:
+                    continue
+                seen.add(entry.name)
+                mtime_ns = int(entry.mtime * 1e9)
+                known = index.files.get(entry.name)
+                if known and known.bundled and known.mtime_ns == mtime_ns and known.size == entry.size:
+                    continue
+                index.seq += 1
+                index.files[entry.name] = OutputFile(entry.name, mtime_ns, entry.size, index.seq, bundled=True)
+
+        removed = set(index.files) - seen
+        for name in removed:
+            del index.files[name]
+        if removed:
+            index.seq += 1
+
+    def changes(
+        self,
+        directory: Path,
+        cursor: Optional[str] = None,
+        final: bool = False
+    ) -> Tuple[List[OutputFile], str, bool]:
+        """List outputs that are new or changed since a cursor.
+
+        Args:
+            directory: Incremental output directory of the run
+            cursor: Cursor returned by a previous call, if any
+            final: Whether the run has finished; once a finished directory has
+                been scanned it is not scanned again
+
+        Returns:
+            Tuple of (changed files sorted by name, next cursor, whether the
+            listing is complete rather than a delta). The next cursor changes
+            whenever the directory's outputs change, so it doubles as an ETag.
+        """
+        with self._lock:
+            epoch, index = self._get_index(directory)
+            if not index.final:
+                self._scan(directory, index)
+                index.final = final
+
+            since = None
+            if cursor:
+                cursor_epoch, _, cursor_seq = cursor.partition(":")
+                if cursor_epoch == epoch and cursor_seq.isdigit():
+                    since = int(cursor_seq)
+
+            files = sorted(
+                (f for f in index.files.values() if since is None or f.seq > since),
+                key=lambda f: f.filename
+            )
+            return files, f"{epoch}:{index.seq}", since is None
+
+    def read(self, directory: Path, output: OutputFile) -> Optional[Dict[str, Any]]:
+        """Read an output file into an API payload.
+
+        Args:
+            directory: Incremental output directory of the run
+            output: Tracked output file
+
+        Returns:
+            Output payload, or None if the file could not be read
+        """
+        file_path = directory / output.filename
+        try:
+            if output.bundled:
+                # The bundle's index is shared with scans
+                with self._lock:
+                    _, index = self._get_index(directory)
+                    bundle = index.bundle or ArtifactBundle(directory / BUNDLE_FILENAME)
+                    content = bundle.read_text(output.filename)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+        except Exception as e:
+            logger.warning(f"Could not read interim output file {file_path}: {e}")
+            return None
+
+        return {
+            "filename": output.filename,
+            "agent_name": agent_name_for(output.filename),
+            "content": content,
+            "timestamp": datetime.fromtimestamp(output.mtime_ns / 1e9).isoformat(),
+            "seq": output.seq
+        }
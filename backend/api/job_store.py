@@ -0,0 +1,806 @@
+"""Workflow job store for the flexible agent API.
+
+This module provides pluggable storage for workflow execution records
+(status, progress, results and errors). A SQLite-backed store is used by
+default so that records survive restarts and listing stays cheap via indexed,
+cursor-paginated queries. An in-memory store is available as a fallback.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Workflow statuses that indicate the run has not finished yet
+ACTIVE_STATUSES = ("initializing", "queued", "running")
+
+# Workflow statuses from which a run can be resumed from its checkpoint
+RESUMABLE_STATUSES = ("failed", "cancelled")
+
+# Fields stored as JSON blobs rather than scalar columns
+JSON_FIELDS = ("executed_agents", "metadata", "result")
+
+# Scalar columns of the workflows table, in schema order
+SCALAR_FIELDS = (
+    "status",
+    "request",
+    "progress",
+    "current_agent",
+    "start_time",
+    "start_ts",
+    "execution_time",
+    "error",
+    "last_message",
+    "last_update",
+    "cancelled",
+    "incremental_dir",
+    "request_key",
+)
+
+# Seconds progress updates are collected before they are written
+PROGRESS_FLUSH_SECONDS = 0.25
+
+# Columns added after the initial schema, applied to existing databases on open
+COLUMN_MIGRATIONS = (
+    ("incremental_dir", "TEXT"),
+    ("request_key", "TEXT"),
+)
+
+
+class JobStoreError(Exception):
+    """Custom exception for job store errors."""
+    pass
+
+
+def encode_cursor(start_ts: float, workflow_id: str) -> str:
+    """Encode a pagination cursor from the last item of a page.
+
+    Args:
+        start_ts: Start timestamp of the last returned workflow
+        workflow_id: ID of the last returned workflow
+
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    raw = json.dumps([start_ts, workflow_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a pagination cursor produced by encode_cursor.
+
+    Args:
+        cursor: Opaque cursor string
+
+    Returns:
+        Tuple of (start_ts, workflow_id)
+
+    Raises:
+        JobStoreError: If the cursor is malformed
+    """
+    try:
+        start_ts, workflow_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(start_ts), str(workflow_id)
+    except Exception as e:
+        raise JobStoreError(f"Invalid cursor: {cursor}") from e
+
+
+class JobStore(ABC):
+    """Abstract storage interface for workflow execution records.
+
+    Records are plain dictionaries with the same keys the API has always used
+    for workflow tracking (status, progress, current_agent, result, error, ...).
+    Listing is ordered newest first and paginated with opaque cursors.
+    """
+
+    @abstractmethod
+    def create(self, workflow_id: str, record: Dict[str, Any]) -> None:
+        """Insert a new workflow record.
+
+        Args:
+            workflow_id: Unique workflow execution ID
+            record: Initial workflow record
+        """
+
+    @abstractmethod
+    def get(self, workflow_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Fetch a workflow record.
+
+        Args:
+            workflow_id: Workflow execution ID
+            include_result: Whether to load the (potentially large) result payload
+
+        Returns:
+            Workflow record, or None if not found
+        """
+
+    @abstractmethod
+    def update(self, workflow_id: str, **fields: Any) -> bool:
+        """Update fields of an existing workflow record.
+
+        Args:
+            workflow_id: Workflow execution ID
+            **fields: Fields to update
+
+        Returns:
+            True if the record exists and was updated, False otherwise
+        """
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Update several workflow records at once.
+
+        Args:
+            updates: Fields to update, keyed by workflow execution ID
+        """
+        for workflow_id, fields in updates.items():
+            self.update(workflow_id, **fields)
+
+    @abstractmethod
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Make the store calls inside the block atomic.
+
+        Other threads, and other processes sharing the store, cannot write
+        until the block ends, so a lookup followed by a create inside it cannot
+        race with the same lookup elsewhere. Transactions may be nested.
+        """
+
+    @abstractmethod
+    def delete(self, workflow_id: str) -> bool:
+        """Delete a workflow record.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if a record was deleted
+        """
+
+    @abstractmethod
+    def list(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List workflow summaries, newest first.
+
+        Args:
+            status: Optional status to filter by
+            limit: Maximum number of records to return
+            cursor: Cursor returned by a previous call to continue from
+
+        Returns:
+            Tuple of (records without results, next cursor or None)
+        """
+
+    @abstractmethod
+    def count(self, status: Optional[str] = None) -> int:
+        """Count workflow records, optionally filtered by status.
+
+        Args:
+            status: Optional status to filter by
+
+        Returns:
+            Number of matching records
+        """
+
+    @abstractmethod
+    def prune(
+        self,
+        older_than: Optional[float] = None,
+        keep: Optional[int] = None,
+        incremental_dirs: Optional[List[str]] = None
+    ) -> int:
+        """Delete finished workflow records.
+
+        Active records are never deleted. A finished record is deleted if any
+        of the given criteria matches it.
+
+        Args:
+            older_than: Delete records started before this timestamp
+            keep: Keep only this many of the newest finished records
+            incremental_dirs: Delete records whose incremental directory is listed
+
+        Returns:
+            Number of deleted records
+        """
+
+    def exists(self, workflow_id: str) -> bool:
+        """Check whether a workflow record exists.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if the record exists
+        """
+        return self.get(workflow_id, include_result=False) is not None
+
+    @abstractmethod
+    def find_by_request_key(
+        self,
+        request_key: str,
+        statuses: Tuple[str, ...],
+        updated_since: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Find the newest workflow submitted with the given request key.
+
+        Args:
+            request_key: Fingerprint of the request and its configuration
+            statuses: Statuses the workflow may have
+            updated_since: Only match records last updated at or after this timestamp
+
+        Returns:
+            Workflow record without the result payload, or None if there is no match
+        """
+
+    @abstractmethod
+    def get_setting(self, key: str) -> Optional[Any]:
+        """Get a shared setting stored alongside the workflow records.
+
+        Args:
+            key: Setting name
+
+        Returns:
+            The JSON-compatible value, or None if the setting is not set
+        """
+
+    @abstractmethod
+    def set_setting(self, key: str, value: Any) -> None:
+        """Store a shared setting, replacing any previous value.
+
+        Args:
+            key: Setting name
+            value: JSON-compatible value
+        """
+
+    def mark_interrupted(self) -> int:
+        """Mark records left active by a previous process as failed.
+
+        Returns:
+            Number of records that were marked as interrupted
+        """
+        return 0
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemoryJobStore(JobStore):
+    """Job store that keeps workflow records in process memory.
+
+    Records are lost on restart. To keep memory flat, the oldest finished
+    records are evicted once ``max_entries`` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """Initialize the in-memory job store.
+
+        Args:
+            max_entries: Maximum number of records to retain
+        """
+        self.max_entries = max_entries
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._settings: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        logger.info(f"InMemoryJobStore initialized (max_entries={max_entries})")
+
+    def create(self, workflow_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            stored = dict(record)
+            stored["id"] = workflow_id
+            stored.setdefault("start_ts", time.time())
+            self._records[workflow_id] = stored
+            self._evict()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+    def get(self, workflow_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(workflow_id)
+            if record is None:
+                return None
+            record = dict(record)
+        if not include_result:
+            record.pop("result", None)
+        return record
+
+    def update(self, workflow_id: str, **fields: Any) -> bool:
+        with self._lock:
+            record = self._records.get(workflow_id)
+            if record is None:
+                return False
+            record.update(fields)
+            return True
+
+    def delete(self, workflow_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(workflow_id, None) is not None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        page: List[Dict[str, Any]] = []
+
+        with self._lock:
+            # Records are inserted in start order, so walk newest first
+            for record in reversed(list(self._records.values())):
+                key = (record.get("start_ts", 0.0), record["id"])
+                if after is not None and key >= after:
+                    continue
+                if status and record.get("status") != status:
+                    continue
+                summary = dict(record)
+                summary.pop("result", None)
+                page.append(summary)
+                if len(page) > limit:
+                    break
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = encode_cursor(last.get("start_ts", 0.0), last["id"])
+        return page, next_cursor
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return len(self._records)
+            return sum(1 for r in self._records.values() if r.get("status") == status)
+
+    def prune(
+        self,
+        older_than: Optional[float] = None,
+        keep: Optional[int] = None,
+        incremental_dirs: Optional[List[str]] = None
+    ) -> int:
+        dirs = set(incremental_dirs or [])
+        with self._lock:
+            finished = sorted(
+                (r for r in self._records.values() if r.get("status") not in ACTIVE_STATUSES),
+                key=lambda r: (r.get("start_ts", 0.0), r["id"]),
+                reverse=True
+            )
+            doomed = [
+                r["id"] for position, r in enumerate(finished)
+                if (older_than is not None and r.get("start_ts", 0.0) < older_than)
+                or (keep is not None and position >= keep)
+                or (r.get("incremental_dir") in dirs)
+            ]
+            for workflow_id in doomed:
+                del self._records[workflow_id]
+        return len(doomed)
+
+    def find_by_request_key(
+        self,
+        request_key: str,
+        statuses: Tuple[str, ...],
+        updated_since: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for record in reversed(list(self._records.values())):
+                if record.get("request_key") != request_key or record.get("status") not in statuses:
+                    continue
+                if updated_since is not None and (record.get("last_update") or 0.0) < updated_since:
+                    continue
+                match = dict(record)
+                match.pop("result", None)
+                return match
+        return None
+
+    def get_setting(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._settings.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_setting(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._settings[key] = json.dumps(value, default=str, ensure_ascii=False)
+
+    def _evict(self) -> None:
+        """Evict the oldest finished records once over capacity."""
+        overflow = len(self._records) - self.max_entries
+        if overflow <= 0:
+            return
+        for workflow_id in list(self._records.keys()):
+            if overflow <= 0:
+                break
+            if self._records[workflow_id].get("status") not in ACTIVE_STATUSES:
+                del self._records[workflow_id]
+                overflow -= 1
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a local SQLite database.
+
+    Scalar fields live in indexed columns so status lookups and listing are
+    O(page); results and other nested values are stored as JSON and only
+    loaded when requested.
+    """
+
+    def __init__(self, db_path: Path):
+        """Initialize the SQLite job store.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        # Several API processes may share the database; wait for their write locks
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+        logger.info(f"SQLiteJobStore initialized at: {self.db_path}")
+
+    def _init_schema(self) -> None:
+        """Create the workflows and settings tables and their indexes if needed."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workflows (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT,
+                    progress REAL DEFAULT 0.0,
+                    current_agent TEXT,
+                    start_time TEXT,
+                    start_ts REAL NOT NULL,
+                    execution_time REAL,
+                    error TEXT,
+                    last_message TEXT,
+                    last_update REAL,
+                    cancelled INTEGER DEFAULT 0,
+                    incremental_dir TEXT,
+                    request_key TEXT,
+                    executed_agents TEXT,
+                    metadata TEXT,
+                    result TEXT
+                )
+                """
+            )
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(workflows)")}
+            for column, declaration in COLUMN_MIGRATIONS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE workflows ADD COLUMN {column} {declaration}")
+                    logger.info(f"Added job store column: {column}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workflows_status_start ON workflows (status, start_ts DESC, id DESC)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workflows_start ON workflows (start_ts DESC, id DESC)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workflows_request_key ON workflows (request_key, start_ts DESC)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT, updated_at REAL)"
+            )
+
+    def _to_row(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert record fields into column values."""
+        row = {}
+        for key, value in fields.items():
+            if key in JSON_FIELDS:
+                row[key] = json.dumps(value, default=str, ensure_ascii=False) if value is not None else None
+            elif key == "cancelled":
+                row[key] = 1 if value else 0
+            elif key in SCALAR_FIELDS:
+                row[key] = value
+            else:
+                logger.debug(f"Ignoring unknown job field: {key}")
+        return row
+
+    def _from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row into a workflow record."""
+        record = dict(row)
+        for key in JSON_FIELDS:
+            if key in record and record[key] is not None:
+                record[key] = json.loads(record[key])
+        if "cancelled" in record:
+            record["cancelled"] = bool(record["cancelled"])
+        return record
+
+    def create(self, workflow_id: str, record: Dict[str, Any]) -> None:
+        fields = dict(record)
+        fields.setdefault("start_ts", time.time())
+        row = self._to_row(fields)
+        row["id"] = workflow_id
+        columns = ", ".join(row.keys())
+        placeholders = ", ".join(f":{key}" for key in row.keys())
+        with self._lock:
+            self._conn.execute(f"INSERT INTO workflows ({columns}) VALUES ({placeholders})", row)
+
+    def get(self, workflow_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        columns = "*" if include_result else ", ".join(("id",) + SCALAR_FIELDS + JSON_FIELDS[:-1])
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM workflows WHERE id = ?", (workflow_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def update(self, workflow_id: str, **fields: Any) -> bool:
+        row = self._to_row(fields)
+        if not row:
+            return self.exists(workflow_id)
+        assignments = ", ".join(f"{key} = :{key}" for key in row.keys())
+        row["_id"] = workflow_id
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE workflows SET {assignments} WHERE id = :_id", row)
+        return cursor.rowcount > 0
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        # One transaction, so a batch of progress updates costs a single commit
+        with self.transaction():
+            for workflow_id, fields in updates.items():
+                row = self._to_row(fields)
+                if not row:
+                    continue
+                assignments = ", ".join(f"{key} = :{key}" for key in row.keys())
+                row["_id"] = workflow_id
+                self._conn.execute(f"UPDATE workflows SET {assignments} WHERE id = :_id", row)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            # Take the write lock up front so other processes wait instead of reading stale rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def delete(self, workflow_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM workflows WHERE id = ?", (workflow_id,))
+        return cursor.rowcount > 0
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        columns = ", ".join(("id",) + SCALAR_FIELDS + ("executed_agents",))
+        clauses = []
+        params: List[Any] = []
+
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if cursor:
+            start_ts, workflow_id = decode_cursor(cursor)
+            clauses.append("(start_ts, id) < (?, ?)")
+            params.extend([start_ts, workflow_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM workflows {where} ORDER BY start_ts DESC, id DESC LIMIT ?",
+                params
+            ).fetchall()
+
+        page = [self._from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last["start_ts"], last["id"])
+        return page, next_cursor
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM workflows").fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM workflows WHERE status = ?", (status,)).fetchone()
+        return int(row[0])
+
+    def prune(
+        self,
+        older_than: Optional[float] = None,
+        keep: Optional[int] = None,
+        incremental_dirs: Optional[List[str]] = None
+    ) -> int:
+        active = ", ".join("?" for _ in ACTIVE_STATUSES)
+        criteria = []
+        params: List[Any] = list(ACTIVE_STATUSES)
+
+        if older_than is not None:
+            criteria.append("start_ts < ?")
+            params.append(older_than)
+        if keep is not None:
+            criteria.append(
+                f"id IN (SELECT id FROM workflows WHERE status NOT IN ({active}) "
+                f"ORDER BY start_ts DESC, id DESC LIMIT -1 OFFSET ?)"
+            )
+            params.extend(ACTIVE_STATUSES)
+            params.append(max(0, keep))
+        if incremental_dirs:
+            criteria.append(f"incremental_dir IN ({', '.join('?' for _ in incremental_dirs)})")
+            params.extend(incremental_dirs)
+        if not criteria:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM workflows WHERE status NOT IN ({active}) AND ({' OR '.join(criteria)})",
+                params
+            )
+        return cursor.rowcount
+
+    def find_by_request_key(
+        self,
+        request_key: str,
+        statuses: Tuple[str, ...],
+        updated_since: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        columns = ", ".join(("id",) + SCALAR_FIELDS + JSON_FIELDS[:-1])
+        clauses = ["request_key = ?", f"status IN ({', '.join('?' for _ in statuses)})"]
+        params: List[Any] = [request_key, *statuses]
+        if updated_since is not None:
+            clauses.append("last_update >= ?")
+            params.append(updated_since)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM workflows WHERE {' AND '.join(clauses)} ORDER BY start_ts DESC LIMIT 1",
+                params
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def get_setting(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row and row["value"] is not None else None
+
+    def set_setting(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, json.dumps(value, default=str, ensure_ascii=False), time.time())
+            )
+
+    def mark_interrupted(self) -> int:
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE workflows SET status = 'failed', progress = 0.0, "
+                f"error = 'Workflow interrupted by server restart' WHERE status IN ({placeholders})",
+                ACTIVE_STATUSES
+            )
+        if cursor.rowcount:
+            logger.warning(f"⚠️ Marked {cursor.rowcount} interrupted workflows as failed")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store(backend: str = "sqlite", db_path: Optional[Path] = None) -> JobStore:
+    """Create a job store for the requested backend.
+
+    Falls back to the in-memory store if the SQLite database cannot be opened.
+
+    Args:
+        backend: Store backend, either "sqlite" or "memory"
+        db_path: Path to the SQLite database file (sqlite backend only)
+
+    Returns:
+        Configured job store instance
+    """
+    if backend == "memory":
+        return InMemoryJobStore()
+
+    if backend != "sqlite":
+        logger.warning(f"⚠️ Unknown job store backend '{backend}', using sqlite")
+
+    if db_path is None:
+        db_path = Path(__file__).parent.parent / "output" / "workflow_jobs.db"
+
+    try:
+        return SQLiteJobStore(db_path)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Failed to open SQLite job store at {db_path}, falling back to memory: {e}")
+        return InMemoryJobStore()
+
+
+class ProgressWriter:
+    """Writes workflow progress updates to a job store off the event loop.
+
+    Runs report progress from callbacks on the API event loop. Updates are
+    merged per workflow and written in one batch from a worker thread every
+    ``interval`` seconds, so a progress tick never blocks the loop on SQLite
+    and a burst of ticks costs a single write.
+    """
+
+    def __init__(self, store: JobStore, interval: float = PROGRESS_FLUSH_SECONDS):
+        """Initialize the progress writer.
+
+        Args:
+            store: Job store receiving the updates
+            interval: Seconds updates are collected before they are written
+        """
+        self.store = store
+        self.interval = interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Batch being written by the worker thread and the write itself
+        self._writing: Dict[str, Dict[str, Any]] = {}
+        self._write: Optional[asyncio.Future] = None
+
+    def record(self, workflow_id: str, **fields: Any) -> None:
+        """Queue fields of a workflow record for the next write.
+
+        Must be called on the event loop.
+
+        Args:
+            workflow_id: Workflow execution ID
+            **fields: Fields to update; later values replace earlier ones
+        """
+        self._pending.setdefault(workflow_id, {}).update(fields)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """Write queued updates until none are left."""
+        while self._pending:
+            await asyncio.sleep(self.interval)
+            self._writing, self._pending = self._pending, {}
+            self._write = asyncio.ensure_future(asyncio.to_thread(self.store.update_many, self._writing))
+            try:
+                await self._write
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to write progress of {len(self._writing)} workflows: {e}")
+            finally:
+                self._writing, self._write = {}, None
+
+    async def settle(self, workflow_id: str) -> None:
+        """Drop queued updates of a workflow and wait for a write of them in progress.
+
+        Called before a workflow's final status is stored, so no progress
+        update lands after it.
+
+        Args:
+            workflow_id: Workflow execution ID
+        """
+        self._pending.pop(workflow_id, None)
+        if self._write is not None and workflow_id in self._writing:
+            await asyncio.wait([self._write])
+
+    async def flush(self) -> None:
+        """Write all queued updates now."""
+        if self._write is not None:
+            await asyncio.wait([self._write])
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            await asyncio.to_thread(self.store.update_many, batch)
@@ -14,17 +14,30 @@ import yaml
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, AsyncGenerator, Tuple
+from typing import Any, Dict, List, Optional, AsyncGenerator, Set, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from ..core.workflow.flexible_workflow_manager import FlexibleWorkflowManager
+from ..core.workflow.compiled_workflow import compiled_workflow_cache
+from ..core.utils.response_cache import response_cache_stats
+from ..core.utils.document_reader import document_cache_stats
+from ..core.workflow.checkpoint import CheckpointError, WorkflowCheckpoint
 from ..core.tools.tool_registry import FlexibleToolRegistry
+from ..core.utils import metrics
 from ..core.config.flexible_config import FlexibleAgentConfig, FlexibleWorkflowConfig
+from .batch import FINISHED_STATUSES, BatchError, BatchItem, WorkflowBatch, parse_batch_entries, parse_jsonl, summarize_batch
+from .job_store import ACTIVE_STATUSES, RESUMABLE_STATUSES, JobStore, JobStoreError, ProgressWriter, create_job_store
+from .interim_outputs import InterimOutputIndex
+from .metrics_exchange import MetricsExchange
+from .progress_hub import ProgressHub, ProgressHubError
+from .retention import RetentionPolicy, RetentionService
+from .scheduler import PRIORITY_CLASSES, SchedulerError, SchedulerQueueFull, WorkflowScheduler, extract_workflow_models
+from .worker_pool import WorkflowWorkerPool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +49,60 @@ workflow_manager: Optional[FlexibleWorkflowManager] = None
 # Global dictionary to track background tasks for cancellation
 background_tasks_tracker = {}
 
+# Job store configuration ("sqlite" or "memory")
+JOB_STORE_BACKEND = os.getenv("WORKFLOW_JOB_STORE", "sqlite")
+JOB_STORE_PATH = os.getenv("WORKFLOW_JOB_STORE_PATH")
+
+# Global job store tracking workflow executions (created in lifespan)
+job_store: Optional[JobStore] = None
+
+# Batches progress updates into the job store off the event loop (created in lifespan)
+progress_writer: Optional[ProgressWriter] = None
+
+# Workflows executing in this process whose cancellation was requested
+cancel_requests: Set[str] = set()
+
+# Global pub/sub hub pushing workflow progress to stream subscribers
+progress_hub = ProgressHub()
+
+# Global index of interim output files, answering cursor and ETag polls cheaply
+interim_index = InterimOutputIndex()
+
+# Global scheduler admitting workflows within per-model concurrency budgets
+scheduler = WorkflowScheduler()
+
+# Gauges evaluated when /metrics is scraped
+metrics.QUEUE_DEPTH.set_function(lambda: scheduler.queue_depth)
+metrics.ACTIVE_RUNS.set_function(lambda: scheduler.running_count)
+metrics.SSE_SUBSCRIBERS.set_function(progress_hub.subscriber_count)
+
+# Background retention of run artifacts and job records
+retention_service: Optional[RetentionService] = None
+
+# Optional worker processes executing workflows outside the API process
+WORKFLOW_WORKERS = int(os.getenv("WORKFLOW_WORKERS", "0"))
+worker_pool: Optional[WorkflowWorkerPool] = None
+
+# Number of API processes serving this app (production mode runs several sharing the SQLite job store)
+API_HTTP_WORKERS = max(1, int(os.getenv("API_HTTP_WORKERS", "1")))
+SHARED_STATE = API_HTTP_WORKERS > 1
+SHARED_STATE_POLL_SECONDS = 1.0
+shared_state_task: Optional[asyncio.Task] = None
+
+# Directory through which the API processes combine their metrics (set by the launcher)
+METRICS_DIR = os.getenv("WORKFLOW_METRICS_DIR")
+metrics_exchange: Optional[MetricsExchange] = None
+
+# Seconds running workflows may take to finish when the server shuts down
+WORKFLOW_DRAIN_TIMEOUT = float(os.getenv("WORKFLOW_DRAIN_TIMEOUT", "0"))
+shutting_down = False
+
+# Batches submitted to this process that are still running, keyed by batch ID
+active_batches: Dict[str, WorkflowBatch] = {}
+
+# Submissions waiting for an identical in-flight workflow, keyed by their own workflow ID
+identical_waiters: Dict[str, asyncio.Task] = {}
+
 
 # Pydantic Models for API
 class WorkflowRequest(BaseModel):
@@ -44,6 +111,13 @@ class WorkflowRequest(BaseModel):
     prompt: Optional[str] = Field(None, description="Optional custom prompt")
     model: Optional[str] = Field(None, description="Optional model override")
     config: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Optional configuration")
+    priority: str = Field("normal", description=f"Scheduling priority: {', '.join(PRIORITY_CLASSES)}")
+    no_cache: bool = Field(False, description="Start a new run even if an identical request is running or recently completed")
+
+
+class ResumeRequest(BaseModel):
+    """Request model for resuming a workflow from its checkpoint."""
+    priority: Optional[str] = Field(None, description="Scheduling priority (defaults to the original workflow's)")
 
 
 class WorkflowResponse(BaseModel):
@@ -64,6 +138,7 @@ class WorkflowStatus(BaseModel):
     executed_agents: List[str] = Field(default_factory=list, description="List of executed agents")
     start_time: Optional[str] = Field(None, description="Workflow start time")
     execution_time: Optional[float] = Field(None, description="Total execution time in seconds")
+    queue_position: Optional[int] = Field(None, description="Position in the scheduler queue while queued")
 
 
 class AgentConfigResponse(BaseModel):
@@ -91,9 +166,6 @@ class WorkflowConfigResponse(BaseModel):
     available_tools: List[ToolInfo]
 
 
-# In-memory storage for tracking workflows (in production, use Redis or database)
-active_workflows: Dict[str, Dict[str, Any]] = {}
-
 # YAML Configuration models
 class YamlConfigResponse(BaseModel):
     name: str
@@ -150,25 +222,502 @@ def validate_yaml_content(content: str) -> tuple[bool, Optional[str]]:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global workflow_manager
+    global workflow_manager, job_store, progress_writer, worker_pool, retention_service, shared_state_task, shutting_down
+    global metrics_exchange
     
     try:
+        # Open the workflow job store before accepting requests
+        job_store = create_job_store(
+            JOB_STORE_BACKEND,
+            Path(JOB_STORE_PATH) if JOB_STORE_PATH else None
+        )
+        # With several API processes the launcher recovers interrupted records once,
+        # before any process starts, so processes never fail each other's runs
+        if os.getenv("WORKFLOW_JOB_STORE_RECOVERED") != "1":
+            job_store.mark_interrupted()
+        progress_writer = ProgressWriter(job_store)
+        logger.info(f"🗄️ Workflow job store ready ({type(job_store).__name__})")
+        progress_hub.bind_loop(asyncio.get_running_loop())
+        
         # Initialize workflow manager (will be updated with uploaded configs later)
         logger.info("🔧 Initializing Flexible Workflow Manager...")
         workflow_manager = FlexibleWorkflowManager()
         await workflow_manager.initialize()
+        configure_scheduler(workflow_manager.gemini_config)
         logger.info("✅ Flexible Workflow Manager initialized successfully")
+        
+        # Keep run artifacts and job records bounded
+        retention_service = RetentionService(
+            Path(workflow_manager.config_loader.get_value("app_config.output_dir", "backend/output")),
+            RetentionPolicy.from_config(workflow_manager.config_loader.get_value("retention_config")),
+            job_store=job_store,
+            protected_dirs=active_incremental_dirs,
+            resumable_dirs=resumable_incremental_dirs
+        )
+        retention_service.start()
+        
+        # Start worker processes when multi-process mode is enabled
+        if WORKFLOW_WORKERS > 0:
+            worker_pool = WorkflowWorkerPool(WORKFLOW_WORKERS)
+            worker_pool.start(asyncio.get_running_loop())
+        
+        # Follow uploads and cancellations made through the other API processes
+        if SHARED_STATE:
+            sync_uploaded_configs()
+            shared_state_task = asyncio.create_task(watch_shared_state(), name="workflow-shared-state")
+            logger.info(f"🔗 Sharing workflow state with {API_HTTP_WORKERS - 1} other API processes")
+            if METRICS_DIR:
+                metrics_exchange = MetricsExchange(Path(METRICS_DIR), metrics.registry)
+                metrics_exchange.start()
+            else:
+                logger.warning("⚠️ WORKFLOW_METRICS_DIR is not set; /metrics only reports the process serving the scrape")
         logger.info("📝 Note: Workflow manager will use uploaded configs when available")
         yield
     except Exception as e:
         logger.error(f"❌ Failed to initialize Flexible Workflow Manager: {e}")
         raise
     finally:
-        # Cleanup if needed
+        # Stop admitting workflows, let running ones drain and record the rest as interrupted
+        shutting_down = True
+        if shared_state_task:
+            shared_state_task.cancel()
+            shared_state_task = None
+        dropped = await scheduler.shutdown(drain_timeout=WORKFLOW_DRAIN_TIMEOUT)
+        for workflow_id in dropped:
+            mark_workflow_interrupted(workflow_id)
+        for batch in list(active_batches.values()):
+            batch.task.cancel()
+            for item in batch.items:
+                record = job_store.get(item.workflow_id, include_result=False) if job_store else None
+                if record and record["status"] in ACTIVE_STATUSES:
+                    mark_workflow_interrupted(item.workflow_id)
+        active_batches.clear()
+        for workflow_id, task in list(identical_waiters.items()):
+            task.cancel()
+            record = job_store.get(workflow_id, include_result=False) if job_store else None
+            if record and record["status"] in ACTIVE_STATUSES:
+                mark_workflow_interrupted(workflow_id)
+        identical_waiters.clear()
+        if retention_service:
+            await retention_service.stop()
+            retention_service = None
+        if worker_pool:
+            await asyncio.to_thread(worker_pool.shutdown)
+            worker_pool = None
+        if metrics_exchange:
+            # Publish last, so the totals of this process and its workers outlive it
+            await metrics_exchange.stop()
+            metrics_exchange = None
         workflow_manager = None
+        if progress_writer:
+            await progress_writer.flush()
+            progress_writer = None
+        if job_store:
+            job_store.close()
+            job_store = None
         logger.info("🔄 Flexible Workflow Manager cleaned up")
 
 
+def get_workflow_or_404(workflow_id: str, include_result: bool = False) -> Dict[str, Any]:
+    """Fetch a workflow record from the job store or raise a 404.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        include_result: Whether to load the result payload
+        
+    Returns:
+        Workflow record
+        
+    Raises:
+        HTTPException: If the job store is unavailable or the workflow does not exist
+    """
+    if not job_store:
+        raise HTTPException(status_code=503, detail="Job store not initialized")
+    
+    workflow_data = job_store.get(workflow_id, include_result=include_result)
+    if workflow_data is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return workflow_data
+
+
+def configure_scheduler(gemini_config: Dict[str, Any]) -> None:
+    """Apply scheduler settings from the gemini configuration.
+    
+    Reads the optional ``scheduler_config`` section (default_model_concurrency,
+    model_concurrency, max_queue_depth) and the default model of ``api_config``,
+    which is charged for workflows that name no model. Model budgets are split
+    evenly across the API processes.
+    
+    Args:
+        gemini_config: Loaded gemini configuration
+    """
+    scheduler_config = (gemini_config or {}).get("scheduler_config") or {}
+    api_config = (gemini_config or {}).get("api_config") or {}
+    scheduler.default_model = api_config.get("default_model") or api_config.get("model")
+    
+    # Budgets are per deployment; each API process gets its share
+    def per_process(budget: Any) -> int:
+        return max(1, int(budget) // API_HTTP_WORKERS)
+    
+    default_budget = scheduler_config.get("default_model_concurrency")
+    scheduler.update_model_budgets(
+        {model: per_process(budget) for model, budget in (scheduler_config.get("model_concurrency") or {}).items()},
+        per_process(default_budget) if default_budget is not None else None
+    )
+    if "max_queue_depth" in scheduler_config:
+        scheduler.max_queue_depth = int(scheduler_config["max_queue_depth"])
+
+
+def resolve_incremental_dir(workflow_id: str, workflow_data: Dict[str, Any]) -> Optional[Path]:
+    """Find the incremental output directory of a workflow run.
+    
+    Runs record their exact directory when they start. Records written before
+    that was tracked fall back to the result metadata and then to the
+    directory named after the start time.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        workflow_data: Workflow record from the job store
+        
+    Returns:
+        Path of the existing incremental directory, or None if unknown
+        
+    Raises:
+        HTTPException: If the workflow record no longer exists
+    """
+    if workflow_data.get("incremental_dir"):
+        return Path(workflow_data["incremental_dir"])
+    
+    candidates = []
+    record = job_store.get(workflow_id, include_result=True)
+    if record is None:
+        # Deleted by retention since the caller looked it up
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    result = record.get("result") or {}
+    if result.get("metadata", {}).get("incremental_output_dir"):
+        candidates.append(Path(result["metadata"]["incremental_output_dir"]))
+    if workflow_data.get("start_time"):
+        try:
+            dt = datetime.strptime(workflow_data["start_time"], '%Y-%m-%d %H:%M:%S')
+            candidates.append(Path(__file__).parent.parent / "output" / f"incremental_{dt.strftime('%Y%m%d_%H%M%S')}")
+        except ValueError:
+            pass
+    
+    for candidate in candidates:
+        if candidate.exists():
+            job_store.update(workflow_id, incremental_dir=str(candidate))
+            return candidate
+    return None
+
+
+def mark_workflow_interrupted(workflow_id: str) -> None:
+    """Record a workflow stopped by server shutdown as failed.
+    
+    Args:
+        workflow_id: Workflow execution ID
+    """
+    error = "Workflow interrupted by server shutdown"
+    if job_store:
+        job_store.update(
+            workflow_id,
+            status="failed",
+            error=error,
+            progress=0.0,
+            last_update=time.time()
+        )
+    publish_workflow_status(workflow_id, "failed", error)
+
+
+def share_uploaded_configs() -> None:
+    """Publish the uploaded configurations to the other API processes."""
+    if SHARED_STATE and job_store:
+        job_store.set_setting("uploaded_configs", uploaded_configs)
+
+
+def sync_uploaded_configs() -> None:
+    """Load configurations uploaded through other API processes."""
+    if not (SHARED_STATE and job_store):
+        return
+    shared = job_store.get_setting("uploaded_configs")
+    if shared is not None and shared != uploaded_configs:
+        uploaded_configs.clear()
+        uploaded_configs.update(shared)
+
+
+async def watch_shared_state() -> None:
+    """Apply cancellations requested through other API processes.
+    
+    The cancel endpoint can be served by any process, but only the process
+    owning a workflow can stop it. Owned workflows are checked for the
+    persisted cancellation flag every SHARED_STATE_POLL_SECONDS.
+    """
+    while True:
+        await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+        try:
+            for workflow_id in scheduler.workflow_ids():
+                record = job_store.get(workflow_id, include_result=False) if job_store else None
+                if not record or not record.get("cancelled"):
+                    continue
+                cancel_workflow_run(workflow_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to check shared workflow state: {e}")
+
+
+async def follow_job_store(workflow_id: str, keepalive: float = 15.0) -> AsyncGenerator[str, None]:
+    """Stream a workflow owned by another API process by polling the job store.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        keepalive: Seconds without changes before a keep-alive comment is sent
+        
+    Yields:
+        Server-Sent Event chunks, ending with the terminal status
+    """
+    last_state = None
+    idle = 0.0
+    while job_store:
+        record = job_store.get(workflow_id, include_result=False)
+        if record is None:
+            return
+        if record["status"] not in ACTIVE_STATUSES:
+            message = build_status_message(f"msg_{record['status']}", record["status"], record.get("error"))
+            yield f"data: {message.model_dump_json()}\n\n"
+            return
+        
+        state = (record.get("current_agent"), record.get("progress"), record.get("last_message"))
+        if record.get("current_agent") and state != last_state:
+            last_state = state
+            idle = 0.0
+            message = build_progress_message(*state)
+            yield f"data: {json.dumps(message.model_dump())}\n\n"
+        elif idle >= keepalive:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+        idle += SHARED_STATE_POLL_SECONDS
+
+
+def active_workflow_managers() -> List[FlexibleWorkflowManager]:
+    """List the workflow managers that may be executing runs in this process.
+    
+    Returns:
+        The global workflow manager and the managers of running batches
+    """
+    managers = [workflow_manager] if workflow_manager else []
+    managers.extend(batch.manager for batch in list(active_batches.values()) if batch.manager)
+    return managers
+
+
+def cancel_workflow_run(workflow_id: str) -> bool:
+    """Cancel a queued or running workflow.
+    
+    Queued workflows are removed from the scheduler and marked cancelled right
+    away. Otherwise the cancellation flag is persisted, which stops runs that
+    have not started executing yet (also in other API processes), and the
+    executing run's in-flight model calls are aborted.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        
+    Returns:
+        True if the workflow was still queued and is now cancelled
+    """
+    if scheduler.cancel(workflow_id):
+        job_store.update(
+            workflow_id,
+            status="cancelled",
+            current_agent="Cancelled",
+            last_update=time.time()
+        )
+        publish_workflow_status(workflow_id, "cancelled")
+        return True
+    
+    job_store.update(workflow_id, cancelled=True)
+    if workflow_id in scheduler.workflow_ids():
+        # Stops the run at its next progress report if it has not registered its task yet
+        cancel_requests.add(workflow_id)
+    if worker_pool:
+        worker_pool.cancel(workflow_id)
+    else:
+        for manager in active_workflow_managers():
+            manager.cancel_run(workflow_id)
+    return False
+
+
+def get_batch_or_404(batch_id: str) -> Dict[str, Any]:
+    """Fetch a batch's description from the job store or raise a 404.
+    
+    Args:
+        batch_id: Batch ID
+        
+    Returns:
+        Batch description with its workflow IDs
+        
+    Raises:
+        HTTPException: If the job store is unavailable or the batch does not exist
+    """
+    if not job_store:
+        raise HTTPException(status_code=503, detail="Job store not initialized")
+    
+    batch = job_store.get_setting(f"batch:{batch_id}")
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+def batch_item_state(index: int, workflow_id: str, include_result: bool = False) -> Dict[str, Any]:
+    """Describe a batch item from its workflow record.
+    
+    Args:
+        index: Position of the item in the batch
+        workflow_id: Workflow execution ID of the item
+        include_result: Whether to include the result content of finished items
+        
+    Returns:
+        Item dictionary with status, progress and error (and content if requested)
+    """
+    record = job_store.get(workflow_id, include_result=include_result) if job_store else None
+    if record is None:
+        # Deleted by retention; nothing left to wait for
+        return {"index": index, "workflow_id": workflow_id, "status": "failed", "progress": 0.0,
+                "error": "Workflow record no longer exists"}
+    
+    item = {
+        "index": index,
+        "workflow_id": workflow_id,
+        "status": record["status"],
+        "progress": record.get("progress") or 0.0,
+        "error": record.get("error"),
+    }
+    if include_result:
+        item["content"] = (record.get("result") or {}).get("content")
+    return item
+
+
+def incremental_dirs_with_status(statuses: Tuple[str, ...]) -> Set[str]:
+    """Collect the recorded incremental directories of all workflows in some statuses.
+    
+    Args:
+        statuses: Workflow statuses to collect
+        
+    Returns:
+        Incremental directory paths
+    """
+    dirs = set()
+    if not job_store:
+        return dirs
+    for status in statuses:
+        cursor = None
+        while True:
+            records, cursor = job_store.list(status=status, limit=500, cursor=cursor)
+            dirs.update(r["incremental_dir"] for r in records if r.get("incremental_dir"))
+            if cursor is None:
+                break
+    return dirs
+
+
+def active_incremental_dirs() -> Set[str]:
+    """Collect incremental directories of runs that have not finished.
+    
+    Returns:
+        Incremental directory paths that retention must not touch
+    """
+    dirs = incremental_dirs_with_status(ACTIVE_STATUSES)
+    for manager in active_workflow_managers():
+        dirs.update(str(ctx.incremental_dir) for ctx in list(manager.active_runs.values()))
+    return dirs
+
+
+def resumable_incremental_dirs() -> Set[str]:
+    """Collect incremental directories of runs that can be resumed.
+    
+    Returns:
+        Incremental directory paths that retention must not compress
+    """
+    return incremental_dirs_with_status(RESUMABLE_STATUSES)
+
+
+def build_status_message(message_id: str, status: str, error: Optional[str] = None) -> StreamMessage:
+    """Build the stream message announcing a terminal workflow status.
+    
+    Args:
+        message_id: Stream message ID
+        status: Terminal workflow status (completed, failed or cancelled)
+        error: Error message for failed workflows
+        
+    Returns:
+        Stream message describing the final status
+    """
+    if status == "completed":
+        content, progress = "Workflow completed successfully!", 100
+    elif status == "cancelled":
+        content, progress = "Workflow was cancelled by user", 0
+    else:
+        content, progress = f"Workflow failed: {error or 'Unknown error'}", 0
+    
+    return StreamMessage(
+        id=message_id,
+        timestamp=time.strftime('%Y-%m-%d %H:%M:%S'),
+        type="workflow_status",
+        content=content,
+        metadata={
+            "progress": progress,
+            "status": status
+        }
+    )
+
+
+def build_progress_message(agent_name: str, progress: float, message: Optional[str]) -> StreamMessage:
+    """Build the stream message announcing agent progress.
+    
+    Args:
+        agent_name: Agent currently reporting progress
+        progress: Workflow progress (0-100)
+        message: Progress message
+        
+    Returns:
+        Stream message describing the progress
+    """
+    return StreamMessage(
+        id=f"msg_{time.time_ns()}",
+        timestamp=time.strftime('%Y-%m-%d %H:%M:%S'),
+        type="agent_progress",
+        agent_name=agent_name,
+        content=message or f"Processing with {agent_name}...",
+        metadata={
+            "progress": progress,
+            "status": "processing"
+        }
+    )
+
+
+def publish_agent_progress(workflow_id: str, agent_name: str, progress: float, message: str) -> None:
+    """Push an agent progress update to stream subscribers.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        agent_name: Agent currently reporting progress
+        progress: Workflow progress (0-100)
+        message: Progress message
+    """
+    stream_message = build_progress_message(agent_name, progress, message)
+    progress_hub.publish(workflow_id, stream_message.model_dump())
+
+
+def publish_workflow_status(workflow_id: str, status: str, error: Optional[str] = None) -> None:
+    """Push the terminal workflow status to stream subscribers and close the stream.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        status: Terminal workflow status
+        error: Error message for failed workflows
+    """
+    stream_message = build_status_message(f"msg_{status}", status, error)
+    progress_hub.publish(workflow_id, stream_message.model_dump(), terminal=True)
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     
@@ -197,10 +746,12 @@ def create_app() -> FastAPI:
             "status": "active",
             "endpoints": {
                 "execute": "/api/v1/workflow/execute",
+                "batch": "/api/v1/workflow/batch",
                 "status": "/api/v1/workflow/status/{workflow_id}",
                 "config": "/api/v1/workflow/config",
                 "tools": "/api/v1/tools",
-                "health": "/api/v1/health"
+                "health": "/api/v1/health",
+                "metrics": "/metrics"
             }
         }
     
@@ -210,15 +761,40 @@ def create_app() -> FastAPI:
         return {
             "status": "healthy",
             "workflow_manager_initialized": workflow_manager is not None,
-            "active_workflows": len(active_workflows)
+            "active_workflows": sum(job_store.count(status) for status in ACTIVE_STATUSES) if job_store else 0,
+            "total_workflows": job_store.count() if job_store else 0,
+            "scheduler": scheduler.snapshot(),
+            "workers": worker_pool.snapshot() if worker_pool else None,
+            "retention": retention_service.last_report if retention_service else None,
+            "compiled_workflows": compiled_workflow_cache.stats(),
+            "response_cache": response_cache_stats(),
+            "document_cache": document_cache_stats()
         }
     
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        """Expose workflow metrics in the Prometheus text exposition format.
+        
+        With several API processes, the totals of all of them are reported,
+        whichever process serves the scrape.
+        """
+        if metrics_exchange:
+            try:
+                await asyncio.to_thread(metrics_exchange.sync)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to combine metrics of the API processes: {e}")
+        return Response(
+            content=metrics.registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
     @app.get("/api/v1/workflow/config", response_model=WorkflowConfigResponse)
     async def get_workflow_config():
         """Get the current workflow configuration, prioritizing uploaded configs over static files."""
         if not workflow_manager:
             raise HTTPException(status_code=503, detail="Workflow manager not initialized")
         
+        sync_uploaded_configs()
         try:
             # PRIORITY 1: Use uploaded workflow configuration if available
             if "workflow" in uploaded_configs and uploaded_configs["workflow"].get("is_valid", True):
@@ -275,17 +851,14 @@ def create_app() -> FastAPI:
         ]
     
     @app.post("/api/v1/workflow/execute", response_model=WorkflowResponse)
-    async def execute_workflow(request: WorkflowRequest, background_tasks: BackgroundTasks):
+    async def execute_workflow(request: WorkflowRequest):
         """Execute a workflow with optional custom configurations"""
-        return await execute_workflow_with_custom_config(request, background_tasks)
+        return await execute_workflow_with_custom_config(request)
     
     @app.get("/api/v1/workflow/status/{workflow_id}")
     async def get_workflow_status(workflow_id: str):
         """Get the status of a specific workflow execution."""
-        if workflow_id not in active_workflows:
-            raise HTTPException(status_code=404, detail="Workflow not found")
-        
-        workflow_data = active_workflows[workflow_id]
+        workflow_data = get_workflow_or_404(workflow_id)
         
         # Calculate execution time if workflow has started
         execution_time = workflow_data.get("execution_time")
@@ -305,18 +878,17 @@ def create_app() -> FastAPI:
             "executed_agents": workflow_data.get("executed_agents", []),
             "start_time": workflow_data.get("start_time"),
             "execution_time": execution_time,
-            "error": workflow_data.get("error")
+            "error": workflow_data.get("error"),
+            "queue_position": scheduler.position(workflow_id),
+            "priority": (workflow_data.get("metadata") or {}).get("priority", "normal")
         }
     
     @app.get("/api/v1/workflow/result/{workflow_id}")
     async def get_workflow_result(workflow_id: str):
         """Get the result of a completed workflow execution."""
-        if workflow_id not in active_workflows:
-            raise HTTPException(status_code=404, detail="Workflow not found")
-        
-        workflow_data = active_workflows[workflow_id]
+        workflow_data = get_workflow_or_404(workflow_id, include_result=True)
         
-        if workflow_data["status"] == "running" or workflow_data["status"] == "initializing":
+        if workflow_data["status"] in ["queued", "running", "initializing"]:
             raise HTTPException(status_code=202, detail="Workflow still running")
         
         if workflow_data["status"] == "failed":
@@ -331,7 +903,7 @@ def create_app() -> FastAPI:
                 }
             }
         
-        result = workflow_data.get("result", {})
+        result = workflow_data.get("result") or {}
         
         return {
             "workflow_id": workflow_id,
@@ -344,35 +916,255 @@ def create_app() -> FastAPI:
     @app.delete("/api/v1/workflow/{workflow_id}")
     async def cancel_workflow(workflow_id: str):
         """Cancel a running workflow."""
-        if workflow_id not in active_workflows:
-            raise HTTPException(status_code=404, detail="Workflow not found")
-        
-        workflow_data = active_workflows[workflow_id]
+        workflow_data = get_workflow_or_404(workflow_id)
         
-        if workflow_data["status"] not in ["running", "initializing"]:
+        if workflow_data["status"] not in ["queued", "running", "initializing"]:
             raise HTTPException(status_code=400, detail="Workflow is not running")
         
-        # Set cancellation flag - this will be picked up by the status callback
-        workflow_data["cancelled"] = True
+        # Queued workflows never started, so they can be cancelled right away
+        if cancel_workflow_run(workflow_id):
+            logger.info(f"🛑 Cancelled queued workflow {workflow_id}")
+            return {"message": "Workflow cancelled before execution"}
+        
         logger.info(f"🛑 Cancellation requested for workflow {workflow_id}")
         
         return {"message": "Workflow cancellation requested"}
     
+    @app.post("/api/v1/workflow/{workflow_id}/resume", response_model=WorkflowResponse)
+    async def resume_workflow(workflow_id: str, request: Optional[ResumeRequest] = None):
+        """Resume a failed or cancelled workflow from its checkpoint.
+        
+        A new workflow is queued that rebuilds the session from the checkpoint
+        in the original run's incremental directory, skips the agents that
+        already completed and continues writing into that directory.
+        """
+        workflow_data = get_workflow_or_404(workflow_id)
+        if workflow_data["status"] not in RESUMABLE_STATUSES:
+            raise HTTPException(status_code=400, detail="Only failed or cancelled workflows can be resumed")
+        if scheduler.draining:
+            raise HTTPException(status_code=503, detail="Server is shutting down", headers={"Retry-After": "5"})
+        
+        metadata = workflow_data.get("metadata") or {}
+        priority = (request.priority if request else None) or metadata.get("priority", "normal")
+        if priority not in PRIORITY_CLASSES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid priority. Must be one of: {list(PRIORITY_CLASSES)}"
+            )
+        
+        incremental_dir = resolve_incremental_dir(workflow_id, workflow_data)
+        if incremental_dir is None:
+            raise HTTPException(status_code=409, detail="Workflow has no output directory to resume from")
+        if str(incremental_dir) in active_incremental_dirs():
+            raise HTTPException(status_code=409, detail="Workflow is already being resumed")
+        try:
+            checkpoint = WorkflowCheckpoint.load(incremental_dir)
+        except CheckpointError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        
+        user_request = workflow_data.get("request") or checkpoint.user_request
+        models = extract_workflow_models(workflow_manager.config, scheduler.default_model) if workflow_manager else set()
+        resumed_id = new_workflow_id()
+        job_store.create(resumed_id, new_workflow_record(
+            user_request,
+            priority,
+            models,
+            extra_metadata={"resumed_from": workflow_id, "resumed_agents": checkpoint.completed_agents}
+        ))
+        job_store.update(resumed_id, incremental_dir=str(incremental_dir))
+        
+        try:
+            queue_position = scheduler.submit(
+                resumed_id,
+                lambda: execute_workflow_background(resumed_id, user_request, resume_dir=str(incremental_dir)),
+                models,
+                priority=priority
+            )
+        except SchedulerQueueFull as e:
+            job_store.delete(resumed_id)
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        
+        logger.info(f"♻️ Resuming workflow {workflow_id} as {resumed_id} after {len(checkpoint.completed_agents)} agents")
+        return WorkflowResponse(
+            id=resumed_id,
+            status="queued" if queue_position else "started",
+            content=None,
+            metadata={
+                "message": f"Resuming workflow {workflow_id} from its checkpoint",
+                "resumed_from": workflow_id,
+                "resumed_agents": checkpoint.completed_agents,
+                "priority": priority,
+                "queue_position": queue_position
+            },
+            state={}
+        )
+    
+    @app.post("/api/v1/workflow/batch")
+    async def execute_workflow_batch(request: Request):
+        """Execute many requests against the current workflow configuration.
+        
+        Accepts a JSON object ``{"requests": [...], "max_concurrency": 4,
+        "priority": "low", "no_cache": false}`` or a bare JSON list, a JSONL
+        body (``application/x-ndjson``, options as query parameters), or a
+        multipart upload with a JSONL ``file`` and optional ``max_concurrency``,
+        ``priority`` and ``no_cache`` form fields. Each request is a string or an object with
+        ``user_request`` and optional ``priority``.
+        """
+        content_type = request.headers.get("content-type", "")
+        options: Any = request.query_params
+        try:
+            if content_type.startswith("multipart/form-data"):
+                form = await request.form()
+                upload = form.get("file")
+                if upload is None or isinstance(upload, str):
+                    raise BatchError("Multipart batches need a JSONL 'file' field")
+                entries = parse_jsonl((await upload.read()).decode("utf-8"))
+                options = form
+            elif "ndjson" in content_type or "jsonl" in content_type:
+                entries = parse_jsonl((await request.body()).decode("utf-8"))
+            else:
+                body = await request.json()
+                if isinstance(body, dict):
+                    entries = body.get("requests") or []
+                    options = body
+                elif isinstance(body, list):
+                    entries = body
+                else:
+                    raise BatchError("Batch body must be a JSON object or list")
+            max_concurrency = int(options["max_concurrency"]) if options.get("max_concurrency") else None
+            no_cache = str(options.get("no_cache", "")).lower() in ("1", "true", "yes")
+        except (BatchError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+        
+        batch = await submit_workflow_batch(entries, max_concurrency, options.get("priority") or "low", no_cache)
+        batch["status_url"] = f"/api/v1/workflow/batch/{batch['batch_id']}"
+        batch["stream_url"] = f"/api/v1/workflow/batch/{batch['batch_id']}/stream"
+        return batch
+    
+    @app.get("/api/v1/workflow/batch/{batch_id}")
+    async def get_batch_status(batch_id: str):
+        """Get the aggregate progress of a batch and the status of its items."""
+        description = get_batch_or_404(batch_id)
+        summary = summarize_batch(batch_id, [
+            batch_item_state(index, workflow_id)
+            for index, workflow_id in enumerate(description["workflow_ids"])
+        ])
+        summary["created_at"] = description.get("created_at")
+        summary["max_concurrency"] = description.get("max_concurrency")
+        return summary
+    
+    @app.delete("/api/v1/workflow/batch/{batch_id}")
+    async def cancel_batch(batch_id: str):
+        """Cancel all unfinished workflows of a batch."""
+        description = get_batch_or_404(batch_id)
+        batch = active_batches.get(batch_id)
+        if batch:
+            batch.cancelled = True
+        
+        cancelled = 0
+        for workflow_id in description["workflow_ids"]:
+            record = job_store.get(workflow_id, include_result=False)
+            if record and record["status"] in ACTIVE_STATUSES:
+                cancel_workflow_run(workflow_id)
+                cancelled += 1
+        logger.info(f"🛑 Cancellation requested for {cancelled} workflows of batch {batch_id}")
+        
+        return {"message": "Batch cancellation requested", "batch_id": batch_id, "cancelled": cancelled}
+    
+    @app.get("/api/v1/workflow/batch/{batch_id}/stream")
+    async def stream_batch_results(batch_id: str):
+        """Stream per-item results of a batch as they finish, using Server-Sent Events.
+        
+        Each finished item is sent once as a ``batch_item`` event with its
+        content or error, interleaved with ``batch_progress`` events carrying
+        the aggregate counts. The stream ends after the batch completes; a
+        reconnecting client receives the items finished so far again.
+        """
+        description = get_batch_or_404(batch_id)
+        workflow_ids = description["workflow_ids"]
+        
+        async def generate_stream():
+            """Generate Server-Sent Event stream"""
+            finished: Dict[int, Dict[str, Any]] = {}
+            last_progress = None
+            idle = 0.0
+            while job_store:
+                # Batches running in this process wake the stream on every item change
+                batch = active_batches.get(batch_id)
+                changed = batch.changed if batch else None
+                
+                items = []
+                for index, workflow_id in enumerate(workflow_ids):
+                    if index in finished:
+                        items.append(finished[index])
+                        continue
+                    item = batch_item_state(index, workflow_id)
+                    if item["status"] in FINISHED_STATUSES:
+                        item = batch_item_state(index, workflow_id, include_result=True)
+                        finished[index] = item
+                        idle = 0.0
+                        yield f"data: {json.dumps({'type': 'batch_item', 'batch_id': batch_id, **item})}\n\n"
+                    items.append(item)
+                
+                summary = summarize_batch(batch_id, items)
+                progress = {key: summary[key] for key in ("total", "finished", "counts", "progress", "complete")}
+                if progress != last_progress:
+                    last_progress = progress
+                    idle = 0.0
+                    yield f"data: {json.dumps({'type': 'batch_progress', 'batch_id': batch_id, **progress})}\n\n"
+                elif idle >= 15.0:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                if summary["complete"]:
+                    break
+                
+                if changed:
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=SHARED_STATE_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+                idle += SHARED_STATE_POLL_SECONDS
+            
+            yield f"data: {json.dumps({'type': 'stream_end'})}\n\n"
+        
+        return StreamingResponse(
+            generate_stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Headers": "*",
+            }
+        )
+    
     @app.get("/api/v1/workflows")
-    async def list_workflows():
-        """List all workflows and their statuses."""
+    async def list_workflows(status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None):
+        """List workflows and their statuses, newest first, with cursor pagination."""
+        if not job_store:
+            raise HTTPException(status_code=503, detail="Job store not initialized")
+        
+        limit = max(1, min(limit, 500))
+        try:
+            page, next_cursor = job_store.list(status=status, limit=limit, cursor=cursor)
+        except JobStoreError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         return {
             "workflows": [
                 {
-                    "id": wf_id,
+                    "id": wf_data["id"],
                     "status": wf_data["status"],
                     "progress": wf_data["progress"],
                     "start_time": wf_data["start_time"],
                     "execution_time": wf_data["execution_time"]
                 }
-                for wf_id, wf_data in active_workflows.items()
+                for wf_data in page
             ],
-            "total": len(active_workflows)
+            "total": job_store.count(status),
+            "next_cursor": next_cursor
         }
     
     @app.post("/api/v1/config/upload")
@@ -404,6 +1196,7 @@ def create_app() -> FastAPI:
                 )
             
             # Store configuration
+            sync_uploaded_configs()
             if config_type not in uploaded_configs:
                 uploaded_configs[config_type] = {}
             
@@ -413,6 +1206,7 @@ def create_app() -> FastAPI:
                 "uploaded_at": datetime.now().isoformat(),
                 "is_valid": True
             }
+            share_uploaded_configs()
             
             return {
                 "message": f"Configuration '{config_type}' uploaded successfully",
@@ -428,6 +1222,7 @@ def create_app() -> FastAPI:
     @app.post("/api/v1/config/validate")
     async def validate_all_configs() -> Dict[str, Any]:
         """Validate all uploaded configurations and return detailed validation results."""
+        sync_uploaded_configs()
         try:
             validation_results = {}
             required_configs = ["workflow", "gemini", "prompts"]
@@ -541,8 +1336,12 @@ def create_app() -> FastAPI:
                 errors.append(f"Missing required field in api_config: {field}")
         
         # Validate provider
-        if "provider" in api_config and api_config["provider"] != "gemini":
-            warnings.append(f"Provider is '{api_config['provider']}', expected 'gemini'")
+        if "provider" in api_config and api_config["provider"] not in ("gemini", "fake"):
+            warnings.append(f"Provider is '{api_config['provider']}', expected 'gemini' or 'fake'")
+        if api_config.get("provider") == "fake":
+            distribution = ((data.get("fake_llm_config") or {}).get("latency_ms") or {}).get("distribution", "fixed")
+            if distribution not in ("fixed", "uniform", "normal", "lognormal"):
+                errors.append(f"Unknown fake_llm_config latency distribution: {distribution}")
         
         # Validate model
         if "model" in api_config:
@@ -591,6 +1390,7 @@ def create_app() -> FastAPI:
     @app.get("/api/v1/config/summary", response_model=ConfigurationSummary)
     async def get_configuration_summary():
         """Get summary of all uploaded configurations"""
+        sync_uploaded_configs()
         try:
             summary = ConfigurationSummary()
             
@@ -628,6 +1428,7 @@ def create_app() -> FastAPI:
     @app.get("/api/v1/config/{config_type}")
     async def get_yaml_config(config_type: str):
         """Get a specific YAML configuration"""
+        sync_uploaded_configs()
         try:
             valid_types = ['workflow', 'gemini', 'prompts']
             if config_type not in valid_types:
@@ -723,295 +1524,521 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=500, detail=f"Failed to list input files: {str(e)}")
 
     @app.get("/api/v1/workflow/{workflow_id}/interim-outputs")
-    async def get_workflow_interim_outputs(workflow_id: str):
-        """Get interim outputs for a workflow."""
-        if workflow_id not in active_workflows:
-            raise HTTPException(status_code=404, detail="Workflow not found")
+    async def get_workflow_interim_outputs(
+        workflow_id: str,
+        since: Optional[str] = None,
+        if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+    ):
+        """Get interim outputs for a workflow.
+        
+        Without ``since`` all outputs are returned. With the ``cursor`` from a
+        previous response only new or changed outputs are returned. Responses
+        carry an ETag; a matching If-None-Match yields 304 Not Modified.
+        """
+        workflow_data = get_workflow_or_404(workflow_id)
         
         try:
-            workflow_data = active_workflows[workflow_id]
+            incremental_dir = resolve_incremental_dir(workflow_id, workflow_data)
+            if not incremental_dir:
+                return {
+                    "workflow_id": workflow_id,
+                    "incremental_dir": None,
+                    "outputs": [],
+                    "total_outputs": 0,
+                    "cursor": None,
+                    "complete": True
+                }
             
-            # Try to get incremental output directory from result metadata
-            incremental_dir = None
-            if "result" in workflow_data and workflow_data["result"]:
-                metadata = workflow_data["result"].get("metadata", {})
-                incremental_dir_str = metadata.get("incremental_output_dir")
-                if incremental_dir_str:
-                    incremental_dir = Path(incremental_dir_str)
+            final = workflow_data.get("status") not in ACTIVE_STATUSES
+            changed, cursor, complete = interim_index.changes(incremental_dir, since, final=final)
             
-            # If not found in result, try to find by pattern
-            if not incremental_dir or not incremental_dir.exists():
-                backend_dir = Path(__file__).parent.parent
-                output_dir = backend_dir / "output"
-                
-                # Look for incremental directories matching workflow start time
-                start_time = workflow_data.get("start_time", "")
-                if start_time:
-                    # Convert start time to directory pattern
-                    try:
-                        dt = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
-                        pattern = f"incremental_{dt.strftime('%Y%m%d_%H%M%S')}"
-                        potential_dir = output_dir / pattern
-                        if potential_dir.exists():
-                            incremental_dir = potential_dir
-                    except:
-                        pass
-                
-                # Last resort: find the most recent incremental directory
-                if not incremental_dir or not incremental_dir.exists():
-                    if output_dir.exists():
-                        incremental_dirs = [d for d in output_dir.iterdir() 
-                                          if d.is_dir() and d.name.startswith("incremental_")]
-                        if incremental_dirs:
-                            incremental_dir = max(incremental_dirs, key=lambda x: x.stat().st_mtime)
+            etag = f'"{cursor}-{since or ""}"'
+            if if_none_match and if_none_match.strip() == etag:
+                return Response(status_code=304, headers={"ETag": etag})
             
-            outputs = []
-            if incremental_dir and incremental_dir.exists():
-                # Read all markdown files in the incremental directory
-                for file_path in sorted(incremental_dir.glob("*.md")):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Extract agent name from filename
-                        filename = file_path.name
-                        if filename.startswith("00_"):
-                            agent_name = "Workflow Metadata"
-                        elif filename.startswith("99_"):
-                            agent_name = "Final Summary"
-                        else:
-                            # Extract agent name from pattern like "01_requirementanalyzer.md"
-                            parts = filename.split('_', 1)
-                            if len(parts) > 1:
-                                agent_name = parts[1].replace('.md', '').replace('_', ' ').title()
-                            else:
-                                agent_name = filename.replace('.md', '')
-                        
-                        outputs.append({
-                            "filename": filename,
-                            "agent_name": agent_name,
-                            "content": content,
-                            "timestamp": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-                        })
-                    except Exception as e:
-                        logger.warning(f"Could not read interim output file {file_path}: {e}")
+            outputs = [
+                output for output in (interim_index.read(incremental_dir, f) for f in changed)
+                if output is not None
+            ]
             
-            return {
-                "workflow_id": workflow_id,
-                "incremental_dir": str(incremental_dir) if incremental_dir else None,
-                "outputs": outputs,
-                "total_outputs": len(outputs)
-            }
+            return JSONResponse(
+                content={
+                    "workflow_id": workflow_id,
+                    "incremental_dir": str(incremental_dir),
+                    "outputs": outputs,
+                    "total_outputs": len(outputs),
+                    "cursor": cursor,
+                    "complete": complete
+                },
+                headers={"ETag": etag}
+            )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error getting interim outputs for workflow {workflow_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to get interim outputs: {str(e)}")
 
     @app.get("/api/v1/workflow/stream/{workflow_id}")
-    async def stream_workflow_progress(workflow_id: str):
-        """Stream live workflow progress using Server-Sent Events"""
+    async def stream_workflow_progress(
+        workflow_id: str,
+        last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+    ):
+        """Stream live workflow progress using Server-Sent Events.
+        
+        Updates are pushed by the workflow as they happen. Clients can resume
+        a dropped stream by sending the Last-Event-ID header.
+        """
+        workflow = get_workflow_or_404(workflow_id)
+        
         try:
-            if workflow_id not in active_workflows:
-                raise HTTPException(status_code=404, detail="Workflow not found")
-            
-            async def generate_stream():
-                """Generate Server-Sent Event stream"""
-                last_update_time = None
-                message_count = 0
-                
-                while workflow_id in active_workflows:
-                    workflow = active_workflows[workflow_id]
-                    current_time = time.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Check if there's a new update
-                    workflow_update_time = workflow.get('last_update')
-                    
-                    if workflow_update_time != last_update_time or workflow['status'] in ['completed', 'failed']:
-                        last_update_time = workflow_update_time
-                        
-                        # Create message based on current workflow state
-                        current_agent = workflow.get('current_agent', 'Unknown')
-                        progress = workflow.get('progress', 0.0)
-                        last_message = workflow.get('last_message', '')
-                        status = workflow.get('status', 'unknown')
-                        
-                        if status == 'running' and current_agent:
-                            message = StreamMessage(
-                                id=f"msg_{message_count}",
-                                timestamp=current_time,
-                                type="agent_progress",
-                                agent_name=current_agent,
-                                content=last_message or f"Processing with {current_agent}...",
-                                metadata={
-                                    "progress": progress,
-                                    "status": "processing"
-                                }
-                            )
-                            
-                            yield f"data: {message.model_dump_json()}\n\n"
-                            message_count += 1
-                        
-                        elif status == 'completed':
-                            completion_message = StreamMessage(
-                                id=f"msg_complete",
-                                timestamp=current_time,
-                                type="workflow_status",
-                                content="Workflow completed successfully!",
-                                metadata={
-                                    "progress": 100,
-                                    "status": "completed"
-                                }
-                            )
-                            yield f"data: {completion_message.model_dump_json()}\n\n"
-                            break
-                        
-                        elif status == 'failed':
-                            error_message = StreamMessage(
-                                id=f"msg_error",
-                                timestamp=current_time,
-                                type="workflow_status", 
-                                content=f"Workflow failed: {workflow.get('error', 'Unknown error')}",
-                                metadata={
-                                    "progress": 0,
-                                    "status": "failed"
-                                }
-                            )
-                            yield f"data: {error_message.model_dump_json()}\n\n"
-                            break
-                        
-                        elif status == 'cancelled':
-                            cancel_message = StreamMessage(
-                                id=f"msg_cancelled",
-                                timestamp=current_time,
-                                type="workflow_status",
-                                content="Workflow was cancelled by user",
-                                metadata={
-                                    "progress": 0,
-                                    "status": "cancelled"
-                                }
-                            )
-                            yield f"data: {cancel_message.model_dump_json()}\n\n"
-                            break
-                    
-                    await asyncio.sleep(1)  # Check for updates every second
-                
-                yield f"data: {json.dumps({'type': 'stream_end'})}\n\n"
-            
-            return StreamingResponse(
-                generate_stream(),
-                media_type="text/plain",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "*",
-                }
-            )
+            resume_from = int(last_event_id) if last_event_id else None
+        except ValueError:
+            resume_from = None
+        
+        if progress_hub.subscriber_count(workflow_id) >= progress_hub.max_subscribers:
+            raise HTTPException(status_code=429, detail="Too many subscribers for this workflow")
+        
+        # Finished before this process saw any events (e.g. after a restart)
+        finished_status = None
+        if workflow["status"] in ("completed", "failed", "cancelled") and not progress_hub.has_channel(workflow_id):
+            finished_status = workflow["status"]
+        
+        # Runs owned by another API process publish no events here; follow the job store instead
+        owned_elsewhere = (
+            SHARED_STATE
+            and workflow["status"] in ACTIVE_STATUSES
+            and workflow_id not in scheduler.workflow_ids()
+        )
+        
+        async def generate_stream():
+            """Generate Server-Sent Event stream"""
+            if finished_status:
+                message = build_status_message(f"msg_{finished_status}", finished_status, workflow.get("error"))
+                yield f"data: {message.model_dump_json()}\n\n"
+            elif owned_elsewhere:
+                async for chunk in follow_job_store(workflow_id):
+                    yield chunk
+            else:
+                try:
+                    async for event in progress_hub.subscribe(workflow_id, last_event_id=resume_from):
+                        if event is None:
+                            yield ": keep-alive\n\n"
+                            continue
+                        yield f"id: {event.id}\ndata: {json.dumps(event.payload)}\n\n"
+                except ProgressHubError as e:
+                    logger.warning(f"⚠️ Stream rejected for workflow {workflow_id}: {e}")
             
-        except Exception as e:
-            logger.error(f"Error streaming workflow progress: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to stream workflow progress: {str(e)}")
+            yield f"data: {json.dumps({'type': 'stream_end'})}\n\n"
+        
+        return StreamingResponse(
+            generate_stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Headers": "*",
+            }
+        )
     
     return app
 
 
-async def execute_workflow_background(workflow_id: str, user_request: str):
-    """Execute workflow in the background and update status."""
-    global workflow_manager
+async def execute_workflow_background(
+    workflow_id: str,
+    user_request: str,
+    manager: Optional[FlexibleWorkflowManager] = None,
+    configs: Optional[Dict[str, Dict[str, str]]] = None,
+    resume_dir: Optional[str] = None
+):
+    """Execute workflow in the background and update status.
+    
+    Args:
+        workflow_id: Workflow execution ID
+        user_request: The user's request to process
+        manager: Workflow manager to run with (defaults to the global one)
+        configs: Uploaded configurations for worker processes (defaults to the current ones)
+        resume_dir: Incremental directory of an earlier run to resume from its checkpoint
+    """
+    manager = manager or workflow_manager
+    run_started = time.perf_counter()
+    outcome = "failed"
     
     try:
-        if not workflow_manager:
+        if not manager:
             raise Exception("Workflow manager not initialized")
         
+        # A cancel requested through another API process may land before the run starts
+        workflow_data = job_store.get(workflow_id, include_result=False)
+        if workflow_data and workflow_data.get("cancelled", False):
+            raise asyncio.CancelledError("Workflow was cancelled before it started")
+        
         # Update status to running (don't set current_agent until actually running)
-        active_workflows[workflow_id]["status"] = "running"
-        active_workflows[workflow_id]["progress"] = 0.0
-        active_workflows[workflow_id]["current_agent"] = None
-        active_workflows[workflow_id]["cancelled"] = False
+        job_store.update(
+            workflow_id,
+            status="running",
+            progress=0.0,
+            current_agent=None
+        )
         
         logger.info(f"🚀 Starting workflow execution for ID: {workflow_id}")
         
         # Create status callback to update workflow status in real-time
         def status_callback(agent_name: str, progress: float, message: str = ""):
             """Callback to update workflow status during execution."""
-            # Check for cancellation
-            if workflow_id in active_workflows and active_workflows[workflow_id].get("cancelled", False):
+            # Cancellations are collected by cancel_workflow_run, so ticks don't query the job store
+            if workflow_id in cancel_requests:
                 raise asyncio.CancelledError("Workflow was cancelled by user")
             
-            if workflow_id in active_workflows:
-                active_workflows[workflow_id]["current_agent"] = agent_name
-                active_workflows[workflow_id]["progress"] = min(100.0, max(0.0, progress))
-                active_workflows[workflow_id]["last_message"] = message
-                active_workflows[workflow_id]["last_update"] = time.time()
-                logger.info(f"📊 Workflow {workflow_id}: {agent_name} - {progress:.1f}% - {message}")
+            progress = min(100.0, max(0.0, progress))
+            progress_writer.record(
+                workflow_id,
+                current_agent=agent_name,
+                progress=progress,
+                last_message=message,
+                last_update=time.time()
+            )
+            publish_agent_progress(workflow_id, agent_name, progress, message)
+            logger.info(f"📊 Workflow {workflow_id}: {agent_name} - {progress:.1f}% - {message}")
+        
+        def record_incremental_dir(incremental_dir: str):
+            """Record the run's exact incremental output directory."""
+            job_store.update(workflow_id, incremental_dir=incremental_dir)
         
-        # Execute the workflow with status callback
-        result = await workflow_manager.run_workflow(user_request, status_callback=status_callback)
+        # Execute the workflow with status callback, in a worker process if enabled
+        if worker_pool:
+            result = await worker_pool.run(
+                workflow_id,
+                user_request,
+                uploaded_configs if configs is None else configs,
+                status_callback,
+                on_run_started=record_incremental_dir,
+                resume_dir=resume_dir
+            )
+        else:
+            result = await manager.run_workflow(
+                user_request,
+                status_callback=status_callback,
+                run_id=workflow_id,
+                run_started_callback=lambda ctx: record_incremental_dir(str(ctx.incremental_dir)),
+                resume_dir=Path(resume_dir) if resume_dir else None
+            )
+        
+        # Progress still queued for the job store must not land after the final status
+        await progress_writer.settle(workflow_id)
         
         # Check if execution was successful
-        if result and result.get("content"):
+        result_status = getattr(result.get("status"), "value", result.get("status")) if result else None
+        if result_status == "failed":
+            # The manager reports agent failures as a result; keep it so the run can be resumed
+            error = result.get("metadata", {}).get("error") or result.get("content")
+            job_store.update(
+                workflow_id,
+                status="failed",
+                error=error,
+                result=result,
+                executed_agents=result.get("metadata", {}).get("executed_agents", []),
+                last_update=time.time()
+            )
+            publish_workflow_status(workflow_id, "failed", error)
+            logger.error(f"❌ Workflow {workflow_id} failed: {error}")
+        elif result and result.get("content"):
             # Update to completed status
-            active_workflows[workflow_id]["status"] = "completed"
-            active_workflows[workflow_id]["progress"] = 100.0
-            active_workflows[workflow_id]["current_agent"] = "Completed"
-            active_workflows[workflow_id]["result"] = result
-            active_workflows[workflow_id]["execution_time"] = result.get("metadata", {}).get("execution_time", 0)
-            active_workflows[workflow_id]["executed_agents"] = result.get("metadata", {}).get("agents_executed", ["MainAgent"])
+            job_store.update(
+                workflow_id,
+                status="completed",
+                progress=100.0,
+                current_agent="Completed",
+                result=result,
+                execution_time=result.get("metadata", {}).get("execution_time", 0),
+                executed_agents=result.get("metadata", {}).get("agents_executed", ["MainAgent"]),
+                last_update=time.time()
+            )
             
+            publish_workflow_status(workflow_id, "completed")
+            outcome = "completed"
             logger.info(f"✅ Workflow {workflow_id} completed successfully")
         else:
             # Handle case where result is empty or invalid
-            active_workflows[workflow_id]["status"] = "failed" 
-            active_workflows[workflow_id]["error"] = "Workflow execution returned empty result"
-            active_workflows[workflow_id]["progress"] = 0.0
+            job_store.update(
+                workflow_id,
+                status="failed",
+                error="Workflow execution returned empty result",
+                progress=0.0,
+                last_update=time.time()
+            )
             
+            publish_workflow_status(workflow_id, "failed", "Workflow execution returned empty result")
             logger.error(f"❌ Workflow {workflow_id} failed: Empty result")
         
     except asyncio.CancelledError:
-        logger.info(f"🛑 Workflow {workflow_id} was cancelled by user")
-        if workflow_id in active_workflows:
-            active_workflows[workflow_id]["status"] = "cancelled"
-            active_workflows[workflow_id]["progress"] = 0.0
-            active_workflows[workflow_id]["current_agent"] = "Cancelled"
+        await progress_writer.settle(workflow_id)
+        if shutting_down:
+            logger.warning(f"🛑 Workflow {workflow_id} was interrupted by server shutdown")
+            mark_workflow_interrupted(workflow_id)
+            outcome = "interrupted"
+        else:
+            logger.info(f"🛑 Workflow {workflow_id} was cancelled by user")
+            job_store.update(
+                workflow_id,
+                status="cancelled",
+                progress=0.0,
+                current_agent="Cancelled",
+                last_update=time.time()
+            )
+            publish_workflow_status(workflow_id, "cancelled")
+            outcome = "cancelled"
     except Exception as e:
         logger.error(f"❌ Workflow {workflow_id} failed: {e}")
-        if workflow_id in active_workflows:
-            active_workflows[workflow_id]["status"] = "failed"
-            active_workflows[workflow_id]["error"] = str(e)
-            active_workflows[workflow_id]["progress"] = 0.0
+        await progress_writer.settle(workflow_id)
+        job_store.update(
+            workflow_id,
+            status="failed",
+            error=str(e),
+            progress=0.0,
+            last_update=time.time()
+        )
+        publish_workflow_status(workflow_id, "failed", str(e))
+    finally:
+        cancel_requests.discard(workflow_id)
+        # Ends the stream of a run that stopped without publishing its final status
+        progress_hub.close(workflow_id)
+        metrics.WORKFLOW_RUNS.inc(1, outcome)
+        metrics.WORKFLOW_DURATION.observe(time.perf_counter() - run_started, outcome)
 
 
-# Modified execute workflow to use uploaded configurations
-async def execute_workflow_with_custom_config(request: WorkflowRequest, background_tasks: BackgroundTasks):
-    """Execute workflow using uploaded configurations if available"""
+def find_reusable_workflow(request_key: str) -> Optional[Dict[str, Any]]:
+    """Find a workflow whose result can answer an identical submission.
+    
+    Reads ``dedup_config`` (enabled, result_ttl_seconds) from the workflow
+    configuration. Unfinished workflows that were not cancelled always match;
+    completed ones only within the result TTL.
+    
+    Args:
+        request_key: Fingerprint of the request and its configuration
+        
+    Returns:
+        Workflow record without result, or None if the request must run
+    """
+    if not job_store or not workflow_manager:
+        return None
+    config_loader = workflow_manager.config_loader
+    if not config_loader.get_value("dedup_config.enabled", True):
+        return None
+    
+    record = job_store.find_by_request_key(request_key, ACTIVE_STATUSES)
+    if record and not record.get("cancelled"):
+        return record
+    
+    ttl = float(config_loader.get_value("dedup_config.result_ttl_seconds", 3600))
+    if ttl > 0:
+        return job_store.find_by_request_key(request_key, ("completed",), updated_since=time.time() - ttl)
+    return None
+
+
+def reused_workflow_response(existing: Dict[str, Any], workflow_id: str) -> WorkflowResponse:
+    """Answer a submission with an identical workflow.
+    
+    Args:
+        existing: Record of the in-flight or completed identical workflow
+        workflow_id: The submission's own workflow, following an in-flight one
+        
+    Returns:
+        Response with the completed workflow's ID and result, or with the
+        submission's own ID while the identical workflow runs
+    """
+    metadata = {
+        "message": "Identical request already submitted, reusing its workflow",
+        "deduplicated": True,
+        "priority": (existing.get("metadata") or {}).get("priority", "normal"),
+    }
+    
+    if existing["status"] == "completed":
+        metrics.WORKFLOW_REUSED.inc(1, "completed")
+        logger.info(f"♻️ Reusing completed result of workflow {existing['id']}")
+        result = (job_store.get(existing["id"], include_result=True) or {}).get("result") or {}
+        return WorkflowResponse(
+            id=existing["id"],
+            status="completed",
+            content=result.get("content"),
+            metadata={**metadata, **(result.get("metadata") or {})},
+            state=result.get("state") or {}
+        )
+    
+    logger.info(f"♻️ Workflow {workflow_id} follows identical running workflow {existing['id']}")
+    queue_position = scheduler.position(existing["id"])
+    return WorkflowResponse(
+        id=workflow_id,
+        status="queued" if existing["status"] == "queued" else "started",
+        content=None,
+        metadata={**metadata, "reused_from": existing["id"], "queue_position": queue_position},
+        state={}
+    )
+
+
+async def complete_from_identical_workflow(workflow_id: str, source_id: str) -> bool:
+    """Complete a workflow with the result of an identical one, waiting while it runs.
+    
+    Args:
+        workflow_id: Workflow to complete
+        source_id: Identical workflow whose result is reused
+        
+    Returns:
+        True if the source completed and its result was copied, False if the workflow must run itself
+    """
+    kind = "completed"
+    while job_store:
+        source = job_store.get(source_id, include_result=False)
+        record = job_store.get(workflow_id, include_result=False)
+        if not source or not record or record.get("cancelled") or source["status"] in ("failed", "cancelled"):
+            return False
+        if source["status"] == "completed":
+            break
+        kind = "in_flight"
+        # Show the identical workflow's progress on this one while waiting
+        progress = {key: source.get(key) for key in ("status", "progress", "current_agent", "last_message")}
+        if any(record.get(key) != value for key, value in progress.items()):
+            job_store.update(workflow_id, last_update=time.time(), **progress)
+        await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+    else:
+        return False
+    
+    source = job_store.get(source_id, include_result=True)
+    job_store.update(
+        workflow_id,
+        status="completed",
+        progress=100.0,
+        current_agent="Completed",
+        result=source.get("result"),
+        execution_time=0.0,
+        executed_agents=source.get("executed_agents") or [],
+        metadata={**(record.get("metadata") or {}), "reused_from": source_id},
+        last_update=time.time()
+    )
+    publish_workflow_status(workflow_id, "completed")
+    metrics.WORKFLOW_REUSED.inc(1, kind)
+    logger.info(f"♻️ Workflow {workflow_id} reused the result of {source_id}")
+    return True
+
+
+async def follow_identical_workflow(
+    workflow_id: str,
+    source_id: str,
+    user_request: str,
+    models: Set[str],
+    priority: str
+) -> None:
+    """Complete a submission from an identical in-flight workflow, or run it if that one does not complete.
+    
+    The submission has its own workflow record, so cancelling it leaves the
+    identical workflow running for its other clients and vice versa.
+    
+    Args:
+        workflow_id: The submission's own workflow
+        source_id: Identical workflow being followed
+        user_request: The user's request to process
+        models: Models the workflow uses
+        priority: Scheduling priority class
+    """
     try:
-        workflow_id = f"workflow_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
-        start_time = time.time()
+        if await complete_from_identical_workflow(workflow_id, source_id):
+            return
+        record = job_store.get(workflow_id, include_result=False) if job_store else None
+        if not record or record["status"] not in ACTIVE_STATUSES:
+            return
+        if record.get("cancelled"):
+            job_store.update(workflow_id, status="cancelled", progress=0.0, current_agent="Cancelled", last_update=time.time())
+            publish_workflow_status(workflow_id, "cancelled")
+            return
         
-        # Create workflow entry with proper initialization
-        active_workflows[workflow_id] = {
-            "id": workflow_id,
-            "status": "initializing",
-            "request": request.user_request,
-            "start_time": time.strftime('%Y-%m-%d %H:%M:%S'),
-            "progress": 0.0,
-            "current_agent": None,
-            "executed_agents": [],
-            "execution_time": None,
-            "result": None,
-            "error": None,
-            "last_message": "Workflow queued for execution",
-            "last_update": time.time(),  # Use timestamp for better comparison
-            "metadata": {
-                "success": False,
-                "message": "Workflow execution started",
-                "has_custom_configs": len(uploaded_configs) > 0,
-                "config_types": list(uploaded_configs.keys())
-            }
+        logger.info(f"🔁 Identical workflow {source_id} did not complete, running {workflow_id} itself")
+        job_store.update(workflow_id, status="queued", progress=0.0, current_agent=None, last_update=time.time())
+        try:
+            scheduler.submit(
+                workflow_id,
+                lambda: execute_workflow_background(workflow_id, user_request),
+                models,
+                priority=priority
+            )
+        except SchedulerError as e:
+            job_store.update(workflow_id, status="failed", error=str(e), last_update=time.time())
+            publish_workflow_status(workflow_id, "failed", str(e))
+    finally:
+        identical_waiters.pop(workflow_id, None)
+
+
+def new_workflow_id() -> str:
+    """Generate a unique workflow execution ID."""
+    return f"workflow_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+
+
+def new_workflow_record(
+    user_request: str,
+    priority: str,
+    models: Set[str],
+    request_key: Optional[str] = None,
+    extra_metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the job store record of a newly queued workflow.
+    
+    Args:
+        user_request: The user's request to process
+        priority: Scheduling priority class
+        models: Models the workflow uses
+        request_key: Fingerprint identifying identical submissions
+        extra_metadata: Additional metadata entries (e.g. the batch the workflow belongs to)
+        
+    Returns:
+        Workflow record
+    """
+    return {
+        "status": "queued",
+        "request": user_request,
+        "request_key": request_key,
+        "start_time": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "start_ts": time.time(),
+        "progress": 0.0,
+        "current_agent": None,
+        "executed_agents": [],
+        "execution_time": None,
+        "result": None,
+        "error": None,
+        "last_message": "Workflow queued for execution",
+        "last_update": time.time(),  # Use timestamp for better comparison
+        "metadata": {
+            "success": False,
+            "message": "Workflow execution started",
+            "has_custom_configs": len(uploaded_configs) > 0,
+            "config_types": list(uploaded_configs.keys()),
+            "priority": priority,
+            "models": sorted(models),
+            **(extra_metadata or {})
         }
+    }
+
+
+# Modified execute workflow to use uploaded configurations
+async def execute_workflow_with_custom_config(request: WorkflowRequest):
+    """Queue workflow execution using uploaded configurations if available"""
+    if scheduler.draining:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down",
+            headers={"Retry-After": "5"}
+        )
+    if request.priority not in PRIORITY_CLASSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority. Must be one of: {list(PRIORITY_CLASSES)}"
+        )
+    
+    try:
+        workflow_id = new_workflow_id()
         
         # Update global workflow manager with uploaded configurations if available
         global workflow_manager
+        sync_uploaded_configs()
         if uploaded_configs:
             logger.info(f"✅ Using uploaded configurations: {list(uploaded_configs.keys())}")
             if workflow_manager:
@@ -1019,29 +2046,226 @@ async def execute_workflow_with_custom_config(request: WorkflowRequest, backgrou
             else:
                 # Create new workflow manager with uploaded configs
                 workflow_manager = FlexibleWorkflowManager(uploaded_configs=uploaded_configs)
+            configure_scheduler(workflow_manager.gemini_config)
+        
+        # Models used by the workflow determine which budgets it consumes
+        models = extract_workflow_models(workflow_manager.config, scheduler.default_model) if workflow_manager else set()
+        
+        # Identical submissions join the running workflow or get its recent result
+        request_key = None
+        if workflow_manager:
+            request_key = await asyncio.to_thread(workflow_manager.request_fingerprint, request.user_request)
+        # Look up and create in one transaction, so concurrent identical submissions elect one run
+        with job_store.transaction():
+            existing = find_reusable_workflow(request_key) if request_key and not request.no_cache else None
+            if not existing or existing["status"] != "completed":
+                extra_metadata = {"reused_from": existing["id"]} if existing else None
+                job_store.create(workflow_id, new_workflow_record(
+                    request.user_request, request.priority, models, request_key, extra_metadata
+                ))
+        if existing:
+            if existing["status"] != "completed":
+                identical_waiters[workflow_id] = asyncio.create_task(
+                    follow_identical_workflow(workflow_id, existing["id"], request.user_request, models, request.priority),
+                    name=f"workflow-follow-{workflow_id}"
+                )
+            return reused_workflow_response(existing, workflow_id)
         
-        # Execute the workflow in background
-        background_tasks.add_task(execute_workflow_background, workflow_id, request.user_request)
+        # Hand the workflow to the scheduler for admission
+        try:
+            queue_position = scheduler.submit(
+                workflow_id,
+                lambda: execute_workflow_background(workflow_id, request.user_request),
+                models,
+                priority=request.priority
+            )
+        except SchedulerQueueFull as e:
+            job_store.delete(workflow_id)
+            logger.warning(f"⚠️ Rejected workflow submission: {e}")
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
         
-        logger.info(f"Started workflow {workflow_id} for request: {request.user_request[:50]}...")
+        logger.info(f"Submitted workflow {workflow_id} for request: {request.user_request[:50]}...")
         
         return WorkflowResponse(
             id=workflow_id,
-            status="started",
+            status="queued" if queue_position else "started",
             content=None,
             metadata={
                 "message": f"Workflow execution started with {'custom' if uploaded_configs else 'default'} configurations",
                 "has_custom_configs": len(uploaded_configs) > 0,
-                "config_types": list(uploaded_configs.keys())
+                "config_types": list(uploaded_configs.keys()),
+                "priority": request.priority,
+                "queue_position": queue_position
             },
             state={}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error executing workflow: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to execute workflow: {str(e)}")
 
 
+async def run_batch_item(batch: WorkflowBatch, item: BatchItem, models: Set[str]) -> None:
+    """Submit one batch item to the scheduler and wait until it finishes.
+    
+    Args:
+        batch: Batch the item belongs to
+        item: Item to execute
+        models: Models the batch's workflow uses
+    """
+    record = job_store.get(item.workflow_id, include_result=False)
+    if record is None or record["status"] not in ACTIVE_STATUSES:
+        batch.set_status(item, record["status"] if record else "failed")
+        return
+    if batch.cancelled or record.get("cancelled"):
+        job_store.update(item.workflow_id, status="cancelled", current_agent="Cancelled", last_update=time.time())
+        publish_workflow_status(item.workflow_id, "cancelled")
+        batch.set_status(item, "cancelled")
+        return
+    if item.reuse_from and await complete_from_identical_workflow(item.workflow_id, item.reuse_from):
+        batch.set_status(item, "completed")
+        return
+    
+    finished = asyncio.get_running_loop().create_future()
+    
+    async def run():
+        try:
+            await execute_workflow_background(
+                item.workflow_id, item.user_request, manager=batch.manager, configs=batch.configs
+            )
+        finally:
+            if not finished.done():
+                finished.set_result(None)
+    
+    while True:
+        try:
+            scheduler.submit(item.workflow_id, run, models, priority=item.priority)
+            break
+        except SchedulerQueueFull as e:
+            await asyncio.sleep(e.retry_after)
+        except SchedulerError:
+            # Server is shutting down
+            mark_workflow_interrupted(item.workflow_id)
+            batch.set_status(item, "failed")
+            return
+    
+    # Items cancelled while queued never run, so also stop waiting once the scheduler lets go of them
+    while not finished.done():
+        await asyncio.wait([finished], timeout=SHARED_STATE_POLL_SECONDS)
+        if not finished.done() and item.workflow_id not in scheduler.workflow_ids():
+            break
+    
+    record = job_store.get(item.workflow_id, include_result=False)
+    batch.set_status(item, record["status"] if record else "failed")
+
+
+async def submit_workflow_batch(
+    entries: List[Any],
+    max_concurrency: Optional[int],
+    priority: str,
+    no_cache: bool = False
+) -> Dict[str, Any]:
+    """Create the workflows of a batch and start executing them.
+    
+    All items run with the configuration current at submission, on one
+    workflow manager whose compiled workflow is shared by every item. Items
+    identical to an earlier item or to a running or recently completed
+    workflow reuse its result unless ``no_cache`` is set.
+    
+    Args:
+        entries: Request strings or objects with ``user_request`` and optional ``priority``
+        max_concurrency: Maximum number of items in flight (defaults to app_config.batch_max_concurrency)
+        priority: Default scheduling priority of the items
+        no_cache: Run every item even if an identical request ran before
+        
+    Returns:
+        Batch ID, item workflow IDs and effective concurrency
+        
+    Raises:
+        HTTPException: If the batch is invalid or the server is shutting down
+    """
+    if scheduler.draining:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down",
+            headers={"Retry-After": "5"}
+        )
+    if not workflow_manager or not job_store:
+        raise HTTPException(status_code=503, detail="Workflow manager not initialized")
+    
+    config_loader = workflow_manager.config_loader
+    limit = int(config_loader.get_value("app_config.batch_max_concurrency", 4))
+    max_items = int(config_loader.get_value("app_config.batch_max_items", 1000))
+    try:
+        requests = parse_batch_entries(entries, priority, list(PRIORITY_CLASSES), max_items)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+    max_concurrency = max(1, min(max_concurrency or limit, limit))
+    
+    # Pin the configuration for the whole batch; the compiled workflow comes from the shared cache
+    sync_uploaded_configs()
+    configs = {key: dict(value) for key, value in uploaded_configs.items()}
+    manager = None if worker_pool else FlexibleWorkflowManager(
+        uploaded_configs=configs or None,
+        max_concurrent_runs=max_concurrency
+    )
+    models = extract_workflow_models((manager or workflow_manager).config, scheduler.default_model)
+    fingerprint = (manager or workflow_manager).request_fingerprint
+    request_keys = await asyncio.to_thread(lambda: [fingerprint(entry["user_request"]) for entry in requests])
+    
+    batch_id = f"batch_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+    items = []
+    first_with_key: Dict[str, str] = {}
+    for index, (entry, request_key) in enumerate(zip(requests, request_keys)):
+        workflow_id = new_workflow_id()
+        with job_store.transaction():
+            # Look up earlier workflows before this item's own record exists
+            reuse_from = None
+            if not no_cache:
+                reuse_from = first_with_key.get(request_key)
+                if reuse_from is None:
+                    existing = find_reusable_workflow(request_key)
+                    reuse_from = existing["id"] if existing else None
+            first_with_key.setdefault(request_key, workflow_id)
+            
+            job_store.create(workflow_id, new_workflow_record(
+                entry["user_request"],
+                entry["priority"],
+                models,
+                request_key,
+                {"batch_id": batch_id, "batch_index": index}
+            ))
+        items.append(BatchItem(index, workflow_id, entry["user_request"], entry["priority"], reuse_from=reuse_from))
+    
+    batch = WorkflowBatch(batch_id, items, max_concurrency, manager=manager, configs=configs)
+    job_store.set_setting(f"batch:{batch_id}", {
+        "workflow_ids": [item.workflow_id for item in items],
+        "created_at": batch.created_at,
+        "max_concurrency": max_concurrency,
+    })
+    
+    active_batches[batch_id] = batch
+    batch.task = asyncio.create_task(
+        batch.run(lambda item: run_batch_item(batch, item, models)),
+        name=f"workflow-batch-{batch_id}"
+    )
+    batch.task.add_done_callback(lambda _: active_batches.pop(batch_id, None))
+    logger.info(f"📦 Submitted batch {batch_id} with {len(items)} requests")
+    
+    return {
+        "batch_id": batch_id,
+        "total": len(items),
+        "max_concurrency": max_concurrency,
+        "workflow_ids": [item.workflow_id for item in items],
+    }
+
+
 # Create the app instance
 app = create_app()
 
@@ -0,0 +1,129 @@
+"""Metrics shared between the API processes of one server.
+
+With several HTTP processes behind one port, a Prometheus scrape reaches
+whichever process accepts the connection. Each process therefore publishes
+the totals of its metrics (including those of its workflow workers) to a
+directory shared by the server's processes, and merges the latest totals of
+the other processes into its ``/metrics`` output, so every scrape reports
+the whole server.
+
+A process publishes on every scrape and every ``interval_seconds``. Its
+totals only grow, so a counter never decreases whichever process serves the
+next scrape. Totals of processes that exited are kept for their counters and
+histograms; their gauges are ignored once the snapshot is older than
+``stale_after_seconds``. The launcher creates a fresh directory for every
+server start.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..core.utils.metrics import LabelValues, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".json"
+
+
+class MetricsExchange:
+    """Publishes this process's metric totals and merges those of its peer processes."""
+
+    def __init__(
+        self,
+        directory: Path,
+        registry: MetricsRegistry,
+        source: Optional[str] = None,
+        interval_seconds: float = 5.0,
+        stale_after_seconds: float = 30.0
+    ):
+        """Initialize the exchange.
+
+        Args:
+            directory: Directory shared by the API processes of the server
+            registry: Registry of this process
+            source: Name of this process (defaults to ``http-<pid>``)
+            interval_seconds: Seconds between background publications
+            stale_after_seconds: Age after which a peer's gauges are ignored
+        """
+        self.directory = Path(directory)
+        self.registry = registry
+        self.source = source or f"http-{os.getpid()}"
+        self.interval_seconds = interval_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def publish(self) -> None:
+        """Write the current totals of this process atomically."""
+        snapshot = {
+            name: [[list(key), value] for key, value in samples.items()]
+            for name, samples in self.registry.export_all().items()
+        }
+        path = self.directory / f"{self.source}{SNAPSHOT_SUFFIX}"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Merge the latest totals published by the other processes."""
+        now = time.time() if now is None else now
+        peers: Dict[str, Dict[str, Dict[LabelValues, Any]]] = {}
+        for path in self.directory.glob(f"*{SNAPSHOT_SUFFIX}"):
+            source = path.name[:-len(SNAPSHOT_SUFFIX)]
+            if source == self.source:
+                continue
+            try:
+                live = now - path.stat().st_mtime <= self.stale_after_seconds
+                with open(path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Skipping unreadable metrics of {source}: {e}")
+                continue
+            peers[source] = {
+                name: {tuple(key): value for key, value in samples}
+                for name, samples in snapshot.items()
+                if live or not self.registry.is_gauge(name)
+            }
+        self.registry.merge_peers(peers)
+
+    def sync(self) -> None:
+        """Publish this process's totals and merge the others'."""
+        self.publish()
+        self.refresh()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to exchange metrics: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start periodic publication on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="workflow-metrics-exchange")
+            logger.info(f"📈 Sharing metrics with the other API processes through {self.directory}")
+
+    async def stop(self) -> None:
+        """Stop periodic publication after publishing the final totals."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await asyncio.to_thread(self.publish)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish final metrics: {e}")
@@ -0,0 +1,311 @@
+"""Push-based progress hub for streaming workflow updates.
+
+This module provides a per-workflow publish/subscribe hub. Workflow execution
+publishes progress events as they happen and every connected stream subscriber
+is woken immediately through its own bounded queue, replacing periodic polling.
+A short event history per workflow allows clients to resume with Last-Event-ID.
+Channels are closed by the workflow's terminal event or, for runs that end
+without one, by ``close``; channels nobody publishes to or reads from expire.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressHubError(Exception):
+    """Custom exception for progress hub errors."""
+    pass
+
+
+@dataclass
+class ProgressEvent:
+    """A single progress event published for a workflow.
+
+    Attributes:
+        id: Monotonically increasing event ID within the workflow
+        payload: JSON-serializable event payload
+        terminal: Whether this event ends the workflow stream
+        timestamp: Time the event was published
+    """
+    id: int
+    payload: Dict[str, Any]
+    terminal: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+
+class _WorkflowChannel:
+    """Event history and subscriber queues for a single workflow."""
+
+    def __init__(self, history_size: int):
+        self.history: Deque[ProgressEvent] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.next_id = 1
+        self.closed = False
+        self.last_activity = time.monotonic()
+
+
+class ProgressHub:
+    """Per-workflow publish/subscribe hub with bounded fan-out.
+
+    Each subscriber gets its own bounded queue. When a slow subscriber's queue
+    is full the oldest pending event is dropped, so publishers never block and
+    the terminal event is always delivered.
+    """
+
+    def __init__(
+        self,
+        history_size: int = 100,
+        queue_size: int = 64,
+        max_subscribers: int = 32,
+        max_closed_channels: int = 256,
+        idle_ttl: float = 3600.0
+    ):
+        """Initialize the progress hub.
+
+        Args:
+            history_size: Number of recent events kept per workflow for resume
+            queue_size: Maximum pending events per subscriber
+            max_subscribers: Maximum concurrent subscribers per workflow
+            max_closed_channels: Number of finished workflows kept for late subscribers
+            idle_ttl: Seconds after which a channel without subscribers or events is dropped
+        """
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.max_closed_channels = max_closed_channels
+        self.idle_ttl = idle_ttl
+        self._channels: "OrderedDict[str, _WorkflowChannel]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_expiry = time.monotonic()
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Bind the hub to the event loop that owns subscriber queues.
+
+        Args:
+            loop: Event loop serving stream subscribers
+        """
+        self._loop = loop
+
+    def publish(self, workflow_id: str, payload: Dict[str, Any], terminal: bool = False) -> None:
+        """Publish an event to all subscribers of a workflow.
+
+        Safe to call from the event loop or from other threads.
+
+        Args:
+            workflow_id: Workflow execution ID
+            payload: JSON-serializable event payload
+            terminal: Whether this is the final event for the workflow
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(self._publish, workflow_id, payload, terminal)
+                return
+        self._publish(workflow_id, payload, terminal)
+
+    def _publish(self, workflow_id: str, payload: Dict[str, Any], terminal: bool) -> None:
+        """Record an event and fan it out to subscriber queues."""
+        channel = self._get_channel(workflow_id)
+        if channel.closed:
+            logger.debug(f"Ignoring event for closed workflow stream {workflow_id}")
+            return
+
+        event = ProgressEvent(id=channel.next_id, payload=payload, terminal=terminal)
+        channel.next_id += 1
+        channel.history.append(event)
+        channel.last_activity = time.monotonic()
+
+        for queue in channel.subscribers:
+            self._offer(queue, event)
+
+        if terminal:
+            channel.closed = True
+            self._trim_closed_channels()
+
+    def _offer(self, queue: asyncio.Queue, event: ProgressEvent) -> None:
+        """Put an event on a subscriber queue, dropping the oldest if full."""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def _get_channel(self, workflow_id: str) -> _WorkflowChannel:
+        """Get or create the channel for a workflow."""
+        channel = self._channels.get(workflow_id)
+        if channel is None:
+            self._expire_idle_channels()
+            channel = _WorkflowChannel(self.history_size)
+            self._channels[workflow_id] = channel
+        return channel
+
+    def _expire_idle_channels(self) -> None:
+        """Drop channels without subscribers that saw no activity for ``idle_ttl`` seconds.
+
+        Runs at most once per ``idle_ttl / 10`` seconds, when a channel is created.
+        """
+        now = time.monotonic()
+        if now - self._last_expiry < self.idle_ttl / 10:
+            return
+        self._last_expiry = now
+        expired = [
+            wf_id for wf_id, ch in self._channels.items()
+            if not ch.subscribers and now - ch.last_activity >= self.idle_ttl
+        ]
+        for wf_id in expired:
+            del self._channels[wf_id]
+        if expired:
+            logger.debug(f"Expired {len(expired)} idle workflow streams")
+
+    def _trim_closed_channels(self) -> None:
+        """Drop the oldest finished channels without subscribers beyond the limit."""
+        closed = [
+            wf_id for wf_id, ch in self._channels.items()
+            if ch.closed and not ch.subscribers
+        ]
+        for wf_id in closed[:max(0, len(closed) - self.max_closed_channels)]:
+            del self._channels[wf_id]
+
+    def has_channel(self, workflow_id: str) -> bool:
+        """Check whether the hub has seen any events for a workflow.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if a channel exists for the workflow
+        """
+        return workflow_id in self._channels
+
+    def subscriber_count(self, workflow_id: Optional[str] = None) -> int:
+        """Count active subscribers.
+
+        Args:
+            workflow_id: Optional workflow to count subscribers for
+
+        Returns:
+            Number of subscribers for the workflow, or across all workflows
+        """
+        if workflow_id is not None:
+            channel = self._channels.get(workflow_id)
+            return len(channel.subscribers) if channel else 0
+        return sum(len(ch.subscribers) for ch in self._channels.values())
+
+    def close(self, workflow_id: str) -> None:
+        """Close a workflow's stream if its run ended without a terminal event.
+
+        Subscribers' streams end after the events already queued for them.
+        Safe to call from the event loop or from other threads, and a no-op
+        for closed or unknown workflows.
+
+        Args:
+            workflow_id: Workflow execution ID
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(self._close, workflow_id)
+                return
+        self._close(workflow_id)
+
+    def _close(self, workflow_id: str) -> None:
+        """Mark a channel closed and end its subscribers' streams."""
+        channel = self._channels.get(workflow_id)
+        if channel is None or channel.closed:
+            return
+        channel.closed = True
+        channel.last_activity = time.monotonic()
+        # Not kept in the history; only tells current subscribers to stop
+        end = ProgressEvent(id=channel.next_id, payload={}, terminal=True)
+        for queue in channel.subscribers:
+            self._offer(queue, end)
+        self._trim_closed_channels()
+
+    def discard(self, workflow_id: str) -> None:
+        """Forget a workflow's channel and history.
+
+        Args:
+            workflow_id: Workflow execution ID
+        """
+        self._channels.pop(workflow_id, None)
+
+    async def subscribe(
+        self,
+        workflow_id: str,
+        last_event_id: Optional[int] = None,
+        keepalive: float = 15.0
+    ) -> AsyncGenerator[Optional[ProgressEvent], None]:
+        """Subscribe to a workflow's progress events.
+
+        Replays retained events newer than ``last_event_id`` and then yields
+        live events until the terminal event. Yields None when no event arrives
+        within ``keepalive`` seconds so callers can send a keep-alive.
+
+        Args:
+            workflow_id: Workflow execution ID
+            last_event_id: ID of the last event the client already received
+            keepalive: Seconds to wait for an event before yielding None
+
+        Yields:
+            Progress events, or None as a keep-alive marker
+
+        Raises:
+            ProgressHubError: If the workflow already has too many subscribers
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        channel = self._get_channel(workflow_id)
+        if len(channel.subscribers) >= self.max_subscribers:
+            raise ProgressHubError(f"Too many subscribers for workflow {workflow_id}")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        backlog: List[ProgressEvent] = [
+            event for event in channel.history
+            if last_event_id is None or event.id > last_event_id
+        ]
+        channel.subscribers.add(queue)
+        channel.last_activity = time.monotonic()
+
+        try:
+            for event in backlog:
+                yield event
+                if event.terminal:
+                    return
+
+            # Events published while the backlog was replayed are already queued
+            if channel.closed and queue.empty():
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event.terminal and not event.payload:
+                    # Closed without a terminal event
+                    return
+                yield event
+                if event.terminal:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+            channel.last_activity = time.monotonic()
+            if channel.closed:
+                self._trim_closed_channels()
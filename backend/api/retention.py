@@ -0,0 +1,317 @@
+"""Retention and garbage collection for workflow run artifacts.
+
+Every workflow run leaves an ``incremental_<label>`` directory plus result,
+report and individual output files named ``*_<label>.*`` in the output
+directory. This module groups those artifacts by run and enforces retention
+policies by age, total size and run count, optionally compressing finished
+runs that can no longer be resumed. Matching job store records are evicted
+along with their artifacts. Retention is off unless enabled in the
+configuration.
+"""
+
+import asyncio
+import logging
+import shutil
+import tarfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_PREFIX = "incremental_"
+ARCHIVE_SUFFIX = ".tar.gz"
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention limits for run artifacts and job records.
+
+    A limit set to None (or 0 for sizes and counts) is not enforced.
+
+    Attributes:
+        enabled: Whether the retention service runs at all
+        interval_seconds: Seconds between retention passes
+        max_age_days: Delete runs older than this
+        max_total_mb: Delete the oldest runs while all run artifacts together are larger than this
+        max_runs: Keep at most this many runs
+        compress_after_hours: Compress finished runs older than this into a tar.gz archive;
+            runs that can still be resumed are never compressed
+        job_max_age_days: Delete finished job records older than this
+        job_max_records: Keep at most this many finished job records
+    """
+    enabled: bool = False
+    interval_seconds: float = 600.0
+    max_age_days: Optional[float] = 30.0
+    max_total_mb: Optional[float] = 2048.0
+    max_runs: Optional[int] = 500
+    compress_after_hours: Optional[float] = None
+    job_max_age_days: Optional[float] = 30.0
+    job_max_records: Optional[int] = 5000
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "RetentionPolicy":
+        """Build a policy from a ``retention_config`` section.
+
+        Args:
+            config: Configuration dictionary, unknown keys are ignored
+
+        Returns:
+            Retention policy
+        """
+        config = config or {}
+        known = {name for name in cls.__dataclass_fields__}
+        return cls(**{key: value for key, value in config.items() if key in known})
+
+
+@dataclass
+class RunArtifacts:
+    """All output artifacts belonging to one workflow run.
+
+    Attributes:
+        label: Run label shared by the run's artifacts
+        incremental_dir: The run's incremental directory (may be archived)
+        paths: Every file or directory belonging to the run
+        size: Total size in bytes
+        mtime: Latest modification time across the run's artifacts
+        compressed: Whether the incremental directory has been archived
+    """
+    label: str
+    incremental_dir: Path
+    paths: List[Path] = field(default_factory=list)
+    size: int = 0
+    mtime: float = 0.0
+    compressed: bool = False
+
+
+def _path_size(path: Path) -> int:
+    """Get the size of a file or the total size of a directory tree."""
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def _path_mtime(path: Path) -> float:
+    """Get the latest modification time of a file or directory tree."""
+    mtime = path.stat().st_mtime
+    if path.is_dir():
+        for p in path.rglob("*"):
+            mtime = max(mtime, p.stat().st_mtime)
+    return mtime
+
+
+def scan_runs(output_dir: Path) -> List[RunArtifacts]:
+    """Group the output directory's artifacts by run, oldest first.
+
+    Args:
+        output_dir: Workflow output directory
+
+    Returns:
+        Runs with their artifacts, sorted by last modification time
+    """
+    if not output_dir.exists():
+        return []
+
+    runs: Dict[str, RunArtifacts] = {}
+    others: List[Path] = []
+    for path in output_dir.iterdir():
+        name = path.name
+        if name.startswith(INCREMENTAL_PREFIX) and path.is_dir():
+            label = name[len(INCREMENTAL_PREFIX):]
+            run = runs.setdefault(label, RunArtifacts(label, path))
+        elif name.startswith(INCREMENTAL_PREFIX) and name.endswith(ARCHIVE_SUFFIX):
+            label = name[len(INCREMENTAL_PREFIX):-len(ARCHIVE_SUFFIX)]
+            run = runs.setdefault(label, RunArtifacts(label, output_dir / f"{INCREMENTAL_PREFIX}{label}"))
+            run.compressed = True
+        else:
+            others.append(path)
+            continue
+        run.paths.append(path)
+
+    # Attach report, result and individual output files named *_<label>.<ext>
+    for path in others:
+        if not path.is_file():
+            continue
+        stem = path.name.split(".", 1)[0]
+        for label, run in runs.items():
+            if stem.endswith(f"_{label}"):
+                run.paths.append(path)
+                break
+
+    for run in runs.values():
+        for path in run.paths:
+            try:
+                run.size += _path_size(path)
+                run.mtime = max(run.mtime, _path_mtime(path))
+            except FileNotFoundError:
+                continue
+
+    return sorted(runs.values(), key=lambda r: (r.mtime, r.label))
+
+
+class RetentionService:
+    """Background service enforcing retention of run artifacts and job records."""
+
+    def __init__(
+        self,
+        output_dir: Path,
+        policy: RetentionPolicy,
+        job_store: Optional[JobStore] = None,
+        protected_dirs: Optional[Callable[[], Set[str]]] = None,
+        resumable_dirs: Optional[Callable[[], Set[str]]] = None
+    ):
+        """Initialize the retention service.
+
+        Args:
+            output_dir: Workflow output directory
+            policy: Retention limits
+            job_store: Job store whose records are evicted with their runs
+            protected_dirs: Callable returning incremental directories of active runs
+            resumable_dirs: Callable returning incremental directories of runs that
+                can be resumed; these are deleted by the limits but never compressed
+        """
+        self.output_dir = Path(output_dir)
+        self.policy = policy
+        self.job_store = job_store
+        self.protected_dirs = protected_dirs or (lambda: set())
+        self.resumable_dirs = resumable_dirs or (lambda: set())
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Run a single retention pass.
+
+        Args:
+            now: Current time, defaults to time.time()
+
+        Returns:
+            Report of what was compressed and deleted
+        """
+        now = now or time.time()
+        policy = self.policy
+        protected = {str(Path(p)) for p in self.protected_dirs()}
+        all_runs = scan_runs(self.output_dir)
+        runs = [r for r in all_runs if str(r.incremental_dir) not in protected]
+
+        # Collect runs to delete, oldest first, by age, then count, then size
+        doomed: Dict[str, RunArtifacts] = {}
+        if policy.max_age_days:
+            cutoff = now - policy.max_age_days * 86400
+            doomed.update((r.label, r) for r in runs if r.mtime < cutoff)
+        if policy.max_runs:
+            excess = len(all_runs) - len(doomed) - policy.max_runs
+            for run in runs:
+                if excess <= 0:
+                    break
+                if run.label not in doomed:
+                    doomed[run.label] = run
+                    excess -= 1
+        if policy.max_total_mb:
+            budget = policy.max_total_mb * 1024 * 1024
+            remaining = sum(r.size for r in all_runs) - sum(r.size for r in doomed.values())
+            for run in runs:
+                if remaining <= budget:
+                    break
+                if run.label not in doomed:
+                    doomed[run.label] = run
+                    remaining -= run.size
+
+        deleted_dirs = []
+        freed = 0
+        for run in doomed.values():
+            for path in run.paths:
+                try:
+                    if path.is_dir():
+                        shutil.rmtree(path)
+                    else:
+                        path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"⚠️ Failed to delete run artifact {path}: {e}")
+            deleted_dirs.append(str(run.incremental_dir))
+            freed += run.size
+
+        compressed = []
+        if policy.compress_after_hours:
+            cutoff = now - policy.compress_after_hours * 3600
+            # Resuming reads the checkpoint and outputs from the directory itself
+            resumable = {str(Path(p)) for p in self.resumable_dirs()}
+            for run in runs:
+                if run.label in doomed or run.compressed or run.mtime >= cutoff:
+                    continue
+                if str(run.incremental_dir) in resumable:
+                    continue
+                if self._compress(run):
+                    compressed.append(run.label)
+
+        evicted = 0
+        if self.job_store:
+            evicted = self.job_store.prune(
+                older_than=now - policy.job_max_age_days * 86400 if policy.job_max_age_days else None,
+                keep=policy.job_max_records or None,
+                incremental_dirs=deleted_dirs
+            )
+
+        report = {
+            "timestamp": now,
+            "runs_deleted": len(doomed),
+            "runs_compressed": len(compressed),
+            "bytes_freed": freed,
+            "job_records_evicted": evicted,
+        }
+        if doomed or compressed or evicted:
+            logger.info(
+                f"🧹 Retention: deleted {len(doomed)} runs ({freed / 1024 / 1024:.1f} MB), "
+                f"compressed {len(compressed)}, evicted {evicted} job records"
+            )
+        self.last_report = report
+        return report
+
+    def _compress(self, run: RunArtifacts) -> bool:
+        """Archive a run's incremental directory into a tar.gz and remove the directory."""
+        source = run.incremental_dir
+        archive = source.parent / f"{source.name}{ARCHIVE_SUFFIX}"
+        partial = archive.with_name(archive.name + ".tmp")
+        try:
+            with tarfile.open(partial, "w:gz") as tar:
+                tar.add(source, arcname=source.name)
+            partial.replace(archive)
+            shutil.rmtree(source)
+            return True
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to compress run {run.label}: {e}")
+            partial.unlink(missing_ok=True)
+            return False
+
+    async def _loop(self) -> None:
+        """Run retention passes periodically until cancelled."""
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Retention pass failed: {e}")
+            await asyncio.sleep(self.policy.interval_seconds)
+
+    def start(self) -> None:
+        """Start periodic retention passes on the running event loop."""
+        if not self.policy.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop(), name="workflow-retention")
+        logger.info(f"🧹 Retention service started for {self.output_dir} (every {self.policy.interval_seconds:.0f}s)")
+
+    async def stop(self) -> None:
+        """Stop periodic retention passes."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,366 @@
+"""Quota-aware workflow scheduler for the flexible agent API.
+
+This module provides admission control between the execute endpoint and
+background workflow execution. Submitted workflows wait in priority queues and
+are started only when every model they use has spare concurrency budget, so a
+burst of requests is spread out instead of exhausting the model quota at once.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower value is dispatched first
+PRIORITY_CLASSES: Dict[str, int] = {
+    "high": 0,
+    "normal": 1,
+    "low": 2,
+}
+
+# Budget key of workflows whose model is not known
+DEFAULT_MODEL_KEY = "default"
+
+
+class SchedulerError(Exception):
+    """Custom exception for scheduler errors."""
+    pass
+
+
+class SchedulerQueueFull(SchedulerError):
+    """Raised when a workflow cannot be queued because the queue is full.
+
+    Attributes:
+        retry_after: Suggested number of seconds to wait before retrying
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def extract_workflow_models(config: Dict[str, Any], default_model: Optional[str] = None) -> Set[str]:
+    """Collect the models referenced by a workflow configuration.
+
+    Looks at the ``model`` field of every LLM agent (or step) and falls back to
+    ``core_config.model``, then to ``default_model``, for LLM agents that don't
+    declare one.
+
+    Args:
+        config: Raw workflow configuration dictionary
+        default_model: Model used when neither the agent nor core_config names one
+
+    Returns:
+        Set of model names used by the workflow
+    """
+    default_model = (config.get("core_config") or {}).get("model") or default_model
+    models: Set[str] = set()
+
+    for entry in (config.get("agents") or []) + (config.get("steps") or []):
+        if not isinstance(entry, dict):
+            continue
+        if entry.get("type", "LlmAgent") != "LlmAgent":
+            continue
+        model = entry.get("model") or default_model
+        if model:
+            models.add(model)
+
+    if not models and default_model:
+        models.add(default_model)
+    return models
+
+
+@dataclass
+class ScheduledJob:
+    """A workflow waiting for or holding model budget.
+
+    Attributes:
+        workflow_id: Workflow execution ID
+        priority: Priority class name
+        models: Models the workflow uses
+        run: Factory returning the coroutine that executes the workflow
+        enqueued_at: Time the job was submitted
+        started_at: Time the job was dispatched, if running
+    """
+    workflow_id: str
+    priority: str
+    models: Set[str]
+    run: Callable[[], Awaitable[Any]]
+    enqueued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+
+
+class WorkflowScheduler:
+    """Priority scheduler with per-model concurrency budgets.
+
+    Dispatch is event driven: the queue is re-examined whenever a job is
+    submitted or finishes. Within a priority class jobs are FIFO, but a job
+    blocked on a busy model does not hold back jobs that use other models.
+    """
+
+    def __init__(
+        self,
+        default_model_budget: int = 2,
+        model_budgets: Optional[Dict[str, int]] = None,
+        max_queue_depth: int = 100,
+        default_run_seconds: float = 120.0
+    ):
+        """Initialize the workflow scheduler.
+
+        Args:
+            default_model_budget: Concurrent workflows allowed per model without an explicit budget
+            model_budgets: Concurrent workflows allowed per model name
+            max_queue_depth: Maximum number of queued (not yet running) workflows
+            default_run_seconds: Initial estimate of workflow duration for Retry-After
+        """
+        self.default_model_budget = max(1, default_model_budget)
+        self.model_budgets: Dict[str, int] = dict(model_budgets or {})
+        # Model charged for workflows submitted without models (set from the gemini configuration)
+        self.default_model: Optional[str] = None
+        self.max_queue_depth = max_queue_depth
+        self._queues: Dict[str, Deque[ScheduledJob]] = {name: deque() for name in PRIORITY_CLASSES}
+        self._running: Dict[str, ScheduledJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._model_usage: Dict[str, int] = {}
+        self._avg_run_seconds = default_run_seconds
+        self._counter = itertools.count()
+        self.draining = False
+
+    def update_model_budgets(self, model_budgets: Dict[str, int], default_model_budget: Optional[int] = None) -> None:
+        """Replace the per-model concurrency budgets.
+
+        Args:
+            model_budgets: Concurrent workflows allowed per model name
+            default_model_budget: Optional new default budget
+        """
+        self.model_budgets = {name: max(1, int(value)) for name, value in model_budgets.items()}
+        if default_model_budget is not None:
+            self.default_model_budget = max(1, int(default_model_budget))
+        self._dispatch()
+
+    def budget_for(self, model: str) -> int:
+        """Get the concurrency budget of a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Number of workflows allowed to use the model at once
+        """
+        return self.model_budgets.get(model, self.default_model_budget)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of workflows waiting to be dispatched."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def running_count(self) -> int:
+        """Number of workflows currently dispatched."""
+        return len(self._running)
+
+    def submit(
+        self,
+        workflow_id: str,
+        run: Callable[[], Awaitable[Any]],
+        models: Iterable[str],
+        priority: str = "normal"
+    ) -> Optional[int]:
+        """Queue a workflow for execution.
+
+        Args:
+            workflow_id: Workflow execution ID
+            run: Factory returning the coroutine that executes the workflow
+            models: Models the workflow uses; none means the default model
+            priority: Priority class name
+
+        Returns:
+            1-based queue position, or None if the workflow started immediately
+
+        Raises:
+            SchedulerError: If the priority class is unknown or the scheduler is shutting down
+            SchedulerQueueFull: If the queue is at its depth limit
+        """
+        if self.draining:
+            raise SchedulerError("Scheduler is shutting down")
+        if priority not in PRIORITY_CLASSES:
+            raise SchedulerError(f"Unknown priority '{priority}'. Must be one of: {list(PRIORITY_CLASSES)}")
+
+        # A workflow without declared models still runs on a model and must hold its budget
+        models = set(models) or {self.default_model or DEFAULT_MODEL_KEY}
+        job = ScheduledJob(workflow_id=workflow_id, priority=priority, models=models, run=run)
+
+        if self.queue_depth >= self.max_queue_depth:
+            retry_after = self.estimate_retry_after(job.models)
+            raise SchedulerQueueFull(
+                f"Workflow queue is full ({self.max_queue_depth} waiting)", retry_after
+            )
+
+        self._queues[priority].append(job)
+        logger.info(f"📥 Queued workflow {workflow_id} (priority={priority}, models={sorted(job.models)})")
+        self._dispatch()
+        return self.position(workflow_id)
+
+    def cancel(self, workflow_id: str) -> bool:
+        """Remove a queued workflow before it starts.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if the workflow was still queued and has been removed
+        """
+        for queue in self._queues.values():
+            for job in queue:
+                if job.workflow_id == workflow_id:
+                    queue.remove(job)
+                    logger.info(f"🛑 Removed queued workflow {workflow_id}")
+                    return True
+        return False
+
+    def position(self, workflow_id: str) -> Optional[int]:
+        """Get a workflow's position in the dispatch order.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            1-based queue position, or None if the workflow is not queued
+        """
+        position = 0
+        for name in sorted(PRIORITY_CLASSES, key=PRIORITY_CLASSES.get):
+            for job in self._queues[name]:
+                position += 1
+                if job.workflow_id == workflow_id:
+                    return position
+        return None
+
+    def workflow_ids(self) -> List[str]:
+        """List the workflows this scheduler owns, queued or running.
+
+        Returns:
+            Workflow execution IDs
+        """
+        queued = [job.workflow_id for queue in self._queues.values() for job in queue]
+        return queued + list(self._running)
+
+    def is_running(self, workflow_id: str) -> bool:
+        """Check whether a workflow has been dispatched and is still running.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if the workflow is running
+        """
+        return workflow_id in self._running
+
+    def estimate_retry_after(self, models: Optional[Set[str]] = None) -> int:
+        """Estimate how long a rejected client should wait before retrying.
+
+        Args:
+            models: Models used by the rejected workflow
+
+        Returns:
+            Suggested wait in whole seconds (1-3600)
+        """
+        capacity = min((self.budget_for(m) for m in models), default=self.default_model_budget) if models else self.default_model_budget
+        waves = (self.queue_depth + 1) / max(capacity, 1)
+        return int(min(3600, max(1, math.ceil(self._avg_run_seconds * waves))))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarize the scheduler state.
+
+        Returns:
+            Dictionary with queue depth, running count and model usage
+        """
+        return {
+            "queued": {name: len(queue) for name, queue in self._queues.items()},
+            "queue_depth": self.queue_depth,
+            "running": self.running_count,
+            "max_queue_depth": self.max_queue_depth,
+            "draining": self.draining,
+            "model_usage": {
+                model: {"in_use": used, "budget": self.budget_for(model)}
+                for model, used in self._model_usage.items()
+            },
+        }
+
+    def _has_budget(self, models: Set[str]) -> bool:
+        """Check whether every model has a free slot."""
+        return all(self._model_usage.get(m, 0) < self.budget_for(m) for m in models)
+
+    def _dispatch(self) -> None:
+        """Start every queued job whose models have spare budget, in priority order."""
+        if self.draining:
+            return
+        for name in sorted(PRIORITY_CLASSES, key=PRIORITY_CLASSES.get):
+            queue = self._queues[name]
+            for job in list(queue):
+                if not self._has_budget(job.models):
+                    continue
+                queue.remove(job)
+                self._start(job)
+
+    def _start(self, job: ScheduledJob) -> None:
+        """Reserve model budget and launch a job."""
+        for model in job.models:
+            self._model_usage[model] = self._model_usage.get(model, 0) + 1
+        job.started_at = time.time()
+        self._running[job.workflow_id] = job
+
+        wait = job.started_at - job.enqueued_at
+        logger.info(f"▶️ Dispatching workflow {job.workflow_id} after {wait:.1f}s in queue")
+
+        task = asyncio.create_task(job.run(), name=f"workflow-{job.workflow_id}-{next(self._counter)}")
+        self._tasks[job.workflow_id] = task
+        task.add_done_callback(lambda _task, job=job: self._finish(job))
+
+    def _finish(self, job: ScheduledJob) -> None:
+        """Release model budget when a job finishes and dispatch waiting jobs."""
+        self._running.pop(job.workflow_id, None)
+        self._tasks.pop(job.workflow_id, None)
+        for model in job.models:
+            remaining = self._model_usage.get(model, 0) - 1
+            if remaining > 0:
+                self._model_usage[model] = remaining
+            else:
+                self._model_usage.pop(model, None)
+
+        if job.started_at:
+            duration = time.time() - job.started_at
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * duration
+
+        self._dispatch()
+
+    async def shutdown(self, drain_timeout: float = 0.0) -> List[str]:
+        """Stop admitting work, drop queued jobs and finish or cancel running ones.
+
+        Args:
+            drain_timeout: Seconds to let running jobs finish before they are cancelled
+
+        Returns:
+            IDs of the queued workflows that were dropped without running
+        """
+        self.draining = True
+        dropped = [job.workflow_id for queue in self._queues.values() for job in queue]
+        for queue in self._queues.values():
+            queue.clear()
+
+        tasks: List[asyncio.Task] = list(self._tasks.values())
+        if tasks and drain_timeout > 0:
+            logger.info(f"⏳ Draining {len(tasks)} running workflows (up to {drain_timeout:.0f}s)")
+            _, pending = await asyncio.wait(tasks, timeout=drain_timeout)
+            tasks = list(pending)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            logger.warning(f"⚠️ Cancelled {len(tasks)} workflows still running at shutdown")
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return dropped
@@ -3,13 +3,26 @@
 
 This script starts the FastAPI server for the flexible agent workflow system.
 It handles proper initialization and error handling for the API.
+
+Two profiles are available. ``development`` (the default) runs a single
+auto-reloading process. ``production`` runs several uvicorn worker processes
+sharing the SQLite job store (and combining their metrics), prefers the uvloop/httptools event loop and HTTP
+parser when installed, tunes keep-alive and backlog, and drains in-flight
+workflows on shutdown.
 """
 
+import argparse
 import asyncio
+import importlib.util
+import inspect
 import logging
+import os
+import shutil
 import sys
+import tempfile
 import uvicorn
 from pathlib import Path
+from typing import Optional
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent.parent
@@ -25,36 +38,211 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Defaults of each launch profile; command line options override them
+PROFILES = {
+    "development": {
+        "http_workers": 1,
+        "reload": True,
+        "loop": "auto",
+        "http": "auto",
+        "keep_alive": 5,
+        "backlog": 2048,
+        "graceful_timeout": None,
+        "drain_timeout": 0.0,
+        "worker_startup_timeout": 5,
+        "access_log": True,
+    },
+    "production": {
+        "http_workers": min(4, os.cpu_count() or 1),
+        "reload": False,
+        "loop": "uvloop",
+        "http": "httptools",
+        # Longer than the usual 60s idle timeout of load balancers, so they close first
+        "keep_alive": 75,
+        "backlog": 4096,
+        "graceful_timeout": 30,
+        "drain_timeout": 120.0,
+        # Workers load the agent framework and the workflow manager before answering health checks
+        "worker_startup_timeout": 60,
+        "access_log": False,
+    },
+}
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Start the Flexible Agent API server")
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        default=os.getenv("API_PROFILE", "development"),
+        help="Launch profile (default: development, or $API_PROFILE)"
+    )
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"), help="Bind address")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")), help="Bind port")
+    parser.add_argument(
+        "--http-workers",
+        type=int,
+        default=None,
+        help="Number of uvicorn processes serving HTTP (production default: CPU count, at most 4)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WORKFLOW_WORKERS", "0")),
+        help="Number of worker processes executing workflows (0 runs them in the API process)"
+    )
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default=None, help="Event loop implementation")
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], default=None, help="HTTP protocol implementation")
+    parser.add_argument("--keep-alive", type=int, default=None, help="Seconds to keep idle connections open")
+    parser.add_argument("--backlog", type=int, default=None, help="Maximum number of pending connections")
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=None,
+        help="Seconds to wait for open connections (e.g. progress streams) on shutdown"
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=None,
+        help="Seconds to let running workflows finish on shutdown before they are interrupted"
+    )
+    return parser.parse_args()
+
+
+def resolve_implementation(choice: str, module: str) -> str:
+    """Fall back to the standard implementation when an optional one is missing.
+
+    Args:
+        choice: Requested implementation (e.g. "uvloop" or "httptools")
+        module: Module providing the optional implementation
+
+    Returns:
+        The requested implementation if importable, otherwise "auto"
+    """
+    if choice == module and importlib.util.find_spec(module) is None:
+        logger.warning(f"⚠️ {module} is not installed, using the default implementation")
+        return "auto"
+    return choice
+
+
+def prepare_shared_job_store() -> None:
+    """Prepare the job store for several API processes.
+
+    The in-memory store cannot be shared, so it is rejected. Records left
+    active by a previous server are marked as interrupted once here, before
+    the API processes start, so that no process fails another's runs.
+
+    Raises:
+        SystemExit: If the in-memory job store is configured
+    """
+    if os.getenv("WORKFLOW_JOB_STORE", "sqlite") == "memory":
+        logger.error("❌ Multiple HTTP workers need the SQLite job store (unset WORKFLOW_JOB_STORE=memory)")
+        sys.exit(1)
+
+    from backend.api.job_store import create_job_store
+
+    store_path = os.getenv("WORKFLOW_JOB_STORE_PATH")
+    store = create_job_store("sqlite", Path(store_path) if store_path else None)
+    try:
+        store.mark_interrupted()
+    finally:
+        store.close()
+    os.environ["WORKFLOW_JOB_STORE_RECOVERED"] = "1"
+
+
+def prepare_metrics_directory() -> Optional[Path]:
+    """Prepare the directory through which the API processes combine their metrics.
+
+    A directory given in WORKFLOW_METRICS_DIR is emptied of the snapshots of a
+    previous server; otherwise a temporary directory is created and exported
+    as WORKFLOW_METRICS_DIR.
+
+    Returns:
+        The temporary directory to remove when the server exits, or None
+    """
+    configured = os.getenv("WORKFLOW_METRICS_DIR")
+    if configured:
+        directory = Path(configured)
+        directory.mkdir(parents=True, exist_ok=True)
+        for snapshot in directory.glob("*.json"):
+            snapshot.unlink(missing_ok=True)
+        return None
+    directory = Path(tempfile.mkdtemp(prefix="workflow-metrics-"))
+    os.environ["WORKFLOW_METRICS_DIR"] = str(directory)
+    return directory
+
 
 def main():
     """Main function to start the API server."""
+    metrics_dir = None
     try:
-        logger.info("🚀 Starting Flexible Agent API Server...")
-        
-        # Configuration
-        host = "0.0.0.0"
-        port = 8000
-        
-        logger.info(f"🌐 Server will be available at: http://localhost:{port}")
-        logger.info(f"📖 API Documentation will be available at: http://localhost:{port}/docs")
-        logger.info(f"🔍 API Health Check: http://localhost:{port}/api/v1/health")
-        
+        args = parse_args()
+        profile = PROFILES[args.profile]
+        logger.info(f"🚀 Starting Flexible Agent API Server ({args.profile} profile)...")
+
+        http_workers = max(1, args.http_workers if args.http_workers is not None else profile["http_workers"])
+        reload = profile["reload"] and http_workers == 1
+        loop = resolve_implementation(args.loop or profile["loop"], "uvloop")
+        http = resolve_implementation(args.http or profile["http"], "httptools")
+        keep_alive = args.keep_alive if args.keep_alive is not None else profile["keep_alive"]
+        backlog = args.backlog if args.backlog is not None else profile["backlog"]
+        graceful_timeout = args.graceful_timeout if args.graceful_timeout is not None else profile["graceful_timeout"]
+        drain_timeout = args.drain_timeout if args.drain_timeout is not None else profile["drain_timeout"]
+
+        # Worker processes are started by the app itself; pass the settings via the environment
+        # so they also reach the reloader's and the HTTP workers' server processes
+        os.environ["WORKFLOW_WORKERS"] = str(max(0, args.workers))
+        os.environ["API_HTTP_WORKERS"] = str(http_workers)
+        os.environ["WORKFLOW_DRAIN_TIMEOUT"] = str(max(0.0, drain_timeout))
+        if args.workers > 0:
+            logger.info(f"⚙️ Each API process runs workflows in {args.workers} worker processes")
+        if http_workers > 1:
+            prepare_shared_job_store()
+            metrics_dir = prepare_metrics_directory()
+            logger.info(f"⚙️ Serving HTTP from {http_workers} processes sharing the job store")
+
+        logger.info(f"🌐 Server will be available at: http://localhost:{args.port}")
+        logger.info(f"📖 API Documentation will be available at: http://localhost:{args.port}/docs")
+        logger.info(f"🔍 API Health Check: http://localhost:{args.port}/api/v1/health")
+
+        server_options = {
+            "host": args.host,
+            "port": args.port,
+            "reload": reload,
+            "workers": None if reload else http_workers,
+            "loop": loop,
+            "http": http,
+            "backlog": backlog,
+            "timeout_keep_alive": keep_alive,
+            "timeout_graceful_shutdown": graceful_timeout,
+            "log_level": "info",
+            "access_log": profile["access_log"],
+        }
+        # Newer uvicorn versions restart HTTP workers that are not ready within this timeout
+        if "timeout_worker_healthcheck" in inspect.signature(uvicorn.Config).parameters:
+            server_options["timeout_worker_healthcheck"] = profile["worker_startup_timeout"]
+
         # Start the server with import string for reload to work
         uvicorn.run(
             "backend.api.main:app",  # Use import string instead of app object
-            host=host,
-            port=port,
-            reload=True,
-            log_level="info",
-            access_log=True
+            **server_options
         )
-        
+
     except KeyboardInterrupt:
         logger.info("🛑 Server shutdown requested by user")
     except Exception as e:
         logger.error(f"❌ Failed to start server: {e}")
         sys.exit(1)
+    finally:
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,399 @@
+"""Multi-process worker pool for flexible workflow execution.
+
+This module moves workflow execution out of the API process. The HTTP front-end
+puts jobs on a local queue, a fixed number of worker processes pull and run
+them with their own FlexibleWorkflowManager, and progress, results and errors
+are reported back through an event queue. Document conversion and synchronous
+file writes then happen in the workers and never stall the API event loop.
+Workers also send snapshots of their metrics, which the API process merges
+into its ``/metrics`` output.
+"""
+
+import asyncio
+import enum
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Workers send a metrics snapshot every this many cancel polls (0.2s each) during a run
+METRICS_INTERVAL_TICKS = 25
+
+
+class WorkerPoolError(Exception):
+    """Custom exception for worker pool errors."""
+    pass
+
+
+@dataclass
+class _PendingJob:
+    """Front-end bookkeeping for a job handed to the worker pool."""
+    workflow_id: str
+    future: asyncio.Future
+    on_progress: Optional[Callable[..., Any]] = None
+    on_run_started: Optional[Callable[[str], Any]] = None
+    worker_index: Optional[int] = None
+
+
+def _plain_default(value: Any) -> Any:
+    """Serialize values json does not know; enums such as WorkflowStatus travel as their value."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+
+def _to_plain(value: Any) -> Any:
+    """Convert a workflow result into plain JSON-compatible data for transport."""
+    return json.loads(json.dumps(value, default=_plain_default, ensure_ascii=False))
+
+
+def _worker_main(
+    worker_index: int,
+    job_queue: "multiprocessing.Queue",
+    event_queue: "multiprocessing.Queue",
+    cancel_event: "multiprocessing.synchronize.Event"
+) -> None:
+    """Entry point of a worker process.
+
+    Pulls jobs from ``job_queue`` until a ``None`` sentinel arrives and reports
+    everything that happens through ``event_queue``.
+
+    Args:
+        worker_index: Index of this worker in the pool
+        job_queue: Queue of (workflow_id, user_request, uploaded_configs, resume_dir) jobs
+        event_queue: Queue receiving (kind, workflow_id, payload) events
+        cancel_event: Set by the front-end to cancel the current job
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - worker-{worker_index} - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Import inside the worker so the parent does not pay for it twice
+    try:
+        from backend.core.workflow.flexible_workflow_manager import FlexibleWorkflowManager
+    except ImportError:
+        from ..core.workflow.flexible_workflow_manager import FlexibleWorkflowManager
+
+    manager: Optional[FlexibleWorkflowManager] = None
+    manager_configs: Optional[str] = None
+
+    def send_metrics() -> None:
+        event_queue.put(("metrics", None, (worker_index, metrics.registry.export())))
+
+    async def run_job(
+        workflow_id: str,
+        user_request: str,
+        uploaded_configs: Dict[str, Any],
+        resume_dir: Optional[str]
+    ) -> None:
+        nonlocal manager, manager_configs
+
+        # Reuse the manager while the uploaded configurations stay the same
+        configs_key = json.dumps(uploaded_configs, sort_keys=True, default=str)
+        if manager is None or configs_key != manager_configs:
+            manager = FlexibleWorkflowManager(uploaded_configs=uploaded_configs or None)
+            await manager.initialize()
+            manager_configs = configs_key
+
+        def status_callback(agent_name: str, progress: float, message: str = ""):
+            if cancel_event.is_set():
+                raise asyncio.CancelledError("Workflow was cancelled by user")
+            event_queue.put(("progress", workflow_id, (agent_name, progress, message)))
+
+        async def watch_cancel():
+            # The cancel event is a process-level flag; poll it to abort the run promptly
+            ticks = 0
+            while not cancel_event.is_set():
+                await asyncio.sleep(0.2)
+                ticks += 1
+                if ticks % METRICS_INTERVAL_TICKS == 0:
+                    send_metrics()
+            manager.cancel_run(workflow_id)
+
+        watcher = asyncio.create_task(watch_cancel())
+        try:
+            result = await manager.run_workflow(
+                user_request,
+                status_callback=status_callback,
+                run_id=workflow_id,
+                run_started_callback=lambda ctx: event_queue.put(
+                    ("run_started", workflow_id, str(ctx.incremental_dir))
+                ),
+                resume_dir=Path(resume_dir) if resume_dir else None
+            )
+        finally:
+            watcher.cancel()
+        event_queue.put(("result", workflow_id, _to_plain(result)))
+
+    async def serve() -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await loop.run_in_executor(None, job_queue.get)
+            if job is None:
+                break
+
+            workflow_id, user_request, uploaded_configs, resume_dir = job
+            cancel_event.clear()
+            event_queue.put(("started", workflow_id, worker_index))
+            try:
+                await run_job(workflow_id, user_request, uploaded_configs, resume_dir)
+            except asyncio.CancelledError:
+                event_queue.put(("cancelled", workflow_id, None))
+            except Exception as e:
+                logger.error(f"❌ Worker {worker_index} failed workflow {workflow_id}: {e}")
+                event_queue.put(("error", workflow_id, str(e)))
+            send_metrics()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkflowWorkerPool:
+    """Pool of worker processes executing workflows for the API front-end.
+
+    Each worker runs one workflow at a time. ``run`` is awaited on the API event
+    loop; progress events are delivered to its ``on_progress`` callback on that
+    loop, and the awaitable resolves with the workflow result.
+    """
+
+    def __init__(self, num_workers: int, poll_interval: float = 1.0):
+        """Initialize the worker pool.
+
+        Args:
+            num_workers: Number of worker processes
+            poll_interval: Seconds between worker liveness checks
+        """
+        if num_workers < 1:
+            raise WorkerPoolError("Worker pool needs at least one worker")
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._job_queue = None
+        self._event_queue = None
+        self._workers: List[Optional[Tuple[Any, Any]]] = [None] * num_workers
+        self._pending: Dict[str, _PendingJob] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def started(self) -> bool:
+        """Whether the pool has been started."""
+        return self._reader is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Spawn the worker processes and the event reader thread.
+
+        Args:
+            loop: API event loop that awaits job results
+        """
+        if self.started:
+            return
+        self._loop = loop
+        self._job_queue = self._ctx.Queue()
+        self._event_queue = self._ctx.Queue()
+        for index in range(self.num_workers):
+            self._spawn(index)
+
+        self._stopping.clear()
+        self._reader = threading.Thread(target=self._read_events, name="workflow-worker-events", daemon=True)
+        self._reader.start()
+        logger.info(f"✅ Started {self.num_workers} workflow worker processes")
+
+    def _spawn(self, index: int) -> None:
+        """Start (or restart) the worker process at ``index``."""
+        cancel_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._job_queue, self._event_queue, cancel_event),
+            name=f"workflow-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._workers[index] = (process, cancel_event)
+
+    async def run(
+        self,
+        workflow_id: str,
+        user_request: str,
+        uploaded_configs: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[..., Any]] = None,
+        on_run_started: Optional[Callable[[str], Any]] = None,
+        resume_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute a workflow in a worker process.
+
+        Args:
+            workflow_id: Workflow execution ID
+            user_request: The user's request to process
+            uploaded_configs: Uploaded configurations the worker should use
+            on_progress: Callback receiving (agent_name, progress, message);
+                raising asyncio.CancelledError from it cancels the job
+            on_run_started: Callback receiving the run's incremental directory
+            resume_dir: Incremental directory of an earlier run to resume from its checkpoint
+
+        Returns:
+            Workflow result dictionary
+
+        Raises:
+            WorkerPoolError: If the pool is not running or the worker failed
+            asyncio.CancelledError: If the workflow was cancelled
+        """
+        if not self.started:
+            raise WorkerPoolError("Worker pool is not running")
+        if workflow_id in self._pending:
+            raise WorkerPoolError(f"Workflow {workflow_id} is already submitted")
+
+        future = self._loop.create_future()
+        self._pending[workflow_id] = _PendingJob(workflow_id, future, on_progress, on_run_started)
+        self._job_queue.put((workflow_id, user_request, dict(uploaded_configs or {}), resume_dir))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.cancel(workflow_id)
+            raise
+        finally:
+            self._pending.pop(workflow_id, None)
+
+    def cancel(self, workflow_id: str) -> bool:
+        """Ask the worker running a workflow to cancel it.
+
+        The worker aborts the run's in-flight model calls within a fraction of a second.
+
+        Args:
+            workflow_id: Workflow execution ID
+
+        Returns:
+            True if the workflow is running in a worker
+        """
+        job = self._pending.get(workflow_id)
+        if job is None or job.worker_index is None:
+            return False
+        worker = self._workers[job.worker_index]
+        if worker:
+            worker[1].set()
+        return True
+
+    def _read_events(self) -> None:
+        """Forward worker events to the API event loop and watch worker health."""
+        while not self._stopping.is_set():
+            try:
+                event = self._event_queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(self._check_workers)
+                continue
+            except (EOFError, OSError):
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._handle_event, event)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                break
+
+    def _handle_event(self, event: Tuple[str, str, Any]) -> None:
+        """Apply a worker event on the API event loop."""
+        kind, workflow_id, payload = event
+        if kind == "metrics":
+            worker_index, snapshot = payload
+            metrics.registry.merge_remote(f"worker-{worker_index}", snapshot)
+            return
+
+        job = self._pending.get(workflow_id)
+        if job is None or job.future.done():
+            # Nobody waits for this job anymore, stop it if it just started
+            if kind == "started" and self._workers[payload]:
+                self._workers[payload][1].set()
+            return
+
+        if kind == "started":
+            job.worker_index = payload
+        elif kind == "progress":
+            if job.on_progress:
+                try:
+                    job.on_progress(*payload)
+                except asyncio.CancelledError:
+                    self.cancel(workflow_id)
+                except Exception as e:
+                    logger.warning(f"⚠️ Progress callback failed for {workflow_id}: {e}")
+        elif kind == "run_started":
+            if job.on_run_started:
+                try:
+                    job.on_run_started(payload)
+                except Exception as e:
+                    logger.warning(f"⚠️ Run started callback failed for {workflow_id}: {e}")
+        elif kind == "result":
+            job.future.set_result(payload)
+        elif kind == "cancelled":
+            job.future.cancel()
+        elif kind == "error":
+            job.future.set_exception(WorkerPoolError(payload))
+
+    def _check_workers(self) -> None:
+        """Fail jobs of dead workers and respawn them."""
+        if self._stopping.is_set():
+            return
+        for index, worker in enumerate(self._workers):
+            if worker is None or worker[0].is_alive():
+                continue
+            exitcode = worker[0].exitcode
+            logger.error(f"❌ Workflow worker {index} exited with code {exitcode}, restarting")
+            metrics.registry.retire_remote(f"worker-{index}")
+            for job in list(self._pending.values()):
+                if job.worker_index == index and not job.future.done():
+                    job.future.set_exception(WorkerPoolError(f"Worker process exited with code {exitcode}"))
+            self._spawn(index)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarize the pool state.
+
+        Returns:
+            Dictionary with worker liveness and job counts
+        """
+        return {
+            "workers": self.num_workers,
+            "alive": sum(1 for w in self._workers if w and w[0].is_alive()),
+            "busy": sum(1 for job in self._pending.values() if job.worker_index is not None),
+            "pending": len(self._pending),
+        }
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the worker processes.
+
+        Workers finish their current job if it ends within ``timeout``;
+        remaining workers are terminated.
+
+        Args:
+            timeout: Seconds to wait for workers to exit
+        """
+        if not self.started:
+            return
+        self._stopping.set()
+        for _ in self._workers:
+            self._job_queue.put(None)
+
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            if worker is None:
+                continue
+            worker[0].join(max(0.0, deadline - time.time()))
+            if worker[0].is_alive():
+                worker[0].terminate()
+                worker[0].join(1.0)
+
+        self._reader.join(self.poll_interval * 2)
+        self._reader = None
+        self._workers = [None] * self.num_workers
+        logger.info("🛑 Workflow worker processes stopped")
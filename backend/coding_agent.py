@@ -33,14 +33,17 @@ if __name__ == "__main__" and not __package__:
 try:
     from backend.data_model.data_models import WorkflowInput, WorkflowStatus
     from backend.core.config.config_loader import ConfigLoader
+    from backend.core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from backend.core.utils.fake_llm import resolve_model
 except ImportError:
     # If absolute imports fail, try relative imports for direct execution
     from data_model.data_models import WorkflowInput, WorkflowStatus
     from core.config.config_loader import ConfigLoader
+    from core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from core.utils.fake_llm import resolve_model
 
 # Google ADK imports
 from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.runners import InMemoryRunner
 from google.genai import types
 
 # Configure logging
@@ -142,7 +145,7 @@ class CodingWorkflowManager:
         
         return LlmAgent(
             name="CodeWriterAgent",
-            model=model,
+            model=resolve_model(model, self.gemini_config_loader),
             instruction=instruction,
             description=agent_config.get("description", "Writes initial Python code based on a specification."),
             output_key=output_key
@@ -163,7 +166,7 @@ class CodingWorkflowManager:
         
         return LlmAgent(
             name="CodeReviewerAgent",
-            model=model,
+            model=resolve_model(model, self.gemini_config_loader),
             instruction=instruction,
             description=agent_config.get("description", "Reviews code and provides feedback."),
             output_key=output_key
@@ -184,7 +187,7 @@ class CodingWorkflowManager:
         
         return LlmAgent(
             name="CodeRefactorerAgent",
-            model=model,
+            model=resolve_model(model, self.gemini_config_loader),
             instruction=instruction,
             description=agent_config.get("description", "Refactors code based on review comments."),
             output_key=output_key
@@ -212,20 +215,13 @@ class CodingWorkflowManager:
         
         # Create runner and session using configuration
         app_name = self.config_loader.get_value("app_config.app_name", "coding_workflow")
-        self.runner = InMemoryRunner(
-            agent=self.sequential_agent,
-            app_name=app_name
-        )
+        self.runner = create_runner(self.sequential_agent, app_name, create_session_service(self.config_loader))
         
         # Create session using configuration
         user_id = self.config_loader.get_value("app_config.user_id", "coding_user")
         session_id = self.config_loader.get_value("app_config.session_id", "coding_session")
         
-        self.session = await self.runner.session_service.create_session(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id
-        )
+        self.session = await get_or_create_session(self.runner.session_service, app_name, user_id, session_id)
         
         logger.info("✅ Sequential Coding Workflow initialized successfully")
     
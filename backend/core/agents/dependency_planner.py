@@ -0,0 +1,199 @@
+"""Dependency-driven parallelization of sequential agent chains.
+
+This module analyzes which session state keys the agents of a SequentialAgent
+read (``{key}`` references in their prompts) and write (their ``output_key``),
+and regroups the chain into stages: agents of one stage don't depend on each
+other and run concurrently in a ParallelAgent, while stages run in the
+declared order. The rewrite happens on the agent configurations, so the
+resulting tree is built by FlexibleAgentFactory like any hand-written one.
+
+State references are not the only way agents see each other's work: an
+LlmAgent with the default ``include_contents`` also receives the conversation
+history, which holds the outputs of every agent before it. Such an agent is
+treated as depending on all earlier steps and all later steps on it, so it
+keeps its place in the sequence. Only agents built with
+``parameters.include_contents: "none"``, or marked ``parameters.independent:
+true`` when their prompt alone carries everything they need, are regrouped.
+"""
+
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Set
+
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.config.flexible_config import FlexibleAgentConfig
+except ImportError:
+    # If absolute imports fail, try relative imports for direct execution
+    from ..config.flexible_config import FlexibleAgentConfig
+
+logger = logging.getLogger(__name__)
+
+# include_contents value of LlmAgents that don't receive the conversation history
+NO_HISTORY_CONTENTS = "none"
+
+# State references in prompts: {key}, {app:key}, {key?} and {key:default text}
+STATE_REFERENCE_PATTERN = re.compile(
+    r"\{+\s*((?:app:|user:|temp:)?[A-Za-z_][A-Za-z0-9_]*)\s*(?:\?|:[^{}]*)?\}+"
+)
+
+
+def referenced_state_keys(text: Optional[str]) -> Set[str]:
+    """Find the session state keys a prompt references.
+
+    Args:
+        text: Prompt or instruction text
+
+    Returns:
+        Referenced state keys
+    """
+    return set(STATE_REFERENCE_PATTERN.findall(text or ""))
+
+
+def uses_history(cfg: FlexibleAgentConfig) -> bool:
+    """Check whether an LlmAgent may depend on earlier agents through the conversation history.
+
+    Args:
+        cfg: LlmAgent configuration
+
+    Returns:
+        False if the agent is built without the history or declared independent
+    """
+    parameters = cfg.parameters or {}
+    if parameters.get("independent"):
+        return False
+    return parameters.get("include_contents", "default") != NO_HISTORY_CONTENTS
+
+
+def build_dependency_graph(
+    reads: List[Set[str]],
+    writes: List[Set[str]],
+    barriers: Optional[List[bool]] = None
+) -> List[Set[int]]:
+    """Compute which steps of a chain must run after which earlier steps.
+
+    Step j depends on an earlier step i if it reads a key step i writes,
+    writes a key step i reads (so step i still sees the old value), or writes
+    a key step i also writes (so the declared last writer wins). A barrier
+    step depends on every earlier step and every later step depends on it.
+
+    Args:
+        reads: State keys read by each step, in declared order
+        writes: State keys written by each step, in declared order
+        barriers: Whether each step reads the conversation history (none by default)
+
+    Returns:
+        For each step, the indexes of the earlier steps it depends on
+    """
+    barriers = barriers or [False] * len(reads)
+    dependencies: List[Set[int]] = []
+    for j in range(len(reads)):
+        dependencies.append({
+            i for i in range(j)
+            if barriers[i] or barriers[j]
+            or reads[j] & writes[i] or writes[j] & reads[i] or writes[j] & writes[i]
+        })
+    return dependencies
+
+
+def plan_stages(dependencies: List[Set[int]]) -> List[List[int]]:
+    """Group the steps of a chain into stages that can run concurrently.
+
+    Each step is placed in the stage after the latest stage of its
+    dependencies, so every step runs as early as its inputs allow.
+
+    Args:
+        dependencies: Output of build_dependency_graph
+
+    Returns:
+        Stages of step indexes; steps keep their declared order within a stage
+    """
+    level: List[int] = []
+    for deps in dependencies:
+        level.append(max((level[i] + 1 for i in deps), default=0))
+    stages: List[List[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+    for index, stage in enumerate(level):
+        stages[stage].append(index)
+    return stages
+
+
+def parallelize_sequential_agents(
+    configs: List[FlexibleAgentConfig],
+    get_prompt: Callable[[FlexibleAgentConfig], Optional[str]],
+    enabled: bool = False
+) -> List[FlexibleAgentConfig]:
+    """Regroup independent agents of sequential chains into parallel stages.
+
+    Applies to every SequentialAgent with ``parameters.auto_parallel`` set,
+    or to all of them when ``enabled`` is set and the agent does not set
+    ``auto_parallel: false``. A stage with several agents becomes a new
+    ParallelAgent named ``<sequence>_Stage<n>``. Steps containing an LlmAgent
+    that receives the conversation history (see uses_history) are not
+    regrouped, since their dependencies can't be read from the prompts.
+
+    Args:
+        configs: Agent configurations; they are not modified
+        get_prompt: Returns the raw prompt of an LlmAgent configuration
+        enabled: Whether the mode is on for sequences that don't configure it
+
+    Returns:
+        Agent configurations with rewritten sequences and the added stage agents
+    """
+    by_name = {cfg.name: cfg for cfg in configs}
+    io_cache: Dict[str, tuple] = {}
+
+    def state_io(name: str) -> tuple:
+        """State keys read and written by an agent's subtree, and whether it reads the history."""
+        if name not in io_cache:
+            cfg = by_name.get(name)
+            reads: Set[str] = set()
+            writes: Set[str] = set()
+            history = False
+            if cfg is not None and cfg.type == "LlmAgent":
+                reads = referenced_state_keys(get_prompt(cfg))
+                writes = {cfg.output_key} if cfg.output_key else set()
+                history = uses_history(cfg)
+            elif cfg is not None:
+                for sub_name in cfg.sub_agents or []:
+                    sub_reads, sub_writes, sub_history = state_io(sub_name)
+                    reads |= sub_reads
+                    writes |= sub_writes
+                    history = history or sub_history
+            io_cache[name] = (reads, writes, history)
+        return io_cache[name]
+
+    result: List[FlexibleAgentConfig] = []
+    for cfg in configs:
+        auto_parallel = (cfg.parameters or {}).get("auto_parallel", enabled)
+        if cfg.type != "SequentialAgent" or not auto_parallel or len(cfg.sub_agents or []) < 2:
+            result.append(cfg)
+            continue
+
+        steps = [name for name in cfg.sub_agents if name in by_name]
+        io = [state_io(name) for name in steps]
+        stages = plan_stages(build_dependency_graph([r for r, _, _ in io], [w for _, w, _ in io], [h for _, _, h in io]))
+        if len(stages) == len(steps):
+            logger.info(f"🔗 {cfg.name}: every agent depends on the previous one, keeping the sequence")
+            result.append(cfg)
+            continue
+
+        sub_agents = []
+        for number, stage in enumerate(stages, 1):
+            names = [steps[i] for i in stage]
+            if len(names) == 1:
+                sub_agents.append(names[0])
+                continue
+            stage_name = f"{cfg.name}_Stage{number}"
+            while stage_name in by_name:
+                stage_name += "_"
+            result.append(FlexibleAgentConfig(
+                name=stage_name,
+                type="ParallelAgent",
+                description=f"Independent agents of {cfg.name} running concurrently",
+                sub_agents=names
+            ))
+            sub_agents.append(stage_name)
+            logger.info(f"⚡ {cfg.name}: running {names} concurrently as {stage_name}")
+        # Copy so the cached workflow configuration is never modified
+        result.append(cfg.model_copy(update={"sub_agents": sub_agents}))
+    return result
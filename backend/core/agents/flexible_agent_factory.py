@@ -4,25 +4,43 @@ This module provides the FlexibleAgentFactory class that creates and configures
 various types of agents based on configuration specifications.
 """
 
+import asyncio
+import inspect
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Type
 
 from google.adk.agents import BaseAgent, LlmAgent, SequentialAgent, ParallelAgent, LoopAgent
+from google.genai import types
 
 # Try absolute imports first (for module execution), then relative imports (for direct execution)
 try:
     from backend.core.config.config_loader import ConfigLoader
     from backend.core.config.flexible_config import FlexibleAgentConfig
+    from backend.core.agents.dependency_planner import parallelize_sequential_agents
+    from backend.core.agents.flexible_loop_checker import FlexibleLoopChecker
     from backend.core.tools.tool_registry import FlexibleToolRegistry
-    from backend.core.utils.document_reader import DocumentReader, DocumentReaderError
+    from backend.core.utils.context_budget import IDENTITY_PREFIX, ContextBudget
+    from backend.core.utils.fake_llm import FakeLlm
+    from backend.core.utils.artifact_writer import get_artifact_writer
+    from backend.core.utils.document_reader import DocumentReader
+    from backend.core.utils.metrics import LLM_CACHE, LLM_ERRORS, LLM_LATENCY, LLM_TOKENS
+    from backend.core.utils.response_cache import response_cache_key
 except ImportError:
     # If absolute imports fail, try relative imports for direct execution
     from ..config.config_loader import ConfigLoader
     from ..config.flexible_config import FlexibleAgentConfig
+    from .dependency_planner import parallelize_sequential_agents
+    from .flexible_loop_checker import FlexibleLoopChecker
     from ..tools.tool_registry import FlexibleToolRegistry
-    from ..utils.document_reader import DocumentReader, DocumentReaderError
+    from ..utils.context_budget import IDENTITY_PREFIX, ContextBudget
+    from ..utils.fake_llm import FakeLlm
+    from ..utils.artifact_writer import get_artifact_writer
+    from ..utils.document_reader import DocumentReader
+    from ..utils.metrics import LLM_CACHE, LLM_ERRORS, LLM_LATENCY, LLM_TOKENS
+    from ..utils.response_cache import response_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +68,14 @@ class FlexibleAgentFactory:
         prompts_loader: ConfigLoader, 
         input_directory: Optional[Path] = None, 
         incremental_dir: Optional[Path] = None,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        checkpoint_callback: Optional[callable] = None,
+        checkpoint: Optional[Any] = None,
+        auto_parallel: bool = False,
+        response_cache: Optional[Any] = None,
+        model_backend: Optional[Dict[str, Any]] = None,
+        artifact_writer: Optional[Any] = None,
+        document_conversion: Optional[Dict[str, Any]] = None
     ):
         """Initialize the flexible agent factory.
         
@@ -60,21 +85,64 @@ class FlexibleAgentFactory:
             input_directory: Directory containing input documents
             incremental_dir: Directory for saving incremental outputs
             progress_callback: Optional callback function for progress updates (agent_name, content, execution_order)
+            checkpoint_callback: Optional callback (or coroutine function) receiving
+                               (agent_name, session_state) whenever a resumable agent completes
+            checkpoint: Optional WorkflowCheckpoint being resumed; its completed agents are skipped
+            auto_parallel: Run independent agents of every SequentialAgent concurrently, based on
+                         the state keys their prompts reference (SequentialAgents can override
+                         this with parameters.auto_parallel); only LlmAgents without the
+                         conversation history (parameters.include_contents: "none") or marked
+                         parameters.independent are regrouped
+            response_cache: Optional LLMResponseCache answering repeated model calls; LlmAgents
+                          can opt out with parameters.cache: false
+            model_backend: Optional FakeLlm settings (fake_llm_settings); LlmAgents then get a
+                         FakeLlm standing in for their configured model instead of Gemini
+            artifact_writer: ArtifactWriter saving the incremental outputs in the background
+                           (defaults to the process-wide writer)
+            document_conversion: Optional ``document_config`` settings: ``parallel`` converts
+                               an agent's input documents in a process pool with
+                               ``max_workers`` processes and ``timeout_seconds`` per document
         """
+        self.prompts_loader = prompts_loader
+        configs = parallelize_sequential_agents(configs, self._get_raw_prompt, auto_parallel)
         self.configs = {c.name: c for c in configs}
         self.instances: Dict[str, BaseAgent] = {}
-        self.prompts_loader = prompts_loader
         self.document_reader = DocumentReader(input_directory)
+        self.document_conversion = document_conversion or {}
         self.incremental_dir = incremental_dir
+        self.artifact_writer = artifact_writer
         self.progress_callback = progress_callback
         self.agent_execution_order = {}
         self.saved_outputs = set()
+        # Start times of in-flight model calls keyed by (invocation_id, agent_name)
+        self._model_call_started: Dict[tuple, float] = {}
+        # Response cache and the cache keys of in-flight model calls keyed by (invocation_id, agent_name)
+        self.response_cache = response_cache
+        self._pending_cache_keys: Dict[tuple, str] = {}
+        self.model_backend = model_backend
+        # Checkpointing and resume of agents in sequential chains
+        self.checkpoint_callback = checkpoint_callback
+        self.checkpoint = checkpoint
+        self.latest_outputs: Dict[str, str] = dict(checkpoint.outputs) if checkpoint else {}
+        self.resumable_agents = self._find_resumable_agents()
+        # Context budget reports of model calls that had to be trimmed, keyed by agent name
+        self.context_reports: Dict[str, List[Dict[str, Any]]] = {}
+        # Per-iteration convergence records of LoopAgents, keyed by loop name
+        self.loop_iterations: Dict[str, List[Dict[str, Any]]] = {}
+        # Input documents are read when the first agent using them runs, once per run
+        self._documents: Dict[str, "asyncio.Future"] = {}
+        # Rendered input document sections, keyed by agent name
+        self._document_sections: Dict[str, str] = {}
         
         logger.info(f"Initialized FlexibleAgentFactory with {len(configs)} agent configurations")
 
-    def build_all(self) -> Dict[str, BaseAgent]:
+    def build_all(self, templates: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, BaseAgent]:
         """Build all flexible agents from configurations.
         
+        Args:
+            templates: Optional precompiled constructor arguments from compile_templates;
+                       only run-specific callbacks are added on top of them
+        
         Returns:
             Dictionary mapping agent names to their instances
             
@@ -86,7 +154,7 @@ class FlexibleAgentFactory:
         # First pass: instantiate each agent
         for cfg in self.configs.values():
             try:
-                agent = self._create_agent(cfg)
+                agent = self._create_agent(cfg, templates.get(cfg.name) if templates else None)
                 setattr(agent, '_pending_subs', cfg.sub_agents)
                 self.instances[cfg.name] = agent
                 logger.info(f"Created flexible agent: {cfg.name} ({cfg.type})")
@@ -110,14 +178,32 @@ class FlexibleAgentFactory:
             if hasattr(agent, '_pending_subs'):
                 delattr(agent, '_pending_subs')
 
+        # Third pass: end converging loops early
+        for cfg in self.configs.values():
+            if cfg.type == "LoopAgent" and (cfg.parameters or {}).get("convergence"):
+                self._add_convergence_checker(cfg)
+
         logger.info(f"Successfully built {len(self.instances)} flexible agents")
         return self.instances
 
-    def _create_agent(self, cfg: FlexibleAgentConfig) -> BaseAgent:
+    def compile_templates(self) -> Dict[str, Dict[str, Any]]:
+        """Resolve the run-independent constructor arguments of every agent.
+        
+        Templates hold everything except run-specific callbacks (resolved
+        instructions, models, tools, ...), so they can be cached and reused by
+        build_all for many runs.
+        
+        Returns:
+            Dictionary mapping agent names to constructor keyword arguments
+        """
+        return {name: self._build_agent_kwargs(cfg) for name, cfg in self.configs.items()}
+
+    def _create_agent(self, cfg: FlexibleAgentConfig, template: Optional[Dict[str, Any]] = None) -> BaseAgent:
         """Create a single flexible agent from configuration.
         
         Args:
             cfg: Configuration for the agent to create
+            template: Optional precompiled constructor arguments from compile_templates
             
         Returns:
             Configured agent instance
@@ -129,64 +215,31 @@ class FlexibleAgentFactory:
             logger.info(f"🔧 Creating agent: {cfg.name} (type: {cfg.type})")
             
             cls = FLEXIBLE_AGENT_CLASSES[cfg.type]
-            kwargs: Dict[str, Any] = {"name": cfg.name}
+            if template is not None:
+                # Copy lists so agents of different runs never share mutable arguments
+                kwargs = {k: list(v) if isinstance(v, list) else v for k, v in template.items()}
+            else:
+                kwargs = self._build_agent_kwargs(cfg)
             
-            # Add common attributes
-            if cfg.description:
-                kwargs["description"] = cfg.description
-                logger.debug(f"   Added description: {cfg.description}")
-            
-            # LlmAgent specific attributes
+            # Add model callbacks for latency metrics and individual file saving
             if cfg.type == "LlmAgent":
-                if cfg.model:
-                    kwargs["model"] = cfg.model
-                    logger.debug(f"   Added model: {cfg.model}")
-                
-                # Get instruction from prompt_key or direct instruction
-                if cfg.prompt_key:
-                    kwargs["instruction"] = self._get_prompt(cfg.prompt_key, cfg)
-                    logger.debug(f"   Added instruction from prompt_key: {cfg.prompt_key}")
-                elif cfg.instruction:
-                    kwargs["instruction"] = cfg.instruction
-                    logger.debug(f"   Added direct instruction")
-                
-                if cfg.output_key:
-                    kwargs["output_key"] = cfg.output_key
-                    logger.debug(f"   Added output_key: {cfg.output_key}")
-                
-                # Add after_model callback for individual file saving
-                if self.incremental_dir:
-                    kwargs["after_model_callback"] = self._create_after_model_callback(cfg.name)
-                    logger.debug(f"   Added after_model_callback for incremental saving")
+                model = kwargs.get("model")
+                kwargs["before_model_callback"] = self._create_before_model_callback(cfg.name)
+                kwargs["after_model_callback"] = self._create_after_model_callback(cfg.name, model)
+                if self.model_backend is not None and isinstance(model, str):
+                    kwargs["model"] = FakeLlm(model=model, **self.model_backend)
+                logger.debug(f"   Added model callbacks for metrics and incremental saving")
             
-            # Add tools if specified
-            if cfg.tools:
-                try:
-                    kwargs["tools"] = [FlexibleToolRegistry.get(name) for name in cfg.tools]
-                    logger.debug(f"   Added tools: {cfg.tools}")
-                except KeyError as e:
-                    logger.warning(f"Tool not found for flexible agent {cfg.name}: {e}")
-            
-            # LoopAgent specific attributes
-            if cfg.type == "LoopAgent" and cfg.max_iterations is not None:
-                logger.debug(f"   Adding max_iterations: {cfg.max_iterations} (type: {type(cfg.max_iterations)})")
-                if isinstance(cfg.max_iterations, dict):
-                    logger.error(f"❌ max_iterations is a dict but should be int: {cfg.max_iterations}")
-                    raise ValueError(f"max_iterations must be an integer, got dict: {cfg.max_iterations}")
-                kwargs["max_iterations"] = cfg.max_iterations
-            
-            # Filter extra parameters to only include supported ones
-            supported_params = {"name", "model", "instruction", "description", "output_key", "tools", "sub_agents", "max_iterations"}
-            
-            for key, value in cfg.extra.items():
-                if key in supported_params:
-                    logger.debug(f"   Adding extra param {key}: {value} (type: {type(value)})")
-                    if key == "max_iterations" and isinstance(value, dict):
-                        logger.error(f"❌ Extra param {key} is a dict but should be int: {value}")
-                        raise ValueError(f"Parameter {key} must be an integer, got dict: {value}")
-                    kwargs[key] = value
-                else:
-                    logger.debug(f"   Skipping unsupported param: {key} = {value}")
+            # Checkpoint agents of sequential chains and skip those a resumed run already completed
+            if cfg.name in self.resumable_agents:
+                if self.checkpoint_callback:
+                    kwargs["after_agent_callback"] = self._create_checkpoint_callback(cfg.name)
+                if self.checkpoint and cfg.name in self.checkpoint.completed_agents:
+                    kwargs["before_agent_callback"] = self._create_skip_callback(cfg.name)
+            
+            # Read input documents when the agent is invoked instead of when it is built
+            if "before_agent_callback" not in kwargs and cfg.type == "LlmAgent" and cfg.prompt_key and self._input_files(cfg):
+                kwargs["before_agent_callback"] = self._create_document_callback(cfg.name)
             
             logger.info(f"   Creating {cfg.type} with kwargs: {list(kwargs.keys())}")
             
@@ -205,15 +258,92 @@ class FlexibleAgentFactory:
             logger.error(f"   Traceback: {traceback.format_exc()}")
             raise
 
+    def _build_agent_kwargs(self, cfg: FlexibleAgentConfig) -> Dict[str, Any]:
+        """Build the constructor arguments of an agent, excluding run-specific callbacks.
+        
+        Args:
+            cfg: Configuration for the agent
+            
+        Returns:
+            Keyword arguments for the agent class
+            
+        Raises:
+            Exception: If the configuration is invalid
+        """
+        kwargs: Dict[str, Any] = {"name": cfg.name}
+        
+        # Add common attributes
+        if cfg.description:
+            kwargs["description"] = cfg.description
+            logger.debug(f"   Added description: {cfg.description}")
+        
+        # LlmAgent specific attributes
+        if cfg.type == "LlmAgent":
+            if cfg.model:
+                kwargs["model"] = cfg.model
+                logger.debug(f"   Added model: {cfg.model}")
+            
+            # Get instruction from prompt_key or direct instruction; input documents are added per invocation
+            if cfg.prompt_key:
+                kwargs["instruction"] = self._get_prompt(cfg.prompt_key, cfg)
+                logger.debug(f"   Added instruction from prompt_key: {cfg.prompt_key}")
+            elif cfg.instruction:
+                kwargs["instruction"] = cfg.instruction
+                logger.debug(f"   Added direct instruction")
+            
+            if cfg.output_key:
+                kwargs["output_key"] = cfg.output_key
+                logger.debug(f"   Added output_key: {cfg.output_key}")
+            
+            # "none" leaves out the conversation history, so the agent only sees its instruction
+            include_contents = (cfg.parameters or {}).get("include_contents")
+            if include_contents:
+                kwargs["include_contents"] = include_contents
+                logger.debug(f"   Added include_contents: {include_contents}")
+        
+        # Add tools if specified
+        if cfg.tools:
+            try:
+                kwargs["tools"] = [FlexibleToolRegistry.get(name) for name in cfg.tools]
+                logger.debug(f"   Added tools: {cfg.tools}")
+            except KeyError as e:
+                logger.warning(f"Tool not found for flexible agent {cfg.name}: {e}")
+        
+        # LoopAgent specific attributes
+        if cfg.type == "LoopAgent" and cfg.max_iterations is not None:
+            logger.debug(f"   Adding max_iterations: {cfg.max_iterations} (type: {type(cfg.max_iterations)})")
+            if isinstance(cfg.max_iterations, dict):
+                logger.error(f"❌ max_iterations is a dict but should be int: {cfg.max_iterations}")
+                raise ValueError(f"max_iterations must be an integer, got dict: {cfg.max_iterations}")
+            kwargs["max_iterations"] = cfg.max_iterations
+        
+        # Filter extra parameters to only include supported ones
+        supported_params = {"name", "model", "instruction", "description", "output_key", "tools", "sub_agents", "max_iterations"}
+        
+        for key, value in cfg.extra.items():
+            if key in supported_params:
+                logger.debug(f"   Adding extra param {key}: {value} (type: {type(value)})")
+                if key == "max_iterations" and isinstance(value, dict):
+                    logger.error(f"❌ Extra param {key} is a dict but should be int: {value}")
+                    raise ValueError(f"Parameter {key} must be an integer, got dict: {value}")
+                kwargs[key] = value
+            else:
+                logger.debug(f"   Skipping unsupported param: {key} = {value}")
+        
+        return kwargs
+
     def _get_prompt(self, prompt_key: str, agent_config: FlexibleAgentConfig) -> str:
-        """Get prompt from prompts configuration file and inject input file content if available.
+        """Get prompt from prompts configuration file.
+        
+        Input documents are not part of the prompt; they are read when the
+        agent is invoked (see _create_document_callback).
         
         Args:
             prompt_key: Key to look up in prompts configuration
             agent_config: Configuration for the agent requesting the prompt
             
         Returns:
-            The prompt text with any input documents injected
+            The prompt text
             
         Raises:
             Exception: If prompt loading fails
@@ -222,108 +352,380 @@ class FlexibleAgentFactory:
             prompt = self.prompts_loader.get_value(f"prompts.{prompt_key}")
             if not prompt:
                 raise ValueError(f"Prompt '{prompt_key}' not found in prompts configuration")
+            return prompt
+        except Exception as e:
+            logger.error(f"Failed to load prompt '{prompt_key}': {e}")
+            raise
+
+    @staticmethod
+    def _input_files(agent_config: FlexibleAgentConfig) -> List[str]:
+        """List an agent's input documents from both single and multiple file specifications."""
+        input_files = []
+        if getattr(agent_config, 'input_key', None):
+            input_files.append(agent_config.input_key)
+        if getattr(agent_config, 'input_keys', None):
+            input_files.extend(agent_config.input_keys)
+        return input_files
+
+    async def _read_input_documents(self, filenames: List[str]) -> List[str]:
+        """Read input documents once per run, sharing the results between agents.
+        
+        The documents that no agent requested yet are read together in a
+        worker thread (converted in parallel processes with
+        ``document_config.parallel``); agents invoked while a document is being
+        read wait for the same read.
+        
+        Args:
+            filenames: Names of the documents in the input directory
             
-            # Collect input documents from both single and multiple file specifications
-            input_files = []
+        Returns:
+            Markdown content of each document, or an empty string for documents that could not be read
+        """
+        new_files = [filename for filename in dict.fromkeys(filenames) if filename not in self._documents]
+        if new_files:
+            batch = asyncio.ensure_future(asyncio.to_thread(
+                self.document_reader.convert_documents,
+                new_files,
+                bool(self.document_conversion.get("parallel", False)),
+                self.document_conversion.get("max_workers"),
+                self.document_conversion.get("timeout_seconds")
+            ))
+            for i, filename in enumerate(new_files):
+                self._documents[filename] = asyncio.ensure_future(self._batch_result(batch, i))
+        
+        results = await asyncio.gather(*(asyncio.shield(self._documents[filename]) for filename in filenames))
+        contents = []
+        for filename, result in zip(filenames, results):
+            if result.error:
+                logger.warning(f"Failed to read input document '{filename}': {result.error}")
+            contents.append(result.content)
+        return contents
+
+    @staticmethod
+    async def _batch_result(batch: "asyncio.Future", index: int) -> Any:
+        """Get one document's result of a batch read."""
+        return (await batch)[index]
+
+    async def _render_input_documents(self, agent_config: FlexibleAgentConfig) -> str:
+        """Render the input documents section appended to an agent's instruction.
+        
+        Args:
+            agent_config: Configuration of the agent
             
-            # Handle single input file (input_key)
-            if hasattr(agent_config, 'input_key') and agent_config.input_key:
-                input_files.append(agent_config.input_key)
+        Returns:
+            The documents section, or an empty string if no document could be loaded
+        """
+        input_files = self._input_files(agent_config)
+        contents = await self._read_input_documents(input_files)
+        
+        input_content_parts = []
+        successful_files = []
+        for i, (filename, file_content) in enumerate(zip(input_files, contents), 1):
+            if file_content:
+                input_content_parts.append(f"### Document {i}: {filename}\n{file_content}")
+                successful_files.append(filename)
+                logger.info(f"Loaded input document '{filename}' for agent '{agent_config.name}'")
+            else:
+                logger.warning(f"No content found in document '{filename}' for agent '{agent_config.name}'")
+        
+        if not input_content_parts:
+            logger.warning(f"No input documents were successfully loaded for agent '{agent_config.name}'")
+            return ""
+        
+        logger.info(f"Injected {len(successful_files)} input documents into prompt for agent '{agent_config.name}'")
+        if len(successful_files) == 1:
+            # Single document format (backward compatibility)
+            return f"\n\n**Additional Input Document:**\n{input_content_parts[0].split('\n', 1)[1]}"
+        # Multiple documents format
+        combined_content = "\n\n".join(input_content_parts)
+        return f"\n\n**Additional Input Documents ({len(successful_files)} files):**\n{combined_content}"
+
+    def _create_document_callback(self, agent_name: str):
+        """Create a before_agent callback loading the agent's input documents.
+        
+        Documents are read on the agent's first invocation, so agents that
+        never run (e.g. in a branch or a loop that stops early) don't read
+        them and building the agent tree doesn't wait for any conversion.
+        The before_model callback adds them to the agent's instruction.
+        
+        Args:
+            agent_name: Name of the agent to create callback for
             
-            # Handle multiple input files (input_keys)
-            if hasattr(agent_config, 'input_keys') and agent_config.input_keys:
-                input_files.extend(agent_config.input_keys)
+        Returns:
+            Async callback function that accepts a callback_context and returns None
+        """
+        async def before_agent_callback(callback_context):
+            """Callback to read the agent's input documents before its first model call."""
+            if agent_name not in self._document_sections:
+                try:
+                    self._document_sections[agent_name] = await self._render_input_documents(self.configs[agent_name])
+                except Exception as e:
+                    logger.error(f"Failed to load input documents for agent {agent_name}: {e}")
+                    self._document_sections[agent_name] = ""
+            return None
+        
+        return before_agent_callback
+
+    def _inject_input_documents(self, agent_name: str, llm_request) -> None:
+        """Add an agent's loaded input documents to the system instruction of a request.
+        
+        The documents follow the agent's own instruction, ahead of the
+        instructions ADK appends, as if they were part of the prompt.
+        """
+        section = self._document_sections.get(agent_name)
+        config = llm_request.config
+        if not section or config is None or not isinstance(config.system_instruction, str):
+            return
+        instruction = config.system_instruction
+        position = instruction.find(IDENTITY_PREFIX)
+        if position < 0:
+            position = len(instruction)
+        config.system_instruction = instruction[:position] + section + instruction[position:]
+
+    def _get_raw_prompt(self, agent_config: FlexibleAgentConfig) -> Optional[str]:
+        """Get an agent's prompt without injected input documents.
+        
+        Args:
+            agent_config: Configuration of the agent
             
-            # Process all input files
-            if input_files:
-                input_content_parts = []
-                successful_files = []
-                
-                for i, filename in enumerate(input_files, 1):
-                    try:
-                        file_content = self.document_reader.read_document(filename)
-                        if file_content:
-                            input_content_parts.append(f"### Document {i}: {filename}\n{file_content}")
-                            successful_files.append(filename)
-                            logger.info(f"Loaded input document '{filename}' for agent '{agent_config.name}'")
-                        else:
-                            logger.warning(f"No content found in document '{filename}' for agent '{agent_config.name}'")
-                    except DocumentReaderError as e:
-                        logger.warning(f"Failed to read input document '{filename}': {e}")
-                
-                # Inject all input content into prompt if any files were successfully loaded
-                if input_content_parts:
-                    if len(successful_files) == 1:
-                        # Single document format (backward compatibility)
-                        prompt = f"{prompt}\n\n**Additional Input Document:**\n{input_content_parts[0].split('\\n', 1)[1]}"
-                    else:
-                        # Multiple documents format
-                        combined_content = "\n\n".join(input_content_parts)
-                        prompt = f"{prompt}\n\n**Additional Input Documents ({len(successful_files)} files):**\n{combined_content}"
-                    
-                    logger.info(f"Injected {len(successful_files)} input documents into prompt for agent '{agent_config.name}'")
-                else:
-                    logger.warning(f"No input documents were successfully loaded for agent '{agent_config.name}'")
+        Returns:
+            Prompt text, or None if the agent has none
+        """
+        if agent_config.prompt_key:
+            return self.prompts_loader.get_value(f"prompts.{agent_config.prompt_key}")
+        return agent_config.instruction
+
+    def _find_resumable_agents(self) -> set:
+        """Find the agents that can be checkpointed and skipped on resume.
+        
+        These are the agents whose ancestors are all SequentialAgents. Agents
+        inside loops or parallel groups are checkpointed through their
+        enclosing group instead.
+        
+        Returns:
+            Names of resumable agents
+        """
+        parents = {}
+        for cfg in self.configs.values():
+            for sub_name in cfg.sub_agents or []:
+                parents[sub_name] = cfg.name
+        
+        resumable = set()
+        for name in self.configs:
+            parent = parents.get(name)
+            if parent is None:
+                continue
+            while parent is not None and self.configs[parent].type == "SequentialAgent":
+                parent = parents.get(parent)
+            if parent is None:
+                resumable.add(name)
+        return resumable
+
+    def _llm_agents_under(self, agent_name: str) -> List[str]:
+        """List the LlmAgents of an agent's subtree in execution order."""
+        cfg = self.configs.get(agent_name)
+        if cfg is None:
+            return []
+        if cfg.type == "LlmAgent":
+            return [agent_name]
+        names = []
+        for sub_name in cfg.sub_agents or []:
+            names.extend(self._llm_agents_under(sub_name))
+        return names
+
+    def _add_convergence_checker(self, cfg: FlexibleAgentConfig) -> None:
+        """Append a FlexibleLoopChecker ending a LoopAgent once its output converges.
+        
+        Configured with ``parameters.convergence`` on the LoopAgent, either
+        ``true`` for the defaults or a mapping of ``min_delta`` (default 0.05),
+        ``token_budget``, ``watch_key`` (default: output_key of the loop's last
+        LlmAgent) and ``stop_keyword``.
+        
+        Args:
+            cfg: Configuration of the LoopAgent
+        """
+        settings = cfg.parameters["convergence"]
+        if not isinstance(settings, dict):
+            settings = {}
+        llm_agents = self._llm_agents_under(cfg.name)
+        watch_key = settings.get("watch_key")
+        if not watch_key:
+            output_keys = [self.configs[name].output_key for name in llm_agents if self.configs[name].output_key]
+            watch_key = output_keys[-1] if output_keys else "last_result"
+        
+        checker = FlexibleLoopChecker(
+            name=f"{cfg.name}_ConvergenceChecker",
+            stop_keyword=settings.get("stop_keyword", ""),
+            watch_key=watch_key,
+            min_delta=settings.get("min_delta", 0.05),
+            token_budget=settings.get("token_budget"),
+            watched_agents=llm_agents
+        )
+        records = self.loop_iterations.setdefault(cfg.name, [])
+        checker.set_iteration_callback(records.append)
+        loop = self.instances[cfg.name]
+        loop.sub_agents = list(loop.sub_agents) + [checker]
+        logger.info(f"🔁 {cfg.name}: stopping on convergence of '{watch_key}' (min_delta: {checker.min_delta}, token_budget: {checker.token_budget})")
+
+    def _create_checkpoint_callback(self, agent_name: str):
+        """Create an after_agent callback reporting the agent's completion for checkpointing.
+        
+        Args:
+            agent_name: Name of the agent to create callback for
             
-            return prompt
-        except Exception as e:
-            logger.error(f"Failed to load prompt '{prompt_key}': {e}")
-            raise
+        Returns:
+            Callback function that accepts a callback_context and returns None
+        """
+        async def after_agent_callback(callback_context):
+            """Callback to checkpoint the session state after the agent completed."""
+            try:
+                result = self.checkpoint_callback(agent_name, callback_context.state.to_dict())
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Failed to checkpoint after agent {agent_name}: {e}")
+            return None
+        
+        return after_agent_callback
+
+    def _create_skip_callback(self, agent_name: str):
+        """Create a before_agent callback skipping an agent completed before resuming.
+        
+        Returning content from a before_agent callback ends the agent without
+        running it; the content replays the outputs the agent produced, and
+        the session state was already restored from the checkpoint.
+        
+        Args:
+            agent_name: Name of the agent to create callback for
+            
+        Returns:
+            Callback function that accepts a callback_context and returns the restored content
+        """
+        def before_agent_callback(callback_context):
+            """Callback to replay a completed agent's outputs from the checkpoint."""
+            texts = []
+            for name in self._llm_agents_under(agent_name):
+                output_key = self.configs[name].output_key
+                text = self.checkpoint.state.get(output_key) if output_key else None
+                text = text if text is not None else self.latest_outputs.get(name)
+                if text:
+                    texts.append(str(text))
+            logger.info(f"⏭️ Skipping agent {agent_name}, completed before resume")
+            return types.Content(role="model", parts=[types.Part(text=text) for text in texts])
+        
+        return before_agent_callback
+
+    def _create_before_model_callback(self, agent_name: str):
+        """Create a before_model callback recording when a model call starts.
+        
+        The callback first adds the agent's input documents to the instruction.
+        With ``parameters.context_budget`` it then trims the request
+        to the agent's input token budget (utils/context_budget.py). With a
+        response cache, it then looks the request up and answers it from the
+        cache, which skips the model call. The callback is a coroutine so the
+        cache's disk tier is read without blocking the event loop.
+        
+        Args:
+            agent_name: Name of the agent to create callback for
+            
+        Returns:
+            Callback function that accepts (callback_context, llm_request) parameters
+            and returns a cached LlmResponse, or None so the model call proceeds unchanged.
+        """
+        cfg = self.configs.get(agent_name)
+        parameters = cfg.parameters if cfg else {}
+        use_cache = self.response_cache is not None and parameters.get("cache", True)
+        budget = ContextBudget.from_parameters(
+            parameters.get("context_budget"),
+            output_keys={c.name: c.output_key for c in self.configs.values() if c.output_key},
+            document_names=self._input_files(cfg)
+        ) if cfg else None
+        
+        async def before_model_callback(callback_context, llm_request):
+            """Callback to timestamp the model call for latency metrics, trim its context and serve cache hits."""
+            key = (getattr(callback_context, "invocation_id", None), agent_name)
+            self._model_call_started[key] = time.perf_counter()
+            self._inject_input_documents(agent_name, llm_request)
+            if budget is not None:
+                try:
+                    report = budget.apply(llm_request, agent_name)
+                    if report["items"]:
+                        self.context_reports.setdefault(agent_name, []).append(report)
+                except Exception as e:
+                    logger.warning(f"⚠️ Context budget could not be applied for {agent_name}: {e}")
+            if not use_cache:
+                return None
+            
+            try:
+                cache_key = response_cache_key(llm_request)
+                cached, result = await self.response_cache.get_async(cache_key)
+            except Exception as e:
+                logger.warning(f"⚠️ Response cache lookup failed for {agent_name}: {e}")
+                return None
+            LLM_CACHE.inc(1, agent_name, result)
+            if cached is None:
+                self._pending_cache_keys[key] = cache_key
+                return None
+            
+            # The model is not called, so after_model callbacks don't run; handle the output here
+            self._model_call_started.pop(key, None)
+            logger.info(f"♻️ Response cache {result.replace('_', ' ')} for agent: {agent_name}")
+            try:
+                await self._handle_model_output(agent_name, cached)
+            except Exception as e:
+                logger.error(f"Error handling cached response for {agent_name}: {e}")
+            return cached
+        
+        return before_model_callback
+
+    def _record_model_metrics(self, callback_context, agent_name: str, model: Optional[str], llm_response) -> None:
+        """Record latency, token and error metrics of a finished model call."""
+        key = (getattr(callback_context, "invocation_id", None), agent_name)
+        started = self._model_call_started.pop(key, None)
+        model = model or ""
+        if started is not None:
+            LLM_LATENCY.observe(time.perf_counter() - started, agent_name, model)
+        
+        usage = getattr(llm_response, "usage_metadata", None) if llm_response else None
+        if usage is not None:
+            if usage.prompt_token_count:
+                LLM_TOKENS.inc(usage.prompt_token_count, agent_name, model, "prompt")
+            if usage.candidates_token_count:
+                LLM_TOKENS.inc(usage.candidates_token_count, agent_name, model, "completion")
+        if llm_response is not None and getattr(llm_response, "error_code", None):
+            LLM_ERRORS.inc(1, agent_name, model)
 
-    def _create_after_model_callback(self, agent_name: str):
+    def _create_after_model_callback(self, agent_name: str, model: Optional[str] = None):
         """Create an after_model callback for saving individual agent outputs.
         
         Uses after_model_callback to get immediate access to the LLM response
         as soon as the model returns, enabling real-time saving of individual
-        agent outputs during workflow execution.
+        agent outputs during workflow execution. The callback also records the
+        call's latency and token usage metrics, and stores responses of cache
+        misses in the response cache without blocking the event loop.
         
         Args:
             agent_name: Name of the agent to create callback for
+            model: Model used by the agent, for metric labels
             
         Returns:
             Callback function that accepts (callback_context, llm_response) parameters
             and returns None to pass through the original response unchanged.
         """
-        def after_model_callback(callback_context, llm_response):
+        async def after_model_callback(callback_context, llm_response):
             """Callback to save agent output immediately after model responds."""
             try:
-                if not self.incremental_dir or agent_name in self.saved_outputs:
-                    return None  # Don't modify response, just pass through
+                self._record_model_metrics(callback_context, agent_name, model, llm_response)
                 
-                # Get execution order
-                if agent_name not in self.agent_execution_order:
-                    self.agent_execution_order[agent_name] = len(self.agent_execution_order) + 1
+                # Remember complete, successful responses of cache misses
+                cache_key = self._pending_cache_keys.pop(
+                    (getattr(callback_context, "invocation_id", None), agent_name), None
+                )
+                if (cache_key and llm_response and llm_response.content and llm_response.content.parts
+                        and not llm_response.partial and not llm_response.error_code):
+                    await self.response_cache.put_async(cache_key, llm_response)
                 
-                execution_order = self.agent_execution_order[agent_name]
-                
-                # Extract content from LLM response
-                content = ""
-                
-                if llm_response and llm_response.content and llm_response.content.parts:
-                    for part in llm_response.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            content += part.text
-                        elif hasattr(part, 'function_call'):
-                            # For function calls, we'll save a description
-                            func_call = part.function_call
-                            content += f"Function Call: {func_call.name}\nArguments: {func_call.args}\n"
-                elif llm_response and hasattr(llm_response, 'error_message') and llm_response.error_message:
-                    content = f"Error: {llm_response.error_message}"
-                
-                if content and len(content.strip()) > 0:
-                    # Save immediately using sync method in callback
-                    self._save_agent_output_sync(agent_name, content, execution_order)
-                    self.saved_outputs.add(agent_name)
-                    logger.info(f"🔄 Model callback saved output for agent: {agent_name} ({len(content)} chars)")
-                    
-                    # Call progress callback if available
-                    if self.progress_callback:
-                        try:
-                            self.progress_callback(agent_name, content, execution_order)
-                        except Exception as e:
-                            logger.error(f"Error in progress callback for {agent_name}: {e}")
-                else:
-                    logger.warning(f"⚠️ No content found in model callback for agent: {agent_name}")
+                await self._handle_model_output(agent_name, llm_response)
                 
                 # Return None to pass through original response unchanged
                 return None
@@ -336,8 +738,60 @@ class FlexibleAgentFactory:
         
         return after_model_callback
     
-    def _save_agent_output_sync(self, agent_name: str, content: str, execution_order: int):
-        """Synchronous method to save agent output from callback.
+    async def _handle_model_output(self, agent_name: str, llm_response) -> None:
+        """Record a model response of an agent and save it as the agent's output.
+        
+        Args:
+            agent_name: Name of the agent that received the response
+            llm_response: Model response, either fresh or from the response cache
+        """
+        # Extract content from LLM response
+        content = ""
+
+        if llm_response and llm_response.content and llm_response.content.parts:
+            for part in llm_response.content.parts:
+                if hasattr(part, 'text') and part.text:
+                    content += part.text
+                elif hasattr(part, 'function_call'):
+                    # For function calls, we'll save a description
+                    func_call = part.function_call
+                    content += f"Function Call: {func_call.name}\nArguments: {func_call.args}\n"
+        elif llm_response and hasattr(llm_response, 'error_message') and llm_response.error_message:
+            content = f"Error: {llm_response.error_message}"
+
+        # Keep the latest output for checkpoints
+        if content.strip() and not getattr(llm_response, "error_code", None):
+            self.latest_outputs[agent_name] = content
+
+        if not self.incremental_dir or agent_name in self.saved_outputs:
+            return  # Already saved, or saving is disabled
+
+        # Get execution order
+        if agent_name not in self.agent_execution_order:
+            self.agent_execution_order[agent_name] = len(self.agent_execution_order) + 1
+
+        execution_order = self.agent_execution_order[agent_name]
+
+        if content and len(content.strip()) > 0:
+            await self._save_agent_output(agent_name, content, execution_order)
+            self.saved_outputs.add(agent_name)
+            logger.info(f"🔄 Model callback saved output for agent: {agent_name} ({len(content)} chars)")
+
+            # Call progress callback if available
+            if self.progress_callback:
+                try:
+                    self.progress_callback(agent_name, content, execution_order)
+                except Exception as e:
+                    logger.error(f"Error in progress callback for {agent_name}: {e}")
+        else:
+            logger.warning(f"⚠️ No content found in model callback for agent: {agent_name}")
+
+    async def _save_agent_output(self, agent_name: str, content: str, execution_order: int):
+        """Save agent output from callback without waiting for the disk.
+        
+        The file is handed to the artifact writer, whose thread writes it;
+        the run flushes the writer before it completes. When the writer's
+        queue is full, only this run waits for space; the event loop doesn't.
         
         Args:
             agent_name: Name of the agent whose output is being saved
@@ -365,15 +819,44 @@ class FlexibleAgentFactory:
 *Saved by after_agent_callback on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
 """
             
-            # Save to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            # Queue the file for the background writer
+            if self.artifact_writer is None:
+                self.artifact_writer = get_artifact_writer()
+            await self.artifact_writer.write_text_async(file_path, markdown_content, "agent_output", bundled=True)
             
-            logger.info(f"💾 Saved agent output: {filename} ({len(content)} chars)")
+            logger.info(f"💾 Queued agent output: {filename} ({len(content)} chars)")
             
         except Exception as e:
             logger.error(f"Failed to save output for {agent_name}: {e}")
     
+    async def flush_unsaved_outputs(self, state: Dict[str, Any]) -> List[str]:
+        """Save outputs present in session state that no model callback saved yet.
+
+        Used when a run stops early (e.g. on cancellation) so that every output
+        already written to the session state ends up in the incremental directory.
+
+        Args:
+            state: Session state of the run
+
+        Returns:
+            Names of the agents whose outputs were flushed
+        """
+        flushed = []
+        for agent_name, cfg in self.configs.items():
+            if agent_name in self.saved_outputs or not cfg.output_key:
+                continue
+            value = state.get(cfg.output_key)
+            if value is None or not str(value).strip():
+                continue
+
+            if agent_name not in self.agent_execution_order:
+                self.agent_execution_order[agent_name] = len(self.agent_execution_order) + 1
+            await self._save_agent_output(agent_name, str(value), self.agent_execution_order[agent_name])
+            self.saved_outputs.add(agent_name)
+            flushed.append(agent_name)
+
+        return flushed
+
     def get_agent_config_by_name(self, agent_name: str) -> Optional[FlexibleAgentConfig]:
         """Get agent configuration by name.
         
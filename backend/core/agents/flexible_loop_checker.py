@@ -1,43 +1,117 @@
 """Loop checker agent for flexible workflows.
 
 This module provides a specialized agent for checking loop termination conditions
-in flexible workflow systems.
+in flexible workflow systems. Besides a literal stop keyword, the checker can end
+a loop once successive iteration outputs stop changing (convergence) or once the
+loop has spent its token budget.
 """
 
 import logging
-from typing import Optional
+import re
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from google.adk.agents import BaseAgent
 from google.adk.events import Event, EventActions
-from google.genai import types
+from pydantic import PrivateAttr
 
 logger = logging.getLogger(__name__)
 
+# Words of an output, compared as shingles of this many consecutive words
+SHINGLE_SIZE = 3
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text: str) -> Set[tuple]:
+    """Split a text into the set of its overlapping word n-grams."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def text_delta(previous: str, current: str) -> float:
+    """Measure how much a text changed between two iterations.
+
+    Uses the Jaccard distance of the word shingles of both texts, which is
+    cheap and insensitive to whitespace and case.
+
+    Args:
+        previous: Output of the previous iteration
+        current: Output of the current iteration
+
+    Returns:
+        0.0 for identical texts up to 1.0 for texts without a shared shingle
+    """
+    a, b = _shingles(previous), _shingles(current)
+    if not a and not b:
+        return 0.0
+    return 1.0 - len(a & b) / len(a | b)
+
 
 class FlexibleLoopChecker(BaseAgent):
     """Agent that checks loop termination conditions for flexible workflows.
-    
-    This agent analyzes the context and determines whether a loop should continue
-    or terminate based on configurable keywords and conditions.
+
+    This agent runs as the last sub-agent of a LoopAgent and escalates (ends
+    the loop) when the watched state value contains the stop keyword, when it
+    changed less than ``min_delta`` since the previous iteration, or when the
+    loop's agents spent ``token_budget`` tokens in the current invocation.
+
+    Attributes:
+        stop_keyword: Keyword that stops the loop when found in the watched value
+        watch_key: Session state key holding the output compared across iterations
+        min_delta: Stop once the output changed less than this (0-1); None disables it
+        token_budget: Stop once the loop's agents used this many tokens; None disables it
+        watched_agents: Authors whose token usage counts against the budget (all if empty)
     """
-    
-    def __init__(self, name: str, stop_keyword: str = "STOP"):
+
+    stop_keyword: str = "STOP"
+    watch_key: str = "last_result"
+    min_delta: Optional[float] = None
+    token_budget: Optional[int] = None
+    watched_agents: List[str] = []
+
+    # Per-invocation progress: previous output, iteration count, tokens and scanned events
+    _progress: Dict[str, Dict[str, Any]] = PrivateAttr(default_factory=dict)
+    _iteration_callback: Optional[Callable[[Dict[str, Any]], None]] = PrivateAttr(default=None)
+
+    def __init__(self, name: str, stop_keyword: str = "STOP", **kwargs):
         """Initialize the flexible loop checker.
-        
+
         Args:
             name: Name of the checker agent
             stop_keyword: Keyword to stop the loop when found in the last result
+            **kwargs: Optional watch_key, min_delta, token_budget and watched_agents
         """
-        super().__init__(name=name)
-        self.stop_keyword = stop_keyword.lower()
+        super().__init__(name=name, stop_keyword=stop_keyword, **kwargs)
         logger.debug(f"Initialized FlexibleLoopChecker '{name}' with stop keyword: '{stop_keyword}'")
 
+    def set_iteration_callback(self, callback: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Set a callback receiving the record of every checked iteration.
+
+        Args:
+            callback: Function called with a dictionary of iteration, delta, tokens and verdict
+        """
+        self._iteration_callback = callback
+
+    def _count_tokens(self, context, progress: Dict[str, Any]) -> int:
+        """Sum the token usage of the loop's events added since the last check."""
+        events = context.session.events if getattr(context, 'session', None) else []
+        tokens = 0
+        for event in events[progress["scanned"]:]:
+            if event.invocation_id != context.invocation_id or not event.usage_metadata:
+                continue
+            if self.watched_agents and event.author not in self.watched_agents:
+                continue
+            tokens += event.usage_metadata.total_token_count or 0
+        progress["scanned"] = len(events)
+        return tokens
+
     async def _run_async_impl(self, context) -> None:
         """Check if loop should stop based on last result.
-        
+
         Args:
             context: The execution context containing session state
-            
+
         Yields:
             Event indicating whether the loop should continue or stop
         """
@@ -45,45 +119,70 @@ class FlexibleLoopChecker(BaseAgent):
             # Extract last result from context
             last_result = ""
             if hasattr(context, 'session') and context.session and hasattr(context.session, 'state'):
-                last_result = context.session.state.get("last_result", "")
-            
-            # Check termination condition
-            should_stop = self.stop_keyword in last_result.lower()
+                last_result = str(context.session.state.get(self.watch_key, "") or "")
+
+            progress = self._progress.setdefault(
+                context.invocation_id, {"previous": None, "iteration": 0, "tokens": 0, "scanned": 0}
+            )
+            progress["iteration"] += 1
+            iteration_tokens = self._count_tokens(context, progress)
+            progress["tokens"] += iteration_tokens
+            delta = text_delta(progress["previous"], last_result) if progress["previous"] is not None else None
+            progress["previous"] = last_result
+
+            # Check termination conditions
+            reason = None
+            if self.stop_keyword and self.stop_keyword.lower() in last_result.lower():
+                reason = "stop_keyword"
+            elif self.min_delta is not None and delta is not None and delta < self.min_delta:
+                reason = "converged"
+            elif self.token_budget is not None and progress["tokens"] >= self.token_budget:
+                reason = "token_budget"
+            should_stop = reason is not None
             verdict = "stop" if should_stop else "continue"
-            
-            logger.debug(f"Loop checker '{self.name}': {verdict} (keyword '{self.stop_keyword}' {'found' if should_stop else 'not found'})")
-            
-            # Create appropriate event actions
-            actions = EventActions(escalate=should_stop)
-            
-            # Yield the decision event
+
+            record = {
+                "iteration": progress["iteration"],
+                "delta": round(delta, 4) if delta is not None else None,
+                "tokens": iteration_tokens,
+                "total_tokens": progress["tokens"],
+                "verdict": verdict,
+                "reason": reason,
+            }
+            if should_stop:
+                logger.info(f"🛑 Loop checker '{self.name}': stopping after iteration {record['iteration']} ({reason}, delta: {record['delta']}, tokens: {record['total_tokens']})")
+            else:
+                logger.debug(f"Loop checker '{self.name}': continue (iteration {record['iteration']}, delta: {record['delta']}, tokens: {record['total_tokens']})")
+            if self._iteration_callback:
+                self._iteration_callback(record)
+
+            # The decision carries no content so it doesn't end up in the next
+            # iteration's model context; the record travels as event metadata
             yield Event(
+                invocation_id=context.invocation_id,
                 author=self.name,
-                content=types.Content(
-                    role="assistant", 
-                    parts=[types.Part(text=verdict)]
-                ),
-                actions=actions
+                branch=context.branch,
+                actions=EventActions(escalate=should_stop),
+                custom_metadata={"loop_iteration": record}
             )
-            
+
         except Exception as e:
             logger.error(f"Error in FlexibleLoopChecker '{self.name}': {e}")
             # Default to stop on error to prevent infinite loops
             yield Event(
+                invocation_id=context.invocation_id,
                 author=self.name,
-                content=types.Content(
-                    role="assistant", 
-                    parts=[types.Part(text=f"stop (error: {str(e)})")]
-                ),
-                actions=EventActions(escalate=True)
+                branch=context.branch,
+                actions=EventActions(escalate=True),
+                custom_metadata={"loop_iteration": {"verdict": "stop", "reason": f"error: {e}"}}
             )
 
     def update_stop_keyword(self, new_keyword: str) -> None:
         """Update the stop keyword for this loop checker.
-        
+
         Args:
             new_keyword: New keyword to use for loop termination
         """
         old_keyword = self.stop_keyword
-        self.stop_keyword = new_keyword.lower()
-        logger.info(f"Updated stop keyword from '{old_keyword}' to '{new_keyword}' for checker '{self.name}'") 
\ No newline at end of file
+        self.stop_keyword = new_keyword
+        logger.info(f"Updated stop keyword from '{old_keyword}' to '{new_keyword}' for checker '{self.name}'")
@@ -0,0 +1,290 @@
+"""Single-file, content-addressed bundle of run artifacts.
+
+Instead of one file per artifact, a run can keep all of its artifacts in one
+append-only ``artifacts.bundle`` in its incremental directory. The bundle is
+a sequence of records:
+
+- blob records hold a content chunk, addressed by its SHA-256 digest and
+  optionally zstd-compressed; a chunk is stored once per bundle no matter how
+  many artifacts contain it
+- entry records map an artifact name to the digests of its chunks; a later
+  entry of the same name replaces the earlier one
+
+Artifacts are split into chunks at paragraph boundaries, so text shared by
+several artifacts (an agent's output and the outputs quoting it) is stored
+once. Readers scan only the record headers and can refresh from the last
+offset they read, then read any artifact with a few seeks.
+
+Appends are made by the artifact writer's thread; a torn record at the end of
+the file (from a crash) is ignored by readers and cut off by the next append.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FILENAME = "artifacts.bundle"
+BUNDLE_MAGIC = b"ARTBNDL1"
+
+RECORD_BLOB = b"B"
+RECORD_ENTRY = b"E"
+RECORD_HEADER = struct.Struct(">cI")  # Record type, payload length
+CODEC_RAW = 0
+CODEC_ZSTD = 1
+DIGEST_SIZE = 32
+
+# Paragraphs are merged into chunks of at least this size, so short ones don't cost a record each
+MIN_CHUNK_BYTES = 256
+# Chunks smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class ArtifactBundleError(Exception):
+    """Custom exception for artifact bundle errors."""
+    pass
+
+
+@dataclass
+class BundleEntry:
+    """An artifact stored in a bundle.
+
+    Attributes:
+        name: Artifact name, e.g. ``01_requirementanalyzer.md``
+        chunks: Hex digests of the artifact's chunks in order
+        size: Size of the artifact in bytes
+        mtime: Time the artifact was written
+        kind: Artifact kind, e.g. ``agent_output``
+        seq: Position of the entry record among all entry records of the bundle
+    """
+    name: str
+    chunks: List[str]
+    size: int
+    mtime: float
+    kind: str
+    seq: int
+
+
+def split_chunks(data: bytes) -> List[bytes]:
+    """Split content into chunks at paragraph boundaries.
+
+    A chunk ends with the first paragraph that brings it to MIN_CHUNK_BYTES,
+    so after the first long paragraph the boundaries of the same text line up
+    in every artifact that contains it.
+
+    Args:
+        data: Artifact content
+
+    Returns:
+        Chunks whose concatenation is the content
+    """
+    chunks = []
+    start = pos = 0
+    while True:
+        end = data.find(b"\n\n", pos)
+        if end < 0:
+            break
+        end += 2
+        if end - start >= MIN_CHUNK_BYTES:
+            chunks.append(data[start:end])
+            start = end
+        pos = end
+    if start < len(data) or not chunks:
+        chunks.append(data[start:])
+    return chunks
+
+
+class ArtifactBundle:
+    """Reader and appender of one bundle file."""
+
+    def __init__(self, path: Path):
+        """Initialize the bundle; nothing is read until refresh or append.
+
+        Args:
+            path: Bundle file, usually ``<incremental_dir>/artifacts.bundle``
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, BundleEntry] = {}
+        # Digest -> (offset of the chunk data, stored length, codec)
+        self._blobs: Dict[str, Tuple[int, int, int]] = {}
+        self._end = 0
+        self._entry_count = 0
+
+    def refresh(self) -> List[BundleEntry]:
+        """Read the records appended since the last refresh.
+
+        Returns:
+            Entries added or replaced since the last refresh
+        """
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        if size < self._end:
+            # The file was replaced; start over
+            self.entries.clear()
+            self._blobs.clear()
+            self._end = self._entry_count = 0
+        if size == self._end:
+            return []
+
+        changed = []
+        with open(self.path, "rb") as f:
+            if self._end == 0:
+                if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                    raise ArtifactBundleError(f"{self.path} is not an artifact bundle")
+                self._end = len(BUNDLE_MAGIC)
+            f.seek(self._end)
+            while self._end + RECORD_HEADER.size <= size:
+                record_type, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                payload_start = self._end + RECORD_HEADER.size
+                if payload_start + length > size:
+                    break  # Torn record at the end
+                if record_type == RECORD_BLOB:
+                    codec, digest = struct.unpack(f">B{DIGEST_SIZE}s", f.read(1 + DIGEST_SIZE))
+                    data_offset = payload_start + 1 + DIGEST_SIZE
+                    self._blobs[digest.hex()] = (data_offset, length - 1 - DIGEST_SIZE, codec)
+                    f.seek(payload_start + length)
+                elif record_type == RECORD_ENTRY:
+                    record = json.loads(f.read(length).decode("utf-8"))
+                    entry = BundleEntry(
+                        name=record["name"], chunks=record["chunks"], size=record["size"],
+                        mtime=record["mtime"], kind=record.get("kind", "artifact"), seq=self._entry_count
+                    )
+                    self._entry_count += 1
+                    self.entries[entry.name] = entry
+                    changed.append(entry)
+                else:
+                    raise ArtifactBundleError(f"Unknown record type {record_type!r} in {self.path} at {self._end}")
+                self._end = payload_start + length
+        return changed
+
+    def read(self, name: str) -> bytes:
+        """Read an artifact.
+
+        Args:
+            name: Artifact name
+
+        Returns:
+            Artifact content
+
+        Raises:
+            ArtifactBundleError: If the bundle holds no such artifact or is damaged
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            self.refresh()
+            entry = self.entries.get(name)
+        if entry is None:
+            raise ArtifactBundleError(f"No artifact '{name}' in {self.path}")
+
+        parts = []
+        with open(self.path, "rb") as f:
+            for digest in entry.chunks:
+                location = self._blobs.get(digest)
+                if location is None:
+                    raise ArtifactBundleError(f"Missing chunk {digest[:12]} of '{name}' in {self.path}")
+                offset, length, codec = location
+                f.seek(offset)
+                parts.append(self._decode(f.read(length), codec))
+        return b"".join(parts)
+
+    def read_text(self, name: str) -> str:
+        """Read a text artifact."""
+        return self.read(name).decode("utf-8")
+
+    def append(self, artifacts: List[Tuple[str, bytes, str]], compression: Optional[str] = None, sync: bool = False) -> int:
+        """Append artifacts, storing only the chunks the bundle doesn't hold yet.
+
+        Args:
+            artifacts: (name, content, kind) of each artifact
+            compression: "zstd" to compress new chunks (when zstandard is installed), or None
+            sync: Whether to fsync the bundle after appending
+
+        Returns:
+            Number of content bytes that were already stored and not written again
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.refresh()
+        use_zstd = compression == "zstd" and zstandard is not None
+        compressor = zstandard.ZstdCompressor() if use_zstd else None
+
+        deduplicated = 0
+        records = []
+        pending = set()
+        now = time.time()
+        for name, data, kind in artifacts:
+            digests = []
+            for chunk in split_chunks(data):
+                digest = hashlib.sha256(chunk).digest()
+                digests.append(digest.hex())
+                if digest.hex() in self._blobs or digest in pending:
+                    deduplicated += len(chunk)
+                    continue
+                pending.add(digest)
+                stored, codec = chunk, CODEC_RAW
+                if compressor and len(chunk) >= MIN_COMPRESS_BYTES:
+                    compressed = compressor.compress(chunk)
+                    if len(compressed) < len(chunk):
+                        stored, codec = compressed, CODEC_ZSTD
+                records.append((digest, codec, stored))
+            entry = {"name": name, "chunks": digests, "size": len(data), "mtime": now, "kind": kind}
+            records.append((None, None, json.dumps(entry, ensure_ascii=False).encode("utf-8")))
+
+        with open(self.path, "r+b" if self.path.exists() else "w+b") as f:
+            if self._end == 0:
+                f.write(BUNDLE_MAGIC)
+                self._end = len(BUNDLE_MAGIC)
+            # Cut off a torn record left by an interrupted append
+            f.truncate(self._end)
+            f.seek(self._end)
+            for digest, codec, payload in records:
+                if digest is not None:
+                    f.write(RECORD_HEADER.pack(RECORD_BLOB, 1 + DIGEST_SIZE + len(payload)))
+                    f.write(struct.pack(f">B{DIGEST_SIZE}s", codec, digest))
+                else:
+                    f.write(RECORD_HEADER.pack(RECORD_ENTRY, len(payload)))
+                f.write(payload)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        # Index what was just written
+        self.refresh()
+        return deduplicated
+
+    @staticmethod
+    def _decode(data: bytes, codec: int) -> bytes:
+        if codec == CODEC_RAW:
+            return data
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise ArtifactBundleError("Bundle chunk is zstd-compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        raise ArtifactBundleError(f"Unknown chunk codec {codec}")
+
+    def stats(self) -> Dict[str, int]:
+        """Summarize the bundle.
+
+        Returns:
+            Dictionary with entry and chunk counts, logical and stored bytes
+        """
+        self.refresh()
+        return {
+            "entries": len(self.entries),
+            "chunks": len(self._blobs),
+            "logical_bytes": sum(entry.size for entry in self.entries.values()),
+            "stored_bytes": self._end,
+        }
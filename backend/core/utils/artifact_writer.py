@@ -0,0 +1,435 @@
+"""Background writer for run artifacts.
+
+Run artifacts (incremental agent outputs, checkpoints, summaries, reports and
+result files) are written by a dedicated thread so that model callbacks and
+the event loop never wait on the disk. Callers enqueue the finished content
+on a bounded queue; the writer drains it in batches, writes every file to a
+temporary name, syncs the batch according to the fsync policy and renames the
+files into place, so readers only ever see complete files. ``flush()`` is a
+barrier returning once everything enqueued before it is on disk.
+
+Coroutines enqueue with ``write_text_async``/``write_json_async``: when the
+queue is full they wait for space in a thread, so a slow disk holds back only
+the run that produces artifacts, never the event loop serving the others.
+
+With the "bundle" format, the artifacts of a run's incremental directory are
+appended to a single content-addressed bundle in that directory instead (see
+artifact_bundle), which avoids one file per artifact and stores content
+shared by several artifacts once.
+
+Configured through the ``artifact_config`` section of the workflow
+configuration::
+
+    artifact_config:
+      queue_size: 1024            # Pending writes before callers wait for the writer
+      fsync: "batch"              # "always", "batch" or "never"
+      batch_max_items: 64         # Writes committed together
+      format: "files"             # "files" or "bundle"
+      compression: null           # "zstd" to compress bundle chunks (needs zstandard)
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle, zstandard
+    from backend.core.utils.metrics import ARTIFACT_QUEUE_DEPTH, ARTIFACT_WRITE
+except ImportError:
+    # If absolute imports fail, try relative imports for direct execution
+    from .artifact_bundle import BUNDLE_FILENAME, ArtifactBundle, zstandard
+    from .metrics import ARTIFACT_QUEUE_DEPTH, ARTIFACT_WRITE
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "batch", "never")
+ARTIFACT_FORMATS = ("files", "bundle")
+COMPRESSIONS = (None, "zstd")
+# Bundles kept open (with their index) by the writer thread
+MAX_OPEN_BUNDLES = 16
+
+# Process-wide writer shared by all runs
+_writer: Optional["ArtifactWriter"] = None
+_writer_lock = threading.Lock()
+
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread is running an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class ArtifactWriterError(Exception):
+    """Custom exception for artifact writer errors."""
+    pass
+
+
+class _Write:
+    """A pending file write."""
+
+    __slots__ = ("path", "data", "kind", "bundled")
+
+    def __init__(self, path: Path, data: bytes, kind: str, bundled: bool = False):
+        self.path = path
+        self.data = data
+        self.kind = kind
+        self.bundled = bundled
+
+
+class _Barrier:
+    """Marker signalled once every write queued before it is committed."""
+
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class ArtifactWriter:
+    """Bounded queue of artifact writes committed by a background thread."""
+
+    def __init__(
+        self,
+        queue_size: int = 1024,
+        fsync: str = "batch",
+        batch_max_items: int = 64,
+        format: str = "files",
+        compression: Optional[str] = None
+    ):
+        """Initialize the writer and start its thread.
+
+        Args:
+            queue_size: Maximum pending writes; callers wait for space beyond it
+            fsync: "always" syncs every file before it is renamed into place,
+                   "batch" syncs each batch of files and their directories once,
+                   "never" leaves syncing to the operating system
+            batch_max_items: Maximum writes committed together
+            format: "files" writes every artifact to its own file, "bundle" appends
+                    bundled artifacts to the bundle of their directory
+            compression: "zstd" to compress bundle chunks, or None
+
+        Raises:
+            ArtifactWriterError: If the fsync policy, format or compression is unknown
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ArtifactWriterError(f"fsync must be one of {FSYNC_POLICIES}, got '{fsync}'")
+        if format not in ARTIFACT_FORMATS:
+            raise ArtifactWriterError(f"format must be one of {ARTIFACT_FORMATS}, got '{format}'")
+        if compression not in COMPRESSIONS:
+            raise ArtifactWriterError(f"compression must be one of {COMPRESSIONS}, got '{compression}'")
+        if compression == "zstd" and zstandard is None:
+            logger.warning("⚠️ zstandard is not installed, bundle chunks are stored uncompressed")
+        self.fsync = fsync
+        self.format = format
+        self.compression = compression
+        self.batch_max_items = max(1, int(batch_max_items))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._closed = False
+        self.writes = 0
+        self.failures = 0
+        self.coalesced = 0
+        self.deduplicated_bytes = 0
+        # Open bundles by path, in LRU order; only used by the writer thread
+        self._bundles: "OrderedDict[Path, ArtifactBundle]" = OrderedDict()
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"ArtifactWriter started (queue: {self._queue.maxsize}, fsync: {self.fsync}, format: {self.format})")
+
+    def write_text(self, path: Union[str, Path], content: str, kind: str = "artifact", bundled: bool = False) -> None:
+        """Queue a text file write.
+
+        Waits for space when the queue is full, so callers on an event loop
+        use write_text_async instead.
+
+        Args:
+            path: Destination file; missing parent directories are created
+            content: File content
+            kind: Artifact kind used as metrics label
+            bundled: Whether the artifact goes to the bundle of its directory
+                     (as ``path.name``) when the writer uses the bundle format
+        """
+        self._put(self._text_write(path, content, kind, bundled))
+
+    async def write_text_async(self, path: Union[str, Path], content: str, kind: str = "artifact", bundled: bool = False) -> None:
+        """Queue a text file write without blocking the event loop when the queue is full.
+
+        Args:
+            path: Destination file; missing parent directories are created
+            content: File content
+            kind: Artifact kind used as metrics label
+            bundled: Whether the artifact goes to the bundle of its directory
+                     when the writer uses the bundle format
+        """
+        await self._put_async(self._text_write(path, content, kind, bundled))
+
+    def write_json(self, path: Union[str, Path], payload: Any, kind: str = "artifact", bundled: bool = False) -> None:
+        """Queue a JSON file write.
+
+        The payload is serialized right away, so later changes to it don't
+        affect the written file. Waits for space when the queue is full, so
+        callers on an event loop use write_json_async instead.
+
+        Args:
+            path: Destination file; missing parent directories are created
+            payload: JSON-serializable value (other values are written with str())
+            kind: Artifact kind used as metrics label
+            bundled: Whether the artifact goes to the bundle of its directory
+                     when the writer uses the bundle format
+        """
+        self._put(self._json_write(path, payload, kind, bundled))
+
+    async def write_json_async(self, path: Union[str, Path], payload: Any, kind: str = "artifact", bundled: bool = False) -> None:
+        """Queue a JSON file write without blocking the event loop when the queue is full.
+
+        Args:
+            path: Destination file; missing parent directories are created
+            payload: JSON-serializable value (other values are written with str())
+            kind: Artifact kind used as metrics label
+            bundled: Whether the artifact goes to the bundle of its directory
+                     when the writer uses the bundle format
+        """
+        await self._put_async(self._json_write(path, payload, kind, bundled))
+
+    def _text_write(self, path: Union[str, Path], content: str, kind: str, bundled: bool) -> _Write:
+        return _Write(Path(path), content.encode("utf-8"), kind, bundled and self.format == "bundle")
+
+    def _json_write(self, path: Union[str, Path], payload: Any, kind: str, bundled: bool) -> _Write:
+        content = json.dumps(payload, indent=2, default=str, ensure_ascii=False)
+        return _Write(Path(path), content.encode("utf-8"), kind, bundled and self.format == "bundle")
+
+    def _put(self, item: Union[_Write, _Barrier]) -> None:
+        if self._closed:
+            raise ArtifactWriterError("ArtifactWriter is closed")
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if _on_event_loop():
+                logger.warning("⚠️ Artifact queue is full; a synchronous write is blocking the event loop")
+            self._queue.put(item)
+        ARTIFACT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _put_async(self, item: _Write) -> None:
+        if self._closed:
+            raise ArtifactWriterError("ArtifactWriter is closed")
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Wait for the writer in a thread, so the loop keeps serving other runs and streams
+            await asyncio.to_thread(self._queue.put, item)
+        ARTIFACT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write queued so far is committed.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the writes were committed within the timeout
+        """
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        barrier = _Barrier()
+        self._put(barrier)
+        return barrier.done.wait(timeout)
+
+    async def flush_async(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the flush barrier without blocking the event loop.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the writes were committed within the timeout
+        """
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Commit the pending writes and stop the writer thread."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize writer activity.
+
+        Returns:
+            Dictionary with queue depth, committed, coalesced and failed writes
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "fsync": self.fsync,
+            "format": self.format,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "deduplicated_bytes": self.deduplicated_bytes,
+            "failures": self.failures,
+        }
+
+    def _run(self) -> None:
+        """Writer thread: drain the queue in batches and commit them."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Take whatever else is already waiting, up to the batch size
+            while len(batch) < self.batch_max_items:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._commit(batch)
+                    return
+                batch.append(item)
+            ARTIFACT_QUEUE_DEPTH.set(self._queue.qsize())
+            self._commit(batch)
+
+    def _commit(self, batch: List[Union[_Write, _Barrier]]) -> None:
+        """Write a batch, syncing it according to the fsync policy, and release its barriers."""
+        # Later writes of the same file in a batch replace earlier ones
+        latest: Dict[Path, _Write] = {}
+        for item in batch:
+            if isinstance(item, _Write):
+                if item.path in latest:
+                    self.coalesced += 1
+                    del latest[item.path]
+                latest[item.path] = item
+
+        staged = []
+        bundles: Dict[Path, List[_Write]] = {}
+        for write in latest.values():
+            if write.bundled:
+                bundles.setdefault(write.path.parent / BUNDLE_FILENAME, []).append(write)
+                continue
+            started = time.perf_counter()
+            tmp_path = write.path.with_name(f".{write.path.name}.{os.getpid()}.tmp")
+            try:
+                write.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    f.write(write.data)
+                    if self.fsync == "always":
+                        f.flush()
+                        os.fsync(f.fileno())
+                staged.append((write, tmp_path, started))
+            except OSError as e:
+                self.failures += 1
+                logger.error(f"Failed to write artifact {write.path}: {e}")
+
+        if self.fsync == "batch":
+            for _, tmp_path, _ in staged:
+                self._sync_path(tmp_path)
+
+        directories = set()
+        for write, tmp_path, started in staged:
+            try:
+                os.replace(tmp_path, write.path)
+            except OSError as e:
+                self.failures += 1
+                logger.error(f"Failed to write artifact {write.path}: {e}")
+                continue
+            directories.add(write.path.parent)
+            self.writes += 1
+            ARTIFACT_WRITE.observe(time.perf_counter() - started, write.kind)
+
+        if self.fsync != "never":
+            # Make the renames durable
+            for directory in directories:
+                self._sync_path(directory)
+
+        for bundle_path, writes in bundles.items():
+            self._append_bundle(bundle_path, writes)
+
+        for item in batch:
+            if isinstance(item, _Barrier):
+                item.done.set()
+
+    def _append_bundle(self, bundle_path: Path, writes: List[_Write]) -> None:
+        """Append a batch's artifacts to one bundle."""
+        started = time.perf_counter()
+        bundle = self._bundles.get(bundle_path)
+        if bundle is None:
+            bundle = self._bundles[bundle_path] = ArtifactBundle(bundle_path)
+            while len(self._bundles) > MAX_OPEN_BUNDLES:
+                self._bundles.popitem(last=False)
+        else:
+            self._bundles.move_to_end(bundle_path)
+        try:
+            new_bundle = not bundle_path.exists()
+            self.deduplicated_bytes += bundle.append(
+                [(write.path.name, write.data, write.kind) for write in writes],
+                compression=self.compression,
+                sync=self.fsync != "never"
+            )
+            if new_bundle and self.fsync != "never":
+                self._sync_path(bundle_path.parent)
+        except Exception as e:
+            self.failures += len(writes)
+            # Re-read the bundle from disk on the next append
+            self._bundles.pop(bundle_path, None)
+            logger.error(f"Failed to append {len(writes)} artifacts to {bundle_path}: {e}")
+            return
+        elapsed = time.perf_counter() - started
+        for write in writes:
+            self.writes += 1
+            ARTIFACT_WRITE.observe(elapsed, write.kind)
+
+    @staticmethod
+    def _sync_path(path: Path) -> None:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def get_artifact_writer(config_loader: Any = None) -> ArtifactWriter:
+    """Get the process-wide artifact writer, starting it on first use.
+
+    The ``artifact_config`` of the first configuration that starts the writer
+    applies to all runs of the process.
+
+    Args:
+        config_loader: Optional ConfigLoader of the workflow configuration
+
+    Returns:
+        The artifact writer
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            settings = {}
+            if config_loader is not None:
+                settings = config_loader.get_value("artifact_config", None) or {}
+            _writer = ArtifactWriter(
+                queue_size=settings.get("queue_size", 1024),
+                fsync=settings.get("fsync", "batch"),
+                batch_max_items=settings.get("batch_max_items", 64),
+                format=settings.get("format", "files"),
+                compression=settings.get("compression")
+            )
+            # Pending artifacts are committed before the interpreter exits
+            atexit.register(_writer.close)
+        return _writer
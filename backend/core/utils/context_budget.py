@@ -0,0 +1,288 @@
+"""Token-budgeted context assembly for flexible agents.
+
+Each agent of a flexible workflow sees the outputs of the agents before it
+(through the conversation history) and the input documents injected into its
+instruction, so its prompt grows with the depth of the workflow. ContextBudget
+trims a model request to a per-agent input token budget: the agent's own
+prompt and the user's request are always kept, while upstream outputs (newest
+first) and input documents are included verbatim while they fit, then
+truncated or summarized, and dropped once nothing useful fits anymore.
+
+Configured per LlmAgent in ``FlexibleAgentConfig.parameters``::
+
+    parameters:
+      context_budget:
+        max_input_tokens: 8000
+        overflow: "truncate"        # or "summarize"
+        verbatim: ["requirements"]  # output_keys, agent names or document names never reduced
+        min_item_tokens: 64         # Drop an item rather than keep less than this
+
+Token counts are estimated from the text length (``chars_per_token``), which
+is cheap and good enough for budgeting.
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Upstream outputs in the history, as rendered by ADK for other agents' events
+FOREIGN_PART_PATTERN = re.compile(r"^\[(?P<author>[^\]]+)\] said: ", re.DOTALL)
+# Input documents injected into the instruction by FlexibleAgentFactory
+DOCUMENTS_MARKER_PATTERN = re.compile(r"\n\n\*\*Additional Input Documents?(?: \(\d+ files\))?:\*\*\n")
+DOCUMENT_HEADER_PATTERN = re.compile(r"^### Document \d+: (?P<name>.+)$", re.MULTILINE)
+# Framework instructions ADK appends after the agent's own instruction
+IDENTITY_PREFIX = "\n\nYou are an agent. Your internal name is "
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s")
+
+OVERFLOW_STRATEGIES = ("truncate", "summarize")
+OMITTED_NOTE = "(omitted to fit the context budget)"
+
+
+class ContextBudgetError(Exception):
+    """Custom exception for context budget errors."""
+    pass
+
+
+class _Item:
+    """A reducible piece of a request: one upstream output or one input document."""
+
+    def __init__(self, kind: str, source: str, text: str):
+        self.kind = kind
+        self.source = source
+        self.text = text
+        self.result = text
+        self.action = "verbatim"
+
+
+class ContextBudget:
+    """Trim model requests to an input token budget."""
+
+    def __init__(
+        self,
+        max_input_tokens: int,
+        overflow: str = "truncate",
+        verbatim: Optional[Iterable[str]] = None,
+        min_item_tokens: int = 64,
+        chars_per_token: float = 4.0,
+        output_keys: Optional[Dict[str, str]] = None,
+        document_names: Optional[List[str]] = None
+    ):
+        """Initialize the budget.
+
+        Args:
+            max_input_tokens: Maximum estimated tokens of instruction plus contents
+            overflow: How items that don't fit are reduced: "truncate" keeps their
+                      beginning and end, "summarize" keeps headings and leading sentences
+            verbatim: Output keys, agent names or document names that are never reduced
+            min_item_tokens: Items that can't keep at least this many tokens are dropped
+            chars_per_token: Characters per token used to estimate token counts
+            output_keys: Mapping of agent names to their output_key, to match ``verbatim``
+            document_names: Names of the injected documents, used when the
+                            instruction carries a single document without a header
+
+        Raises:
+            ContextBudgetError: If the configuration is invalid
+        """
+        if int(max_input_tokens) <= 0:
+            raise ContextBudgetError(f"max_input_tokens must be positive, got {max_input_tokens}")
+        if overflow not in OVERFLOW_STRATEGIES:
+            raise ContextBudgetError(f"overflow must be one of {OVERFLOW_STRATEGIES}, got '{overflow}'")
+        self.max_input_tokens = int(max_input_tokens)
+        self.overflow = overflow
+        self.verbatim = set(verbatim or [])
+        self.min_item_tokens = max(1, int(min_item_tokens))
+        self.chars_per_token = float(chars_per_token)
+        self.output_keys = output_keys or {}
+        self.document_names = document_names or []
+
+    @classmethod
+    def from_parameters(
+        cls,
+        settings: Any,
+        output_keys: Optional[Dict[str, str]] = None,
+        document_names: Optional[List[str]] = None
+    ) -> Optional["ContextBudget"]:
+        """Create a budget from the ``context_budget`` agent parameter.
+
+        Args:
+            settings: Value of ``parameters.context_budget``: a mapping, a token count or None
+            output_keys: Mapping of agent names to their output_key
+            document_names: Names of the agent's input documents
+
+        Returns:
+            The budget, or None if the parameter is not set
+        """
+        if not settings:
+            return None
+        if not isinstance(settings, dict):
+            settings = {"max_input_tokens": settings}
+        if "max_input_tokens" not in settings:
+            raise ContextBudgetError("context_budget requires max_input_tokens")
+        return cls(
+            max_input_tokens=settings["max_input_tokens"],
+            overflow=settings.get("overflow", "truncate"),
+            verbatim=settings.get("verbatim"),
+            min_item_tokens=settings.get("min_item_tokens", 64),
+            chars_per_token=settings.get("chars_per_token", 4.0),
+            output_keys=output_keys,
+            document_names=document_names
+        )
+
+    def estimate_tokens(self, text: Optional[str]) -> int:
+        """Estimate the token count of a text."""
+        return int(len(text or "") / self.chars_per_token + 0.5)
+
+    def _is_verbatim(self, item: _Item) -> bool:
+        return item.source in self.verbatim or self.output_keys.get(item.source) in self.verbatim
+
+    def _reduce(self, text: str, tokens: int) -> str:
+        """Shorten a text to about the given number of tokens with the overflow strategy."""
+        max_chars = int(tokens * self.chars_per_token)
+        if self.overflow == "summarize":
+            return self._summarize(text, max_chars)
+        return self._truncate(text, max_chars)
+
+    def _truncate(self, text: str, max_chars: int) -> str:
+        """Keep the beginning and the end of a text."""
+        note = f"\n[... {self.estimate_tokens(text) - self.estimate_tokens(text[:max_chars])} tokens truncated ...]\n"
+        keep = max(0, max_chars - len(note))
+        head = keep * 2 // 3
+        tail = keep - head
+        return text[:head] + note + (text[-tail:] if tail else "")
+
+    def _summarize(self, text: str, max_chars: int) -> str:
+        """Keep the headings and the first sentence of every paragraph."""
+        lines = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            first_line = paragraph.splitlines()[0]
+            if first_line.startswith("#"):
+                lines.append(first_line)
+                paragraph = paragraph[len(first_line):].strip()
+                if not paragraph:
+                    continue
+            lines.append(SENTENCE_END_PATTERN.split(paragraph, 1)[0])
+        summary = "[Summary: headings and leading sentences]\n" + "\n".join(lines)
+        if len(summary) > max_chars:
+            summary = summary[:max(0, max_chars - 4)].rstrip() + " ..."
+        return summary
+
+    def _split_instruction(self, instruction: str) -> tuple:
+        """Split an instruction into its prompt, the documents header, the documents and the framework suffix."""
+        match = DOCUMENTS_MARKER_PATTERN.search(instruction)
+        if not match:
+            return instruction, "", [], ""
+        prompt, header, body = instruction[:match.start()], match.group(0), instruction[match.end():]
+        suffix_start = body.rfind(IDENTITY_PREFIX)
+        suffix = body[suffix_start:] if suffix_start >= 0 else ""
+        body = body[:suffix_start] if suffix_start >= 0 else body
+        headers = list(DOCUMENT_HEADER_PATTERN.finditer(body))
+        if not headers:
+            name = self.document_names[0] if len(self.document_names) == 1 else "input document"
+            return prompt, header, [("", name, body)], suffix
+        documents = []
+        for i, doc in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(body)
+            text = body[doc.end() + 1:end]
+            separator = "\n\n" if text.endswith("\n\n") else ""
+            documents.append((doc.group(0) + "\n", doc.group("name").strip(), text[:len(text) - len(separator)]))
+        return prompt, header, documents, suffix
+
+    def apply(self, llm_request: LlmRequest, agent_name: str) -> Dict[str, Any]:
+        """Trim a request to the budget in place.
+
+        Upstream outputs are considered from the newest to the oldest, then the
+        input documents in their declared order; each is kept verbatim while it
+        fits, then reduced to the remaining budget, then dropped.
+
+        Args:
+            llm_request: Request about to be sent to the model
+            agent_name: Name of the agent making the request
+
+        Returns:
+            Report with the estimated tokens before and after and the action
+            taken for every reduced or dropped item
+        """
+        config = llm_request.config
+        instruction = config.system_instruction if config and isinstance(config.system_instruction, str) else ""
+        prompt, documents_header, documents, suffix = self._split_instruction(instruction)
+
+        items: List[_Item] = []
+        positions = []  # (content index, part index) of each output item
+        fixed_tokens = self.estimate_tokens(prompt + documents_header + suffix)
+        for c, content in enumerate(llm_request.contents):
+            for p, part in enumerate(content.parts or []):
+                match = FOREIGN_PART_PATTERN.match(part.text or "")
+                if match:
+                    source, text = match.group("author"), part.text[match.end():]
+                elif part.text and content.role == "model":
+                    source, text = agent_name, part.text
+                else:
+                    fixed_tokens += self.estimate_tokens(part.text) if part.text else 0
+                    continue
+                fixed_tokens += self.estimate_tokens(part.text) - self.estimate_tokens(text)
+                items.append(_Item("output", source, text))
+                positions.append((c, p))
+        document_items = [_Item("document", name, text) for _, name, text in documents]
+
+        total_before = fixed_tokens + sum(self.estimate_tokens(item.text) for item in items + document_items)
+        report = {"max_input_tokens": self.max_input_tokens, "tokens_before": total_before, "tokens_after": total_before, "items": []}
+        if total_before <= self.max_input_tokens:
+            return report
+
+        # Newest upstream outputs first, then documents; verbatim items are reserved up front
+        ranked = list(reversed(items)) + document_items
+        remaining = self.max_input_tokens - fixed_tokens
+        remaining -= sum(self.estimate_tokens(item.text) for item in ranked if self._is_verbatim(item))
+        reducible = [item for item in ranked if not self._is_verbatim(item)]
+        note_tokens = self.estimate_tokens(OMITTED_NOTE)
+        for i, item in enumerate(reducible):
+            tokens = self.estimate_tokens(item.text)
+            if tokens <= remaining:
+                remaining -= tokens
+                continue
+            # Leave room for the notes that replace the items after this one if they are dropped
+            available = remaining - note_tokens * (len(reducible) - i - 1)
+            if available >= self.min_item_tokens:
+                item.result = self._reduce(item.text, available)
+                item.action = "summarized" if self.overflow == "summarize" else "truncated"
+            else:
+                item.result = OMITTED_NOTE
+                item.action = "dropped"
+            remaining -= self.estimate_tokens(item.result)
+            report["items"].append({
+                "kind": item.kind,
+                "source": item.source,
+                "action": item.action,
+                "tokens_before": tokens,
+                "tokens_after": self.estimate_tokens(item.result),
+            })
+
+        # Write the reduced items back, without touching the contents shared with the session
+        contents = list(llm_request.contents)
+        for item, (c, p) in zip(items, positions):
+            if item.action == "verbatim":
+                continue
+            content = contents[c] = contents[c].model_copy(update={"parts": list(contents[c].parts)})
+            prefix = f"[{item.source}] said: " if content.role != "model" or item.source != agent_name else ""
+            content.parts[p] = types.Part(text=prefix + item.result)
+        llm_request.contents = contents
+        if documents:
+            reduced = "".join(
+                header + item.result + ("\n\n" if i + 1 < len(documents) else "")
+                for i, ((header, _, _), item) in enumerate(zip(documents, document_items))
+            )
+            config.system_instruction = prompt + documents_header + reduced + suffix
+
+        report["tokens_after"] = total_before - sum(entry["tokens_before"] - entry["tokens_after"] for entry in report["items"])
+        for entry in report["items"]:
+            logger.info(f"✂️ {agent_name}: {entry['action']} {entry['kind']} '{entry['source']}' ({entry['tokens_before']} -> {entry['tokens_after']} tokens)")
+        logger.info(f"✂️ {agent_name}: context trimmed from ~{report['tokens_before']} to ~{report['tokens_after']} tokens (budget {self.max_input_tokens})")
+        return report
@@ -0,0 +1,370 @@
+"""Process pool for converting input documents in parallel.
+
+The PDF, DOCX, PPTX and XLSX converters are CPU-bound pure Python, so
+converting several documents in threads still uses one core. ConversionPool
+runs DocumentReader conversions in a pool of spawned worker processes:
+
+- results are returned in the requested order, with an error per file
+  instead of failing the whole batch
+- each conversion has a timeout; a worker stops a conversion that runs past
+  it, and a worker that doesn't stop is killed with the pool
+- a crashing worker (e.g. a converter segfaulting on a malformed file) breaks
+  only its own conversion: the files that were in flight with it are retried
+  one at a time in a fresh pool, so only the file that crashes again fails
+- batches of concurrent callers share the workers instead of queueing behind
+  each other; a conversion interrupted because another batch's stuck worker
+  was killed is retried
+
+Workers write the converted markdown to the shared on-disk cache of the
+DocumentReader, so later reads in any process don't convert again.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker gets past the timeout to stop a conversion before the pool is killed
+KILL_GRACE_SECONDS = 5.0
+# Seconds new workers get to start (spawn and import the converters) before conversion deadlines run
+WORKER_START_SECONDS = 30.0
+# Seconds between checks for workers freed by other batches while this batch's conversions run
+SLOT_POLL_SECONDS = 0.2
+
+# Process-wide pool shared by all DocumentReaders
+_pool: Optional["ConversionPool"] = None
+_pool_lock = threading.Lock()
+
+
+class ConversionPoolError(Exception):
+    """Custom exception for conversion pool errors."""
+    pass
+
+
+class ConversionTimeout(BaseException):
+    """Raised in a worker when a conversion exceeds its timeout.
+
+    Derived from BaseException so converters catching Exception (e.g. per
+    PDF page) don't swallow it.
+    """
+    pass
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting one document.
+
+    Attributes:
+        filename: Document name in the input directory
+        content: Converted markdown (empty on error or for missing documents)
+        error: Error message if the conversion failed
+        seconds: Time the conversion took in the worker
+    """
+    filename: str
+    content: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+def _raise_timeout(signum, frame):
+    raise ConversionTimeout()
+
+
+def _convert_in_worker(input_directory: str, filename: str, timeout: Optional[float]) -> Tuple[str, float]:
+    """Convert a document in a worker process.
+
+    Args:
+        input_directory: Directory containing input documents
+        filename: Document name
+        timeout: Seconds after which the conversion is interrupted, or None
+
+    Returns:
+        Tuple of (markdown content, conversion seconds)
+    """
+    # Try absolute imports first (for module execution), then relative imports (for direct execution)
+    try:
+        from backend.core.utils.document_reader import DocumentReader
+    except ImportError:
+        # If absolute imports fail, try relative imports for direct execution
+        from .document_reader import DocumentReader
+
+    started = time.perf_counter()
+    if timeout:
+        # Tasks run in the worker's main thread, so the timer interrupts pure-Python converters
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        content = DocumentReader(Path(input_directory)).read_document(filename)
+    except ConversionTimeout:
+        raise ConversionPoolError(f"Conversion of {filename} timed out after {timeout:g}s") from None
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return content or "", time.perf_counter() - started
+
+
+class ConversionPool:
+    """Pool of worker processes converting documents with timeouts and crash isolation."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize the pool; worker processes are started on first use.
+
+        Args:
+            max_workers: Number of worker processes (defaults to the number of CPUs)
+        """
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started = 0.0
+        # Guards starting and discarding the workers; batches convert concurrently
+        self._lock = threading.RLock()
+        # Workers taken by the conversions of all batches; a conversion retried in isolation takes all of them
+        self._slots = threading.Condition()
+        self._busy = 0
+        # Workers killed on purpose, whose other conversions are retried instead of blamed for a crash
+        self._killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._stats_lock = threading.Lock()
+        self.conversions = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.crashes = 0
+
+    def _start(self) -> ProcessPoolExecutor:
+        """Start the worker processes."""
+        if multiprocessing.current_process().daemon:
+            # Daemonic processes (e.g. workflow workers) are not allowed to have children
+            raise ConversionPoolError("Cannot start conversion workers from a daemonic process")
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._started = time.monotonic()
+        return self._executor
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        """Get the time after which a conversion submitted now is killed."""
+        if not timeout:
+            return None
+        return max(time.monotonic(), self._started + WORKER_START_SECONDS) + timeout + KILL_GRACE_SECONDS
+
+    def _submit(self, input_directory: Path, filename: str, timeout: Optional[float]) -> Tuple[Future, ProcessPoolExecutor, Optional[float]]:
+        """Submit a conversion to the current workers.
+
+        Returns:
+            Tuple of (future, executor running it, kill deadline)
+        """
+        with self._lock:
+            executor = self._start()
+            try:
+                future = executor.submit(_convert_in_worker, str(input_directory), filename, timeout)
+            except BrokenProcessPool:
+                # A worker of another batch crashed and its batch hasn't replaced the workers yet
+                self._discard(executor)
+                executor = self._start()
+                future = executor.submit(_convert_in_worker, str(input_directory), filename, timeout)
+            return future, executor, self._deadline(timeout)
+
+    def _discard(self, executor: Optional[ProcessPoolExecutor] = None, kill: bool = False) -> None:
+        """Drop workers; the next conversion starts new ones.
+
+        Args:
+            executor: Workers to drop (defaults to the current ones); the
+                      current workers are kept if they were already replaced
+            kill: Whether to kill the workers, e.g. because one is stuck in a conversion
+        """
+        with self._lock:
+            if executor is None:
+                executor = self._executor
+            if executor is None:
+                return
+            if self._executor is executor:
+                self._executor = None
+            if kill:
+                self._killed.add(executor)
+        # ProcessPoolExecutor has no public way to stop a busy worker before Python 3.14
+        processes = list((getattr(executor, "_processes", None) or {}).values()) if kill else []
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+    def _acquire(self, slots: int, timeout: Optional[float]) -> bool:
+        """Take worker slots, waiting up to timeout seconds (None waits indefinitely)."""
+        with self._slots:
+            if not self._slots.wait_for(lambda: self._busy + slots <= self.max_workers, timeout):
+                return False
+            self._busy += slots
+            return True
+
+    def _release(self, slots: int) -> None:
+        with self._slots:
+            self._busy -= slots
+            self._slots.notify_all()
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def convert(
+        self,
+        input_directory: Path,
+        filenames: List[str],
+        timeout: Optional[float] = None
+    ) -> List[ConversionResult]:
+        """Convert documents in parallel.
+
+        Batches of several callers share the workers: each conversion takes
+        one worker slot, and a conversion retried in isolation waits for all
+        of them.
+
+        Args:
+            input_directory: Directory containing the documents
+            filenames: Document names
+            timeout: Seconds each conversion may take, or None for no limit
+
+        Returns:
+            One result per file, in the order of ``filenames``
+
+        Raises:
+            ConversionPoolError: If worker processes cannot be started in this process
+        """
+        results: List[Optional[ConversionResult]] = [None] * len(filenames)
+        pending = deque(range(len(filenames)))
+        # Files that were in flight when a worker crashed, retried one at a time
+        isolated: deque = deque()
+        # Future -> (file index, kill deadline, whether it runs alone, executor running it)
+        running: Dict = {}
+
+        def fail(index: int, message: str) -> None:
+            self._count("failures")
+            results[index] = ConversionResult(filenames[index], error=message)
+            logger.warning(f"⚠️ Conversion of {filenames[index]} failed: {message}")
+
+        def submit(index: int, alone: bool) -> None:
+            try:
+                future, executor, deadline = self._submit(input_directory, filenames[index], timeout)
+            except BaseException:
+                self._release(self.max_workers if alone else 1)
+                raise
+            running[future] = (index, deadline, alone, executor)
+
+        def release(future: Future) -> Tuple[int, bool, ProcessPoolExecutor]:
+            index, _, alone, executor = running.pop(future)
+            self._release(self.max_workers if alone else 1)
+            return index, alone, executor
+
+        try:
+            while pending or isolated or running:
+                if isolated:
+                    if not running and self._acquire(self.max_workers, None):
+                        submit(isolated.popleft(), True)
+                else:
+                    # Wait for a worker only when nothing of this batch is running
+                    while pending and len(running) < self.max_workers and self._acquire(1, 0 if running else None):
+                        submit(pending.popleft(), False)
+
+                deadlines = [deadline for _, deadline, _, _ in running.values() if deadline is not None]
+                wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                if pending and not isolated:
+                    # Workers freed by other batches are picked up between completions
+                    wait_timeout = min(wait_timeout, SLOT_POLL_SECONDS) if wait_timeout is not None else SLOT_POLL_SECONDS
+                done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+                broken = set()
+                for future in done:
+                    index, alone, executor = release(future)
+                    try:
+                        content, seconds = future.result()
+                    except (BrokenProcessPool, CancelledError):
+                        if executor in self._killed or future.cancelled():
+                            # Stopped with workers killed over a timeout, not by this file
+                            (isolated if alone else pending).appendleft(index)
+                            continue
+                        broken.add(executor)
+                        if alone:
+                            self._count("crashes")
+                            fail(index, "Conversion worker crashed")
+                        else:
+                            # The conversions in flight died with the workers; retry them in isolation
+                            isolated.append(index)
+                        continue
+                    except ConversionPoolError as e:
+                        self._count("timeouts")
+                        fail(index, str(e))
+                        continue
+                    except Exception as e:
+                        fail(index, str(e))
+                        continue
+                    self._count("conversions")
+                    results[index] = ConversionResult(filenames[index], content, None, seconds)
+
+                if broken:
+                    for executor in broken:
+                        self._discard(executor)
+                    logger.warning(f"⚠️ A conversion worker crashed, retrying {len(isolated)} documents one at a time")
+                    continue
+
+                now = time.monotonic()
+                expired = [future for future, (_, deadline, _, _) in running.items() if deadline is not None and now >= deadline]
+                for future in expired:
+                    index, _, executor = release(future)
+                    self._count("timeouts")
+                    fail(index, f"Conversion of {filenames[index]} timed out after {timeout:g}s")
+                    # Killing the stuck worker takes its pool down; the conversions it interrupts are retried
+                    self._discard(executor, kill=True)
+        finally:
+            for future in list(running):
+                future.cancel()
+                release(future)
+
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        self._discard()
+
+    def stats(self) -> Dict[str, int]:
+        """Summarize pool activity.
+
+        Returns:
+            Dictionary with worker count, conversions, failures, timeouts and crashes
+        """
+        with self._stats_lock:
+            return {
+                "max_workers": self.max_workers,
+                "conversions": self.conversions,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+            }
+
+
+def get_conversion_pool(max_workers: Optional[int] = None) -> ConversionPool:
+    """Get the process-wide conversion pool, creating it on first use.
+
+    Args:
+        max_workers: Number of worker processes of a new pool (defaults to the number of CPUs)
+
+    Returns:
+        The conversion pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConversionPool(max_workers)
+            atexit.register(_pool.shutdown)
+        return _pool
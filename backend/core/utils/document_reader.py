@@ -2,12 +2,23 @@
 
 This module provides functionality to read PDF, DOCX, TXT, Markdown, CSV, and PPTX files
 and convert their content to markdown format for use in agent workflows.
+
+Conversions are cached by the content hash of the source file and the reader
+version: on disk as ``input_markdown/<name>.md`` with a ``.meta.json`` sidecar
+recording the hash, and in a process-wide LRU of converted markdown capped in
+bytes. A replaced source file is converted again; an unchanged one (same size
+and mtime, or same content) is never reparsed.
 """
 
 import csv
+import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 try:
     import PyPDF2
@@ -29,14 +40,120 @@ try:
 except ImportError:
     pd = None
 
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.utils.conversion_pool import ConversionPoolError, ConversionResult, get_conversion_pool
+    from backend.core.utils.file_utils import file_digest
+    from backend.core.utils.metrics import DOCUMENT_CONVERSION
+except ImportError:
+    from .conversion_pool import ConversionPoolError, ConversionResult, get_conversion_pool
+    from .file_utils import file_digest
+    from .metrics import DOCUMENT_CONVERSION
+
 logger = logging.getLogger(__name__)
 
+# Bumped whenever a conversion changes, so markdown converted by an older reader is redone
+READER_VERSION = 1
+
+# Default byte cap of the in-process cache of converted markdown
+DEFAULT_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+
+# Suffix of the sidecar recording what a cached markdown file was converted from
+META_SUFFIX = ".meta.json"
+
 
 class DocumentReaderError(Exception):
     """Custom exception for document reading errors."""
     pass
 
 
+class ConversionCache:
+    """In-process LRU of converted markdown, keyed by source content and bounded in bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_MAX_BYTES):
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size of the cached markdown (UTF-8 encoded)
+        """
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.conversions = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get converted markdown, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return entry[0]
+
+    def put(self, key: str, content: str) -> None:
+        """Cache converted markdown, evicting the least recently used entries beyond the byte cap."""
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (content, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def record(self, counter: str) -> None:
+        """Count a disk hit, conversion or invalidation."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self) -> None:
+        """Drop all cached markdown."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize cache usage.
+
+        Returns:
+            Dictionary with the cached entries and bytes, hits, conversions and invalidations
+        """
+        with self._lock:
+            reads = self.memory_hits + self.disk_hits + self.conversions
+            return {
+                "reader_version": READER_VERSION,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "memory_max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "conversions": self.conversions,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / reads, 3) if reads else 0.0,
+            }
+
+
+# Shared by all DocumentReaders of the process
+_conversion_cache = ConversionCache()
+
+
+def document_cache_stats() -> Dict[str, Any]:
+    """Summarize the process-wide document conversion cache."""
+    return _conversion_cache.stats()
+
+
 class DocumentReader:
     """Reader class for multiple document formats with markdown output.
     
@@ -50,13 +167,15 @@ class DocumentReader:
     - PowerPoint (.pptx)
     """
     
-    def __init__(self, input_directory: Optional[Path] = None):
+    def __init__(self, input_directory: Optional[Path] = None, cache: Optional[ConversionCache] = None):
         """Initialize the document reader.
         
         Args:
             input_directory: Directory containing input documents.
                            Defaults to 'backend/input' if not provided.
+            cache: In-process cache of converted markdown (defaults to the process-wide cache)
         """
+        self.cache = cache if cache is not None else _conversion_cache
         if input_directory is None:
             # Default to backend/input directory
             self.input_directory = Path(__file__).parent.parent.parent / "input"
@@ -73,11 +192,13 @@ class DocumentReader:
         logger.info(f"DocumentReader initialized with input directory: {self.input_directory}")
         logger.info(f"Markdown output directory: {self.input_markdown_directory}")
     
-    def read_document(self, filename: str) -> str:
+    def read_document(self, filename: str, convert: bool = True) -> Optional[str]:
         """Read a document and return its content as markdown.
         
         Args:
             filename: Name of the file to read (with extension)
+            convert: Whether to convert the document if no cached markdown is
+                     valid; with False, None is returned instead
             
         Returns:
             Document content as markdown string. Empty string if file not found.
@@ -90,27 +211,53 @@ class DocumentReader:
         
         file_path = self.input_directory / filename
         
-        if not file_path.exists():
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
             logger.warning(f"Document not found: {file_path}")
             return ""
         
-        # Check if markdown version already exists
-        # Use original filename with .md extension to avoid conflicts between different formats
+        # Markdown versions are named after the original file to avoid conflicts between different formats
         markdown_filename = file_path.name + ".md"
         markdown_path = self.input_markdown_directory / markdown_filename
+        meta_path = markdown_path.with_name(markdown_filename + META_SUFFIX)
+        recorded = self._read_meta(meta_path)
+        
+        try:
+            known = (recorded.get("size"), recorded.get("mtime_ns"), recorded.get("sha256")) if recorded else None
+            sha = file_digest(file_path, stat, known)
+        except OSError as e:
+            raise DocumentReaderError(f"Error reading document {filename}: {e}") from e
+        cache_key = f"{READER_VERSION}:{file_path.name}:{sha}"
+        
+        content = self.cache.get(cache_key)
+        if content is not None:
+            logger.debug(f"Using in-memory markdown version of {filename}")
+            return content
         
-        if markdown_path.exists():
-            # Return existing markdown version
-            logger.info(f"Using cached markdown version: {markdown_path}")
+        if recorded and recorded.get("sha256") == sha and recorded.get("reader_version") == READER_VERSION:
             try:
                 with open(markdown_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception as e:
+                    content = f.read()
+                logger.info(f"Using cached markdown version: {markdown_path}")
+                self.cache.record("disk_hits")
+                self.cache.put(cache_key, content)
+                if (recorded.get("size"), recorded.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                    # Same content under a new mtime; record it to keep the fast path
+                    self._write_meta(meta_path, sha, stat)
+                return content
+            except OSError as e:
                 logger.warning(f"Failed to read cached markdown, regenerating: {e}")
+        elif markdown_path.exists():
+            logger.info(f"♻️ Cached markdown of {filename} is stale, converting again")
+            self.cache.record("invalidations")
+        if not convert:
+            return None
         
         try:
             # Determine file type by extension and read content
             extension = file_path.suffix.lower()
+            started = time.perf_counter()
             
             if extension == '.pdf':
                 content = self._read_pdf(file_path)
@@ -130,10 +277,14 @@ class DocumentReader:
                 logger.warning(f"Unsupported file type: {extension}")
                 logger.info("Supported formats: .pdf, .docx, .txt, .md, .csv, .xlsx, .pptx")
                 return ""
+            DOCUMENT_CONVERSION.observe(time.perf_counter() - started, extension.lstrip('.'))
+            self.cache.record("conversions")
             
             # Save markdown version to input_markdown directory
             if content:
                 self._save_markdown_version(content, markdown_path, filename)
+                self._write_meta(meta_path, sha, stat)
+                self.cache.put(cache_key, content)
             
             return content
                 
@@ -142,11 +293,20 @@ class DocumentReader:
             logger.error(error_msg)
             raise DocumentReaderError(error_msg) from e
     
-    def read_multiple_documents(self, filenames: List[str]) -> Dict[str, str]:
+    def read_multiple_documents(
+        self,
+        filenames: List[str],
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, str]:
         """Read multiple documents and return their content as a dictionary.
         
         Args:
             filenames: List of filenames to read
+            parallel: Convert documents in a process pool (see convert_documents)
+            max_workers: Number of conversion processes (defaults to the number of CPUs)
+            timeout: Seconds each parallel conversion may take
             
         Returns:
             Dictionary mapping filename to content. Failed reads return empty string.
@@ -158,23 +318,94 @@ class DocumentReader:
         
         logger.info(f"Reading {len(filenames)} documents: {filenames}")
         
-        for filename in filenames:
-            try:
-                content = self.read_document(filename)
-                results[filename] = content
-                if content:
-                    logger.debug(f"Successfully read {filename}: {len(content)} characters")
-                else:
-                    logger.warning(f"No content returned for {filename}")
-            except Exception as e:
-                logger.error(f"Failed to read {filename}: {e}")
-                results[filename] = ""
+        for result in self.convert_documents(filenames, parallel, max_workers, timeout):
+            results[result.filename] = result.content
+            if result.error:
+                logger.error(f"Failed to read {result.filename}: {result.error}")
+            elif result.content:
+                logger.debug(f"Successfully read {result.filename}: {len(result.content)} characters")
+            else:
+                logger.warning(f"No content returned for {result.filename}")
         
         successful_reads = sum(1 for content in results.values() if content)
         logger.info(f"Successfully read {successful_reads}/{len(filenames)} documents")
         
         return results
     
+    def convert_documents(
+        self,
+        filenames: List[str],
+        parallel: bool = True,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[ConversionResult]:
+        """Read documents, converting the ones without valid cached markdown.
+        
+        Cached documents are read right away. With ``parallel`` and more than
+        one document to convert, conversions run in the process-wide
+        ConversionPool, one CPU per document; otherwise (or when worker
+        processes can't be started here) they run one after another.
+        
+        Args:
+            filenames: Names of the documents to read
+            parallel: Whether to convert documents in worker processes
+            max_workers: Number of conversion processes (defaults to the number of CPUs)
+            timeout: Seconds each parallel conversion may take, or None for no limit
+            
+        Returns:
+            One result per document in the order of ``filenames``, with an error
+            message instead of content for documents that failed
+        """
+        results: List[Optional[ConversionResult]] = [None] * len(filenames)
+        to_convert = []
+        for i, filename in enumerate(filenames):
+            try:
+                content = self.read_document(filename, convert=False)
+            except DocumentReaderError as e:
+                results[i] = ConversionResult(filename, error=str(e))
+                continue
+            if content is None:
+                to_convert.append(i)
+            else:
+                results[i] = ConversionResult(filename, content)
+        
+        converted = None
+        if parallel and len(to_convert) > 1:
+            try:
+                pool = get_conversion_pool(max_workers)
+                logger.info(f"Converting {len(to_convert)} documents in {min(pool.max_workers, len(to_convert))} processes")
+                converted = pool.convert(self.input_directory, [filenames[i] for i in to_convert], timeout)
+            except ConversionPoolError as e:
+                logger.warning(f"⚠️ Parallel conversion unavailable, converting in this process: {e}")
+        
+        if converted is not None:
+            for i, result in zip(to_convert, converted):
+                if result.error is None:
+                    # The worker saved the markdown to disk; keep it in this process's cache too
+                    self.cache.record("conversions")
+                    self._remember(filenames[i], result.content)
+                    DOCUMENT_CONVERSION.observe(result.seconds, Path(filenames[i]).suffix.lower().lstrip('.'))
+                results[i] = result
+        else:
+            for i in to_convert:
+                try:
+                    results[i] = ConversionResult(filenames[i], self.read_document(filenames[i]) or "")
+                except DocumentReaderError as e:
+                    results[i] = ConversionResult(filenames[i], error=str(e))
+        
+        return results
+    
+    def _remember(self, filename: str, content: str) -> None:
+        """Cache markdown converted elsewhere under the current version of its source."""
+        if not content:
+            return
+        file_path = self.input_directory / filename
+        try:
+            sha = file_digest(file_path)
+        except OSError:
+            return
+        self.cache.put(f"{READER_VERSION}:{file_path.name}:{sha}", content)
+    
     def _save_markdown_version(self, content: str, markdown_path: Path, original_filename: str) -> None:
         """Save markdown version of the document to input_markdown directory.
         
@@ -184,12 +415,48 @@ class DocumentReader:
             original_filename: Original filename for logging
         """
         try:
-            with open(markdown_path, 'w', encoding='utf-8') as f:
+            tmp_path = markdown_path.with_name(f".{markdown_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            os.replace(tmp_path, markdown_path)
             logger.info(f"Saved markdown version: {markdown_path} (from {original_filename})")
         except Exception as e:
             logger.warning(f"Failed to save markdown version for {original_filename}: {e}")
     
+    @staticmethod
+    def _read_meta(meta_path: Path) -> Optional[Dict[str, Any]]:
+        """Read the sidecar of a cached markdown file, or None if there is none."""
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _write_meta(meta_path: Path, sha: str, stat: os.stat_result) -> None:
+        """Record the source version a cached markdown file was converted from."""
+        meta = {
+            "sha256": sha,
+            "reader_version": READER_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        try:
+            tmp_path = meta_path.with_name(f".{meta_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            logger.warning(f"Failed to save conversion metadata {meta_path}: {e}")
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Summarize the reader's conversion cache.
+        
+        Returns:
+            Dictionary with the cached entries and bytes, hits, conversions and invalidations
+        """
+        return self.cache.stats()
+    
     def _read_pdf(self, file_path: Path) -> str:
         """Read PDF file and convert to markdown.
         
@@ -0,0 +1,207 @@
+"""Deterministic local model backend for benchmarking the orchestration layer.
+
+This module provides FakeLlm, an ADK model that answers every request locally
+with a canned or templated response after a simulated latency, and reports
+token usage like Gemini does. Responses, latencies and token counts are
+derived from a hash of the request and a seed, so repeated runs of the same
+workflow are reproducible while concurrent calls still see varied latencies.
+No API key, network access or quota is needed.
+
+The backend is selected in the gemini configuration of a workflow::
+
+    api_config:
+      provider: "fake"
+
+    fake_llm_config:
+      seed: 0
+      latency_ms:
+        distribution: "lognormal"   # fixed, uniform, normal or lognormal
+        mean: 800
+        stddev: 300
+        min: 50
+        max: 5000
+      ms_per_output_token: 0        # Added latency per generated token
+      output_tokens: 300            # Length of the generated filler text
+      responses:
+        default: "[{agent}] response {request_id}\\n\\n{filler}"
+        CodeGenerator: "```python\\nprint('hello')\\n```"
+
+Templates may use ``{agent}``, ``{model}``, ``{request_id}``, ``{prompt_tokens}``
+and ``{filler}``.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import re
+from typing import Any, AsyncGenerator, Dict, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.utils.response_cache import response_cache_key
+except ImportError:
+    # If absolute imports fail, try relative imports for direct execution
+    from .response_cache import response_cache_key
+
+logger = logging.getLogger(__name__)
+
+FAKE_PROVIDER = "fake"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+DEFAULT_RESPONSE_TEMPLATE = "[{agent}] response {request_id}\n\n{filler}"
+
+# ADK tells the model its agent name in the system instruction
+AGENT_NAME_PATTERN = re.compile(r'Your internal name is "([^"]+)"')
+FILLER_WORDS = (
+    "the", "agent", "workflow", "design", "module", "request", "output", "review", "code",
+    "function", "data", "test", "config", "result", "service", "model", "value", "step",
+    "and", "with", "for", "that", "each", "new", "is", "to", "of", "in", "a", "uses",
+)
+# Characters per token used to estimate token counts
+CHARS_PER_TOKEN = 4.0
+
+
+class FakeLlmError(Exception):
+    """Custom exception for fake model backend errors."""
+    pass
+
+
+class FakeLlm(BaseLlm):
+    """ADK model returning deterministic responses after a simulated latency.
+
+    Attributes:
+        model: Name of the model this backend stands in for
+        seed: Seed combined with the request hash for all random choices
+        latency_ms: Latency distribution (distribution, mean, stddev, min, max)
+        ms_per_output_token: Added latency per generated token
+        output_tokens: Number of tokens of the generated filler text
+        responses: Response templates keyed by agent name, with a "default" entry
+    """
+
+    seed: int = 0
+    latency_ms: Dict[str, Any] = {}
+    ms_per_output_token: float = 0.0
+    output_tokens: int = 300
+    responses: Dict[str, str] = {}
+
+    @classmethod
+    def supported_models(cls) -> list:
+        """Match no model names; FakeLlm instances are passed to agents directly."""
+        return []
+
+    def _latency_seconds(self, rng: random.Random, output_tokens: int) -> float:
+        """Draw the latency of one call from the configured distribution."""
+        settings = self.latency_ms or {}
+        distribution = settings.get("distribution", "fixed")
+        mean = float(settings.get("mean", 0))
+        stddev = float(settings.get("stddev", 0))
+        low = float(settings.get("min", 0))
+        high = float(settings.get("max", max(mean * 10, low)))
+
+        if distribution == "uniform":
+            value = rng.uniform(low, high)
+        elif distribution == "normal":
+            value = rng.gauss(mean, stddev)
+        elif distribution == "lognormal" and mean > 0:
+            # Parameters of the underlying normal distribution giving this mean and stddev
+            sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+            value = rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        else:
+            value = mean
+        value = min(max(value, low), high) + self.ms_per_output_token * output_tokens
+        return max(value, 0.0) / 1000
+
+    def _render(self, llm_request: LlmRequest, request_id: str, prompt_tokens: int, rng: random.Random) -> str:
+        """Render the response template of the requesting agent."""
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        match = AGENT_NAME_PATTERN.search(instruction) if isinstance(instruction, str) else None
+        agent = match.group(1) if match else "agent"
+        template = self.responses.get(agent) or self.responses.get("default") or DEFAULT_RESPONSE_TEMPLATE
+        filler = ""
+        if "{filler}" in template:
+            # About 1.3 tokens per filler word
+            filler = " ".join(rng.choice(FILLER_WORDS) for _ in range(int(self.output_tokens / 1.3)))
+        try:
+            return template.format(
+                agent=agent, model=self.model, request_id=request_id,
+                prompt_tokens=prompt_tokens, filler=filler
+            )
+        except (KeyError, IndexError, ValueError) as e:
+            raise FakeLlmError(f"Invalid fake response template for {agent}: {e}")
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Answer a request with a templated response after the simulated latency.
+
+        Args:
+            llm_request: Request that would be sent to the model
+            stream: Ignored; the response is always returned in one piece
+
+        Yields:
+            One complete response with usage metadata
+        """
+        self._maybe_append_user_content(llm_request)
+        request_hash = response_cache_key(llm_request)
+        rng = random.Random(f"{self.seed}:{request_hash}")
+
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        prompt_chars = len(instruction) if isinstance(instruction, str) else 0
+        prompt_chars += sum(len(part.text or "") for content in llm_request.contents for part in content.parts or [])
+        prompt_tokens = int(prompt_chars / CHARS_PER_TOKEN + 0.5)
+
+        text = self._render(llm_request, request_hash[:12], prompt_tokens, rng)
+        output_tokens = int(len(text) / CHARS_PER_TOKEN + 0.5)
+        await asyncio.sleep(self._latency_seconds(rng, output_tokens))
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens
+            )
+        )
+
+
+def fake_llm_settings(gemini_config_loader: Any) -> Optional[Dict[str, Any]]:
+    """Get the fake backend settings selected by a gemini configuration.
+
+    Args:
+        gemini_config_loader: ConfigLoader of the gemini configuration
+
+    Returns:
+        Settings for FakeLlm, or None if the configuration uses a real provider
+
+    Raises:
+        FakeLlmError: If the latency distribution is unknown
+    """
+    if gemini_config_loader is None or gemini_config_loader.get_value("api_config.provider", "gemini") != FAKE_PROVIDER:
+        return None
+    settings = dict(gemini_config_loader.get_value("fake_llm_config", None) or {})
+    distribution = (settings.get("latency_ms") or {}).get("distribution", "fixed")
+    if distribution not in LATENCY_DISTRIBUTIONS:
+        raise FakeLlmError(f"Unknown latency distribution '{distribution}', expected one of {LATENCY_DISTRIBUTIONS}")
+    return {key: value for key, value in settings.items() if key in FakeLlm.model_fields and key != "model"}
+
+
+def resolve_model(model: Optional[str], gemini_config_loader: Any) -> Union[str, BaseLlm, None]:
+    """Get the model to give an agent under a gemini configuration.
+
+    Args:
+        model: Configured model name
+        gemini_config_loader: ConfigLoader of the gemini configuration
+
+    Returns:
+        The model name for the Gemini provider, or a FakeLlm standing in for it
+    """
+    settings = fake_llm_settings(gemini_config_loader)
+    if settings is None or not model:
+        return model
+    logger.debug(f"Using fake model backend for {model}")
+    return FakeLlm(model=model, **settings)
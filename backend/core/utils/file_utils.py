@@ -1,7 +1,13 @@
 """Utility functions for file operations."""
+import hashlib
 import os
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Dict, Optional, Tuple, Union
+
+# Content digests of files, keyed by path and reused while size and mtime are unchanged
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+_file_digests_lock = threading.Lock()
 
 def ensure_directory_exists(directory: Union[str, Path]) -> None:
     """Ensure that a directory exists, creating it if necessary.
@@ -17,3 +23,44 @@ def ensure_directory_exists(directory: Union[str, Path]) -> None:
         path.mkdir(parents=True, exist_ok=True)
     except Exception as e:
         raise OSError(f"Failed to create directory {directory}: {str(e)}") from e
+
+def file_digest(
+    path: Union[str, Path],
+    stat: Optional[os.stat_result] = None,
+    known: Optional[Tuple[int, int, str]] = None
+) -> str:
+    """Get the SHA-256 of a file, hashing it only when its size or mtime changed.
+    
+    Digests are remembered for the process, so every caller hashing the same
+    file (e.g. input documents for cache keys and for conversion) shares one pass.
+    
+    Args:
+        path: File to hash
+        stat: Current stat of the file (taken if not given)
+        known: (size, mtime_ns, sha256) recorded elsewhere, e.g. in a sidecar,
+               used instead of hashing if the size and mtime still match
+        
+    Returns:
+        Hex SHA-256 digest of the file content
+        
+    Raises:
+        OSError: If the file cannot be read
+    """
+    if stat is None:
+        stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        cached = _file_digests.get(str(path))
+    if cached and cached[:2] == version:
+        return cached[2]
+    if known and tuple(known[:2]) == version and known[2]:
+        sha = known[2]
+    else:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        sha = hasher.hexdigest()
+    with _file_digests_lock:
+        _file_digests[str(path)] = (*version, sha)
+    return sha
@@ -0,0 +1,443 @@
+"""Lightweight Prometheus-compatible metrics.
+
+This module provides counters, gauges and histograms that render in the
+Prometheus text exposition format, plus the process-wide metrics recorded by
+the workflow system. Recording a sample is a dictionary update under a lock,
+so metrics can be updated on the hot path of model callbacks.
+
+Worker processes keep their own registry and periodically send an ``export()``
+snapshot to the API process, which merges it into its own output with
+``merge_remote``. API processes serving the same port exchange their totals
+(``export_all()``, merged with ``merge_peers``) so every scrape reports the
+whole server.
+"""
+
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+RUN_DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+
+class MetricsError(Exception):
+    """Custom exception for metrics errors."""
+    pass
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the exposition format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set, e.g. ``{agent="a",model="m"}``."""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    """Base class of all metric types."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labelvalues: Sequence[Any]) -> LabelValues:
+        """Validate label values and turn them into a sample key."""
+        if len(labelvalues) != len(self.labelnames):
+            raise MetricsError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {len(labelvalues)} values"
+            )
+        return tuple("" if v is None else str(v) for v in labelvalues)
+
+    @abstractmethod
+    def export(self) -> Dict[LabelValues, Any]:
+        """Copy the samples of this metric for transport to another process."""
+
+    @abstractmethod
+    def merged(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> Dict[LabelValues, Any]:
+        """Combine the samples of this process with samples exported by other processes."""
+
+    @abstractmethod
+    def render(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> List[str]:
+        """Render this metric, adding samples exported by other processes."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labelvalues: Any) -> None:
+        """Increase the counter.
+
+        Args:
+            amount: Non-negative amount to add
+            *labelvalues: Label values in the order of ``labelnames``
+        """
+        if amount < 0:
+            raise MetricsError(f"Counter {self.name} cannot decrease")
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues: Any) -> float:
+        """Get the current value for a label set."""
+        with self._lock:
+            return self._values.get(self._key(labelvalues), 0.0)
+
+    def export(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def merged(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> Dict[LabelValues, Any]:
+        merged = self.export()
+        for samples in remote:
+            for key, value in samples.items():
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def render(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.merged(remote).items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labelvalues: Any) -> None:
+        """Set the gauge for a label set."""
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, *labelvalues: Any) -> None:
+        """Increase (or with a negative amount decrease) the gauge."""
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Compute the (unlabelled) gauge by calling ``function`` at scrape time."""
+        self._function = function
+
+    def export(self) -> Dict[LabelValues, Any]:
+        # Gauges describe the state of a worker's parent process, not of the worker
+        return {}
+
+    def merged(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> Dict[LabelValues, Any]:
+        # Only API processes exchange gauges; they add up (queued and running workflows, subscribers)
+        if self._function is not None:
+            try:
+                merged = {(): float(self._function())}
+            except Exception:
+                merged = {}
+        else:
+            with self._lock:
+                merged = dict(self._values)
+        for samples in remote:
+            for key, value in samples.items():
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def render(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.merged(remote).items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        """Record an observation.
+
+        Args:
+            value: Observed value, e.g. seconds
+            *labelvalues: Label values in the order of ``labelnames``
+        """
+        key = self._key(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            sample[0][index] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def count(self, *labelvalues: Any) -> int:
+        """Get the number of observations for a label set."""
+        with self._lock:
+            sample = self._values.get(self._key(labelvalues))
+            return sample[2] if sample else 0
+
+    def export(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            return {key: [list(s[0]), s[1], s[2]] for key, s in self._values.items()}
+
+    def merged(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> Dict[LabelValues, Any]:
+        merged = self.export()
+        for samples in remote:
+            for key, (counts, total, count) in samples.items():
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                sample = merged.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                sample[0] = [a + b for a, b in zip(sample[0], counts)]
+                sample[1] += total
+                sample[2] += count
+        return merged
+
+    def render(self, remote: Sequence[Dict[LabelValues, Any]] = ()) -> List[str]:
+        lines = []
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total, count) in sorted(self.merged(remote).items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = _format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels, key + (le,))} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._remote: Dict[str, Dict[str, Dict[LabelValues, Any]]] = {}
+        self._retired: List[Dict[str, Dict[LabelValues, Any]]] = []
+        # Latest totals of the other API processes serving the same port
+        self._peers: Dict[str, Dict[str, Dict[LabelValues, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise MetricsError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def export(self) -> Dict[str, Dict[LabelValues, Any]]:
+        """Snapshot counters and histograms for transport to another process.
+
+        Returns:
+            Picklable mapping of metric name to samples
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.export() for metric in metrics if not isinstance(metric, Gauge)}
+
+    def merge_remote(self, source: str, snapshot: Dict[str, Dict[LabelValues, Any]]) -> None:
+        """Replace the latest snapshot received from another process.
+
+        Args:
+            source: Stable name of the sending process, e.g. ``worker-0``
+            snapshot: Result of the sender's ``export()``
+        """
+        with self._lock:
+            self._remote[source] = snapshot
+
+    def retire_remote(self, source: str) -> None:
+        """Keep the last snapshot of a process that exited so totals never decrease.
+
+        Args:
+            source: Name the process used with ``merge_remote``
+        """
+        with self._lock:
+            snapshot = self._remote.pop(source, None)
+            if snapshot:
+                self._retired.append(snapshot)
+
+    def export_all(self) -> Dict[str, Dict[LabelValues, Any]]:
+        """Snapshot the totals of this process and its workers for the other API processes.
+
+        Unlike ``export()``, gauges are included and the snapshots merged
+        from workers are added in; snapshots of peers are not.
+
+        Returns:
+            Picklable mapping of metric name to samples
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            snapshots = list(self._remote.values()) + list(self._retired)
+        return {
+            metric.name: metric.merged([s[metric.name] for s in snapshots if metric.name in s])
+            for metric in metrics
+        }
+
+    def merge_peers(self, peers: Dict[str, Dict[str, Dict[LabelValues, Any]]]) -> None:
+        """Replace the totals received from the other API processes.
+
+        Args:
+            peers: ``export_all()`` snapshot of every other process, by process name
+        """
+        with self._lock:
+            self._peers = dict(peers)
+
+    def is_gauge(self, name: str) -> bool:
+        """Whether a metric name belongs to a registered gauge."""
+        with self._lock:
+            return isinstance(self._metrics.get(name), Gauge)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text ending with a newline
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            snapshots = list(self._remote.values()) + list(self._retired) + list(self._peers.values())
+
+        lines = []
+        for metric in metrics:
+            remote = [s[metric.name] for s in snapshots if metric.name in s]
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render(remote))
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the metrics recorded by the workflow system
+registry = MetricsRegistry()
+
+LLM_LATENCY = registry.histogram(
+    "workflow_llm_request_duration_seconds",
+    "Latency of model calls by agent and model",
+    ("agent", "model"),
+    LLM_LATENCY_BUCKETS
+)
+LLM_TOKENS = registry.counter(
+    "workflow_llm_tokens_total",
+    "Tokens used by model calls by agent, model and kind (prompt or completion)",
+    ("agent", "model", "kind")
+)
+LLM_CACHE = registry.counter(
+    "workflow_llm_cache_requests_total",
+    "Model calls looked up in the response cache by agent and result (memory_hit, disk_hit or miss)",
+    ("agent", "result")
+)
+LLM_ERRORS = registry.counter(
+    "workflow_llm_errors_total",
+    "Model calls that returned an error by agent and model",
+    ("agent", "model")
+)
+WORKFLOW_RUNS = registry.counter(
+    "workflow_runs_total",
+    "Finished workflow runs by outcome",
+    ("outcome",)
+)
+WORKFLOW_DURATION = registry.histogram(
+    "workflow_run_duration_seconds",
+    "Workflow run duration by outcome",
+    ("outcome",),
+    RUN_DURATION_BUCKETS
+)
+WORKFLOW_REUSED = registry.counter(
+    "workflow_reused_total",
+    "Submissions answered by an identical workflow by kind (in_flight or completed)",
+    ("kind",)
+)
+QUEUE_DEPTH = registry.gauge(
+    "workflow_queue_depth",
+    "Workflows waiting for a run slot"
+)
+ACTIVE_RUNS = registry.gauge(
+    "workflow_active_runs",
+    "Workflows currently running"
+)
+SSE_SUBSCRIBERS = registry.gauge(
+    "workflow_sse_subscribers",
+    "Connected progress stream subscribers"
+)
+DOCUMENT_CONVERSION = registry.histogram(
+    "document_conversion_duration_seconds",
+    "Time spent converting input documents to markdown by format",
+    ("format",)
+)
+ARTIFACT_WRITE = registry.histogram(
+    "artifact_write_duration_seconds",
+    "Time spent writing run artifacts by kind",
+    ("kind",)
+)
+ARTIFACT_QUEUE_DEPTH = registry.gauge(
+    "artifact_write_queue_depth",
+    "Run artifacts waiting for the background writer"
+)
@@ -0,0 +1,397 @@
+"""Memoization of model responses for flexible agents.
+
+This module provides LLMResponseCache, a two-tier cache of model responses:
+an in-process LRU bounded by entry count and size, backed by an on-disk store
+shared by all processes using the same directory. Entries are keyed by a hash
+of everything that determines a model call (model, rendered instruction,
+conversation contents carrying the upstream agents' outputs, tool set and
+generation parameters) and expire after a TTL. Model callbacks use
+get_async and put_async, which serve memory hits on the event loop and do
+all disk I/O of the shared tier in a worker thread.
+
+The cache is opt-in through the ``response_cache_config`` section of the
+workflow configuration::
+
+    response_cache_config:
+      enabled: true
+      ttl_seconds: 86400
+      memory_max_entries: 256
+      memory_max_mb: 64
+      disk_path: "backend/output/llm_cache"
+      disk_max_mb: 512
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+logger = logging.getLogger(__name__)
+
+# Project root, against which relative cache directories are resolved
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+
+DEFAULT_CACHE_DIR = "backend/output/llm_cache"
+
+# Bumped when the key or entry layout changes, so old entries are never read
+CACHE_FORMAT_VERSION = 1
+
+# Open caches, keyed by disk directory
+_caches: Dict[str, "LLMResponseCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def response_cache_key(llm_request: LlmRequest) -> str:
+    """Hash everything that determines the response to a model request.
+
+    Args:
+        llm_request: Request about to be sent to the model
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    config = llm_request.config
+    payload = {
+        "version": CACHE_FORMAT_VERSION,
+        "model": llm_request.model,
+        "instruction": config.system_instruction if config else None,
+        "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+        "tools": sorted(llm_request.tools_dict),
+        "parameters": config.model_dump(
+            mode="json", exclude_none=True, exclude={"system_instruction", "tools", "http_options"}
+        ) if config else None,
+    }
+    canonical = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU plus disk) cache of model responses with TTL."""
+
+    def __init__(
+        self,
+        disk_dir: Optional[Path] = None,
+        ttl_seconds: float = 86400,
+        memory_max_entries: int = 256,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        """Initialize the cache.
+
+        Args:
+            disk_dir: Directory of the on-disk tier, or None for memory only
+            ttl_seconds: Seconds an entry stays valid (0 never expires)
+            memory_max_entries: Maximum number of entries kept in memory
+            memory_max_bytes: Maximum total size of the entries kept in memory
+            disk_max_bytes: Maximum total size of the on-disk tier
+        """
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.ttl_seconds = float(ttl_seconds)
+        self.memory_max_entries = max(0, int(memory_max_entries))
+        self.memory_max_bytes = max(0, int(memory_max_bytes))
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._evicting = False
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*.json"))
+        logger.info(f"LLMResponseCache initialized (disk: {self.disk_dir or 'disabled'}, ttl: {self.ttl_seconds:.0f}s)")
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, stored_at: float, serialized: str) -> None:
+        """Put an entry into the memory tier and evict beyond its limits; caller holds the lock."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous[1])
+        if len(serialized) > self.memory_max_bytes or self.memory_max_entries == 0:
+            return
+        self._memory[key] = (stored_at, serialized)
+        self._memory_bytes += len(serialized)
+        while len(self._memory) > self.memory_max_entries or self._memory_bytes > self.memory_max_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key: str) -> Tuple[Optional[LlmResponse], str]:
+        """Look up a cached response.
+
+        Args:
+            key: Key from response_cache_key
+
+        Returns:
+            The cached response (None on a miss) and where it was found:
+            "memory_hit", "disk_hit" or "miss"
+        """
+        cached, expired = self._get_memory(key)
+        if cached is not None:
+            return cached, "memory_hit"
+        return self._get_disk(key, expired)
+
+    async def get_async(self, key: str) -> Tuple[Optional[LlmResponse], str]:
+        """Look up a cached response, reading the disk tier in a worker thread.
+
+        Args:
+            key: Key from response_cache_key
+
+        Returns:
+            Same as get
+        """
+        cached, expired = self._get_memory(key)
+        if cached is not None:
+            return cached, "memory_hit"
+        if not self.disk_dir:
+            return self._get_disk(key, expired)
+        return await asyncio.to_thread(self._get_disk, key, expired)
+
+    def put(self, key: str, llm_response: LlmResponse) -> None:
+        """Store a response in both tiers.
+
+        Args:
+            key: Key from response_cache_key
+            llm_response: Complete, successful model response
+        """
+        stored_at, serialized = self._put_memory(key, llm_response)
+        if self.disk_dir:
+            self._write_disk(key, stored_at, serialized)
+
+    async def put_async(self, key: str, llm_response: LlmResponse) -> None:
+        """Store a response in both tiers, writing the disk tier in a worker thread.
+
+        Args:
+            key: Key from response_cache_key
+            llm_response: Complete, successful model response
+        """
+        stored_at, serialized = self._put_memory(key, llm_response)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, stored_at, serialized)
+
+    def _get_memory(self, key: str) -> Tuple[Optional[LlmResponse], bool]:
+        """Look up the memory tier.
+
+        Returns:
+            The cached response or None, and whether the entry was found expired
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None, False
+            if self._expired(entry[0]):
+                self._memory.pop(key)
+                self._memory_bytes -= len(entry[1])
+                self.expirations += 1
+                return None, True
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            serialized = entry[1]
+        return LlmResponse.model_validate_json(serialized), False
+
+    def _get_disk(self, key: str, expired: bool) -> Tuple[Optional[LlmResponse], str]:
+        """Look up the disk tier after a memory miss and promote a hit into memory."""
+        if expired and self.disk_dir:
+            # Both tiers hold the same entry, so it expired on disk as well
+            self._delete_disk(self._disk_path(key))
+        entry = self._read_disk(key) if self.disk_dir and not expired else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, "miss"
+            self.disk_hits += 1
+            self._remember(key, *entry)
+        return LlmResponse.model_validate_json(entry[1]), "disk_hit"
+
+    def _put_memory(self, key: str, llm_response: LlmResponse) -> Tuple[float, str]:
+        """Serialize a response into the memory tier and return (stored_at, serialized)."""
+        serialized = llm_response.model_dump_json(exclude_none=True)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, stored_at, serialized)
+            self.stores += 1
+        return stored_at, serialized
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        """Read an entry of the disk tier, deleting it if it expired or is unreadable."""
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            stored_at, serialized = float(entry["stored_at"]), entry["response"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Dropping unreadable response cache entry {path.name}: {e}")
+            self._delete_disk(path)
+            return None
+        if self._expired(stored_at):
+            self._delete_disk(path)
+            with self._lock:
+                self.expirations += 1
+            return None
+        return stored_at, serialized
+
+    def _write_disk(self, key: str, stored_at: float, serialized: str) -> None:
+        """Write an entry atomically and evict the oldest entries beyond the size limit."""
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "response": serialized}, f, ensure_ascii=False)
+            size = tmp_path.stat().st_size
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to write response cache entry {path.name}: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += size - replaced
+            # One eviction scan at a time; concurrent writers leave it to the running one
+            evict = self._disk_bytes > self.disk_max_bytes and not self._evicting
+            self._evicting = self._evicting or evict
+        if evict:
+            try:
+                self._evict_disk()
+            finally:
+                with self._lock:
+                    self._evicting = False
+
+    def _delete_disk(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def _evict_disk(self) -> None:
+        """Delete expired and then least recently written entries until the disk tier fits."""
+        entries = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9  # Leave headroom so every store doesn't trigger a scan
+        evicted = 0
+        for mtime, size, path in entries:
+            if total <= target and not self._expired(mtime):
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
+
+    def clear(self) -> None:
+        """Drop all entries of both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.disk_dir:
+            for path in self.disk_dir.glob("*/*.json"):
+                self._delete_disk(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize cache usage.
+
+        Returns:
+            Dictionary with tier sizes, hits, misses and evictions
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def get_response_cache(config_loader: Any) -> Optional[LLMResponseCache]:
+    """Get the response cache selected by a workflow configuration.
+
+    Caches are shared by everything in the process that uses the same disk
+    directory; the limits of the first configuration that opened it apply.
+
+    Args:
+        config_loader: ConfigLoader of the workflow configuration (reads ``response_cache_config``)
+
+    Returns:
+        The response cache, or None if caching is disabled
+    """
+    if not config_loader.get_value("response_cache_config.enabled", False):
+        return None
+
+    disk_path = config_loader.get_value("response_cache_config.disk_path", DEFAULT_CACHE_DIR)
+    disk_dir = None
+    if disk_path:
+        disk_dir = Path(disk_path)
+        if not disk_dir.is_absolute():
+            disk_dir = PROJECT_ROOT / disk_dir
+    key = str(disk_dir.resolve()) if disk_dir else ""
+
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            mb = 1024 * 1024
+            try:
+                cache = LLMResponseCache(
+                    disk_dir=disk_dir,
+                    ttl_seconds=config_loader.get_value("response_cache_config.ttl_seconds", 86400),
+                    memory_max_entries=config_loader.get_value("response_cache_config.memory_max_entries", 256),
+                    memory_max_bytes=float(config_loader.get_value("response_cache_config.memory_max_mb", 64)) * mb,
+                    disk_max_bytes=float(config_loader.get_value("response_cache_config.disk_max_mb", 512)) * mb
+                )
+            except OSError as e:
+                logger.warning(f"⚠️ Failed to open response cache at {disk_dir}, caching in memory only: {e}")
+                cache = LLMResponseCache(disk_dir=None)
+            _caches[key] = cache
+    return cache
+
+
+def response_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Summarize all response caches open in this process, keyed by disk directory."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {key or "memory": cache.stats() for key, cache in caches.items()}
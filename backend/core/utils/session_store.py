@@ -0,0 +1,521 @@
+"""Disk-backed session storage for ADK runners.
+
+This module provides SQLiteSessionService, an ADK session service that keeps
+sessions, their events and their state in a local SQLite file instead of in
+process memory, so sessions survive a restart. Each state value is stored in
+its own row. Values larger than a configurable size are not loaded with the
+session; the session's state dictionary fetches them from disk whenever they
+are read and does not keep them, which bounds the memory held per run.
+
+The backend is chosen by the ``session_config`` section of a workflow
+configuration::
+
+    session_config:
+      backend: "sqlite"          # or "memory" (default)
+      path: "backend/output/sessions.db"
+      lazy_value_bytes: 16384
+      retention_days: 7
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events import Event
+from google.adk.memory import InMemoryMemoryService
+from google.adk.runners import InMemoryRunner, Runner
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+logger = logging.getLogger(__name__)
+
+# Project root, against which relative database paths are resolved
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+
+DEFAULT_SESSION_DB = "backend/output/sessions.db"
+DEFAULT_LAZY_VALUE_BYTES = 16384
+
+# Placeholder kept in a session's state for values that stay on disk
+_UNLOADED = object()
+
+# Open SQLite session services, keyed by database path and lazy value size
+_services: Dict[Tuple[str, int], "SQLiteSessionService"] = {}
+_services_lock = threading.Lock()
+
+
+class SessionStoreError(Exception):
+    """Custom exception for session storage errors."""
+    pass
+
+
+class LazyState(dict):
+    """Session state whose large values are read from disk on access.
+
+    Values marked unloaded are fetched through ``loader`` every time they are
+    read and are never cached, so a session only holds its small values in
+    memory. Copies (``dict(state)``, ``copy.deepcopy``) contain loaded values.
+    """
+
+    def __init__(self, values: Dict[str, Any], loader: Callable[[str], Any]):
+        super().__init__(values)
+        self._loader = loader
+
+    def offload(self, key: str) -> None:
+        """Drop a value from memory; it must already be stored on disk."""
+        if dict.__contains__(self, key):
+            dict.__setitem__(self, key, _UNLOADED)
+
+    def __getitem__(self, key: str) -> Any:
+        value = dict.__getitem__(self, key)
+        if value is _UNLOADED:
+            return self._loader(key)
+        return value
+
+    # Overriding __iter__ makes dict() and dict.update() read through keys() and __getitem__
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if dict.__contains__(self, key) else default
+
+    def items(self):
+        return [(key, self[key]) for key in dict.keys(self)]
+
+    def values(self):
+        return [self[key] for key in dict.keys(self)]
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __copy__(self) -> Dict[str, Any]:
+        return self.copy()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return copy.deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+    def __repr__(self) -> str:
+        return repr({key: "<on disk>" if dict.__getitem__(self, key) is _UNLOADED else value
+                     for key, value in dict.items(self)})
+
+
+class SQLiteSessionService(BaseSessionService):
+    """ADK session service backed by a local SQLite database.
+
+    Events are stored as JSON, one row per event. Session state is stored one
+    row per key; ``app:`` and ``user:`` prefixed keys are shared by all
+    sessions of the app or user, and ``temp:`` keys are never stored.
+    Database access runs in a thread so that writing large outputs does not
+    block the event loop.
+    """
+
+    def __init__(self, db_path: Path, lazy_value_bytes: int = DEFAULT_LAZY_VALUE_BYTES):
+        """Initialize the SQLite session service.
+
+        Args:
+            db_path: Path to the SQLite database file
+            lazy_value_bytes: State values larger than this (serialized) are loaded on access
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lazy_value_bytes = max(0, int(lazy_value_bytes))
+        self._lock = threading.RLock()
+        # Worker processes may share the database; wait for their write locks
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+        logger.info(f"SQLiteSessionService initialized at: {self.db_path}")
+
+    def _init_schema(self) -> None:
+        """Create the session, event and state tables if needed."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    app_name TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    create_time REAL NOT NULL,
+                    update_time REAL NOT NULL,
+                    PRIMARY KEY (app_name, user_id, id)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS session_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    app_name TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    event TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_events_session "
+                "ON session_events (app_name, user_id, session_id, seq)"
+            )
+            # Session state; rows with an empty session_id hold user state and,
+            # with an empty user_id as well, app state
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS session_state (
+                    app_name TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (app_name, user_id, session_id, key)
+                )
+                """
+            )
+
+    @staticmethod
+    def _state_scope(app_name: str, user_id: str, session_id: str, key: str) -> Tuple[str, str, str, str]:
+        """Map a state key to the (app_name, user_id, session_id, key) row it is stored in."""
+        if key.startswith(State.APP_PREFIX):
+            return app_name, "", "", key[len(State.APP_PREFIX):]
+        if key.startswith(State.USER_PREFIX):
+            return app_name, user_id, "", key[len(State.USER_PREFIX):]
+        return app_name, user_id, session_id, key
+
+    def _write_state(self, app_name: str, user_id: str, session_id: str, state: Dict[str, Any]) -> List[str]:
+        """Store state values; must be called inside a transaction.
+
+        Returns:
+            Keys whose values are large enough to be loaded on access
+        """
+        lazy_keys = []
+        for key, value in state.items():
+            if key.startswith(State.TEMP_PREFIX):
+                continue
+            serialized = json.dumps(value, default=str, ensure_ascii=False)
+            size = len(serialized.encode("utf-8"))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_state (app_name, user_id, session_id, key, value, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*self._state_scope(app_name, user_id, session_id, key), serialized, size)
+            )
+            if size > self.lazy_value_bytes:
+                lazy_keys.append(key)
+        return lazy_keys
+
+    def _load_value(self, app_name: str, user_id: str, session_id: str, key: str) -> Any:
+        """Read one state value from disk."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?",
+                self._state_scope(app_name, user_id, session_id, key)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row["value"])
+
+    def _new_state(self, app_name: str, user_id: str, session_id: str, values: Dict[str, Any]) -> LazyState:
+        """Create the state dictionary of a session."""
+        return LazyState(values, lambda key: self._load_value(app_name, user_id, session_id, key))
+
+    def _read_state(self, app_name: str, user_id: str, session_id: str) -> LazyState:
+        """Load a session's state, merged with its app and user state."""
+        values = {}
+        prefixes = ((app_name, "", "", State.APP_PREFIX), (app_name, user_id, "", State.USER_PREFIX),
+                    (app_name, user_id, session_id, ""))
+        for scope_app, scope_user, scope_session, prefix in prefixes:
+            rows = self._conn.execute(
+                "SELECT key, CASE WHEN size > ? THEN NULL ELSE value END AS value FROM session_state "
+                "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (self.lazy_value_bytes, scope_app, scope_user, scope_session)
+            )
+            for row in rows:
+                values[prefix + row["key"]] = _UNLOADED if row["value"] is None else json.loads(row["value"])
+        return self._new_state(app_name, user_id, session_id, values)
+
+    def _create_session_sync(
+        self, app_name: str, user_id: str, state: Optional[Dict[str, Any]], session_id: Optional[str]
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (app_name, user_id, session_id)
+                ).fetchone()
+                if exists:
+                    raise SessionStoreError(f"Session {session_id} already exists")
+                self._conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, create_time, update_time) VALUES (?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, now, now)
+                )
+                self._write_state(app_name, user_id, session_id, state or {})
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            session = Session(app_name=app_name, user_id=user_id, id=session_id, last_update_time=now)
+            # Assigned after construction so pydantic doesn't copy the state into a plain dict
+            session.state = self._read_state(app_name, user_id, session_id)
+        return session
+
+    def _get_session_sync(
+        self, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]
+    ) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id)
+            ).fetchone()
+            if row is None:
+                return None
+
+            query = "SELECT event FROM session_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params: List[Any] = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            query += " ORDER BY seq DESC"
+            if config and config.num_recent_events:
+                query += " LIMIT ?"
+                params.append(config.num_recent_events)
+            events = [Event.model_validate_json(r["event"]) for r in self._conn.execute(query, params)]
+            events.reverse()
+
+            session = Session(
+                app_name=app_name,
+                user_id=user_id,
+                id=session_id,
+                events=events,
+                last_update_time=row["update_time"]
+            )
+            session.state = self._read_state(app_name, user_id, session_id)
+        return session
+
+    def _append_event_sync(self, session: Session, event: Event) -> List[str]:
+        state_delta = event.actions.state_delta if event.actions and event.actions.state_delta else {}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO session_events (app_name, user_id, session_id, timestamp, event) VALUES (?, ?, ?, ?, ?)",
+                    (session.app_name, session.user_id, session.id, event.timestamp,
+                     event.model_dump_json(exclude_none=True))
+                )
+                lazy_keys = self._write_state(session.app_name, session.user_id, session.id, state_delta)
+                self._conn.execute(
+                    "UPDATE sessions SET update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (event.timestamp, session.app_name, session.user_id, session.id)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return lazy_keys
+
+    def _list_sessions_sync(self, app_name: str, user_id: str) -> ListSessionsResponse:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, update_time FROM sessions WHERE app_name = ? AND user_id = ? ORDER BY update_time",
+                (app_name, user_id)
+            ).fetchall()
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=user_id, id=row["id"], last_update_time=row["update_time"])
+            for row in rows
+        ])
+
+    def _delete_session_sync(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                params = (app_name, user_id, session_id)
+                self._conn.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", params)
+                self._conn.execute(
+                    "DELETE FROM session_events WHERE app_name = ? AND user_id = ? AND session_id = ?", params
+                )
+                self._conn.execute(
+                    "DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", params
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        """Create and store a new session.
+
+        Raises:
+            SessionStoreError: If a session with this ID already exists
+        """
+        return await asyncio.to_thread(self._create_session_sync, app_name, user_id, state, session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """Load a session with its events and (lazily) its state."""
+        return await asyncio.to_thread(self._get_session_sync, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        """List a user's sessions without their events and state."""
+        return await asyncio.to_thread(self._list_sessions_sync, app_name, user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        """Delete a session with its events and state."""
+        await asyncio.to_thread(self._delete_session_sync, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        """Store an event and apply its state delta to the session."""
+        if event.partial:
+            return event
+        lazy_keys = await asyncio.to_thread(self._append_event_sync, session, event)
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        if isinstance(session.state, LazyState):
+            for key in lazy_keys:
+                session.state.offload(key)
+        return event
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete sessions that were not updated for a while.
+
+        Args:
+            max_age_seconds: Sessions last updated longer ago than this are deleted
+
+        Returns:
+            Number of deleted sessions
+        """
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            stale = self._conn.execute(
+                "SELECT app_name, user_id, id FROM sessions WHERE update_time < ?", (cutoff,)
+            ).fetchall()
+        for row in stale:
+            self._delete_session_sync(row["app_name"], row["user_id"], row["id"])
+        if stale:
+            logger.info(f"🧹 Deleted {len(stale)} sessions older than {max_age_seconds / 86400:.1f} days")
+        return len(stale)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_service(config_loader: Any) -> Optional[BaseSessionService]:
+    """Create the session service selected by a workflow configuration.
+
+    SQLite services are shared by everything in the process that uses the
+    same database. Falls back to in-memory sessions if the database cannot be
+    opened.
+
+    Args:
+        config_loader: ConfigLoader of the workflow configuration (reads ``session_config``)
+
+    Returns:
+        SQLite session service, or None for in-memory sessions
+    """
+    backend = config_loader.get_value("session_config.backend", "memory")
+    if backend == "memory":
+        return None
+    if backend != "sqlite":
+        logger.warning(f"⚠️ Unknown session backend '{backend}', using in-memory sessions")
+        return None
+
+    db_path = Path(config_loader.get_value("session_config.path", DEFAULT_SESSION_DB))
+    if not db_path.is_absolute():
+        db_path = PROJECT_ROOT / db_path
+    lazy_value_bytes = int(config_loader.get_value("session_config.lazy_value_bytes", DEFAULT_LAZY_VALUE_BYTES))
+    key = (str(db_path.resolve()), lazy_value_bytes)
+
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            try:
+                service = SQLiteSessionService(db_path, lazy_value_bytes)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Failed to open session database at {db_path}, using in-memory sessions: {e}")
+                return None
+            retention_days = config_loader.get_value("session_config.retention_days", 0)
+            if retention_days:
+                service.prune(float(retention_days) * 86400)
+            _services[key] = service
+    return service
+
+
+def create_runner(agent: BaseAgent, app_name: str, session_service: Optional[BaseSessionService] = None) -> Runner:
+    """Create a runner for an agent on the given session service.
+
+    Args:
+        agent: Root agent to run
+        app_name: Application name of the runner
+        session_service: Session service, or None for an InMemoryRunner
+
+    Returns:
+        Runner with in-memory artifact and memory services
+    """
+    if session_service is None:
+        return InMemoryRunner(agent=agent, app_name=app_name)
+    return Runner(
+        app_name=app_name,
+        agent=agent,
+        artifact_service=InMemoryArtifactService(),
+        session_service=session_service,
+        memory_service=InMemoryMemoryService(),
+    )
+
+
+async def get_or_create_session(
+    session_service: BaseSessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    state: Optional[Dict[str, Any]] = None
+) -> Session:
+    """Reopen a stored session, or create it if it does not exist yet.
+
+    Args:
+        session_service: Session service holding the session
+        app_name: Application name
+        user_id: User ID
+        session_id: Session ID
+        state: Initial state of a new session
+
+    Returns:
+        The existing or newly created session
+    """
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is not None:
+        logger.info(f"📂 Resuming stored session {session_id} ({len(session.events)} events)")
+        return session
+    return await session_service.create_session(
+        app_name=app_name, user_id=user_id, session_id=session_id, state=state
+    )
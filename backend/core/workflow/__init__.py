@@ -5,5 +5,7 @@ for flexible agent systems.
 """
 
 from .flexible_workflow_manager import FlexibleWorkflowManager
+from .run_context import WorkflowRunContext
+from .compiled_workflow import CompiledWorkflow, CompiledWorkflowCache
 
-__all__ = ["FlexibleWorkflowManager"] 
\ No newline at end of file
+__all__ = ["FlexibleWorkflowManager", "WorkflowRunContext", "CompiledWorkflow", "CompiledWorkflowCache"] 
\ No newline at end of file
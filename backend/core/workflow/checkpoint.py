@@ -0,0 +1,164 @@
+"""Run checkpoints for resuming flexible workflows.
+
+This module provides the WorkflowCheckpoint class that records, in the run's
+incremental directory, which agents of a workflow completed together with
+their outputs and the session state at that point. A failed or cancelled run
+can then be resumed: the session is rebuilt from the checkpoint and completed
+agents are skipped instead of calling their models again.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# File holding the checkpoint inside a run's incremental directory
+CHECKPOINT_FILENAME = "checkpoint.json"
+
+# Bumped when the checkpoint layout changes incompatibly
+CHECKPOINT_VERSION = 1
+
+# Session state prefix ADK uses for values that must not outlive an invocation
+TEMP_STATE_PREFIX = "temp:"
+
+
+class CheckpointError(Exception):
+    """Custom exception for missing or unreadable checkpoints."""
+    pass
+
+
+@dataclass
+class WorkflowCheckpoint:
+    """Progress of a workflow run that allows resuming it.
+
+    Attributes:
+        run_id: ID of the run that last wrote the checkpoint
+        user_request: The user's request being processed
+        config_hash: Fingerprint of the configuration the run used
+        completed_agents: Agents that completed and are skipped on resume, in order
+        outputs: Latest model output of each agent, keyed by agent name
+        state: Session state after the last completed agent
+        executed_agents: Agents reported as executed, in order
+        execution_order: Output file numbering of agents, keyed by agent name
+        saved_outputs: Agents whose output files are already written
+        updated_at: Time the checkpoint was last written
+    """
+    run_id: str
+    user_request: str
+    config_hash: str = ""
+    completed_agents: List[str] = field(default_factory=list)
+    outputs: Dict[str, str] = field(default_factory=dict)
+    state: Dict[str, Any] = field(default_factory=dict)
+    executed_agents: List[str] = field(default_factory=list)
+    execution_order: Dict[str, int] = field(default_factory=dict)
+    saved_outputs: List[str] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    def record_agent(
+        self,
+        agent_name: str,
+        state: Dict[str, Any],
+        outputs: Dict[str, str],
+        executed_agents: List[str],
+        execution_order: Dict[str, int],
+        saved_outputs: List[str]
+    ) -> None:
+        """Record that an agent completed.
+
+        Args:
+            agent_name: Name of the agent that completed
+            state: Current session state
+            outputs: Latest model output of each agent
+            executed_agents: Agents reported as executed so far
+            execution_order: Output file numbering of agents
+            saved_outputs: Agents whose output files are written
+        """
+        if agent_name not in self.completed_agents:
+            self.completed_agents.append(agent_name)
+        self.state = {k: v for k, v in state.items() if not k.startswith(TEMP_STATE_PREFIX)}
+        self.outputs = dict(outputs)
+        self.executed_agents = list(executed_agents)
+        self.execution_order = dict(execution_order)
+        self.saved_outputs = sorted(saved_outputs)
+        self.updated_at = time.time()
+
+    def save(self, directory: Path, writer: Optional[Any] = None) -> Path:
+        """Write the checkpoint atomically into a run directory.
+
+        Args:
+            directory: The run's incremental directory
+            writer: Optional ArtifactWriter; the checkpoint is then serialized
+                    now and written by the writer's thread
+
+        Returns:
+            Path of the checkpoint file
+        """
+        path = Path(directory) / CHECKPOINT_FILENAME
+        payload = {"version": CHECKPOINT_VERSION, **asdict(self)}
+        if writer is not None:
+            writer.write_json(path, payload, "checkpoint")
+            return path
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, default=str, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.debug(f"Checkpoint written after {len(self.completed_agents)} agents: {path}")
+        return path
+
+    async def save_async(self, directory: Path, writer: Any) -> Path:
+        """Queue the checkpoint on an ArtifactWriter without blocking the event loop.
+
+        Args:
+            directory: The run's incremental directory
+            writer: ArtifactWriter writing the checkpoint in its thread
+
+        Returns:
+            Path of the checkpoint file
+        """
+        path = Path(directory) / CHECKPOINT_FILENAME
+        await writer.write_json_async(path, {"version": CHECKPOINT_VERSION, **asdict(self)}, "checkpoint")
+        return path
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """Check whether a run directory holds a checkpoint.
+
+        Args:
+            directory: The run's incremental directory
+
+        Returns:
+            True if a checkpoint file exists
+        """
+        return (Path(directory) / CHECKPOINT_FILENAME).is_file()
+
+    @classmethod
+    def load(cls, directory: Path) -> "WorkflowCheckpoint":
+        """Read the checkpoint of a run directory.
+
+        Args:
+            directory: The run's incremental directory
+
+        Returns:
+            The checkpoint
+
+        Raises:
+            CheckpointError: If there is no checkpoint or it cannot be read
+        """
+        path = Path(directory) / CHECKPOINT_FILENAME
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            raise CheckpointError(f"No checkpoint found in {directory}")
+        except (OSError, json.JSONDecodeError) as e:
+            raise CheckpointError(f"Failed to read checkpoint {path}: {e}")
+
+        if payload.pop("version", None) != CHECKPOINT_VERSION:
+            raise CheckpointError(f"Unsupported checkpoint version in {path}")
+        known = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in payload.items() if k in known})
@@ -0,0 +1,173 @@
+"""Compiled workflow cache for flexible workflows.
+
+This module provides a cache of compiled workflows keyed by a fingerprint of
+the workflow, prompts and gemini configurations. A compiled workflow holds the
+validated FlexibleWorkflowConfig and reusable agent templates, so runs with unchanged configuration only bind
+their run-specific callbacks instead of re-parsing and re-resolving everything.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.config.flexible_config import FlexibleWorkflowConfig
+    from backend.core.utils.file_utils import file_digest
+except ImportError:
+    # If absolute imports fail, try relative imports for direct execution
+    from ..config.flexible_config import FlexibleWorkflowConfig
+    from ..utils.file_utils import file_digest
+
+logger = logging.getLogger(__name__)
+
+
+def hash_configs(*configs: Any) -> str:
+    """Hash configuration dictionaries in a key-order independent way.
+
+    Args:
+        *configs: Configuration objects to hash
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(configs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def referenced_input_files(config: Dict[str, Any]) -> List[str]:
+    """List the input documents referenced by a raw workflow configuration.
+
+    Args:
+        config: Raw workflow configuration dictionary
+
+    Returns:
+        Sorted input document file names from input_key/input_keys
+    """
+    files = set()
+    for entry in (config.get("agents") or []) + (config.get("steps") or []):
+        if not isinstance(entry, dict):
+            continue
+        if entry.get("input_key"):
+            files.add(entry["input_key"])
+        files.update(name for name in (entry.get("input_keys") or []) if name)
+    return sorted(files)
+
+
+def input_files_digest(input_directory: Path, filenames: List[str]) -> List[Any]:
+    """Describe input documents by content hash.
+
+    Touching a file without changing its content keeps the digest. Files
+    are only re-read when their size or mtime changes.
+
+    Args:
+        input_directory: Directory containing input documents
+        filenames: Input document file names
+
+    Returns:
+        List of [name, sha256] entries (None for missing files)
+    """
+    digests = []
+    for name in filenames:
+        try:
+            digests.append([name, file_digest(input_directory / name)])
+        except OSError:
+            digests.append([name, None])
+    return digests
+
+
+@dataclass
+class CompiledWorkflow:
+    """A validated workflow with reusable agent templates.
+
+    Attributes:
+        fingerprint: Hash of the configurations the workflow was compiled from
+        workflow_config: Validated workflow configuration
+        agent_templates: Run-independent agent constructor arguments, keyed by agent name
+        compiled_at: Time the workflow was compiled
+        compile_seconds: Time spent compiling
+    """
+    fingerprint: str
+    workflow_config: FlexibleWorkflowConfig
+    agent_templates: Dict[str, Dict[str, Any]]
+    compiled_at: float = field(default_factory=time.time)
+    compile_seconds: float = 0.0
+
+
+class CompiledWorkflowCache:
+    """LRU cache of compiled workflows keyed by configuration fingerprint."""
+
+    def __init__(self, max_entries: int = 8):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of compiled workflows to keep
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CompiledWorkflow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compile(
+        self,
+        fingerprint: str,
+        compile_fn: Callable[[], CompiledWorkflow]
+    ) -> CompiledWorkflow:
+        """Return the compiled workflow for a fingerprint, compiling it on a miss.
+
+        Args:
+            fingerprint: Configuration fingerprint
+            compile_fn: Callable compiling the workflow
+
+        Returns:
+            Compiled workflow
+        """
+        with self._lock:
+            compiled = self._entries.get(fingerprint)
+            if compiled is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        started = time.perf_counter()
+        compiled = compile_fn()
+        compiled.compile_seconds = time.perf_counter() - started
+        logger.info(f"🧩 Compiled workflow {fingerprint[:12]} in {compiled.compile_seconds:.3f}s")
+
+        with self._lock:
+            self._entries[fingerprint] = compiled
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        """Drop all compiled workflows."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize cache usage.
+
+        Returns:
+            Dictionary with entry count, hits and misses
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Process-wide cache shared by all workflow managers
+compiled_workflow_cache = CompiledWorkflowCache()
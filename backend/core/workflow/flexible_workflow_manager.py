@@ -7,11 +7,11 @@ the orchestration, execution, and monitoring of flexible agent workflows.
 import asyncio
 import logging
 import os
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from google.adk.runners import InMemoryRunner
 from google.genai import types
 from pydantic import ValidationError
 
@@ -22,6 +22,17 @@ try:
     from backend.core.config.flexible_config import FlexibleWorkflowConfig, FlexibleAgentConfig
     from backend.core.agents.flexible_agent_factory import FlexibleAgentFactory
     from backend.core.tools.tool_registry import FlexibleToolRegistry
+    from backend.core.workflow.run_context import WorkflowRunContext
+    from backend.core.workflow.checkpoint import WorkflowCheckpoint
+    from backend.core.utils.response_cache import get_response_cache
+    from backend.core.utils.fake_llm import fake_llm_settings
+    from backend.core.utils.artifact_writer import ArtifactWriter, get_artifact_writer
+    from backend.core.utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle
+    from backend.core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from backend.core.workflow.compiled_workflow import (
+        CompiledWorkflow, compiled_workflow_cache, hash_configs, input_files_digest,
+        referenced_input_files
+    )
 except ImportError:
     # If absolute imports fail, try relative imports for direct execution
     from ...data_model.data_models import WorkflowStatus
@@ -29,6 +40,17 @@ except ImportError:
     from ..config.flexible_config import FlexibleWorkflowConfig, FlexibleAgentConfig
     from ..agents.flexible_agent_factory import FlexibleAgentFactory
     from ..tools.tool_registry import FlexibleToolRegistry
+    from .run_context import WorkflowRunContext
+    from .checkpoint import WorkflowCheckpoint
+    from ..utils.response_cache import get_response_cache
+    from ..utils.fake_llm import fake_llm_settings
+    from ..utils.artifact_writer import ArtifactWriter, get_artifact_writer
+    from ..utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle
+    from ..utils.session_store import create_runner, create_session_service, get_or_create_session
+    from .compiled_workflow import (
+        CompiledWorkflow, compiled_workflow_cache, hash_configs, input_files_digest,
+        referenced_input_files
+    )
 
 logger = logging.getLogger(__name__)
 
@@ -41,16 +63,24 @@ class FlexibleWorkflowManager:
     models, prompts, and execution strategies.
     """
     
-    def __init__(self, config_dir: Optional[Path] = None, uploaded_configs: Optional[Dict[str, Dict[str, Any]]] = None):
+    def __init__(
+        self,
+        config_dir: Optional[Path] = None,
+        uploaded_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_concurrent_runs: Optional[int] = None
+    ):
         """Initialize the flexible workflow manager.
         
         Args:
             config_dir: Directory containing configuration files
             uploaded_configs: Optional uploaded configurations to use instead of static files
+            max_concurrent_runs: Maximum number of workflows executing at once.
+                               Defaults to app_config.max_concurrent_runs (or 4).
         """
         self.base_dir = Path(__file__).parent.parent.parent
         self.config_dir = config_dir or (self.base_dir / "config" / "flexible_agent")
-        self.uploaded_configs = uploaded_configs or {}
+        # Copy so later in-place changes by the caller are detected by update_configurations
+        self.uploaded_configs = {key: dict(value) for key, value in (uploaded_configs or {}).items()}
         
         # Load configuration files (prioritizing uploaded configs)
         self._load_configurations()
@@ -64,7 +94,14 @@ class FlexibleWorkflowManager:
         self.runner = None
         self.session = None
         
-        logger.info("FlexibleWorkflowManager initialized")
+        # Per-run execution contexts and the cap on concurrent runs
+        if max_concurrent_runs is None:
+            max_concurrent_runs = self.config_loader.get_value("app_config.max_concurrent_runs", 4)
+        self.max_concurrent_runs = max(1, int(max_concurrent_runs))
+        self._run_slots = asyncio.Semaphore(self.max_concurrent_runs)
+        self.active_runs: Dict[str, WorkflowRunContext] = {}
+        
+        logger.info(f"FlexibleWorkflowManager initialized (max_concurrent_runs={self.max_concurrent_runs})")
         
     def update_configurations(self, uploaded_configs: Dict[str, Dict[str, Any]]) -> None:
         """Update the workflow manager with new uploaded configurations.
@@ -72,8 +109,12 @@ class FlexibleWorkflowManager:
         Args:
             uploaded_configs: New uploaded configurations to use
         """
+        if uploaded_configs == self.uploaded_configs:
+            logger.debug("Uploaded configurations unchanged, keeping loaded configuration")
+            return
+        
         logger.info(f"🔄 Updating configurations with: {list(uploaded_configs.keys())}")
-        self.uploaded_configs = uploaded_configs
+        self.uploaded_configs = {key: dict(value) for key, value in uploaded_configs.items()}
         
         # Reload configurations with new uploads
         self._load_configurations()
@@ -143,6 +184,10 @@ class FlexibleWorkflowManager:
                 self.prompts_loader = ConfigLoader(prompts_config_path)
                 self.prompts_config = self.prompts_loader.load_config()
             
+            # Fingerprint the configuration for the compiled workflow cache
+            self._config_hash = hash_configs(self.config, self.prompts_config, self.gemini_config)
+            self._input_files = referenced_input_files(self.config or {})
+            
             config_sources = []
             if "workflow" in self.uploaded_configs: config_sources.append("uploaded workflow")
             if "gemini" in self.uploaded_configs: config_sources.append("uploaded gemini")
@@ -233,6 +278,48 @@ class FlexibleWorkflowManager:
             logger.error(f"Failed to parse flexible workflow configuration: {e}")
             raise
 
+    def _compile_workflow(self) -> CompiledWorkflow:
+        """Get the compiled workflow for the current configuration.
+        
+        Parsing, validation and prompt resolution happen only when the
+        configuration fingerprint is not in the compiled workflow cache yet.
+        Input documents are not part of the templates (agents read them when
+        they are invoked), so changing them doesn't require recompiling.
+        
+        Returns:
+            Compiled workflow with validated config and agent templates
+        """
+        input_directory = self.base_dir / "input"
+        fingerprint = self._config_hash
+        prompts_loader = self.prompts_loader
+        
+        def compile_fn() -> CompiledWorkflow:
+            workflow_config = self._parse_workflow_config()
+            factory = FlexibleAgentFactory(workflow_config.agents, prompts_loader, input_directory)
+            return CompiledWorkflow(fingerprint, workflow_config, factory.compile_templates())
+        
+        return compiled_workflow_cache.get_or_compile(fingerprint, compile_fn)
+
+    def request_fingerprint(self, user_request: str) -> str:
+        """Fingerprint a request together with everything that determines its result.
+        
+        The request text is normalized (surrounding and repeated whitespace is
+        ignored) and combined with the workflow, prompts and gemini
+        configurations and the content hashes of the referenced input documents.
+        
+        Args:
+            user_request: The user's request
+            
+        Returns:
+            Hex SHA-256 digest identifying identical submissions
+        """
+        normalized = " ".join(user_request.split())
+        return hash_configs(
+            normalized,
+            self._config_hash,
+            input_files_digest(self.base_dir / "input", self._input_files)
+        )
+
     async def initialize(self) -> None:
         """Initialize the flexible workflow.
         
@@ -242,14 +329,19 @@ class FlexibleWorkflowManager:
         logger.info("🔧 Initializing Flexible Workflow")
         
         try:
-            # Parse workflow configuration
-            workflow_config = self._parse_workflow_config()
+            # Compile (or reuse) the workflow configuration
+            compiled = self._compile_workflow()
+            workflow_config = compiled.workflow_config
             logger.info(f"Flexible Workflow: {workflow_config.name} v{workflow_config.version}")
             
             # Create agent factory and build all agents
             input_directory = self.base_dir / "input"
-            factory = FlexibleAgentFactory(workflow_config.agents, self.prompts_loader, input_directory)
-            self.all_agents = factory.build_all()
+            factory = FlexibleAgentFactory(
+                workflow_config.agents, self.prompts_loader, input_directory,
+                auto_parallel=self.config_loader.get_value("flexible_config.auto_parallel", False),
+                model_backend=fake_llm_settings(self.gemini_config_loader)
+            )
+            self.all_agents = factory.build_all(templates=compiled.agent_templates)
             
             # Get the main agent
             if workflow_config.main_agent not in self.all_agents:
@@ -260,20 +352,13 @@ class FlexibleWorkflowManager:
             
             # Create runner and session
             app_name = self.config_loader.get_value("app_config.app_name", "flexible_workflow")
-            self.runner = InMemoryRunner(
-                agent=self.main_agent,
-                app_name=app_name
-            )
+            self.runner = create_runner(self.main_agent, app_name, create_session_service(self.config_loader))
             
             # Create session
             user_id = self.config_loader.get_value("app_config.user_id", "flexible_user")
             session_id = self.config_loader.get_value("app_config.session_id", "flexible_session")
             
-            self.session = await self.runner.session_service.create_session(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id
-            )
+            self.session = await get_or_create_session(self.runner.session_service, app_name, user_id, session_id)
             
             logger.info(f"✅ Flexible Workflow initialized with {len(self.all_agents)} agents")
             
@@ -281,28 +366,155 @@ class FlexibleWorkflowManager:
             logger.error(f"Failed to initialize flexible workflow: {e}")
             raise
 
-    async def run_workflow(self, user_request: str, status_callback=None) -> Dict[str, Any]:
+    async def run_workflow(
+        self,
+        user_request: str,
+        status_callback=None,
+        run_id: Optional[str] = None,
+        run_started_callback=None,
+        resume_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
         """Run the flexible workflow.
         
+        Each call executes in its own WorkflowRunContext with a dedicated agent
+        tree, runner and session, so concurrent calls do not interfere. At most
+        ``max_concurrent_runs`` workflows execute at once; further calls wait.
+        
         Args:
             user_request: The user's request to process
             status_callback: Optional callback function to report progress (agent_name, progress, message)
+            run_id: Optional ID of the run, used to cancel it with cancel_run
+            run_started_callback: Optional callback receiving the WorkflowRunContext once the
+                                run is set up, e.g. to record its incremental directory
+            resume_dir: Optional incremental directory of an earlier run to resume from its
+                       checkpoint; the run continues writing into that directory
             
         Returns:
             Dictionary containing workflow results and metadata
+            
+        Raises:
+            asyncio.CancelledError: If the run was cancelled
+            CheckpointError: If resume_dir holds no readable checkpoint
+        """
+        if self._run_slots.locked():
+            logger.info(f"⏳ All {self.max_concurrent_runs} run slots busy, waiting for a free slot")
+        
+        async with self._run_slots:
+            ctx = await self._create_run_context(user_request, status_callback, run_id, resume_dir)
+            self.active_runs[ctx.run_id] = ctx
+            try:
+                if run_started_callback:
+                    run_started_callback(ctx)
+                
+                # Execute in a dedicated task so cancel_run can abort in-flight model calls
+                ctx.task = asyncio.create_task(self._execute_run(ctx), name=f"flexible-run-{ctx.run_id}")
+                return await ctx.task
+            finally:
+                self.active_runs.pop(ctx.run_id, None)
+
+    def cancel_run(self, run_id: str) -> bool:
+        """Cancel an executing workflow run.
+        
+        The run's task is cancelled immediately, so pending model and tool calls
+        are aborted; outputs produced so far are flushed to the incremental directory.
+        
+        Args:
+            run_id: ID of the run to cancel
+            
+        Returns:
+            True if the run was executing and has been cancelled
+        """
+        ctx = self.active_runs.get(run_id)
+        if ctx is None:
+            return False
+        logger.info(f"🛑 Cancelling workflow run {run_id}")
+        return ctx.cancel()
+
+    def _artifact_writer(self) -> ArtifactWriter:
+        """Get the background writer used for the run artifacts."""
+        return get_artifact_writer(self.config_loader)
+
+    def _create_incremental_dir(self, output_dir: Path, timestamp: str) -> Path:
+        """Create a unique incremental output directory for a run.
+        
+        Args:
+            output_dir: Base output directory
+            timestamp: Run start timestamp
+            
+        Returns:
+            Newly created directory
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        suffix = 0
+        while True:
+            name = f"incremental_{timestamp}" if suffix == 0 else f"incremental_{timestamp}_{suffix}"
+            try:
+                incremental_dir = output_dir / name
+                incremental_dir.mkdir()
+                return incremental_dir
+            except FileExistsError:
+                suffix += 1
+
+    async def _create_run_context(
+        self,
+        user_request: str,
+        status_callback=None,
+        run_id: Optional[str] = None,
+        resume_dir: Optional[Path] = None
+    ) -> WorkflowRunContext:
+        """Build an isolated execution context for one workflow run.
+        
+        Args:
+            user_request: The user's request to process
+            status_callback: Optional callback function to report progress
+            run_id: Optional ID of the run (generated when omitted)
+            resume_dir: Optional incremental directory of an earlier run to resume
+            
+        Returns:
+            Run context with its own agent tree, runner and session
+            
+        Raises:
+            CheckpointError: If resume_dir holds no readable checkpoint
         """
         start_time = datetime.now()
         logger.info(f"🚀 Starting flexible workflow for request: {user_request}")
         
-        # Setup incremental saving
-        timestamp = start_time.strftime("%Y%m%d_%H%M%S")
-        output_dir = Path(self.config_loader.get_value("app_config.output_dir", "backend/output"))
-        incremental_dir = output_dir / f"incremental_{timestamp}"
-        incremental_dir.mkdir(parents=True, exist_ok=True)
+        # Snapshot configuration so later updates don't affect this run
+        config_loader = self.config_loader
+        prompts_loader = self.prompts_loader
+        model_backend = fake_llm_settings(self.gemini_config_loader)
+        compiled = self._compile_workflow()
+        run_id = run_id or uuid.uuid4().hex
         
-        # Rebuild agents with callback support for incremental saving and status updates
-        workflow_config = self._parse_workflow_config()
-        input_directory = self.base_dir / "input"
+        # Setup incremental saving; a resumed run continues in the earlier run's directory
+        if resume_dir:
+            incremental_dir = Path(resume_dir)
+            checkpoint = WorkflowCheckpoint.load(incremental_dir)
+            if checkpoint.config_hash and checkpoint.config_hash != self._config_hash:
+                logger.warning("⚠️ Configuration changed since the checkpoint was written; resuming anyway")
+            logger.info(f"♻️ Resuming from {incremental_dir} after {len(checkpoint.completed_agents)} completed agents")
+            checkpoint.run_id = run_id
+            checkpoint.config_hash = self._config_hash
+        else:
+            timestamp = start_time.strftime("%Y%m%d_%H%M%S")
+            output_dir = Path(config_loader.get_value("app_config.output_dir", "backend/output"))
+            incremental_dir = self._create_incremental_dir(output_dir, timestamp)
+            checkpoint = WorkflowCheckpoint(run_id=run_id, user_request=user_request, config_hash=self._config_hash)
+        
+        ctx = WorkflowRunContext(
+            run_id=run_id,
+            user_request=user_request,
+            start_time=start_time,
+            run_label=incremental_dir.name[len("incremental_"):],
+            incremental_dir=incremental_dir,
+            workflow_config=compiled.workflow_config,
+            config_loader=config_loader,
+            prompts_loader=prompts_loader,
+            status_callback=status_callback,
+            checkpoint=checkpoint,
+            resumed_agents=list(checkpoint.completed_agents) if resume_dir else []
+        )
+        workflow_config = ctx.workflow_config
         
         # Create a wrapper callback that handles both saving and status updates
         def progress_callback_wrapper(agent_name: str, content: str, execution_order: int):
@@ -310,68 +522,95 @@ class FlexibleWorkflowManager:
             logger.info(f"🔄 Agent completed: {agent_name} (#{execution_order})")
             
             # Track executed agents
-            if agent_name not in executed_agents:
-                executed_agents.append(agent_name)
+            ctx.record_agent_completed(agent_name)
             
             # Calculate progress based on execution order
             total_agents = len(workflow_config.agents) - 1  # Exclude MainFlexibleOrchestrator
             progress = 10.0 + (execution_order * 80.0 / max(total_agents, 1))
             
             # Report completion via status callback
-            if status_callback:
-                status_callback(agent_name, min(95.0, progress), f"Completed {agent_name}")
+            ctx.report_status(agent_name, min(95.0, progress), f"Completed {agent_name}")
         
-        factory = FlexibleAgentFactory(
+        async def checkpoint_callback(agent_name: str, state: Dict[str, Any]):
+            """Persist the run's progress after a resumable agent completed."""
+            ctx.checkpoint.record_agent(
+                agent_name,
+                state,
+                ctx.factory.latest_outputs,
+                ctx.executed_agents,
+                ctx.factory.agent_execution_order,
+                list(ctx.factory.saved_outputs)
+            )
+            await ctx.checkpoint.save_async(incremental_dir, self._artifact_writer())
+        
+        # Build agents with callback support for incremental saving and status updates
+        input_directory = self.base_dir / "input"
+        ctx.factory = FlexibleAgentFactory(
             workflow_config.agents, 
-            self.prompts_loader, 
+            prompts_loader, 
             input_directory, 
             incremental_dir,
-            progress_callback=progress_callback_wrapper
+            progress_callback=progress_callback_wrapper,
+            checkpoint_callback=checkpoint_callback,
+            checkpoint=checkpoint if resume_dir else None,
+            auto_parallel=ctx.config_loader.get_value("flexible_config.auto_parallel", False),
+            response_cache=get_response_cache(ctx.config_loader),
+            model_backend=model_backend,
+            artifact_writer=self._artifact_writer(),
+            document_conversion=ctx.config_loader.get_value("document_config", None)
         )
-        self.all_agents = factory.build_all()
+        if resume_dir:
+            # Continue output numbering and progress where the earlier run stopped
+            ctx.factory.agent_execution_order.update(checkpoint.execution_order)
+            ctx.factory.saved_outputs.update(checkpoint.saved_outputs)
+            ctx.executed_agents.extend(checkpoint.executed_agents)
+        # Only run-specific callbacks are bound here; everything else comes from the compiled templates
+        ctx.all_agents = ctx.factory.build_all(templates=compiled.agent_templates)
         
-        # Update main agent and runner with callback-enabled agents
-        if workflow_config.main_agent not in self.all_agents:
+        if workflow_config.main_agent not in ctx.all_agents:
             raise ValueError(f"Main flexible agent '{workflow_config.main_agent}' not found in agents")
         
-        self.main_agent = self.all_agents[workflow_config.main_agent]
+        ctx.main_agent = ctx.all_agents[workflow_config.main_agent]
         
-        # Recreate runner with callback-enabled agents
-        app_name = self.config_loader.get_value("app_config.app_name", "flexible_workflow")
-        self.runner = InMemoryRunner(
-            agent=self.main_agent,
-            app_name=app_name
-        )
-        
-        # Create new session for the new runner
-        user_id = self.config_loader.get_value("app_config.user_id", "flexible_user")
-        session_id = f"flexible_session_{timestamp}"
+        # Create a dedicated runner and session for this run, on the configured session backend
+        app_name = config_loader.get_value("app_config.app_name", "flexible_workflow")
+        ctx.runner = create_runner(ctx.main_agent, app_name, create_session_service(config_loader))
         
-        self.session = await self.runner.session_service.create_session(
+        user_id = config_loader.get_value("app_config.user_id", "flexible_user")
+        ctx.session = await ctx.runner.session_service.create_session(
             app_name=app_name,
             user_id=user_id,
-            session_id=session_id
+            session_id=f"flexible_session_{ctx.run_label}_{ctx.run_id[-8:]}",
+            state=dict(checkpoint.state) if resume_dir else None
         )
         
-        # Save initial workflow metadata
-        await self._save_workflow_metadata(incremental_dir, user_request, start_time)
+        return ctx
+
+    async def _execute_run(self, ctx: WorkflowRunContext) -> Dict[str, Any]:
+        """Execute a prepared workflow run and save its outputs.
+        
+        Args:
+            ctx: Run context created by _create_run_context
+            
+        Returns:
+            Dictionary containing workflow results and metadata
+        """
+        start_time = ctx.start_time
+        user_request = ctx.user_request
+        incremental_dir = ctx.incremental_dir
         
-        # Track agent execution for better error reporting
-        current_agent = None
-        executed_agents = []
-        agent_outputs = {}  # Store outputs for incremental saving
+        # Save initial workflow metadata
+        await self._save_workflow_metadata(incremental_dir, user_request, start_time, ctx.all_agents, ctx.config_loader)
         
         try:
-            # Initialize if not already done
-            if not self.main_agent:
-                await self.initialize()
-            
             # Log all agent configurations for debugging
-            self._log_agent_configurations()
+            self._log_agent_configurations(ctx.all_agents)
             
             # Report initialization complete
-            if status_callback:
-                status_callback("Initialization", 5.0, "Workflow initialized successfully")
+            if ctx.resumed_agents:
+                ctx.report_status("Initialization", 5.0, f"Resuming after {len(ctx.resumed_agents)} completed agents")
+            else:
+                ctx.report_status("Initialization", 5.0, "Workflow initialized successfully")
             
             # Create user message
             content = types.Content(role='user', parts=[types.Part(text=user_request)])
@@ -380,11 +619,15 @@ class FlexibleWorkflowManager:
             response_text = ""
             final_state = {}
 
-            async for event in self.runner.run_async(
-                user_id=self.session.user_id,
-                session_id=self.session.id,
+            async for event in ctx.runner.run_async(
+                user_id=ctx.session.user_id,
+                session_id=ctx.session.id,
                 new_message=content
             ):
+                # Track the agent producing events for error and cancellation reports
+                if event.author and event.author != "user":
+                    ctx.current_agent = event.author
+                
                 # Extract final response
                 if event.is_final_response() and event.content and event.content.parts:
                     for part in event.content.parts:
@@ -395,9 +638,12 @@ class FlexibleWorkflowManager:
                 if hasattr(event, 'state') and event.state:
                     final_state.update(event.state)
             
-            # Get the final state from the session
-            if not final_state and self.session:
-                final_state = getattr(self.session, 'state', {})
+            # Get the final state from the session; the runner updated its stored copy, not ctx.session
+            if not final_state and ctx.session:
+                session = await ctx.runner.session_service.get_session(
+                    app_name=ctx.session.app_name, user_id=ctx.session.user_id, session_id=ctx.session.id
+                )
+                final_state = getattr(session or ctx.session, 'state', {})
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
@@ -410,41 +656,52 @@ class FlexibleWorkflowManager:
                     "timestamp": start_time.isoformat(),
                     "original_request": user_request,
                     "workflow_type": "flexible",
-                    "workflow_name": self.config_loader.get_value("name"),
-                    "workflow_version": self.config_loader.get_value("version"),
-                    "agents_executed": executed_agents,
-                    "main_agent": self.main_agent.name,
-                    "total_agents": len(self.all_agents),
-                    "model_used": self.config_loader.get_value("core_config.model"),
-                    "incremental_output_dir": str(incremental_dir)
+                    "workflow_name": ctx.config_loader.get_value("name"),
+                    "workflow_version": ctx.config_loader.get_value("version"),
+                    "agents_executed": ctx.executed_agents,
+                    "main_agent": ctx.main_agent.name,
+                    "total_agents": len(ctx.all_agents),
+                    "model_used": ctx.config_loader.get_value("core_config.model"),
+                    "incremental_output_dir": str(incremental_dir),
+                    "resumed_agents": ctx.resumed_agents,
+                    "loop_iterations": ctx.factory.loop_iterations,
+                    "context_budget": ctx.factory.context_reports
                 },
                 "state": final_state
             }
             
             # Save final comprehensive results
-            await self._save_results(result)
+            await self._save_results(result, ctx)
             
             # Get outputs saved by callbacks
-            callback_outputs = {}
-            if hasattr(factory, 'saved_outputs'):
-                callback_outputs = {name: "Saved via callback" for name in factory.saved_outputs}
+            callback_outputs = {name: "Saved via callback" for name in ctx.factory.saved_outputs}
             
             # Save final summary to incremental directory
-            await self._save_final_summary(incremental_dir, result, executed_agents, callback_outputs)
+            await self._save_final_summary(incremental_dir, result, ctx.executed_agents, callback_outputs)
+            
+            # Every artifact of the run is on disk before it is reported complete
+            await self._artifact_writer().flush_async()
             
             # Report completion via callback
-            if status_callback:
-                status_callback("Completed", 100.0, f"Workflow completed successfully in {execution_time:.1f}s")
+            ctx.report_status("Completed", 100.0, f"Workflow completed successfully in {execution_time:.1f}s")
             
             logger.info(f"✅ Flexible workflow completed successfully in {execution_time:.2f}s")
             logger.info(f"📁 Incremental outputs saved to: {incremental_dir}")
             return result
             
+        except asyncio.CancelledError:
+            logger.info(f"🛑 Flexible workflow cancelled after {(datetime.now() - start_time).total_seconds():.2f}s")
+            await self._save_cancellation_report(ctx)
+            await self._artifact_writer().flush_async()
+            logger.info(f"📁 Partial outputs saved to: {incremental_dir}")
+            raise
+            
         except Exception as e:
             execution_time = (datetime.now() - start_time).total_seconds()
+            executed_agents = ctx.executed_agents
             
             # Enhanced error reporting with agent and model details
-            error_details = self._analyze_error(e, current_agent, executed_agents)
+            error_details = self._analyze_error(e, ctx.current_agent, executed_agents, ctx.all_agents, ctx.config_loader)
             error_msg = f"Flexible workflow failed: {str(e)}"
             
             # Log detailed error information
@@ -456,9 +713,7 @@ class FlexibleWorkflowManager:
             logger.error(f"   Error Type: {error_details['error_type']}")
             
             # Get outputs saved by callbacks for error report
-            callback_outputs = {}
-            if 'factory' in locals() and hasattr(factory, 'saved_outputs'):
-                callback_outputs = {name: "Saved via callback" for name in factory.saved_outputs}
+            callback_outputs = {name: "Saved via callback" for name in ctx.factory.saved_outputs}
             
             # Save error details to incremental directory
             await self._save_error_details(incremental_dir, error_details, executed_agents, callback_outputs)
@@ -474,22 +729,32 @@ class FlexibleWorkflowManager:
                     "error_details": error_details,
                     "executed_agents": executed_agents,
                     "workflow_type": "flexible",
-                    "workflow_name": self.config_loader.get_value("name", "Flexible Workflow"),
-                    "workflow_version": self.config_loader.get_value("version", "1.0.0"),
+                    "workflow_name": ctx.config_loader.get_value("name", "Flexible Workflow"),
+                    "workflow_version": ctx.config_loader.get_value("version", "1.0.0"),
                     "incremental_output_dir": str(incremental_dir)
                 }
             }
             
+            await self._artifact_writer().flush_async()
             logger.info(f"📁 Partial outputs saved to: {incremental_dir}")
             return result
 
-    async def _save_workflow_metadata(self, incremental_dir: Path, user_request: str, start_time: datetime) -> None:
+    async def _save_workflow_metadata(
+        self,
+        incremental_dir: Path,
+        user_request: str,
+        start_time: datetime,
+        all_agents: Dict[str, Any],
+        config_loader: ConfigLoader
+    ) -> None:
         """Save initial workflow metadata and configuration.
         
         Args:
             incremental_dir: Directory to save metadata to
             user_request: Original user request
             start_time: Workflow start time
+            all_agents: Agents built for the run
+            config_loader: Workflow configuration used by the run
         """
         try:
             metadata_file = incremental_dir / "00_workflow_metadata.md"
@@ -497,8 +762,8 @@ class FlexibleWorkflowManager:
             metadata_content = f"""# Flexible Workflow Execution - Metadata
 
 ## 🚀 Workflow Information
-- **Workflow Name**: {self.config_loader.get_value('name', 'Flexible Workflow')}
-- **Version**: {self.config_loader.get_value('version', '1.0.0')}
+- **Workflow Name**: {config_loader.get_value('name', 'Flexible Workflow')}
+- **Version**: {config_loader.get_value('version', '1.0.0')}
 - **Started**: {start_time.strftime('%Y-%m-%d %H:%M:%S')}
 - **Type**: Flexible Multi-Agent Workflow
 
@@ -508,15 +773,15 @@ class FlexibleWorkflowManager:
 ```
 
 ## 🤖 Agent Configuration
-- **Main Agent**: {self.config_loader.get_value('main_agent', 'MainFlexibleOrchestrator')}
-- **Model**: {self.config_loader.get_value('core_config.model', 'gemini-1.5-flash')}
-- **Total Agents**: {len(self.all_agents) if self.all_agents else 0}
+- **Main Agent**: {config_loader.get_value('main_agent', 'MainFlexibleOrchestrator')}
+- **Model**: {config_loader.get_value('core_config.model', 'gemini-1.5-flash')}
+- **Total Agents**: {len(all_agents) if all_agents else 0}
 
 ### Available Agents:
 """
             
-            if self.all_agents:
-                for i, (name, agent) in enumerate(self.all_agents.items(), 1):
+            if all_agents:
+                for i, (name, agent) in enumerate(all_agents.items(), 1):
                     agent_type = type(agent).__name__
                     metadata_content += f"{i}. **{name}** ({agent_type})\n"
             
@@ -531,8 +796,7 @@ class FlexibleWorkflowManager:
 *Generated by FlexibleWorkflowManager on {start_time.strftime('%Y-%m-%d %H:%M:%S')}*
 """
             
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                f.write(metadata_content)
+            await self._artifact_writer().write_text_async(metadata_file, metadata_content, "metadata", bundled=True)
                 
             logger.info(f"📋 Workflow metadata saved: {metadata_file}")
             
@@ -583,14 +847,31 @@ class FlexibleWorkflowManager:
 ## 📁 Generated Files
 """
             
-            # List all generated files
+            # List all generated files, once the queued outputs are written
             try:
-                for file_path in sorted(incremental_dir.glob("*.md")):
-                    if file_path.name != "99_final_summary.md":
-                        summary_content += f"- `{file_path.name}`\n"
+                await self._artifact_writer().flush_async()
+                generated = {file_path.name for file_path in incremental_dir.glob("*.md")}
+                bundle_path = incremental_dir / BUNDLE_FILENAME
+                if bundle_path.exists():
+                    bundle = ArtifactBundle(bundle_path)
+                    bundle.refresh()
+                    generated.update(name for name in bundle.entries if name.endswith(".md"))
+                for name in sorted(generated):
+                    if name != "99_final_summary.md":
+                        summary_content += f"- `{name}`\n"
             except:
                 summary_content += "- Error listing generated files\n"
             
+            loop_iterations = metadata.get('loop_iterations') or {}
+            if any(loop_iterations.values()):
+                summary_content += "\n## 🔁 Loop Convergence\n"
+                for loop_name, records in loop_iterations.items():
+                    summary_content += f"\n### {loop_name}\n"
+                    for record in records:
+                        delta = "n/a" if record.get('delta') is None else f"{record['delta']:.3f}"
+                        reason = f" ({record['reason']})" if record.get('reason') else ""
+                        summary_content += f"- Iteration {record.get('iteration')}: delta {delta}, {record.get('tokens', 0)} tokens - {record.get('verdict')}{reason}\n"
+            
             summary_content += f"""
 ## 🎯 Workflow Performance
 - **Average time per agent**: {metadata.get('execution_time', 0) / max(len(executed_agents), 1):.2f}s
@@ -600,8 +881,7 @@ class FlexibleWorkflowManager:
 *Workflow completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
 """
             
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                f.write(summary_content)
+            await self._artifact_writer().write_text_async(summary_file, summary_content, "summary", bundled=True)
             
             logger.info(f"📋 Final summary saved: {summary_file}")
             
@@ -682,40 +962,83 @@ You have the following partial results available:
 *Error report generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
 """
             
-            with open(error_file, 'w', encoding='utf-8') as f:
-                f.write(error_content)
+            await self._artifact_writer().write_text_async(error_file, error_content, "error_report", bundled=True)
             
             logger.info(f"🚨 Error report saved: {error_file}")
             
         except Exception as e:
             logger.warning(f"⚠️ Failed to save error details: {e}")
 
-    async def _save_results(self, result: Dict[str, Any]) -> None:
+    async def _save_cancellation_report(self, ctx: WorkflowRunContext) -> None:
+        """Flush partial outputs and record a cancelled run.
+        
+        Args:
+            ctx: Run context of the cancelled run
+        """
+        try:
+            # Persist state outputs that no model callback has written yet
+            state = {}
+            if ctx.runner and ctx.session:
+                session = await ctx.runner.session_service.get_session(
+                    app_name=ctx.runner.app_name,
+                    user_id=ctx.session.user_id,
+                    session_id=ctx.session.id
+                )
+                state = dict(session.state) if session else {}
+            flushed = await ctx.factory.flush_unsaved_outputs(state) if ctx.factory else []
+            
+            saved = sorted(ctx.factory.saved_outputs) if ctx.factory else []
+            report_file = ctx.incremental_dir / "99_cancelled_report.md"
+            report_content = f"""# 🛑 Workflow Execution Cancelled
+
+- **Run ID**: {ctx.run_id}
+- **Request**: {ctx.user_request}
+- **Cancelled At**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- **Execution Time**: {(datetime.now() - ctx.start_time).total_seconds():.2f} seconds
+- **Last Active Agent**: {ctx.current_agent or 'Unknown'}
+
+## ✅ Completed Agents
+"""
+            for i, agent in enumerate(ctx.executed_agents, 1):
+                report_content += f"{i}. **{agent}**\n"
+            
+            report_content += "\n## 💾 Saved Outputs\n"
+            for agent in saved:
+                note = " (flushed on cancellation)" if agent in flushed else ""
+                report_content += f"- **{agent}**{note}\n"
+            
+            await self._artifact_writer().write_text_async(report_file, report_content, "cancellation_report", bundled=True)
+            
+            logger.info(f"🛑 Cancellation report saved: {report_file}")
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to save cancellation report: {e}")
+
+    async def _save_results(self, result: Dict[str, Any], ctx: WorkflowRunContext) -> None:
         """Save flexible workflow results to output directory in multiple formats.
         
         Args:
             result: Workflow execution result to save
+            ctx: Run context the result belongs to
         """
         try:
-            output_dir = Path(self.config_loader.get_value("app_config.output_dir", "backend/output"))
+            output_dir = Path(ctx.config_loader.get_value("app_config.output_dir", "backend/output"))
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = ctx.run_label
             
             # Save JSON result
             result_file = output_dir / f"flexible_workflow_result_{timestamp}.json"
-            import json
             result_copy = result.copy()
             if 'status' in result_copy:
                 result_copy['status'] = str(result_copy['status'])
             
-            with open(result_file, 'w', encoding='utf-8') as f:
-                json.dump(result_copy, f, indent=2, ensure_ascii=False)
+            await self._artifact_writer().write_json_async(result_file, result_copy, "result")
             
             logger.info(f"💾 Flexible workflow results saved to: {result_file}")
             
             # Save comprehensive markdown report
-            await self._save_markdown_report(result, output_dir, timestamp)
+            await self._save_markdown_report(result, output_dir, timestamp, ctx)
             
             # Save individual agent outputs if available in state (legacy support)
             await self._save_individual_outputs(result, output_dir, timestamp)
@@ -723,13 +1046,20 @@ You have the following partial results available:
         except Exception as e:
             logger.warning(f"⚠️ Failed to save flexible workflow results: {e}")
 
-    async def _save_markdown_report(self, result: Dict[str, Any], output_dir: Path, timestamp: str) -> None:
+    async def _save_markdown_report(
+        self,
+        result: Dict[str, Any],
+        output_dir: Path,
+        timestamp: str,
+        ctx: WorkflowRunContext
+    ) -> None:
         """Save a comprehensive markdown report of the workflow execution.
         
         Args:
             result: Workflow execution result
             output_dir: Directory to save report to
             timestamp: Timestamp for file naming
+            ctx: Run context the result belongs to
         """
         try:
             markdown_file = output_dir / f"flexible_workflow_report_{timestamp}.md"
@@ -812,10 +1142,11 @@ Note: Actual filenames will match the executed agents in your workflow.
 
 ## 🔧 Technical Details
 - **Workflow Manager**: FlexibleWorkflowManager
-- **Runner Type**: InMemoryRunner
-- **Session ID**: {self.config_loader.get_value('app_config.session_id', 'N/A')}
-- **User ID**: {self.config_loader.get_value('app_config.user_id', 'N/A')}
-- **App Name**: {self.config_loader.get_value('app_config.app_name', 'N/A')}
+- **Runner Type**: {type(ctx.runner).__name__ if ctx.runner else 'N/A'}
+- **Session Backend**: {type(ctx.runner.session_service).__name__ if ctx.runner else 'N/A'}
+- **Session ID**: {ctx.session.id if ctx.session else 'N/A'}
+- **User ID**: {ctx.config_loader.get_value('app_config.user_id', 'N/A')}
+- **App Name**: {ctx.config_loader.get_value('app_config.app_name', 'N/A')}
 """
             
             # Add error information if failed
@@ -835,8 +1166,7 @@ Note: Actual filenames will match the executed agents in your workflow.
 """
             
             # Write the markdown file
-            with open(markdown_file, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            await self._artifact_writer().write_text_async(markdown_file, markdown_content, "report")
             
             logger.info(f"📄 Markdown report saved to: {markdown_file}")
             
@@ -881,27 +1211,30 @@ Note: Actual filenames will match the executed agents in your workflow.
                     output_file = output_dir / f"{safe_key}_{timestamp}.{ext}"
                     
                     # Write the file
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        if ext == 'md' and not value.startswith('#'):
-                            # Add markdown header if it's a markdown file without one
-                            f.write(f"# {key.replace('_', ' ').title()}\n\n{value}")
-                        else:
-                            f.write(value)
+                    if ext == 'md' and not value.startswith('#'):
+                        # Add markdown header if it's a markdown file without one
+                        value = f"# {key.replace('_', ' ').title()}\n\n{value}"
+                    await self._artifact_writer().write_text_async(output_file, value, "individual_output")
                     
                     logger.info(f"📁 Individual output saved: {output_file}")
             
         except Exception as e:
             logger.warning(f"⚠️ Failed to save individual outputs: {e}")
 
-    def _log_agent_configurations(self) -> None:
-        """Log detailed agent configurations for debugging."""
+    def _log_agent_configurations(self, all_agents: Optional[Dict[str, Any]] = None) -> None:
+        """Log detailed agent configurations for debugging.
+        
+        Args:
+            all_agents: Agents to log. Defaults to the manager's initialized agents.
+        """
         logger.info("🔍 Agent Configuration Details:")
         
-        if not self.all_agents:
+        all_agents = self.all_agents if all_agents is None else all_agents
+        if not all_agents:
             logger.warning("   No agents initialized yet")
             return
             
-        for agent_name, agent in self.all_agents.items():
+        for agent_name, agent in all_agents.items():
             agent_type = type(agent).__name__
             
             # Try to get model from agent or config
@@ -918,17 +1251,28 @@ Note: Actual filenames will match the executed agents in your workflow.
             
             logger.info(f"   📱 {agent_name}: {agent_type} (model: {model})")
     
-    def _analyze_error(self, error: Exception, current_agent: str, executed_agents: list) -> Dict[str, Any]:
+    def _analyze_error(
+        self,
+        error: Exception,
+        current_agent: str,
+        executed_agents: list,
+        all_agents: Optional[Dict[str, Any]] = None,
+        config_loader: Optional[ConfigLoader] = None
+    ) -> Dict[str, Any]:
         """Analyze error and provide detailed information about the failure.
         
         Args:
             error: The exception that occurred
             current_agent: Name of the currently executing agent
             executed_agents: List of agents that were executed
+            all_agents: Agents of the failed run. Defaults to the manager's agents.
+            config_loader: Workflow configuration of the failed run
             
         Returns:
             Dictionary containing detailed error analysis
         """
+        all_agents = self.all_agents if all_agents is None else all_agents
+        config_loader = config_loader or self.config_loader
         error_str = str(error)
         error_type = type(error).__name__
         
@@ -939,8 +1283,8 @@ Note: Actual filenames will match the executed agents in your workflow.
         agent_model = "unknown"
         agent_type = "unknown"
         
-        if failed_agent and failed_agent in self.all_agents:
-            agent = self.all_agents[failed_agent]
+        if failed_agent and failed_agent in all_agents:
+            agent = all_agents[failed_agent]
             agent_type = type(agent).__name__
             
             # Try to get model from agent
@@ -948,7 +1292,7 @@ Note: Actual filenames will match the executed agents in your workflow.
                 agent_model = agent.model
             else:
                 # Look up in workflow config
-                agents_config = self.config_loader.get_value('agents', [])
+                agents_config = config_loader.get_value('agents', [])
                 for agent_config in agents_config:
                     if agent_config.get('name') == failed_agent:
                         agent_model = agent_config.get('model', 'not specified')
@@ -977,7 +1321,7 @@ Note: Actual filenames will match the executed agents in your workflow.
             "error_category": error_category,
             "error_message": error_str,
             "all_executed_agents": executed_agents,
-            "total_agents_in_workflow": len(self.all_agents) if self.all_agents else 0
+            "total_agents_in_workflow": len(all_agents) if all_agents else 0
         }
 
     def print_configuration_summary(self) -> None:
@@ -0,0 +1,105 @@
+"""Per-run execution context for flexible workflows.
+
+This module provides the WorkflowRunContext class that holds all mutable state
+belonging to a single workflow execution, so that several workflows can run
+concurrently in one process without sharing runners or sessions.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+
+# Try absolute imports first (for module execution), then relative imports (for direct execution)
+try:
+    from backend.core.config.config_loader import ConfigLoader
+    from backend.core.config.flexible_config import FlexibleWorkflowConfig
+except ImportError:
+    # If absolute imports fail, try relative imports for direct execution
+    from ..config.config_loader import ConfigLoader
+    from ..config.flexible_config import FlexibleWorkflowConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkflowRunContext:
+    """Isolated state for a single flexible workflow execution.
+
+    Attributes:
+        run_id: Unique identifier of the run
+        user_request: The user's request being processed
+        start_time: Time the run started
+        run_label: Label used to name the run's output files and directories
+        incremental_dir: Directory receiving incremental agent outputs
+        workflow_config: Parsed workflow configuration for this run
+        config_loader: Workflow configuration snapshot taken at run start
+        prompts_loader: Prompts configuration snapshot taken at run start
+        status_callback: Optional callback reporting (agent_name, progress, message)
+        factory: Agent factory that built this run's agent tree
+        all_agents: Agents built for this run, keyed by name
+        main_agent: Root agent of this run
+        runner: ADK runner executing this run
+        session: ADK session for this run
+        executed_agents: Names of agents that completed, in order
+        current_agent: Name of the agent currently executing, if known
+        task: Task executing the run, used for cancellation
+        cancel_requested: Whether cancellation of the run was requested
+        checkpoint: WorkflowCheckpoint recording completed agents for resume
+        resumed_agents: Agents skipped because an earlier run completed them
+    """
+    run_id: str
+    user_request: str
+    start_time: datetime
+    run_label: str
+    incremental_dir: Path
+    workflow_config: FlexibleWorkflowConfig
+    config_loader: ConfigLoader
+    prompts_loader: ConfigLoader
+    status_callback: Optional[Callable[..., Any]] = None
+    factory: Any = None
+    all_agents: Dict[str, BaseAgent] = field(default_factory=dict)
+    main_agent: Optional[BaseAgent] = None
+    runner: Any = None
+    session: Any = None
+    executed_agents: List[str] = field(default_factory=list)
+    current_agent: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    cancel_requested: bool = False
+    checkpoint: Any = None
+    resumed_agents: List[str] = field(default_factory=list)
+
+    def report_status(self, agent_name: str, progress: float, message: str = "") -> None:
+        """Report progress through the run's status callback, if any.
+
+        Args:
+            agent_name: Agent the update refers to
+            progress: Workflow progress (0-100)
+            message: Progress message
+        """
+        if self.status_callback:
+            self.status_callback(agent_name, progress, message)
+
+    def record_agent_completed(self, agent_name: str) -> None:
+        """Record that an agent finished executing.
+
+        Args:
+            agent_name: Name of the agent that completed
+        """
+        if agent_name not in self.executed_agents:
+            self.executed_agents.append(agent_name)
+
+    def cancel(self) -> bool:
+        """Cancel the run, aborting any in-flight model or tool call.
+
+        Returns:
+            True if the run was still executing and has been cancelled
+        """
+        self.cancel_requested = True
+        if self.task is None or self.task.done():
+            return False
+        return self.task.cancel()
@@ -9,7 +9,6 @@ from typing import Any, Dict, Optional
 import time
 
 from google.adk.agents import Agent
-from google.adk.runners import InMemoryRunner
 from google.adk.tools import google_search
 from google.genai import types
 
@@ -17,11 +16,15 @@ try:
     from backend.core.agents.base_agent import BaseResearchAgent
     from backend.core.utils.response_formatter import format_response, format_error_response
     from backend.core.config.config_loader import ConfigLoader
+    from backend.core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from backend.core.utils.fake_llm import resolve_model
     from backend.tools.deep_research_tool import rag_tool
 except:
     from core.agents.base_agent import BaseResearchAgent
     from core.utils.response_formatter import format_response, format_error_response
     from core.config.config_loader import ConfigLoader
+    from core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from core.utils.fake_llm import resolve_model
     from tools.deep_research_tool import rag_tool
 
 
@@ -140,7 +143,7 @@ class ResearchAgent(BaseResearchAgent):
         
         self.agent = Agent(
             name=self.config_loader.get_value("agent_config.name"),
-            model=self.config_loader.get_value("core_config.model"),
+            model=resolve_model(self.config_loader.get_value("core_config.model"), self.gemini_config_loader),
             description=self.config_loader.get_value("agent_config.description"),
             instruction=self.get_agent_instruction(),
             tools=enabled_tools
@@ -148,10 +151,7 @@ class ResearchAgent(BaseResearchAgent):
         
         # Setup runner and session using config values
         app_name = self.config_loader.get_value("app_config.app_name")
-        self.runner = InMemoryRunner(
-            agent=self.agent, 
-            app_name=app_name
-        )
+        self.runner = create_runner(self.agent, app_name, create_session_service(self.config_loader))
         await self._create_session()
         
         self.initialized = True
@@ -180,11 +180,9 @@ class ResearchAgent(BaseResearchAgent):
             self.config_loader.get_value("session_config.fallback_session_id", "default_session")
         )
         
-        self.session = await self.runner.session_service.create_session(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id,
-            state=initial_state
+        # A stored session (sqlite session backend) is continued instead of recreated
+        self.session = await get_or_create_session(
+            self.runner.session_service, app_name, user_id, session_id, state=initial_state
         )
 
     async def query_async(self, query: str) -> Dict[str, Any]:
@@ -8,17 +8,20 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from google.adk.agents import Agent
-from google.adk.runners import InMemoryRunner
 from google.adk.tools import google_search
 
 try:
     from backend.core.agents.base_agent import BaseResearchAgent
     from backend.core.utils.response_formatter import format_response, format_error_response
     from backend.core.config.config_loader import ConfigLoader
+    from backend.core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from backend.core.utils.fake_llm import resolve_model
 except:
     from core.agents.base_agent import BaseResearchAgent
     from core.utils.response_formatter import format_response, format_error_response
     from core.config.config_loader import ConfigLoader
+    from core.utils.session_store import create_runner, create_session_service, get_or_create_session
+    from core.utils.fake_llm import resolve_model
 
 
 class SearchAgent(BaseResearchAgent):
@@ -87,7 +90,7 @@ class SearchAgent(BaseResearchAgent):
         # Create agent with configuration from config files
         self.agent = Agent(
             name=self.config_loader.get_value("agent_config.name"),
-            model=self.config_loader.get_value("core_config.model"),
+            model=resolve_model(self.config_loader.get_value("core_config.model"), self.gemini_config_loader),
             description=self.config_loader.get_value("agent_config.description"),
             instruction=self.get_agent_instruction(),
             tools=self.get_tools()
@@ -95,10 +98,7 @@ class SearchAgent(BaseResearchAgent):
         
         # Setup runner and session using config values
         app_name = self.config_loader.get_value("app_config.app_name")
-        self.runner = InMemoryRunner(
-            agent=self.agent, 
-            app_name=app_name
-        )
+        self.runner = create_runner(self.agent, app_name, create_session_service(self.config_loader))
         await self._create_session()
         
         self.initialized = True
@@ -127,11 +127,9 @@ class SearchAgent(BaseResearchAgent):
             self.config_loader.get_value("session_config.fallback_session_id", "default_session")
         )
         
-        self.session = await self.runner.session_service.create_session(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id,
-            state=initial_state
+        # A stored session (sqlite session backend) is continued instead of recreated
+        self.session = await get_or_create_session(
+            self.runner.session_service, app_name, user_id, session_id, state=initial_state
         )
 
     def get_agent_instruction(self) -> str:
@@ -0,0 +1,22 @@
+"""Stand-in conversions for the conversion pool tests.
+
+Kept free of backend imports, so the spawned worker processes that import
+this module start quickly.
+"""
+
+import os
+import time
+
+
+def convert(input_directory, filename, timeout):
+    """Convert a document by name: crash*, hang*, fail* and slow* misbehave accordingly."""
+    if filename.startswith("crash"):
+        os._exit(3)
+    if filename.startswith("hang"):
+        while True:
+            time.sleep(0.05)
+    if filename.startswith("fail"):
+        raise ValueError(f"cannot convert {filename}")
+    if filename.startswith("slow"):
+        time.sleep(3)
+    return f"converted {filename}", 0.0
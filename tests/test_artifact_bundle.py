@@ -0,0 +1,122 @@
+"""Tests for the content-addressed artifact bundle."""
+
+import pytest
+
+from backend.core.utils.artifact_bundle import (
+    BUNDLE_FILENAME,
+    MIN_CHUNK_BYTES,
+    ArtifactBundle,
+    ArtifactBundleError,
+    split_chunks,
+)
+
+PARAGRAPH = b"A paragraph long enough to be a chunk of its own. " * 6 + b"\n\n"
+
+
+def test_split_chunks():
+    assert split_chunks(b"") == [b""]
+    assert split_chunks(b"short\n\ntext") == [b"short\n\ntext"]
+    data = PARAGRAPH + b"short\n\n" + PARAGRAPH + b"tail"
+    chunks = split_chunks(data)
+    assert b"".join(chunks) == data
+    assert chunks[0] == PARAGRAPH
+    assert all(len(chunk) >= MIN_CHUNK_BYTES for chunk in chunks[:-1])
+
+
+def test_round_trip_and_replacement(tmp_path):
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    bundle.append([("01_writer.md", "Entwurf ✓".encode(), "agent_output"), ("state.json", b"{}", "state")])
+
+    reader = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    assert reader.read_text("01_writer.md") == "Entwurf ✓"
+    assert reader.entries["state.json"].kind == "state"
+
+    bundle.append([("01_writer.md", b"second draft", "agent_output")])
+
+    assert reader.read_text("01_writer.md") == "Entwurf ✓"  # Until it refreshes
+    assert [entry.name for entry in reader.refresh()] == ["01_writer.md"]
+    assert reader.read_text("01_writer.md") == "second draft"
+    assert reader.entries["01_writer.md"].seq == 2
+    with pytest.raises(ArtifactBundleError):
+        reader.read("missing.md")
+
+
+def test_shared_chunks_are_stored_once(tmp_path):
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    output = PARAGRAPH + b"analysis"
+    quoting = PARAGRAPH + b"design based on the analysis"
+
+    assert bundle.append([("01_analyzer.md", output, "agent_output")]) == 0
+    assert bundle.append([("02_designer.md", quoting, "agent_output")]) == len(PARAGRAPH)
+    # Duplicates within one append are stored once as well
+    assert bundle.append([("a.md", b"same", "x"), ("b.md", b"same", "x")]) == len(b"same")
+
+    stats = bundle.stats()
+    assert stats["entries"] == 4
+    assert stats["chunks"] == 4
+    assert stats["logical_bytes"] == len(output) + len(quoting) + 8
+    assert ArtifactBundle(tmp_path / BUNDLE_FILENAME).read("02_designer.md") == quoting
+
+
+def test_refresh_reads_only_new_records(tmp_path):
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    reader = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    assert reader.refresh() == []
+
+    bundle.append([("01_writer.md", b"draft", "agent_output")])
+    assert [entry.name for entry in reader.refresh()] == ["01_writer.md"]
+    assert reader.refresh() == []
+
+    bundle.append([("02_reviewer.md", b"review", "agent_output")])
+    assert [entry.name for entry in reader.refresh()] == ["02_reviewer.md"]
+    assert sorted(reader.entries) == ["01_writer.md", "02_reviewer.md"]
+
+
+def test_torn_tail_is_ignored_and_cut_by_next_append(tmp_path):
+    path = tmp_path / BUNDLE_FILENAME
+    ArtifactBundle(path).append([("01_writer.md", b"draft", "agent_output")])
+    complete_size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"E\x00\x00\x01\x00{\"name\": ")  # Entry record cut short by a crash
+
+    reader = ArtifactBundle(path)
+    assert [entry.name for entry in reader.refresh()] == ["01_writer.md"]
+
+    ArtifactBundle(path).append([("02_reviewer.md", b"review", "agent_output")])
+
+    assert [entry.name for entry in reader.refresh()] == ["02_reviewer.md"]
+    assert reader.read_text("02_reviewer.md") == "review"
+    assert path.stat().st_size > complete_size
+
+
+def test_replaced_file_is_read_from_the_start(tmp_path):
+    path = tmp_path / BUNDLE_FILENAME
+    ArtifactBundle(path).append([("01_writer.md", b"draft " * 50, "agent_output")])
+    reader = ArtifactBundle(path)
+    reader.refresh()
+
+    path.unlink()
+    ArtifactBundle(path).append([("01_other.md", b"new", "agent_output")])
+
+    reader.refresh()
+    assert sorted(reader.entries) == ["01_other.md"]
+    assert reader.read_text("01_other.md") == "new"
+
+
+def test_not_a_bundle(tmp_path):
+    path = tmp_path / BUNDLE_FILENAME
+    path.write_bytes(b"something else entirely")
+
+    with pytest.raises(ArtifactBundleError):
+        ArtifactBundle(path).refresh()
+
+
+def test_zstd_chunks_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    data = PARAGRAPH * 20
+
+    bundle.append([("01_writer.md", data, "agent_output")], compression="zstd")
+
+    assert ArtifactBundle(tmp_path / BUNDLE_FILENAME).read("01_writer.md") == data
+    assert bundle.stats()["stored_bytes"] < len(data)
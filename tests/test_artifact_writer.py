@@ -0,0 +1,151 @@
+"""Tests for the background artifact writer."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from backend.core.utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle
+from backend.core.utils.artifact_writer import ArtifactWriter, ArtifactWriterError
+
+
+@pytest.fixture
+def writer():
+    writers = []
+
+    def make(**kwargs):
+        writers.append(ArtifactWriter(**kwargs))
+        return writers[-1]
+
+    yield make
+    for w in writers:
+        w.close()
+
+
+@pytest.mark.parametrize("fsync", ["always", "batch", "never"])
+def test_writes_are_on_disk_after_flush(writer, tmp_path, fsync):
+    w = writer(fsync=fsync)
+    w.write_text(tmp_path / "run" / "01_writer.md", "draft")
+    w.write_json(tmp_path / "run" / "state.json", {"step": 1, "at": tmp_path})
+
+    assert w.flush(timeout=10)
+
+    assert (tmp_path / "run" / "01_writer.md").read_text() == "draft"
+    assert json.loads((tmp_path / "run" / "state.json").read_text()) == {"step": 1, "at": str(tmp_path)}
+    # Temporary files are renamed into place
+    assert sorted(p.name for p in (tmp_path / "run").iterdir()) == ["01_writer.md", "state.json"]
+    assert w.stats()["writes"] == 2
+
+
+def test_json_payload_is_serialized_when_queued(writer, tmp_path):
+    w = writer()
+    payload = {"status": "running"}
+    w.write_json(tmp_path / "state.json", payload)
+    payload["status"] = "completed"
+    w.flush(timeout=10)
+
+    assert json.loads((tmp_path / "state.json").read_text()) == {"status": "running"}
+
+
+def test_last_write_of_a_file_wins(writer, tmp_path):
+    w = writer()
+    for i in range(50):
+        w.write_text(tmp_path / "summary.md", f"version {i}")
+    w.flush(timeout=10)
+
+    assert (tmp_path / "summary.md").read_text() == "version 49"
+    stats = w.stats()
+    assert stats["writes"] + stats["coalesced"] == 50
+    assert stats["failures"] == 0
+
+
+def test_failed_write_is_counted(writer, tmp_path):
+    (tmp_path / "blocker").write_text("not a directory")
+    w = writer()
+    w.write_text(tmp_path / "blocker" / "01_writer.md", "draft")
+    w.write_text(tmp_path / "ok.md", "fine")
+    w.flush(timeout=10)
+
+    assert w.stats()["failures"] == 1
+    assert (tmp_path / "ok.md").read_text() == "fine"
+
+
+def test_full_queue_does_not_block_the_event_loop(writer, tmp_path):
+    w = writer(queue_size=2)
+    released = threading.Event()
+    commit = w._commit
+
+    def stalled_commit(batch):
+        released.wait(10)
+        commit(batch)
+
+    w._commit = stalled_commit
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async def produce():
+            for i in range(6):
+                await w.write_text_async(tmp_path / f"{i:02d}_agent.md", f"output {i}")
+            await w.write_json_async(tmp_path / "state.json", {"done": True})
+
+        ticking = asyncio.create_task(ticker())
+        producing = asyncio.create_task(produce())
+        await asyncio.sleep(0.3)
+        # The producer waits for the stalled writer while the loop keeps running
+        assert not producing.done()
+        assert ticks >= 10
+        released.set()
+        await producing
+        ticking.cancel()
+        return await w.flush_async(timeout=10)
+
+    assert asyncio.run(scenario())
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{i:02d}_agent.md" for i in range(6)] + ["state.json"]
+
+
+def test_bundle_format_appends_bundled_artifacts(writer, tmp_path):
+    w = writer(format="bundle")
+    shared = "Shared paragraph. " * 20 + "\n\n"
+    w.write_text(tmp_path / "01_writer.md", shared + "draft", kind="agent_output", bundled=True)
+    w.write_text(tmp_path / "02_reviewer.md", shared + "review", kind="agent_output", bundled=True)
+    w.write_json(tmp_path / "result.json", {"ok": True})
+    w.flush(timeout=10)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [BUNDLE_FILENAME, "result.json"]
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    assert bundle.read_text("01_writer.md") == shared + "draft"
+    assert bundle.read_text("02_reviewer.md") == shared + "review"
+    assert bundle.entries["01_writer.md"].kind == "agent_output"
+    assert w.stats()["deduplicated_bytes"] == len(shared)
+    assert w.stats()["writes"] == 3
+
+
+def test_bundled_flag_is_ignored_by_files_format(writer, tmp_path):
+    w = writer(format="files")
+    w.write_text(tmp_path / "01_writer.md", "draft", bundled=True)
+    w.flush(timeout=10)
+
+    assert (tmp_path / "01_writer.md").read_text() == "draft"
+    assert not (tmp_path / BUNDLE_FILENAME).exists()
+
+
+def test_invalid_settings_and_closed_writer(tmp_path):
+    for kwargs in ({"fsync": "sometimes"}, {"format": "zip"}, {"compression": "gzip"}):
+        with pytest.raises(ArtifactWriterError):
+            ArtifactWriter(**kwargs)
+
+    w = ArtifactWriter()
+    w.write_text(tmp_path / "late.md", "committed on close")
+    w.close()
+
+    assert (tmp_path / "late.md").read_text() == "committed on close"
+    with pytest.raises(ArtifactWriterError):
+        w.write_text(tmp_path / "after.md", "rejected")
@@ -0,0 +1,89 @@
+"""Tests for batch submission parsing and progress aggregation."""
+
+import asyncio
+
+import pytest
+
+from backend.api.batch import (
+    BatchError,
+    BatchItem,
+    WorkflowBatch,
+    parse_batch_entries,
+    parse_jsonl,
+    summarize_batch,
+)
+
+PRIORITIES = ["high", "normal", "low"]
+
+
+def test_parse_jsonl_skips_blank_lines():
+    text = '"first"\n\n{"user_request": "second", "priority": "high"}\n   \n'
+
+    assert parse_jsonl(text) == ["first", {"user_request": "second", "priority": "high"}]
+
+
+def test_parse_jsonl_reports_the_invalid_line():
+    with pytest.raises(BatchError, match="Line 2 is not valid JSON"):
+        parse_jsonl('"ok"\n{broken\n')
+
+
+def test_parse_batch_entries_normalizes_strings_and_objects():
+    requests = parse_batch_entries(["first", {"user_request": "second", "priority": "high"}], "low", PRIORITIES, 10)
+
+    assert requests == [
+        {"user_request": "first", "priority": "low"},
+        {"user_request": "second", "priority": "high"},
+    ]
+
+
+@pytest.mark.parametrize("entries, message", [
+    ([], "no requests"),
+    (["a", "b", "c"], "limit is 2"),
+    (["a", 3], "Entry 1 must be a string or an object"),
+    (["a", "  "], "Entry 1 has no user_request"),
+    ([{"priority": "high"}], "Entry 0 has no user_request"),
+    ([{"user_request": "a", "priority": "urgent"}], "invalid priority 'urgent'"),
+])
+def test_parse_batch_entries_rejects_invalid_batches(entries, message):
+    with pytest.raises(BatchError, match=message):
+        parse_batch_entries(entries, "low", PRIORITIES, 2)
+
+
+def test_summarize_batch_counts_finished_items():
+    items = [
+        {"status": "completed"},
+        {"status": "failed"},
+        {"status": "running", "progress": 50.0},
+        {"status": "queued", "progress": None},
+    ]
+
+    summary = summarize_batch("b", items)
+
+    assert summary["total"] == 4
+    assert summary["finished"] == 2
+    assert summary["counts"] == {"completed": 1, "failed": 1, "running": 1, "queued": 1}
+    assert summary["progress"] == 62.5
+    assert not summary["complete"]
+    assert summarize_batch("b", [])["progress"] == 100.0
+    assert summarize_batch("b", [{"status": "cancelled"}])["complete"]
+
+
+def test_run_limits_items_in_flight_and_survives_failures():
+    batch = WorkflowBatch("b", [BatchItem(i, f"wf{i}", f"request {i}") for i in range(6)], max_concurrency=2)
+    in_flight = []
+    peak = 0
+
+    async def execute(item):
+        nonlocal peak
+        in_flight.append(item.index)
+        peak = max(peak, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(item.index)
+        if item.index == 3:
+            raise RuntimeError("boom")
+        batch.set_status(item, "completed")
+
+    asyncio.run(batch.run(execute))
+
+    assert peak == 2
+    assert [item.status for item in batch.items] == ["completed"] * 3 + ["queued"] + ["completed"] * 2
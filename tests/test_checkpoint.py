@@ -0,0 +1,99 @@
+"""Tests for resuming workflow runs from their checkpoint."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from backend.core.utils.fake_llm import AGENT_NAME_PATTERN, FakeLlm
+from backend.core.workflow.checkpoint import CHECKPOINT_FILENAME, CheckpointError, WorkflowCheckpoint
+from backend.core.workflow.flexible_workflow_manager import FlexibleWorkflowManager
+
+AGENTS = ["Analyzer", "Designer", "Writer"]
+
+
+def chain_configs(output_dir):
+    """Uploaded configurations of a three-agent chain answered by the fake model."""
+    workflow = {
+        "name": "Chain",
+        "description": "Analyzer, Designer and Writer in sequence",
+        "version": "1",
+        "main_agent": "Main",
+        "core_config": {"model": "fake-model"},
+        "app_config": {"output_dir": str(output_dir)},
+        "agents": [{"name": "Main", "type": "SequentialAgent", "sub_agents": AGENTS}] + [
+            {"name": name, "type": "LlmAgent", "model": "fake-model", "prompt_key": name.lower(),
+             "output_key": name.lower()}
+            for name in AGENTS
+        ],
+    }
+    gemini = {
+        "api_config": {"provider": "fake"},
+        "fake_llm_config": {
+            "latency_ms": {"distribution": "fixed", "mean": 100},
+            "responses": {"default": "{agent} output {request_id}"},
+        },
+    }
+    prompts = {"prompts": {name.lower(): f"Act as the {name}." for name in AGENTS}}
+    return {
+        name: {"content": yaml.safe_dump(config)}
+        for name, config in (("workflow", workflow), ("gemini", gemini), ("prompts", prompts))
+    }
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """Names of the agents whose model was called, in order."""
+    calls = []
+    generate = FakeLlm.generate_content_async
+
+    async def counting_generate(self, llm_request, stream=False):
+        calls.append(AGENT_NAME_PATTERN.search(llm_request.config.system_instruction).group(1))
+        async for response in generate(self, llm_request, stream):
+            yield response
+
+    monkeypatch.setattr(FakeLlm, "generate_content_async", counting_generate)
+    return calls
+
+
+def test_resumed_run_skips_completed_agents(tmp_path, model_calls):
+    manager = FlexibleWorkflowManager(uploaded_configs=chain_configs(tmp_path))
+
+    async def scenario():
+        runs = []
+        first = asyncio.create_task(manager.run_workflow("Build it", run_id="first", run_started_callback=runs.append))
+        # Cancel once the Analyzer is checkpointed, while the Designer is running
+        while not (runs and "Analyzer" in runs[0].checkpoint.completed_agents):
+            await asyncio.sleep(0.01)
+        manager.cancel_run("first")
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        incremental_dir = runs[0].incremental_dir
+        checkpoint = WorkflowCheckpoint.load(incremental_dir)
+        calls_before_resume = list(model_calls)
+        resumed = await manager.run_workflow("Build it", run_id="second", resume_dir=incremental_dir)
+        return checkpoint, calls_before_resume, resumed
+
+    checkpoint, calls_before_resume, result = asyncio.run(scenario())
+
+    assert checkpoint.completed_agents == ["Analyzer"]
+    assert calls_before_resume[0] == "Analyzer" and "Writer" not in calls_before_resume
+    # Only the agents that did not complete call their models again
+    assert model_calls[len(calls_before_resume):] == ["Designer", "Writer"]
+    metadata = result["metadata"]
+    assert metadata["resumed_agents"] == ["Analyzer"]
+    assert result["state"]["analyzer"] == checkpoint.state["analyzer"]
+    assert result["state"]["analyzer"].startswith("Analyzer output ")
+    assert result["state"]["writer"].startswith("Writer output ")
+    saved = json.loads((Path(metadata["incremental_output_dir"]) / CHECKPOINT_FILENAME).read_text(encoding="utf-8"))
+    assert saved["completed_agents"] == AGENTS
+    assert saved["run_id"] == "second"
+
+
+def test_resume_without_checkpoint_raises(tmp_path):
+    manager = FlexibleWorkflowManager(uploaded_configs=chain_configs(tmp_path))
+
+    with pytest.raises(CheckpointError):
+        asyncio.run(manager.run_workflow("Build it", resume_dir=tmp_path))
@@ -0,0 +1,122 @@
+"""Tests for token-budgeted context assembly."""
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from backend.core.utils.context_budget import (
+    IDENTITY_PREFIX,
+    OMITTED_NOTE,
+    ContextBudget,
+    ContextBudgetError,
+)
+
+
+def request(outputs, instruction="Prompt."):
+    """Model request with the user's request followed by upstream outputs, oldest first."""
+    contents = [types.Content(role="user", parts=[types.Part(text="Do it")])]
+    contents += [
+        types.Content(role="user", parts=[types.Part(text=f"[{author}] said: {text}")])
+        for author, text in outputs
+    ]
+    return LlmRequest(model="m", contents=contents, config=types.GenerateContentConfig(system_instruction=instruction))
+
+
+def budget(max_input_tokens, **kwargs):
+    # One character per token keeps the arithmetic readable
+    return ContextBudget(max_input_tokens, chars_per_token=1.0, min_item_tokens=40, **kwargs)
+
+
+def parts(llm_request):
+    return [content.parts[0].text for content in llm_request.contents]
+
+
+def actions(report):
+    return {entry["source"]: entry["action"] for entry in report["items"]}
+
+
+def test_from_parameters():
+    assert ContextBudget.from_parameters(None) is None
+    assert ContextBudget.from_parameters(500).max_input_tokens == 500
+    configured = ContextBudget.from_parameters({"max_input_tokens": 100, "overflow": "summarize", "verbatim": ["req"]})
+    assert configured.overflow == "summarize"
+    assert configured.verbatim == {"req"}
+
+    with pytest.raises(ContextBudgetError):
+        ContextBudget.from_parameters({"overflow": "truncate"})
+    with pytest.raises(ContextBudgetError):
+        ContextBudget(100, overflow="compress")
+    with pytest.raises(ContextBudgetError):
+        ContextBudget(0)
+
+
+def test_request_within_budget_is_unchanged():
+    llm_request = request([("Analyzer", "A" * 50)])
+    before = parts(llm_request)
+
+    report = budget(1000).apply(llm_request, "Writer")
+
+    assert report["items"] == []
+    assert report["tokens_before"] == report["tokens_after"]
+    assert parts(llm_request) == before
+
+
+def test_truncates_older_outputs_and_drops_what_no_longer_fits():
+    llm_request = request([("Analyzer", "A" * 200), ("Designer", "D" * 200), ("Coder", "C" * 200)])
+    original = list(llm_request.contents)
+
+    report = budget(350).apply(llm_request, "Writer")
+
+    # The newest output is kept, the next one truncated to what is left, the oldest dropped
+    assert actions(report) == {"Designer": "truncated", "Analyzer": "dropped"}
+    texts = parts(llm_request)
+    assert texts[0] == "Do it"
+    assert texts[1] == f"[Analyzer] said: {OMITTED_NOTE}"
+    assert texts[2].startswith("[Designer] said: D") and "tokens truncated" in texts[2]
+    assert texts[3] == "[Coder] said: " + "C" * 200
+    assert report["tokens_after"] <= 350
+    # Contents shared with the session are not modified
+    assert original[1].parts[0].text == "[Analyzer] said: " + "A" * 200
+
+
+def test_summarize_keeps_headings_and_leading_sentences():
+    text = "# Design\n\nThe API is REST. It uses JSON everywhere.\n\n## Storage\nSQLite holds jobs. WAL mode is on.\n\n" + "x" * 400
+    llm_request = request([("Designer", text), ("Coder", "C" * 100)])
+
+    report = budget(250, overflow="summarize").apply(llm_request, "Writer")
+
+    assert actions(report) == {"Designer": "summarized"}
+    summary = parts(llm_request)[1]
+    assert "# Design" in summary and "The API is REST." in summary
+    assert "## Storage" in summary and "SQLite holds jobs." in summary
+    assert "It uses JSON everywhere." not in summary
+
+
+def test_verbatim_outputs_are_never_reduced():
+    llm_request = request([("Analyzer", "A" * 200), ("Designer", "D" * 200), ("Coder", "C" * 200)])
+
+    report = budget(400, verbatim=["analysis"], output_keys={"Analyzer": "analysis"}).apply(llm_request, "Writer")
+
+    assert "Analyzer" not in actions(report)
+    assert parts(llm_request)[1] == "[Analyzer] said: " + "A" * 200
+    assert actions(report) == {"Coder": "truncated", "Designer": "dropped"}
+
+
+def test_input_documents_are_reduced_after_outputs():
+    documents = (
+        "\n\n**Additional Input Documents (2 files):**\n"
+        "### Document 1: spec.md\n" + "S" * 100 + "\n\n"
+        "### Document 2: notes.md\n" + "N" * 300
+    )
+    suffix = IDENTITY_PREFIX + '"Writer".'
+    llm_request = request([("Coder", "C" * 50)], instruction="Prompt." + documents + suffix)
+
+    report = budget(320).apply(llm_request, "Writer")
+
+    assert actions(report) == {"notes.md": "truncated"}
+    instruction = llm_request.config.system_instruction
+    assert instruction.startswith("Prompt.\n\n**Additional Input Documents (2 files):**\n")
+    assert "### Document 1: spec.md\n" + "S" * 100 + "\n\n### Document 2: notes.md\n" in instruction
+    assert "tokens truncated" in instruction
+    assert instruction.endswith(suffix)
+    assert parts(llm_request)[1] == "[Coder] said: " + "C" * 50
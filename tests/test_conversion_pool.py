@@ -0,0 +1,110 @@
+"""Tests for parallel document conversion with timeouts and crash isolation."""
+
+import threading
+import time
+
+import conversion_workers
+import pytest
+
+from backend.core.utils import conversion_pool
+from backend.core.utils.conversion_pool import ConversionPool, ConversionPoolError
+from backend.core.utils.document_reader import DocumentReader
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(conversion_pool, "_convert_in_worker", conversion_workers.convert)
+    # Stuck conversions are killed right after their timeout
+    monkeypatch.setattr(conversion_pool, "WORKER_START_SECONDS", 0.0)
+    monkeypatch.setattr(conversion_pool, "KILL_GRACE_SECONDS", 0.2)
+    pool = ConversionPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def outcome(results):
+    return [(r.filename, r.content or r.error) for r in results]
+
+
+def test_results_keep_their_order_with_errors_per_file(pool, tmp_path):
+    results = pool.convert(tmp_path, ["a", "fail.txt", "b", "c"])
+
+    assert outcome(results) == [
+        ("a", "converted a"),
+        ("fail.txt", "cannot convert fail.txt"),
+        ("b", "converted b"),
+        ("c", "converted c"),
+    ]
+    assert pool.stats()["conversions"] == 3
+    assert pool.stats()["failures"] == 1
+
+
+def test_crash_fails_only_the_crashing_file(pool, tmp_path):
+    results = pool.convert(tmp_path, ["a", "crash.pdf", "b", "c"])
+
+    assert outcome(results) == [
+        ("a", "converted a"),
+        ("crash.pdf", "Conversion worker crashed"),
+        ("b", "converted b"),
+        ("c", "converted c"),
+    ]
+    assert pool.stats()["crashes"] == 1
+    assert pool.stats()["failures"] == 1
+
+
+def test_stuck_conversion_is_killed_after_its_timeout(pool, tmp_path):
+    results = pool.convert(tmp_path, ["hang.pdf", "a", "b"], timeout=1)
+
+    assert outcome(results) == [
+        ("hang.pdf", "Conversion of hang.pdf timed out after 1s"),
+        ("a", "converted a"),
+        ("b", "converted b"),
+    ]
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["crashes"] == 0
+
+
+def convert_in_thread(pool, directory, filenames, timeout=None):
+    outcome_of = {}
+    thread = threading.Thread(target=lambda: outcome_of.update(results=pool.convert(directory, filenames, timeout)))
+    thread.start()
+    while pool._busy == 0 and thread.is_alive():
+        time.sleep(0.01)
+    return thread, outcome_of
+
+
+def test_batches_do_not_wait_for_each_other(pool, tmp_path):
+    stuck, stuck_outcome = convert_in_thread(pool, tmp_path, ["hang.pdf"], timeout=2)
+
+    results = pool.convert(tmp_path, ["a"])
+
+    assert stuck.is_alive()
+    assert outcome(results) == [("a", "converted a")]
+    stuck.join()
+    assert outcome(stuck_outcome["results"]) == [("hang.pdf", "Conversion of hang.pdf timed out after 2s")]
+
+
+def test_conversions_interrupted_by_another_batch_timeout_are_retried(pool, tmp_path):
+    stuck, stuck_outcome = convert_in_thread(pool, tmp_path, ["hang.pdf"], timeout=1)
+
+    # Still running when the stuck worker's pool is killed
+    results = pool.convert(tmp_path, ["slow.pdf"])
+
+    stuck.join()
+    assert outcome(results) == [("slow.pdf", "converted slow.pdf")]
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["crashes"] == 0
+    assert pool._busy == 0
+
+
+def test_worker_interrupts_a_conversion_past_its_timeout(monkeypatch, tmp_path):
+    def endless(self, file_path):
+        while True:
+            pass
+
+    monkeypatch.setattr(DocumentReader, "_read_txt", endless)
+    (tmp_path / "input").mkdir()
+    (tmp_path / "input" / "notes.txt").write_text("content")
+
+    with pytest.raises(ConversionPoolError, match="timed out after 0.2s"):
+        conversion_pool._convert_in_worker(str(tmp_path / "input"), "notes.txt", 0.2)
@@ -0,0 +1,149 @@
+"""Tests for dependency-driven parallelization of sequential agents."""
+
+from backend.core.agents.dependency_planner import (
+    build_dependency_graph,
+    parallelize_sequential_agents,
+    plan_stages,
+    referenced_state_keys,
+    uses_history,
+)
+from backend.core.agents.flexible_agent_factory import FlexibleAgentFactory
+from backend.core.config.flexible_config import FlexibleAgentConfig
+
+NO_HISTORY = {"include_contents": "none"}
+
+
+def llm(name, prompt, output_key=None, **parameters):
+    return FlexibleAgentConfig(name=name, type="LlmAgent", instruction=prompt, output_key=output_key,
+                               parameters=parameters)
+
+
+def sequence(name, sub_agents, **parameters):
+    return FlexibleAgentConfig(name=name, type="SequentialAgent", sub_agents=sub_agents, parameters=parameters)
+
+
+def plan(configs, enabled=True):
+    planned = parallelize_sequential_agents(configs, lambda cfg: cfg.instruction, enabled)
+    return {cfg.name: cfg for cfg in planned}
+
+
+def test_referenced_state_keys():
+    text = "Use {requirements}, {app:style?}, {{design}} and {notes:none given}; not {1bad} or { }"
+    assert referenced_state_keys(text) == {"requirements", "app:style", "design", "notes"}
+    assert referenced_state_keys(None) == set()
+
+
+def test_dependency_graph_and_stages():
+    reads = [set(), set(), {"a", "b"}, set()]
+    writes = [{"a"}, {"b"}, {"c"}, {"a"}]
+
+    dependencies = build_dependency_graph(reads, writes)
+
+    # Step 3 rewrites a: after step 0 (last writer wins) and step 2 (which reads the old a)
+    assert dependencies == [set(), set(), {0, 1}, {0, 2}]
+    assert plan_stages(dependencies) == [[0, 1], [2], [3]]
+
+
+def test_barrier_steps_keep_their_place():
+    reads = [set(), set(), set(), set()]
+    writes = [{"a"}, {"b"}, {"c"}, {"d"}]
+
+    dependencies = build_dependency_graph(reads, writes, [False, False, True, False])
+
+    assert plan_stages(dependencies) == [[0, 1], [2], [3]]
+
+
+def test_uses_history():
+    assert uses_history(llm("A", "x"))
+    assert not uses_history(llm("A", "x", **NO_HISTORY))
+    assert not uses_history(llm("A", "x", independent=True))
+
+
+def test_agents_without_history_are_regrouped_by_state_references():
+    configs = [
+        llm("Security", "Review {code}", "security", **NO_HISTORY),
+        llm("Performance", "Review {code}", "performance", **NO_HISTORY),
+        llm("Summary", "Summarize {security} and {performance}", "summary", **NO_HISTORY),
+        sequence("Reviews", ["Security", "Performance", "Summary"]),
+    ]
+
+    planned = plan(configs)
+
+    assert planned["Reviews"].sub_agents == ["Reviews_Stage1", "Summary"]
+    assert planned["Reviews_Stage1"].type == "ParallelAgent"
+    assert planned["Reviews_Stage1"].sub_agents == ["Security", "Performance"]
+    # The cached configuration is not modified
+    assert configs[3].sub_agents == ["Security", "Performance", "Summary"]
+
+
+def test_agents_reading_the_history_stay_in_sequence():
+    configs = [
+        llm("Analyzer", "Analyze the request", "analysis"),
+        llm("Designer", "Design a solution", "design"),
+        sequence("Pipeline", ["Analyzer", "Designer"]),
+    ]
+
+    planned = plan(configs)
+
+    assert planned["Pipeline"].sub_agents == ["Analyzer", "Designer"]
+    assert not any(name.startswith("Pipeline_Stage") for name in planned)
+
+
+def test_history_reader_is_a_barrier_between_independent_agents():
+    configs = [
+        llm("A", "Draft part one", "one", **NO_HISTORY),
+        llm("B", "Draft part two", "two", independent=True),
+        llm("Editor", "Edit the drafts so far", "edited"),
+        llm("C", "Draft part three", "three", **NO_HISTORY),
+        llm("D", "Draft part four", "four", **NO_HISTORY),
+        sequence("Book", ["A", "B", "Editor", "C", "D"]),
+    ]
+
+    planned = plan(configs)
+
+    assert planned["Book"].sub_agents == ["Book_Stage1", "Editor", "Book_Stage3"]
+    assert planned["Book_Stage3"].sub_agents == ["C", "D"]
+
+
+def test_nested_sequence_with_a_history_reader_is_a_barrier():
+    configs = [
+        llm("A", "Draft", "a", **NO_HISTORY),
+        llm("Inner1", "Outline", "outline", **NO_HISTORY),
+        llm("Inner2", "Expand the outline above", "expanded"),
+        sequence("Inner", ["Inner1", "Inner2"]),
+        llm("B", "Draft", "b", **NO_HISTORY),
+        sequence("Outer", ["A", "Inner", "B"]),
+    ]
+
+    planned = plan(configs)
+
+    assert planned["Outer"].sub_agents == ["A", "Inner", "B"]
+
+
+def test_sequence_opt_in_and_opt_out():
+    configs = [
+        llm("A", "x", "a", **NO_HISTORY),
+        llm("B", "y", "b", **NO_HISTORY),
+        sequence("On", ["A", "B"], auto_parallel=True),
+        sequence("Off", ["A", "B"], auto_parallel=False),
+    ]
+
+    disabled = plan(configs, enabled=False)
+    enabled = plan(configs, enabled=True)
+
+    assert disabled["On"].sub_agents == ["On_Stage1"]
+    assert enabled["Off"].sub_agents == ["A", "B"]
+
+
+class NoPrompts:
+    def get_value(self, key, default=None):
+        return default
+
+
+def test_factory_builds_agents_without_history():
+    cfg = FlexibleAgentConfig(name="A", type="LlmAgent", model="gemini-2.0-flash", instruction="x",
+                              parameters=NO_HISTORY)
+
+    agent = FlexibleAgentFactory([cfg], NoPrompts())._create_agent(cfg)
+
+    assert agent.include_contents == "none"
@@ -0,0 +1,142 @@
+"""Tests for the content-keyed document conversion cache."""
+
+import json
+import os
+
+import pytest
+
+from backend.core.utils import file_utils
+from backend.core.utils.document_reader import META_SUFFIX, READER_VERSION, ConversionCache, DocumentReader
+from backend.core.workflow.compiled_workflow import input_files_digest
+
+
+@pytest.fixture
+def reader(tmp_path):
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+    return DocumentReader(input_directory, cache=ConversionCache())
+
+
+def write(reader, name, text, mtime=None):
+    path = reader.input_directory / name
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def counters(reader):
+    stats = reader.cache_stats()
+    return {key: stats[key] for key in ("memory_hits", "disk_hits", "conversions", "invalidations")}
+
+
+def test_conversion_is_saved_with_its_source_digest(reader):
+    write(reader, "notes.txt", "first version")
+
+    content = reader.read_document("notes.txt")
+
+    markdown_path = reader.input_markdown_directory / "notes.txt.md"
+    assert "first version" in content
+    assert markdown_path.read_text() == content
+    meta = json.loads((reader.input_markdown_directory / ("notes.txt.md" + META_SUFFIX)).read_text())
+    assert meta["reader_version"] == READER_VERSION
+    assert len(meta["sha256"]) == 64
+    assert sorted(p.name for p in reader.input_markdown_directory.iterdir()) == ["notes.txt.md", "notes.txt.md" + META_SUFFIX]
+
+
+def test_memory_hit_then_disk_hit_in_a_new_process(reader):
+    write(reader, "notes.txt", "content")
+    first = reader.read_document("notes.txt")
+
+    assert reader.read_document("notes.txt") == first
+    assert counters(reader) == {"memory_hits": 1, "disk_hits": 0, "conversions": 1, "invalidations": 0}
+
+    # Another process starts with an empty cache and reuses the markdown on disk
+    other = DocumentReader(reader.input_directory, cache=ConversionCache())
+    assert other.read_document("notes.txt") == first
+    assert counters(other) == {"memory_hits": 0, "disk_hits": 1, "conversions": 0, "invalidations": 0}
+
+
+def test_replaced_source_is_converted_again(reader):
+    write(reader, "notes.txt", "old content", mtime=1_000_000)
+    reader.read_document("notes.txt")
+
+    write(reader, "notes.txt", "new content", mtime=2_000_000)
+    content = reader.read_document("notes.txt")
+
+    assert "new content" in content and "old content" not in content
+    assert (reader.input_markdown_directory / "notes.txt.md").read_text() == content
+    assert counters(reader)["conversions"] == 2
+
+    # A fresh cache notices the stale markdown as well
+    write(reader, "notes.txt", "newest content", mtime=3_000_000)
+    other = DocumentReader(reader.input_directory, cache=ConversionCache())
+    assert "newest content" in other.read_document("notes.txt")
+    assert counters(other)["invalidations"] == 1
+
+
+def test_same_content_with_new_mtime_is_not_converted_again(reader):
+    write(reader, "notes.txt", "content", mtime=1_000_000)
+    reader.read_document("notes.txt")
+
+    write(reader, "notes.txt", "content", mtime=2_000_000)
+    other = DocumentReader(reader.input_directory, cache=ConversionCache())
+    other.read_document("notes.txt")
+
+    assert counters(other) == {"memory_hits": 0, "disk_hits": 1, "conversions": 0, "invalidations": 0}
+    meta = json.loads((reader.input_markdown_directory / ("notes.txt.md" + META_SUFFIX)).read_text())
+    assert meta["mtime_ns"] == 2_000_000 * 10**9
+
+
+def test_markdown_of_an_older_reader_version_is_converted_again(reader):
+    write(reader, "notes.txt", "content")
+    reader.read_document("notes.txt")
+    meta_path = reader.input_markdown_directory / ("notes.txt.md" + META_SUFFIX)
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps({**meta, "reader_version": READER_VERSION - 1}))
+
+    other = DocumentReader(reader.input_directory, cache=ConversionCache())
+    other.read_document("notes.txt")
+
+    assert counters(other)["conversions"] == 1
+    assert json.loads(meta_path.read_text())["reader_version"] == READER_VERSION
+
+
+def test_read_without_conversion(reader):
+    write(reader, "notes.txt", "content")
+
+    assert reader.read_document("notes.txt", convert=False) is None
+    reader.read_document("notes.txt")
+    assert "content" in reader.read_document("notes.txt", convert=False)
+    assert reader.read_document("missing.txt") == ""
+
+
+def test_memory_cache_is_bounded_in_bytes():
+    cache = ConversionCache(max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")
+    cache.put("c", "12345")
+    cache.put("huge", "x" * 11)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert (stats["memory_entries"], stats["memory_bytes"], stats["evictions"]) == (2, 10, 1)
+
+
+def test_file_digest_is_shared_with_workflow_fingerprints(reader, monkeypatch):
+    write(reader, "notes.txt", "content")
+    [[_, sha]] = input_files_digest(reader.input_directory, ["notes.txt"])
+
+    class NoHashing:
+        @staticmethod
+        def sha256():
+            raise AssertionError("file hashed twice")
+
+    monkeypatch.setattr(file_utils, "hashlib", NoHashing)
+    reader.read_document("notes.txt")
+
+    meta = json.loads((reader.input_markdown_directory / ("notes.txt.md" + META_SUFFIX)).read_text())
+    assert meta["sha256"] == sha
@@ -0,0 +1,139 @@
+"""Tests for the deterministic fake model backend."""
+
+import asyncio
+import random
+
+import pytest
+import yaml
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from backend.core.config.config_loader import ConfigLoader
+from backend.core.utils import fake_llm
+from backend.core.utils.fake_llm import FakeLlm, FakeLlmError, fake_llm_settings, resolve_model
+
+
+def request(agent="Writer", text="Write the summary"):
+    instruction = f'You are helpful.\n\nYou are an agent. Your internal name is "{agent}".'
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(system_instruction=instruction),
+    )
+
+
+def generate(llm, llm_request, monkeypatch):
+    """Run one model call and return the response with the latency it slept."""
+    slept = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(seconds):
+        slept.append(seconds)
+        await sleep(0)
+
+    monkeypatch.setattr(fake_llm.asyncio, "sleep", record_sleep)
+
+    async def run():
+        return [response async for response in llm.generate_content_async(llm_request)]
+
+    responses = asyncio.run(run())
+    assert len(responses) == 1
+    return responses[0], slept[0]
+
+
+def loader(tmp_path, config):
+    path = tmp_path / "gemini.yml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    config_loader = ConfigLoader(path)
+    config_loader.load_config()
+    return config_loader
+
+
+def test_responses_are_deterministic_across_instances(monkeypatch):
+    settings = {"seed": 7, "latency_ms": {"distribution": "lognormal", "mean": 800, "stddev": 300}}
+
+    first, first_latency = generate(FakeLlm(model="m", **settings), request(), monkeypatch)
+    second, second_latency = generate(FakeLlm(model="m", **settings), request(), monkeypatch)
+    other_seed, _ = generate(FakeLlm(model="m", **{**settings, "seed": 8}), request(), monkeypatch)
+
+    assert first.content.parts[0].text == second.content.parts[0].text
+    assert first_latency == second_latency > 0
+    assert other_seed.content.parts[0].text != first.content.parts[0].text
+
+
+def test_usage_metadata_counts_prompt_and_output_tokens(monkeypatch):
+    llm = FakeLlm(model="m", responses={"default": "x" * 40})
+    llm_request = request(text="y" * 400)
+
+    response, _ = generate(llm, llm_request, monkeypatch)
+
+    usage = response.usage_metadata
+    instruction_tokens = len(llm_request.config.system_instruction) / 4
+    assert usage.prompt_token_count == int(instruction_tokens + 100 + 0.5)
+    assert usage.candidates_token_count == 10
+    assert usage.total_token_count == usage.prompt_token_count + 10
+
+
+def test_templates_are_chosen_by_agent_name(monkeypatch):
+    llm = FakeLlm(model="m", responses={
+        "Coder": "code by {agent} on {model}",
+        "default": "text by {agent} for {prompt_tokens} tokens",
+    })
+
+    coder, _ = generate(llm, request("Coder"), monkeypatch)
+    writer, _ = generate(llm, request("Writer"), monkeypatch)
+    builtin, _ = generate(FakeLlm(model="m", output_tokens=13), request("Writer"), monkeypatch)
+
+    assert coder.content.parts[0].text == "code by Coder on m"
+    assert writer.content.parts[0].text.startswith("text by Writer for ")
+    assert builtin.content.parts[0].text.startswith("[Writer] response ")
+    assert len(builtin.content.parts[0].text.split("\n\n")[1].split()) == 10
+
+
+def test_invalid_template_raises(monkeypatch):
+    llm = FakeLlm(model="m", responses={"default": "{unknown} field"})
+
+    with pytest.raises(FakeLlmError, match="Invalid fake response template for Writer"):
+        generate(llm, request(), monkeypatch)
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "normal", "lognormal"])
+def test_latency_is_clamped(distribution):
+    llm = FakeLlm(model="m", ms_per_output_token=2.0, latency_ms={
+        "distribution": distribution, "mean": 500, "stddev": 5000, "min": 100, "max": 900,
+    })
+    rng = random.Random(1)
+
+    latencies = [llm._latency_seconds(rng, output_tokens=50) for _ in range(200)]
+
+    # Clamped to min/max before the per-token latency is added
+    assert min(latencies) >= 0.2 and max(latencies) <= 1.0
+    assert FakeLlm(model="m", latency_ms={"mean": 250})._latency_seconds(rng, 0) == 0.25
+
+
+def test_settings_select_the_fake_backend(tmp_path):
+    fake = loader(tmp_path, {
+        "api_config": {"provider": "fake"},
+        "fake_llm_config": {"seed": 3, "output_tokens": 20, "model": "ignored", "unrelated": 1},
+    })
+    gemini = loader(tmp_path, {"api_config": {"provider": "gemini"}})
+
+    assert fake_llm_settings(fake) == {"seed": 3, "output_tokens": 20}
+    assert fake_llm_settings(gemini) is None
+    assert fake_llm_settings(None) is None
+
+    model = resolve_model("gemini-2.5-pro", fake)
+    assert isinstance(model, FakeLlm)
+    assert (model.model, model.seed, model.output_tokens) == ("gemini-2.5-pro", 3, 20)
+    assert resolve_model("gemini-2.5-pro", gemini) == "gemini-2.5-pro"
+    assert resolve_model(None, fake) is None
+
+
+def test_unknown_latency_distribution_raises(tmp_path):
+    config = loader(tmp_path, {
+        "api_config": {"provider": "fake"},
+        "fake_llm_config": {"latency_ms": {"distribution": "pareto"}},
+    })
+
+    with pytest.raises(FakeLlmError, match="Unknown latency distribution 'pareto'"):
+        fake_llm_settings(config)
@@ -0,0 +1,116 @@
+"""Tests for loading input documents when agents run."""
+
+import asyncio
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from backend.core.agents.flexible_agent_factory import FlexibleAgentFactory
+from backend.core.config.flexible_config import FlexibleAgentConfig
+from backend.core.utils.context_budget import IDENTITY_PREFIX
+
+
+class Prompts:
+    def get_value(self, key, default=None):
+        return "Use the documents." if key.startswith("prompts.") else default
+
+
+def factory(tmp_path, monkeypatch, **documents):
+    """Factory for a Main sequence of Reader (spec.md, notes.md) and Checker (spec.md).
+
+    Returns:
+        The factory with its agents built, and the lists of filenames passed to each conversion
+    """
+    for name, text in documents.items():
+        (tmp_path / name.replace("_", ".")).write_text(text, encoding="utf-8")
+    configs = [
+        FlexibleAgentConfig(name="Main", type="SequentialAgent", sub_agents=["Reader", "Checker"]),
+        FlexibleAgentConfig(name="Reader", type="LlmAgent", model="m", prompt_key="reader",
+                            input_keys=["spec.md", "notes.md"]),
+        FlexibleAgentConfig(name="Checker", type="LlmAgent", model="m", prompt_key="checker", input_key="spec.md"),
+    ]
+    built = FlexibleAgentFactory(configs, Prompts(), tmp_path)
+    conversions = []
+    convert = built.document_reader.convert_documents
+
+    def counting_convert(filenames, *args):
+        conversions.append(list(filenames))
+        return convert(filenames, *args)
+
+    monkeypatch.setattr(built.document_reader, "convert_documents", counting_convert)
+    built.build_all()
+    return built, conversions
+
+
+def invoke(built, *agent_names):
+    """Run the before_agent callbacks of agents concurrently."""
+    async def run():
+        return await asyncio.gather(*(
+            built.instances[name].before_agent_callback(None) for name in agent_names
+        ))
+
+    return asyncio.run(run())
+
+
+def test_documents_are_not_read_when_agents_are_built(tmp_path, monkeypatch):
+    built, conversions = factory(tmp_path, monkeypatch, spec_md="Spec text", notes_md="Notes text")
+
+    assert conversions == []
+    assert built.instances["Reader"].before_agent_callback is not None
+    assert "Spec text" not in built.instances["Reader"].instruction
+
+
+def test_concurrent_agents_share_one_conversion(tmp_path, monkeypatch):
+    built, conversions = factory(tmp_path, monkeypatch, spec_md="Spec text", notes_md="Notes text")
+
+    assert invoke(built, "Reader", "Checker") == [None, None]
+    invoke(built, "Checker")
+
+    assert conversions == [["spec.md", "notes.md"]]
+    reader = built._document_sections["Reader"]
+    assert reader.startswith("\n\n**Additional Input Documents (2 files):**\n")
+    assert reader.index("### Document 1: spec.md") < reader.index("Spec text")
+    assert reader.index("### Document 2: notes.md") < reader.index("Notes text")
+    checker = built._document_sections["Checker"]
+    assert checker.startswith("\n\n**Additional Input Document:**\n") and "Spec text" in checker
+
+
+def test_documents_are_inserted_before_the_identity_instruction(tmp_path, monkeypatch):
+    built, _ = factory(tmp_path, monkeypatch, spec_md="Spec text", notes_md="Notes text")
+    invoke(built, "Checker")
+    identity = IDENTITY_PREFIX + '"Checker".'
+    llm_request = LlmRequest(
+        model="m", config=types.GenerateContentConfig(system_instruction="Use the documents." + identity)
+    )
+
+    built._inject_input_documents("Checker", llm_request)
+
+    instruction = llm_request.config.system_instruction
+    assert instruction == "Use the documents." + built._document_sections["Checker"] + identity
+    assert "Spec text" in instruction
+
+
+def test_failed_conversions_leave_the_section_empty(tmp_path, monkeypatch):
+    built, _ = factory(tmp_path, monkeypatch, spec_md="Spec text")
+
+    def failing_convert(*args):
+        raise RuntimeError("converter crashed")
+
+    monkeypatch.setattr(built.document_reader, "convert_documents", failing_convert)
+
+    assert invoke(built, "Reader", "Checker") == [None, None]
+    assert built._document_sections == {"Reader": "", "Checker": ""}
+    llm_request = LlmRequest(model="m", config=types.GenerateContentConfig(system_instruction="Prompt."))
+    built._inject_input_documents("Reader", llm_request)
+    assert llm_request.config.system_instruction == "Prompt."
+
+
+def test_missing_documents_are_left_out(tmp_path, monkeypatch):
+    built, _ = factory(tmp_path, monkeypatch, notes_md="Notes text")
+
+    invoke(built, "Reader", "Checker")
+
+    reader = built._document_sections["Reader"]
+    assert reader.startswith("\n\n**Additional Input Document:**\n")
+    assert "Notes text" in reader and "spec.md" not in reader
+    assert built._document_sections["Checker"] == ""
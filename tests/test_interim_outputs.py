@@ -0,0 +1,126 @@
+"""Tests for the interim output index and its endpoint."""
+
+from fastapi.testclient import TestClient
+
+from backend.api import main
+from backend.api.interim_outputs import InterimOutputIndex, agent_name_for
+from backend.api.job_store import InMemoryJobStore
+from backend.core.utils.artifact_bundle import BUNDLE_FILENAME, ArtifactBundle
+
+
+def names(files):
+    return [f.filename for f in files]
+
+
+def test_agent_name_for():
+    assert agent_name_for("00_workflow_metadata.md") == "Workflow Metadata"
+    assert agent_name_for("99_final_summary.md") == "Final Summary"
+    assert agent_name_for("01_code_generator.md") == "Code Generator"
+
+
+def test_cursor_returns_only_new_and_changed_outputs(tmp_path):
+    index = InterimOutputIndex()
+    (tmp_path / "01_writer.md").write_text("draft")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    files, cursor, complete = index.changes(tmp_path)
+    assert names(files) == ["01_writer.md"]
+    assert complete
+
+    files, same_cursor, complete = index.changes(tmp_path, cursor)
+    assert files == []
+    assert same_cursor == cursor
+    assert not complete
+
+    (tmp_path / "02_reviewer.md").write_text("review")
+    (tmp_path / "01_writer.md").write_text("second draft")
+    files, next_cursor, _ = index.changes(tmp_path, cursor)
+    assert names(files) == ["01_writer.md", "02_reviewer.md"]
+    assert next_cursor != cursor
+
+
+def test_removed_output_changes_cursor(tmp_path):
+    index = InterimOutputIndex()
+    (tmp_path / "01_writer.md").write_text("draft")
+    _, cursor, _ = index.changes(tmp_path)
+
+    (tmp_path / "01_writer.md").unlink()
+    files, next_cursor, _ = index.changes(tmp_path, cursor)
+
+    assert files == []
+    assert next_cursor != cursor
+    assert names(index.changes(tmp_path)[0]) == []
+
+
+def test_cursor_of_another_epoch_gets_full_listing(tmp_path):
+    (tmp_path / "01_writer.md").write_text("draft")
+    _, cursor, _ = InterimOutputIndex().changes(tmp_path)
+
+    files, _, complete = InterimOutputIndex().changes(tmp_path, cursor)
+
+    assert names(files) == ["01_writer.md"]
+    assert complete
+
+
+def test_evicted_directory_gets_new_epoch(tmp_path):
+    index = InterimOutputIndex(max_directories=1)
+    first, second = tmp_path / "a", tmp_path / "b"
+    for directory in (first, second):
+        directory.mkdir()
+        (directory / "01_writer.md").write_text("draft")
+
+    _, cursor, _ = index.changes(first)
+    index.changes(second)
+    files, _, complete = index.changes(first, cursor)
+
+    assert names(files) == ["01_writer.md"]
+    assert complete
+
+
+def test_final_directory_is_not_rescanned(tmp_path):
+    index = InterimOutputIndex()
+    (tmp_path / "01_writer.md").write_text("draft")
+    _, cursor, _ = index.changes(tmp_path, final=True)
+
+    (tmp_path / "02_late.md").write_text("late")
+
+    assert index.changes(tmp_path, cursor) == ([], cursor, False)
+
+
+def test_bundled_outputs_are_indexed_and_read(tmp_path):
+    index = InterimOutputIndex()
+    bundle = ArtifactBundle(tmp_path / BUNDLE_FILENAME)
+    bundle.append([("01_writer.md", b"draft", "agent_output"), ("state.json", b"{}", "state")])
+
+    files, cursor, _ = index.changes(tmp_path)
+    assert names(files) == ["01_writer.md"]
+    assert files[0].bundled
+    assert index.read(tmp_path, files[0])["content"] == "draft"
+
+    bundle.append([("01_writer.md", b"second draft", "agent_output")])
+    files, _, _ = index.changes(tmp_path, cursor)
+    assert names(files) == ["01_writer.md"]
+    assert index.read(tmp_path, files[0])["content"] == "second draft"
+
+
+def test_endpoint_etag_and_cursor(monkeypatch, tmp_path):
+    store = InMemoryJobStore()
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setattr(main, "interim_index", InterimOutputIndex())
+    store.create("wf", {"status": "running", "incremental_dir": str(tmp_path)})
+    (tmp_path / "01_writer.md").write_text("draft")
+    client = TestClient(main.app)
+    url = "/api/v1/workflow/wf/interim-outputs"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert [o["content"] for o in first.json()["outputs"]] == ["draft"]
+    etag = first.headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    (tmp_path / "02_reviewer.md").write_text("review")
+    delta = client.get(url, params={"since": first.json()["cursor"]})
+    assert [o["filename"] for o in delta.json()["outputs"]] == ["02_reviewer.md"]
+    assert not delta.json()["complete"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,269 @@
+"""Tests for the workflow job stores and the progress writer."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.api.job_store import (
+    InMemoryJobStore,
+    JobStoreError,
+    ProgressWriter,
+    SQLiteJobStore,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryJobStore()
+    else:
+        store = SQLiteJobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+def add(store, workflow_id, start_ts, status="completed", **fields):
+    store.create(workflow_id, {"status": status, "start_ts": start_ts, "progress": 0.0, **fields})
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12.5, "workflow_1")) == (12.5, "workflow_1")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(JobStoreError):
+        decode_cursor("not-a-cursor")
+
+
+def test_create_get_update_delete(store):
+    add(store, "a", 1.0, status="running", result={"content": "x"}, metadata={"priority": "high"})
+
+    assert store.get("a")["result"] == {"content": "x"}
+    assert "result" not in store.get("a", include_result=False)
+    assert store.update("a", progress=50.0, current_agent="Writer")
+    record = store.get("a")
+    assert record["progress"] == 50.0
+    assert record["current_agent"] == "Writer"
+    assert record["metadata"] == {"priority": "high"}
+
+    assert not store.update("missing", progress=1.0)
+    assert store.delete("a")
+    assert store.get("a") is None
+
+
+def test_list_pages_newest_first_with_cursor(store):
+    for index in range(7):
+        add(store, f"wf_{index}", float(index))
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = store.list(limit=3, cursor=cursor)
+        seen.extend(record["id"] for record in page)
+        if cursor is None:
+            break
+
+    assert seen == [f"wf_{index}" for index in reversed(range(7))]
+
+
+def test_list_cursor_breaks_start_time_ties_by_id(store):
+    for workflow_id in ("a", "b", "c", "d"):
+        add(store, workflow_id, 5.0)
+
+    first, cursor = store.list(limit=2)
+    second, end = store.list(limit=2, cursor=cursor)
+
+    assert [r["id"] for r in first] == ["d", "c"]
+    assert [r["id"] for r in second] == ["b", "a"]
+    assert end is None
+
+
+def test_list_filters_by_status(store):
+    add(store, "done", 1.0)
+    add(store, "busy", 2.0, status="running")
+
+    page, cursor = store.list(status="running")
+
+    assert [r["id"] for r in page] == ["busy"]
+    assert cursor is None
+    assert store.count("running") == 1
+    assert store.count() == 2
+
+
+def test_prune_by_age_keeps_active_records(store):
+    add(store, "old", 1.0)
+    add(store, "old_running", 2.0, status="running")
+    add(store, "new", 100.0)
+
+    assert store.prune(older_than=50.0) == 1
+    assert store.get("old") is None
+    assert store.get("old_running") is not None
+    assert store.get("new") is not None
+
+
+def test_prune_keeps_newest_finished_records(store):
+    for index in range(5):
+        add(store, f"wf_{index}", float(index))
+    add(store, "queued", 0.5, status="queued")
+
+    assert store.prune(keep=2) == 3
+    remaining = {r["id"] for r in store.list(limit=10)[0]}
+    assert remaining == {"wf_4", "wf_3", "queued"}
+
+
+def test_prune_by_incremental_dir(store):
+    add(store, "a", 1.0, incremental_dir="/out/incremental_a")
+    add(store, "b", 2.0, incremental_dir="/out/incremental_b")
+
+    assert store.prune(incremental_dirs=["/out/incremental_a"]) == 1
+    assert store.get("a") is None
+    assert store.get("b") is not None
+
+
+def test_prune_without_criteria_deletes_nothing(store):
+    add(store, "a", 1.0)
+    assert store.prune() == 0
+
+
+def test_find_by_request_key(store):
+    add(store, "old", 1.0, request_key="k", last_update=10.0)
+    add(store, "new", 2.0, request_key="k", last_update=20.0)
+    add(store, "running", 3.0, status="running", request_key="k", last_update=30.0)
+
+    assert store.find_by_request_key("k", ("completed",))["id"] == "new"
+    assert store.find_by_request_key("k", ("completed",), updated_since=25.0) is None
+    assert store.find_by_request_key("k", ("running",))["id"] == "running"
+    assert store.find_by_request_key("other", ("completed",)) is None
+
+
+def test_update_many(store):
+    add(store, "a", 1.0, status="running")
+    add(store, "b", 2.0, status="running")
+
+    store.update_many({"a": {"progress": 10.0}, "b": {"progress": 20.0, "current_agent": "B"}, "gone": {"progress": 1.0}})
+
+    assert store.get("a")["progress"] == 10.0
+    assert store.get("b")["current_agent"] == "B"
+
+
+def test_transaction_is_atomic_and_nestable(store):
+    with store.transaction():
+        add(store, "a", 1.0)
+        with store.transaction():
+            store.update_many({"a": {"progress": 5.0}})
+
+    assert store.get("a")["progress"] == 5.0
+
+
+def test_sqlite_transaction_rolls_back_and_blocks_other_connections(tmp_path):
+    path = tmp_path / "jobs.db"
+    store, other = SQLiteJobStore(path), SQLiteJobStore(path)
+    other._conn.execute("PRAGMA busy_timeout = 50")
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            add(store, "a", 1.0)
+            raise RuntimeError("abort")
+    assert store.get("a") is None
+
+    with store.transaction():
+        add(store, "b", 1.0)
+        with pytest.raises(sqlite3.OperationalError):
+            add(other, "c", 2.0)
+    assert other.get("b") is not None
+    store.close()
+    other.close()
+
+
+def test_settings(store):
+    assert store.get_setting("missing") is None
+    store.set_setting("uploaded", {"workflow": {"content": "x"}})
+    store.set_setting("uploaded", {"workflow": {"content": "y"}})
+    assert store.get_setting("uploaded") == {"workflow": {"content": "y"}}
+
+
+def test_sqlite_marks_interrupted_runs_on_reopen(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = SQLiteJobStore(path)
+    add(store, "running", 1.0, status="running")
+    add(store, "done", 2.0)
+    store.close()
+
+    reopened = SQLiteJobStore(path)
+    assert reopened.mark_interrupted() == 1
+    assert reopened.get("running")["status"] == "failed"
+    assert reopened.get("done")["status"] == "completed"
+    reopened.close()
+
+
+def test_memory_store_evicts_oldest_finished_records():
+    store = InMemoryJobStore(max_entries=2)
+    add(store, "running", 1.0, status="running")
+    add(store, "done", 2.0)
+    add(store, "newest", 3.0)
+
+    assert store.get("running") is not None
+    assert store.get("done") is None
+    assert store.get("newest") is not None
+
+
+class CountingStore(InMemoryJobStore):
+    """In-memory store counting batched writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def update_many(self, updates):
+        self.batches.append({key: dict(value) for key, value in updates.items()})
+        super().update_many(updates)
+
+
+def test_progress_writer_coalesces_updates():
+    store = CountingStore()
+    add(store, "a", 1.0, status="running")
+
+    async def scenario():
+        writer = ProgressWriter(store, interval=0.01)
+        for progress in (10.0, 20.0, 30.0):
+            writer.record("a", progress=progress)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert store.batches == [{"a": {"progress": 30.0}}]
+    assert store.get("a")["progress"] == 30.0
+
+
+def test_progress_writer_settle_drops_pending_updates():
+    store = CountingStore()
+    add(store, "a", 1.0, status="running")
+
+    async def scenario():
+        writer = ProgressWriter(store, interval=0.05)
+        writer.record("a", progress=50.0)
+        await writer.settle("a")
+        store.update("a", status="completed", progress=100.0)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert store.get("a")["progress"] == 100.0
+    assert store.batches == []
+
+
+def test_progress_writer_flush_writes_pending_updates():
+    store = CountingStore()
+    add(store, "a", 1.0, status="running")
+
+    async def scenario():
+        writer = ProgressWriter(store, interval=10.0)
+        writer.record("a", progress=42.0)
+        await writer.flush()
+
+    asyncio.run(scenario())
+
+    assert store.get("a")["progress"] == 42.0
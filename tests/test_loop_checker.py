@@ -0,0 +1,121 @@
+"""Tests for the loop checker's stop conditions."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+
+from backend.core.agents.flexible_loop_checker import FlexibleLoopChecker, text_delta
+
+
+def context(invocation_id="run-1"):
+    """Minimal invocation context: a session with state and events."""
+    return SimpleNamespace(
+        invocation_id=invocation_id, branch=None, session=SimpleNamespace(state={}, events=[])
+    )
+
+
+def usage(ctx, author, tokens, invocation_id=None):
+    ctx.session.events.append(Event(
+        author=author,
+        invocation_id=invocation_id or ctx.invocation_id,
+        usage_metadata=types.GenerateContentResponseUsageMetadata(total_token_count=tokens),
+    ))
+
+
+def check(checker, ctx, result):
+    """Run one iteration's check on ``result`` and return the checker's event."""
+    ctx.session.state[checker.watch_key] = result
+
+    async def run():
+        return [event async for event in checker._run_async_impl(ctx)]
+
+    events = asyncio.run(run())
+    assert len(events) == 1
+    return events[0]
+
+
+def record(event):
+    return event.custom_metadata["loop_iteration"]
+
+
+def test_text_delta():
+    assert text_delta("The plan is ready.", "the  PLAN is ready") == 0.0
+    assert text_delta("", "") == 0.0
+    assert text_delta("alpha beta gamma", "delta epsilon zeta") == 1.0
+    assert 0.0 < text_delta("one two three four five", "one two three four six") < 1.0
+
+
+def test_stops_once_outputs_converge():
+    checker = FlexibleLoopChecker("Checker", min_delta=0.2)
+    ctx = context()
+    draft = "The service stores jobs in SQLite and streams progress over server sent events to clients"
+
+    first = check(checker, ctx, "A first rough outline of the design")
+    second = check(checker, ctx, draft)
+    third = check(checker, ctx, draft + " quickly")
+
+    assert not first.actions.escalate and record(first)["delta"] is None
+    assert not second.actions.escalate and record(second)["delta"] > 0.2
+    assert third.actions.escalate
+    assert record(third)["iteration"] == 3
+    assert record(third)["delta"] < 0.2
+    assert (record(third)["verdict"], record(third)["reason"]) == ("stop", "converged")
+    assert third.content is None
+
+
+def test_token_budget_counts_watched_agents_of_this_invocation():
+    checker = FlexibleLoopChecker("Checker", token_budget=100, watched_agents=["Writer"])
+    ctx = context()
+    usage(ctx, "Writer", 60)
+    usage(ctx, "Reviewer", 500)
+    usage(ctx, "Writer", 500, invocation_id="earlier-run")
+
+    first = check(checker, ctx, "draft one")
+    usage(ctx, "Writer", 50)
+    second = check(checker, ctx, "draft two")
+
+    assert not first.actions.escalate
+    assert record(first)["tokens"] == 60
+    assert second.actions.escalate
+    assert record(second)["tokens"] == 50
+    assert record(second)["total_tokens"] == 110
+    assert record(second)["reason"] == "token_budget"
+
+
+def test_stop_keyword_wins_over_other_conditions():
+    checker = FlexibleLoopChecker("Checker", stop_keyword="DONE", min_delta=0.5, token_budget=10)
+    ctx = context()
+    usage(ctx, "Writer", 50)
+
+    check(checker, ctx, "Final answer, all done")
+    event = check(checker, ctx, "Final answer, all done")
+
+    assert event.actions.escalate
+    assert record(event)["reason"] == "stop_keyword"
+
+
+def test_progress_is_kept_per_invocation():
+    checker = FlexibleLoopChecker("Checker", min_delta=0.5)
+    records = []
+    checker.set_iteration_callback(records.append)
+
+    check(checker, context("run-1"), "same text every time")
+    event = check(checker, context("run-2"), "same text every time")
+
+    assert not event.actions.escalate
+    assert [(r["iteration"], r["verdict"]) for r in records] == [(1, "continue"), (1, "continue")]
+
+
+@pytest.mark.parametrize("min_delta, token_budget", [(None, None), (0.0, None)])
+def test_continues_without_a_stop_condition(min_delta, token_budget):
+    checker = FlexibleLoopChecker("Checker", min_delta=min_delta, token_budget=token_budget)
+    ctx = context()
+
+    check(checker, ctx, "same")
+    event = check(checker, ctx, "same")
+
+    assert not event.actions.escalate
+    assert record(event)["verdict"] == "continue" and record(event)["reason"] is None
@@ -0,0 +1,242 @@
+"""Tests for workflow bookkeeping in the API application module."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend.api import main
+from backend.api.job_store import InMemoryJobStore
+from backend.api.scheduler import WorkflowScheduler
+
+
+class StubConfigLoader:
+    def get_value(self, key, default=None):
+        return default
+
+
+class StubManager:
+    """Workflow manager stand-in for submission bookkeeping."""
+    config = {"core_config": {"model": "m"}}
+    config_loader = StubConfigLoader()
+
+    def request_fingerprint(self, user_request):
+        return f"key:{user_request}"
+
+    def cancel_run(self, workflow_id):
+        return False
+
+
+class StubRuns:
+    """Replaces workflow execution with runs that finish when released."""
+
+    def __init__(self, store):
+        self.store = store
+        self.started = []
+        self.release = {}
+
+    async def execute(self, workflow_id, user_request, **kwargs):
+        self.started.append(workflow_id)
+        self.release[workflow_id] = asyncio.Event()
+        self.store.update(workflow_id, status="running", progress=40.0, current_agent="Writer")
+        await self.release[workflow_id].wait()
+        if self.store.get(workflow_id).get("cancelled"):
+            self.store.update(workflow_id, status="cancelled")
+        else:
+            self.store.update(workflow_id, status="completed", progress=100.0, result={"content": f"done {user_request}"})
+
+
+@pytest.fixture
+def submissions(monkeypatch, store):
+    runs = StubRuns(store)
+    monkeypatch.setattr(main, "workflow_manager", StubManager())
+    monkeypatch.setattr(main, "scheduler", WorkflowScheduler())
+    monkeypatch.setattr(main, "execute_workflow_background", runs.execute)
+    monkeypatch.setattr(main, "SHARED_STATE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(main, "identical_waiters", {})
+    return runs
+
+
+async def settle(seconds=0.05):
+    await asyncio.sleep(seconds)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = InMemoryJobStore()
+    monkeypatch.setattr(main, "job_store", store)
+    return store
+
+
+def test_resolve_incremental_dir_of_deleted_workflow_is_404(store):
+    # The record was looked up by the endpoint, then deleted by retention
+    record = {"id": "gone", "status": "completed", "start_time": None}
+
+    with pytest.raises(HTTPException) as error:
+        main.resolve_incremental_dir("gone", record)
+
+    assert error.value.status_code == 404
+
+
+def test_resolve_incremental_dir_uses_recorded_directory(store, tmp_path):
+    store.create("wf", {"status": "completed", "incremental_dir": str(tmp_path)})
+
+    assert main.resolve_incremental_dir("wf", store.get("wf")) == tmp_path
+
+
+def test_resolve_incremental_dir_falls_back_to_result_metadata(store, tmp_path):
+    store.create("wf", {
+        "status": "completed",
+        "result": {"metadata": {"incremental_output_dir": str(tmp_path)}},
+    })
+
+    assert main.resolve_incremental_dir("wf", store.get("wf", include_result=False)) == tmp_path
+    assert store.get("wf")["incremental_dir"] == str(tmp_path)
+
+
+def test_health_counts_queued_workflows_as_active(store):
+    for workflow_id, status in (("q", "queued"), ("i", "initializing"), ("r", "running"), ("c", "completed")):
+        store.create(workflow_id, {"status": status})
+
+    response = TestClient(main.app).get("/api/v1/health")
+
+    assert response.status_code == 200
+    assert response.json()["active_workflows"] == 3
+    assert response.json()["total_workflows"] == 4
+
+
+def test_configure_scheduler_sets_budgets_and_default_model(monkeypatch):
+    scheduler = WorkflowScheduler()
+    monkeypatch.setattr(main, "scheduler", scheduler)
+
+    main.configure_scheduler({
+        "api_config": {"model": "gemini-2.5-flash", "default_model": "gemini-2.0-flash"},
+        "scheduler_config": {"default_model_concurrency": 3, "model_concurrency": {"gemini-2.5-flash": 1}},
+    })
+
+    assert scheduler.default_model == "gemini-2.0-flash"
+    assert scheduler.budget_for("gemini-2.5-flash") == 1
+    assert scheduler.budget_for("other") == 3
+
+
+def test_incremental_dirs_of_active_and_resumable_runs_cover_every_record(store):
+    for index in range(1203):
+        store.create(f"run_{index}", {"status": "running", "start_ts": float(index), "incremental_dir": f"/out/r{index}"})
+    store.create("failed", {"status": "failed", "start_ts": 1.0, "incremental_dir": "/out/failed"})
+    store.create("done", {"status": "completed", "start_ts": 1.0, "incremental_dir": "/out/done"})
+
+    assert len(main.active_incremental_dirs()) == 1203
+    assert main.resumable_incremental_dirs() == {"/out/failed"}
+
+
+def test_identical_submission_follows_running_workflow_under_its_own_id(store, submissions):
+    async def scenario():
+        first = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        second = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        await settle()
+        mirrored = store.get(second.id)
+        submissions.release[first.id].set()
+        await settle()
+        await main.scheduler.shutdown()
+        return first, second, mirrored
+
+    first, second, mirrored = asyncio.run(scenario())
+
+    assert second.id != first.id
+    assert second.metadata["deduplicated"]
+    assert second.metadata["reused_from"] == first.id
+    assert submissions.started == [first.id]
+    assert (mirrored["status"], mirrored["progress"]) == ("running", 40.0)
+    assert store.get(second.id)["status"] == "completed"
+    assert store.get(second.id)["result"] == {"content": "done same"}
+    assert main.identical_waiters == {}
+
+
+def test_cancelling_a_follower_leaves_the_identical_workflow_running(store, submissions):
+    async def scenario():
+        first = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        second = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        await settle()
+        main.cancel_workflow_run(second.id)
+        await settle()
+        statuses = store.get(first.id)["status"], store.get(second.id)["status"]
+        submissions.release[first.id].set()
+        await settle()
+        await main.scheduler.shutdown()
+        return first, statuses
+
+    first, statuses = asyncio.run(scenario())
+
+    assert statuses == ("running", "cancelled")
+    assert store.get(first.id)["status"] == "completed"
+
+
+def test_follower_runs_itself_when_the_identical_workflow_is_cancelled(store, submissions):
+    async def scenario():
+        first = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        second = await main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same"))
+        await settle()
+        main.cancel_workflow_run(first.id)
+        submissions.release[first.id].set()
+        await settle()
+        submissions.release[second.id].set()
+        await settle()
+        await main.scheduler.shutdown()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert submissions.started == [first.id, second.id]
+    assert store.get(first.id)["status"] == "cancelled"
+    assert store.get(second.id)["status"] == "completed"
+
+
+def test_completed_identical_workflow_answers_right_away(store, submissions):
+    store.create("done", {"status": "completed", "request_key": "key:same", "last_update": 1e12,
+                          "result": {"content": "cached"}})
+
+    response = asyncio.run(main.execute_workflow_with_custom_config(main.WorkflowRequest(user_request="same")))
+
+    assert response.id == "done"
+    assert response.content == "cached"
+    assert store.count() == 1
+
+
+def test_batch_endpoint_keeps_at_most_max_concurrency_items_in_flight(store, submissions, monkeypatch):
+    monkeypatch.setattr(main, "scheduler", WorkflowScheduler(default_model_budget=10))
+    monkeypatch.setattr(main, "FlexibleWorkflowManager", lambda **kwargs: StubManager())
+    monkeypatch.setattr(main, "active_batches", {})
+    in_flight = []
+    peak = 0
+
+    async def execute(workflow_id, user_request, **kwargs):
+        nonlocal peak
+        in_flight.append(workflow_id)
+        peak = max(peak, len(in_flight))
+        await settle(0.02)
+        in_flight.remove(workflow_id)
+        store.update(workflow_id, status="completed", progress=100.0, result={"content": f"done {user_request}"})
+
+    monkeypatch.setattr(main, "execute_workflow_background", execute)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/v1/workflow/batch", json={
+                "requests": [f"request {i}" for i in range(6)], "max_concurrency": 2,
+            })
+            batch = main.active_batches[response.json()["batch_id"]]
+            await asyncio.wait_for(batch.task, timeout=5)
+            status = await client.get(response.json()["status_url"])
+        await main.scheduler.shutdown()
+        return response, status
+
+    response, status = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert response.json()["max_concurrency"] == 2
+    assert peak == 2
+    assert status.json()["counts"] == {"completed": 6}
+    assert status.json()["complete"]
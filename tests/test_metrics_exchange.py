@@ -0,0 +1,84 @@
+"""Tests for combining the metrics of several API processes."""
+
+import os
+import time
+
+from backend.api.metrics_exchange import MetricsExchange
+from backend.core.utils.metrics import MetricsRegistry
+
+
+def process(directory, source):
+    """Registry and exchange of one API process."""
+    registry = MetricsRegistry()
+    runs = registry.counter("runs_total", "Runs", ("status",))
+    duration = registry.histogram("run_seconds", "Run duration", buckets=(1.0, 10.0))
+    active = registry.gauge("active_runs", "Active runs")
+    return registry, runs, duration, active, MetricsExchange(directory, registry, source=source)
+
+
+def test_every_process_reports_the_totals_of_all_processes(tmp_path):
+    registry_a, runs_a, duration_a, active_a, exchange_a = process(tmp_path, "a")
+    registry_b, runs_b, duration_b, active_b, exchange_b = process(tmp_path, "b")
+    runs_a.inc(2, "completed")
+    runs_b.inc(3, "completed")
+    runs_b.inc(1, "failed")
+    duration_a.observe(0.5)
+    duration_b.observe(5.0)
+    active_a.set(1)
+    active_b.set(2)
+
+    exchange_a.sync()
+    exchange_b.sync()
+    exchange_a.sync()
+
+    for registry in (registry_a, registry_b):
+        output = registry.render()
+        assert 'runs_total{status="completed"} 5' in output
+        assert 'runs_total{status="failed"} 1' in output
+        assert 'run_seconds_bucket{le="1"} 1' in output
+        assert 'run_seconds_bucket{le="10"} 2' in output
+        assert "run_seconds_count 2" in output
+        assert "active_runs 3" in output
+
+
+def test_stale_peers_keep_counters_but_not_gauges(tmp_path):
+    registry_a, runs_a, _, active_a, exchange_a = process(tmp_path, "a")
+    registry_b, runs_b, _, active_b, exchange_b = process(tmp_path, "b")
+    active_a.set(1)
+    runs_b.inc(4, "completed")
+    active_b.set(5)
+    exchange_b.publish()
+
+    # Process b has exited and its snapshot is older than stale_after_seconds
+    stale = time.time() - exchange_a.stale_after_seconds - 1
+    os.utime(tmp_path / "b.json", (stale, stale))
+    exchange_a.refresh()
+
+    output = registry_a.render()
+    assert 'runs_total{status="completed"} 4' in output
+    assert "active_runs 1" in output
+
+
+def test_export_all_includes_workers_but_not_peers(tmp_path):
+    registry_a, runs_a, _, _, exchange_a = process(tmp_path, "a")
+    registry_b, runs_b, _, _, exchange_b = process(tmp_path, "b")
+    runs_a.inc(1, "completed")
+    registry_a.merge_remote("worker-1", {"runs_total": {("completed",): 2.0}})
+    registry_a.merge_remote("worker-2", {"runs_total": {("completed",): 3.0}})
+    registry_a.retire_remote("worker-2")
+    runs_b.inc(10, "completed")
+    exchange_b.publish()
+    exchange_a.refresh()
+
+    assert registry_a.export_all()["runs_total"] == {("completed",): 6.0}
+    assert 'runs_total{status="completed"} 16' in registry_a.render()
+
+
+def test_unreadable_snapshots_are_skipped(tmp_path):
+    registry_a, runs_a, _, _, exchange_a = process(tmp_path, "a")
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    runs_a.inc(1, "completed")
+
+    exchange_a.sync()
+
+    assert 'runs_total{status="completed"} 1' in registry_a.render()
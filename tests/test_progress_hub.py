@@ -0,0 +1,170 @@
+"""Tests for the workflow progress pub/sub hub."""
+
+import asyncio
+
+import pytest
+
+from backend.api.progress_hub import ProgressHub, ProgressHubError
+
+
+async def collect(stream, limit=100):
+    events = []
+    async for event in stream:
+        events.append(event)
+        if len(events) >= limit:
+            break
+    return events
+
+
+def test_replays_history_after_last_event_id():
+    async def scenario():
+        hub = ProgressHub()
+        for step in range(1, 4):
+            hub.publish("wf", {"step": step})
+        hub.publish("wf", {"status": "completed"}, terminal=True)
+        return await collect(hub.subscribe("wf", last_event_id=2))
+
+    events = asyncio.run(scenario())
+
+    assert [event.id for event in events] == [3, 4]
+    assert events[-1].terminal
+
+
+def test_live_events_reach_every_subscriber():
+    async def scenario():
+        hub = ProgressHub()
+        first = asyncio.ensure_future(collect(hub.subscribe("wf")))
+        second = asyncio.ensure_future(collect(hub.subscribe("wf")))
+        await asyncio.sleep(0)
+        assert hub.subscriber_count("wf") == 2
+
+        hub.publish("wf", {"step": 1})
+        hub.publish("wf", {"status": "completed"}, terminal=True)
+        results = await asyncio.gather(first, second)
+        return hub, results
+
+    hub, results = asyncio.run(scenario())
+
+    for events in results:
+        assert [event.payload for event in events] == [{"step": 1}, {"status": "completed"}]
+    assert hub.subscriber_count("wf") == 0
+
+
+def test_slow_subscriber_drops_oldest_but_gets_terminal_event():
+    async def scenario():
+        hub = ProgressHub(queue_size=3)
+        stream = hub.subscribe("wf")
+        # Register the subscriber, then publish more than its queue holds
+        hub.publish("wf", {"step": 0})
+        first = await stream.__anext__()
+        for step in range(1, 10):
+            hub.publish("wf", {"step": step})
+        hub.publish("wf", {"status": "done"}, terminal=True)
+        return [first] + await collect(stream)
+
+    events = asyncio.run(scenario())
+    payloads = [event.payload for event in events]
+
+    assert payloads[0] == {"step": 0}
+    assert payloads[1:] == [{"step": 8}, {"step": 9}, {"status": "done"}]
+
+
+def test_events_after_terminal_event_are_ignored():
+    async def scenario():
+        hub = ProgressHub()
+        hub.publish("wf", {"status": "completed"}, terminal=True)
+        hub.publish("wf", {"step": 99})
+        return await collect(hub.subscribe("wf"))
+
+    events = asyncio.run(scenario())
+
+    assert [event.payload for event in events] == [{"status": "completed"}]
+
+
+def test_subscriber_limit():
+    async def scenario():
+        hub = ProgressHub(max_subscribers=1)
+        first = hub.subscribe("wf", keepalive=0.01)
+        assert await first.__anext__() is None
+        with pytest.raises(ProgressHubError):
+            await hub.subscribe("wf").__anext__()
+        await first.aclose()
+        return hub
+
+    hub = asyncio.run(scenario())
+    assert hub.subscriber_count("wf") == 0
+
+
+def test_keepalive_marker_when_idle():
+    async def scenario():
+        hub = ProgressHub()
+        stream = hub.subscribe("wf", keepalive=0.01)
+        marker = await stream.__anext__()
+        await stream.aclose()
+        return marker
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_close_ends_streams_of_runs_without_terminal_event():
+    async def scenario():
+        hub = ProgressHub()
+        hub.bind_loop(asyncio.get_running_loop())
+        subscriber = asyncio.ensure_future(collect(hub.subscribe("wf")))
+        await asyncio.sleep(0)
+        hub.publish("wf", {"step": 1})
+        hub.close("wf")
+        events = await asyncio.wait_for(subscriber, timeout=1.0)
+        late = await asyncio.wait_for(collect(hub.subscribe("wf")), timeout=1.0)
+        return events, late
+
+    events, late = asyncio.run(scenario())
+
+    assert [event.payload for event in events] == [{"step": 1}]
+    assert [event.payload for event in late] == [{"step": 1}]
+
+
+def test_close_keeps_terminal_event():
+    async def scenario():
+        hub = ProgressHub()
+        hub.publish("wf", {"status": "failed"}, terminal=True)
+        hub.close("wf")
+        return await collect(hub.subscribe("wf"))
+
+    events = asyncio.run(scenario())
+
+    assert [event.payload for event in events] == [{"status": "failed"}]
+
+
+def test_closed_channels_are_trimmed():
+    hub = ProgressHub(max_closed_channels=2)
+    for index in range(5):
+        hub.publish(f"wf_{index}", {"status": "completed"}, terminal=True)
+
+    assert [hub.has_channel(f"wf_{index}") for index in range(5)] == [False, False, False, True, True]
+
+
+def test_idle_channels_expire():
+    hub = ProgressHub(idle_ttl=0.05)
+    hub.publish("abandoned", {"step": 1})
+    hub.close("crashed")  # Unknown workflows are ignored
+
+    asyncio.run(asyncio.sleep(0.06))
+    hub.publish("new", {"step": 1})
+
+    assert not hub.has_channel("abandoned")
+    assert hub.has_channel("new")
+
+
+def test_publish_from_another_thread():
+    async def scenario():
+        hub = ProgressHub()
+        hub.bind_loop(asyncio.get_running_loop())
+        subscriber = asyncio.ensure_future(collect(hub.subscribe("wf")))
+        await asyncio.sleep(0)
+        await asyncio.to_thread(hub.publish, "wf", {"status": "completed"}, True)
+        return await asyncio.wait_for(subscriber, timeout=1.0)
+
+    events = asyncio.run(scenario())
+
+    assert [event.payload for event in events] == [{"status": "completed"}]
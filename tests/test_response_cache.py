@@ -0,0 +1,133 @@
+"""Tests for the two-tier model response cache."""
+
+import asyncio
+import time
+
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from backend.core.utils.response_cache import LLMResponseCache
+
+
+def response(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def text_of(llm_response):
+    return llm_response.content.parts[0].text
+
+
+def disk_size(cache):
+    return sum(path.stat().st_size for path in cache.disk_dir.glob("*/*.json"))
+
+
+def test_memory_hit_disk_hit_and_miss(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path)
+    cache.put("aa1", response("cached"))
+
+    hit, where = cache.get("aa1")
+    assert (text_of(hit), where) == ("cached", "memory_hit")
+
+    # Another process sharing the directory starts with an empty memory tier
+    other = LLMResponseCache(disk_dir=tmp_path)
+    hit, where = other.get("aa1")
+    assert (text_of(hit), where) == ("cached", "disk_hit")
+    assert other.get("aa1")[1] == "memory_hit"
+
+    assert other.get("bb2") == (None, "miss")
+    assert other.stats()["hit_ratio"] == round(2 / 3, 3)
+
+
+def test_expired_entries_are_dropped_from_both_tiers(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path, ttl_seconds=0.05)
+    cache.put("aa1", response("old"))
+    time.sleep(0.1)
+
+    assert cache.get("aa1") == (None, "miss")
+    assert list(tmp_path.glob("*/*.json")) == []
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["disk_bytes"] == 0
+
+
+def test_expired_disk_entry_is_dropped(tmp_path):
+    LLMResponseCache(disk_dir=tmp_path).put("aa1", response("old"))
+    time.sleep(0.1)
+
+    cache = LLMResponseCache(disk_dir=tmp_path, ttl_seconds=0.05)
+
+    assert cache.get("aa1") == (None, "miss")
+    assert list(tmp_path.glob("*/*.json")) == []
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMResponseCache(memory_max_entries=2)
+    cache.put("a", response("a"))
+    cache.put("b", response("b"))
+    cache.get("a")
+    cache.put("c", response("c"))
+
+    assert cache.get("b") == (None, "miss")
+    assert cache.get("a")[1] == "memory_hit"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_tier_respects_byte_limit():
+    cache = LLMResponseCache(memory_max_bytes=200)
+    cache.put("small", response("x"))
+    cache.put("large", response("y" * 500))
+
+    assert cache.stats()["memory_entries"] == 1
+    assert cache.get("large") == (None, "miss")
+
+
+def test_disk_tier_evicts_oldest_entries_beyond_size_limit(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path, memory_max_entries=0, disk_max_bytes=1000)
+    for index in range(5):
+        cache.put(f"k{index}", response(str(index) * 200))
+        time.sleep(0.01)
+
+    assert cache.get("k0") == (None, "miss")
+    assert text_of(cache.get("k4")[0]) == "4" * 200
+    assert disk_size(cache) <= 1000
+    assert cache.stats()["disk_bytes"] == disk_size(cache)
+
+
+def test_overwriting_an_entry_does_not_inflate_disk_size(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path)
+    for _ in range(3):
+        cache.put("aa1", response("same"))
+
+    assert cache.stats()["disk_bytes"] == disk_size(cache)
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path)
+    cache.put("aa1", response("x"))
+    cache._disk_path("aa1").write_text("{not json")
+
+    assert LLMResponseCache(disk_dir=tmp_path).get("aa1") == (None, "miss")
+    assert not cache._disk_path("aa1").exists()
+
+
+def test_async_lookup_and_store(tmp_path):
+    async def scenario():
+        cache = LLMResponseCache(disk_dir=tmp_path)
+        await cache.put_async("aa1", response("async"))
+        other = LLMResponseCache(disk_dir=tmp_path)
+        return await cache.get_async("aa1"), await other.get_async("aa1"), await other.get_async("bb2")
+
+    memory, disk, miss = asyncio.run(scenario())
+
+    assert memory[1] == "memory_hit"
+    assert (text_of(disk[0]), disk[1]) == ("async", "disk_hit")
+    assert miss == (None, "miss")
+
+
+def test_clear(tmp_path):
+    cache = LLMResponseCache(disk_dir=tmp_path)
+    cache.put("aa1", response("x"))
+
+    cache.clear()
+
+    assert cache.get("aa1") == (None, "miss")
+    assert cache.stats()["disk_bytes"] == 0
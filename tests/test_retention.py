@@ -0,0 +1,97 @@
+"""Tests for retention of run artifacts and job records."""
+
+import os
+
+from backend.api.job_store import InMemoryJobStore
+from backend.api.retention import RetentionPolicy, RetentionService, scan_runs
+
+DAY = 86400.0
+NOW = 100 * DAY
+
+
+def make_run(output_dir, label, age_days, size=10):
+    """Create a run's incremental directory and result file, last modified age_days ago."""
+    incremental_dir = output_dir / f"incremental_{label}"
+    incremental_dir.mkdir()
+    (incremental_dir / "01_writer.md").write_bytes(b"x" * size)
+    result = output_dir / f"result_{label}.json"
+    result.write_text("{}")
+    mtime = NOW - age_days * DAY
+    for path in (incremental_dir / "01_writer.md", incremental_dir, result):
+        os.utime(path, (mtime, mtime))
+    return incremental_dir
+
+
+def test_policy_is_disabled_by_default():
+    assert not RetentionPolicy().enabled
+    policy = RetentionPolicy.from_config({"enabled": True, "max_runs": 3, "unknown": 1})
+    assert policy.enabled
+    assert policy.max_runs == 3
+
+
+def test_scan_groups_artifacts_by_run(tmp_path):
+    make_run(tmp_path, "new", 1, size=5)
+    make_run(tmp_path, "old", 2, size=7)
+    (tmp_path / "sessions.db").write_text("")
+
+    runs = scan_runs(tmp_path)
+
+    assert [run.label for run in runs] == ["old", "new"]
+    assert sorted(path.name for path in runs[0].paths) == ["incremental_old", "result_old.json"]
+    assert runs[0].size == 7 + 2
+
+
+def test_deletes_by_age_count_and_size_but_not_active_runs(tmp_path):
+    for label, age in (("a", 50), ("b", 40), ("c", 3), ("d", 2), ("e", 1)):
+        make_run(tmp_path, label, age)
+    active = str(tmp_path / "incremental_a")
+    policy = RetentionPolicy(max_age_days=30, max_runs=3, max_total_mb=None)
+    service = RetentionService(tmp_path, policy, protected_dirs=lambda: {active})
+
+    report = service.run_once(now=NOW)
+
+    # b is too old; a is too old as well but still running, so c goes to meet max_runs
+    assert report["runs_deleted"] == 2
+    assert [run.label for run in scan_runs(tmp_path)] == ["a", "d", "e"]
+
+
+def test_deletes_oldest_runs_beyond_size_budget(tmp_path):
+    make_run(tmp_path, "old", 3, size=600 * 1024)
+    make_run(tmp_path, "new", 1, size=600 * 1024)
+    policy = RetentionPolicy(max_age_days=None, max_runs=None, max_total_mb=1)
+
+    RetentionService(tmp_path, policy).run_once(now=NOW)
+
+    assert [run.label for run in scan_runs(tmp_path)] == ["new"]
+
+
+def test_compression_skips_resumable_runs(tmp_path):
+    make_run(tmp_path, "done", 5)
+    resumable = make_run(tmp_path, "failed", 5)
+    policy = RetentionPolicy(max_age_days=None, max_runs=None, max_total_mb=None, compress_after_hours=24)
+    service = RetentionService(tmp_path, policy, resumable_dirs=lambda: {str(resumable)})
+
+    report = service.run_once(now=NOW)
+
+    assert report["runs_compressed"] == 1
+    assert (tmp_path / "incremental_done.tar.gz").exists()
+    assert not (tmp_path / "incremental_done").exists()
+    assert resumable.is_dir()
+    runs = {run.label: run for run in scan_runs(tmp_path)}
+    assert runs["done"].compressed
+    assert not runs["failed"].compressed
+
+
+def test_job_records_are_evicted_with_their_runs(tmp_path):
+    store = InMemoryJobStore()
+    old = make_run(tmp_path, "old", 50)
+    new = make_run(tmp_path, "new", 1)
+    store.create("old", {"status": "completed", "start_ts": NOW - 50 * DAY, "incremental_dir": str(old)})
+    store.create("new", {"status": "completed", "start_ts": NOW - DAY, "incremental_dir": str(new)})
+    policy = RetentionPolicy(max_age_days=30, max_runs=None, max_total_mb=None, job_max_age_days=None, job_max_records=None)
+
+    report = RetentionService(tmp_path, policy, job_store=store).run_once(now=NOW)
+
+    assert report["job_records_evicted"] == 1
+    assert store.get("old") is None
+    assert store.get("new") is not None
@@ -0,0 +1,246 @@
+"""Tests for the quota-aware workflow scheduler."""
+
+import asyncio
+
+import pytest
+
+from backend.api.scheduler import (
+    DEFAULT_MODEL_KEY,
+    SchedulerError,
+    SchedulerQueueFull,
+    WorkflowScheduler,
+    extract_workflow_models,
+)
+
+
+class Jobs:
+    """Workflow coroutines that run until released."""
+
+    def __init__(self):
+        self.started = []
+        self.release = {}
+
+    def run(self, workflow_id):
+        async def job():
+            self.started.append(workflow_id)
+            self.release[workflow_id] = asyncio.Event()
+            await self.release[workflow_id].wait()
+        return job
+
+    async def finish(self, workflow_id):
+        self.release[workflow_id].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+
+def test_extract_models_falls_back_to_core_config_and_default():
+    config = {
+        "core_config": {"model": "core-model"},
+        "agents": [
+            {"name": "A", "type": "LlmAgent", "model": "agent-model"},
+            {"name": "B", "type": "LlmAgent"},
+            {"name": "Seq", "type": "SequentialAgent", "model": "ignored"},
+        ],
+    }
+    assert extract_workflow_models(config) == {"agent-model", "core-model"}
+
+    no_core = {"agents": [{"name": "B", "type": "LlmAgent"}]}
+    assert extract_workflow_models(no_core) == set()
+    assert extract_workflow_models(no_core, "gemini-default") == {"gemini-default"}
+    assert extract_workflow_models({"core_config": {"model": "core-model"}}) == {"core-model"}
+
+
+def test_budget_limits_concurrent_workflows_per_model():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1, model_budgets={"wide": 2})
+        jobs = Jobs()
+        positions = [
+            scheduler.submit("a", jobs.run("a"), {"narrow"}),
+            scheduler.submit("b", jobs.run("b"), {"narrow"}),
+            scheduler.submit("c", jobs.run("c"), {"wide"}),
+            scheduler.submit("d", jobs.run("d"), {"wide"}),
+        ]
+        await asyncio.sleep(0)
+        started_before = list(jobs.started)
+        await jobs.finish("a")
+        started_after = list(jobs.started)
+        await scheduler.shutdown()
+        return positions, started_before, started_after
+
+    positions, before, after = asyncio.run(scenario())
+
+    # b waits for narrow's only slot; c and d share wide's two slots
+    assert positions == [None, 1, None, None]
+    assert sorted(before) == ["a", "c", "d"]
+    assert sorted(after) == ["a", "b", "c", "d"]
+
+
+def test_workflow_using_several_models_needs_budget_on_all():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        jobs = Jobs()
+        scheduler.submit("x", jobs.run("x"), {"m1"})
+        position = scheduler.submit("both", jobs.run("both"), {"m1", "m2"})
+        other = scheduler.submit("y", jobs.run("y"), {"m2"})
+        await asyncio.sleep(0)
+        snapshot = scheduler.snapshot()
+        await scheduler.shutdown()
+        return position, other, snapshot
+
+    position, other, snapshot = asyncio.run(scenario())
+
+    # A blocked workflow doesn't hold back one that uses a free model
+    assert position == 1
+    assert other is None
+    assert snapshot["model_usage"]["m1"] == {"in_use": 1, "budget": 1}
+    assert snapshot["queue_depth"] == 1
+
+
+def test_priority_order():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        jobs = Jobs()
+        scheduler.submit("running", jobs.run("running"), {"m"})
+        scheduler.submit("low", jobs.run("low"), {"m"}, priority="low")
+        scheduler.submit("normal", jobs.run("normal"), {"m"})
+        scheduler.submit("high", jobs.run("high"), {"m"}, priority="high")
+        positions = {wf: scheduler.position(wf) for wf in ("high", "normal", "low")}
+        await asyncio.sleep(0)
+        for workflow_id in ("running", "high", "normal"):
+            await jobs.finish(workflow_id)
+        order = list(jobs.started)
+        await scheduler.shutdown()
+        return positions, order
+
+    positions, order = asyncio.run(scenario())
+
+    assert positions == {"high": 1, "normal": 2, "low": 3}
+    assert order == ["running", "high", "normal", "low"]
+
+
+def test_workflow_without_models_uses_default_model_budget():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        scheduler.default_model = "gemini-default"
+        jobs = Jobs()
+        first = scheduler.submit("a", jobs.run("a"), set())
+        second = scheduler.submit("b", jobs.run("b"), [])
+        explicit = scheduler.submit("c", jobs.run("c"), {"gemini-default"})
+        await asyncio.sleep(0)
+        await scheduler.shutdown()
+        return first, second, explicit, jobs.started
+
+    first, second, explicit, started = asyncio.run(scenario())
+
+    assert first is None
+    assert second == 1
+    assert explicit == 2
+    assert started == ["a"]
+
+
+def test_workflow_without_models_and_no_default_model_still_has_a_budget():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        jobs = Jobs()
+        scheduler.submit("a", jobs.run("a"), set())
+        position = scheduler.submit("b", jobs.run("b"), set())
+        await asyncio.sleep(0)
+        snapshot = scheduler.snapshot()
+        await scheduler.shutdown()
+        return position, snapshot
+
+    position, snapshot = asyncio.run(scenario())
+
+    assert position == 1
+    assert snapshot["model_usage"] == {DEFAULT_MODEL_KEY: {"in_use": 1, "budget": 1}}
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1, max_queue_depth=2, default_run_seconds=30.0)
+        jobs = Jobs()
+        for workflow_id in ("a", "b", "c"):
+            scheduler.submit(workflow_id, jobs.run(workflow_id), {"m"})
+        with pytest.raises(SchedulerQueueFull) as error:
+            scheduler.submit("d", jobs.run("d"), {"m"})
+        await scheduler.shutdown()
+        return error.value
+
+    error = asyncio.run(scenario())
+
+    # Two queued plus the rejected one, one at a time at 30 s each
+    assert error.retry_after == 90
+
+
+def test_retry_after_uses_the_scarcest_model_and_is_bounded():
+    scheduler = WorkflowScheduler(default_model_budget=4, model_budgets={"scarce": 1}, default_run_seconds=10.0)
+
+    assert scheduler.estimate_retry_after({"scarce", "other"}) == 10
+    assert scheduler.estimate_retry_after({"other"}) == 3
+
+    scheduler._avg_run_seconds = 1e6
+    assert scheduler.estimate_retry_after({"scarce"}) == 3600
+
+
+def test_run_durations_update_retry_estimate():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_run_seconds=100.0)
+        jobs = Jobs()
+        scheduler.submit("a", jobs.run("a"), {"m"})
+        await asyncio.sleep(0)
+        await jobs.finish("a")
+        return scheduler._avg_run_seconds
+
+    # A near-instant run pulls the average down
+    assert asyncio.run(scenario()) < 100.0 * 0.81
+
+
+def test_cancel_removes_queued_workflow():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        jobs = Jobs()
+        scheduler.submit("a", jobs.run("a"), {"m"})
+        scheduler.submit("b", jobs.run("b"), {"m"})
+        await asyncio.sleep(0)
+        cancelled = scheduler.cancel("b")
+        not_queued = scheduler.cancel("a")
+        await jobs.finish("a")
+        await scheduler.shutdown()
+        return cancelled, not_queued, jobs.started
+
+    cancelled, not_queued, started = asyncio.run(scenario())
+
+    assert cancelled
+    assert not not_queued
+    assert started == ["a"]
+
+
+def test_unknown_priority_and_draining_are_rejected():
+    async def scenario():
+        scheduler = WorkflowScheduler()
+        jobs = Jobs()
+        with pytest.raises(SchedulerError):
+            scheduler.submit("a", jobs.run("a"), {"m"}, priority="urgent")
+        scheduler.submit("b", jobs.run("b"), {"m"}, priority="low")
+        dropped = await scheduler.shutdown()
+        with pytest.raises(SchedulerError):
+            scheduler.submit("c", jobs.run("c"), {"m"})
+        return dropped
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_shutdown_drops_queued_and_cancels_running():
+    async def scenario():
+        scheduler = WorkflowScheduler(default_model_budget=1)
+        jobs = Jobs()
+        scheduler.submit("a", jobs.run("a"), {"m"})
+        scheduler.submit("b", jobs.run("b"), {"m"})
+        await asyncio.sleep(0)
+        dropped = await scheduler.shutdown(drain_timeout=0.01)
+        return dropped, scheduler.running_count
+
+    dropped, running = asyncio.run(scenario())
+
+    assert dropped == ["b"]
+    assert running == 0
@@ -0,0 +1,146 @@
+"""Tests for the SQLite session store."""
+
+import asyncio
+import copy
+import time
+
+import pytest
+from google.adk.events import Event, EventActions
+
+from backend.core.utils.session_store import SQLiteSessionService, SessionStoreError
+
+LARGE = "x" * 200
+
+
+def service(tmp_path):
+    # Values over 100 serialized bytes stay on disk
+    return SQLiteSessionService(tmp_path / "sessions.db", lazy_value_bytes=100)
+
+
+def event(state_delta):
+    return Event(author="Writer", invocation_id="run-1", actions=EventActions(state_delta=state_delta))
+
+
+def test_large_values_are_read_from_disk_and_hidden_from_repr(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        return await store.create_session(
+            app_name="app", user_id="u", session_id="s", state={"small": 1, "large": LARGE}
+        )
+
+    session = asyncio.run(scenario())
+
+    assert "<on disk>" in repr(session.state) and LARGE not in repr(session.state)
+    assert session.state["large"] == LARGE
+    assert session.state.get("large") == LARGE
+    assert session.state.get("missing", "default") == "default"
+    assert dict(session.state.items()) == {"small": 1, "large": LARGE}
+    # Reading a value does not keep it in memory
+    assert "<on disk>" in repr(session.state)
+
+
+def test_copies_contain_loaded_values(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        return await store.create_session(app_name="app", user_id="u", session_id="s", state={"large": LARGE})
+
+    state = asyncio.run(scenario()).state
+    expected = {"large": LARGE}
+
+    assert dict(state) == expected
+    merged = {}
+    merged.update(state)
+    assert merged == expected
+    assert state.copy() == expected
+    assert copy.copy(state) == expected
+    assert copy.deepcopy(state) == expected
+    assert type(copy.deepcopy(state)) is dict
+
+
+def test_append_event_stores_state_and_offloads_large_values(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        session = await store.create_session(app_name="app", user_id="u", session_id="s")
+        await store.append_event(session, event({"answer": LARGE, "count": 2, "temp:scratch": "t"}))
+        return session
+
+    session = asyncio.run(scenario())
+
+    assert session.state["answer"] == LARGE
+    assert "<on disk>" in repr(session.state)
+    assert session.state["count"] == 2
+    assert "temp:scratch" not in session.state
+    assert len(session.events) == 1
+
+
+def test_sessions_reopen_with_a_new_service(tmp_path):
+    async def write():
+        store = service(tmp_path)
+        session = await store.create_session(app_name="app", user_id="u", session_id="s", state={"topic": "db"})
+        await store.append_event(session, event({"answer": LARGE}))
+        store.close()
+
+    async def read():
+        store = service(tmp_path)
+        session = await store.get_session(app_name="app", user_id="u", session_id="s")
+        missing = await store.get_session(app_name="app", user_id="u", session_id="other")
+        listed = await store.list_sessions(app_name="app", user_id="u")
+        return session, missing, listed
+
+    asyncio.run(write())
+    session, missing, listed = asyncio.run(read())
+
+    assert session.state["topic"] == "db"
+    assert session.state["answer"] == LARGE
+    assert [e.author for e in session.events] == ["Writer"]
+    assert missing is None
+    assert [s.id for s in listed.sessions] == ["s"]
+
+
+def test_app_and_user_state_are_shared(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        first = await store.create_session(
+            app_name="app", user_id="u1", session_id="s1",
+            state={"app:model": "m", "user:name": "Ada", "local": 1, "temp:scratch": "t"}
+        )
+        other_session = await store.create_session(app_name="app", user_id="u1", session_id="s2")
+        other_user = await store.create_session(app_name="app", user_id="u2", session_id="s3")
+        other_app = await store.create_session(app_name="other", user_id="u1", session_id="s4")
+        return first, other_session, other_user, other_app
+
+    first, other_session, other_user, other_app = asyncio.run(scenario())
+
+    assert "temp:scratch" not in first.state
+    assert dict(other_session.state) == {"app:model": "m", "user:name": "Ada"}
+    assert dict(other_user.state) == {"app:model": "m"}
+    assert dict(other_app.state) == {}
+
+
+def test_duplicate_sessions_are_rejected(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        await store.create_session(app_name="app", user_id="u", session_id="s")
+        await store.create_session(app_name="app", user_id="u", session_id="s")
+
+    with pytest.raises(SessionStoreError):
+        asyncio.run(scenario())
+
+
+def test_prune_deletes_only_stale_sessions(tmp_path):
+    async def scenario():
+        store = service(tmp_path)
+        await store.create_session(app_name="app", user_id="u", session_id="old", state={"k": 1})
+        await store.create_session(app_name="app", user_id="u", session_id="new", state={"k": 2})
+        store._conn.execute("UPDATE sessions SET update_time = ? WHERE id = 'old'", (time.time() - 3600,))
+        deleted = store.prune(60)
+        old = await store.get_session(app_name="app", user_id="u", session_id="old")
+        new = await store.get_session(app_name="app", user_id="u", session_id="new")
+        rows = store._conn.execute("SELECT COUNT(*) FROM session_state WHERE session_id = 'old'").fetchone()[0]
+        return deleted, old, new, rows
+
+    deleted, old, new, rows = asyncio.run(scenario())
+
+    assert deleted == 1
+    assert old is None and rows == 0
+    assert new.state["k"] == 2
@@ -0,0 +1,74 @@
+"""Tests for running workflows in worker processes."""
+
+import asyncio
+
+import yaml
+
+from backend.api import main
+from backend.api.job_store import InMemoryJobStore, ProgressWriter
+from backend.api.worker_pool import WorkflowWorkerPool, _to_plain
+from backend.data_model.data_models import WorkflowStatus
+
+
+def failing_configs(output_dir):
+    """Uploaded configurations of a one-agent workflow whose fake model always errors."""
+    workflow = {
+        "name": "Failing workflow",
+        "description": "Writer fails on an invalid response template",
+        "version": "1",
+        "main_agent": "Main",
+        "core_config": {"model": "fake-model"},
+        "app_config": {"output_dir": str(output_dir)},
+        "agents": [
+            {"name": "Main", "type": "SequentialAgent", "sub_agents": ["Writer"]},
+            {"name": "Writer", "type": "LlmAgent", "model": "fake-model", "prompt_key": "writer", "output_key": "draft"},
+        ],
+    }
+    gemini = {
+        "api_config": {"provider": "fake"},
+        "fake_llm_config": {
+            "latency_ms": {"distribution": "fixed", "mean": 1},
+            "responses": {"default": "{unknown_placeholder}"},
+        },
+    }
+    prompts = {"prompts": {"writer": "Write a draft."}}
+    return {
+        name: {"content": yaml.safe_dump(config)}
+        for name, config in (("workflow", workflow), ("gemini", gemini), ("prompts", prompts))
+    }
+
+
+def test_to_plain_sends_enum_values():
+    result = {"status": WorkflowStatus.FAILED, "metadata": {"path": object}}
+
+    plain = _to_plain(result)
+
+    assert plain["status"] == "failed"
+    assert plain["metadata"]["path"] == str(object)
+
+
+def test_failing_workflow_in_worker_is_recorded_as_failed(monkeypatch, tmp_path):
+    store = InMemoryJobStore()
+    monkeypatch.setattr(main, "job_store", store)
+
+    async def scenario():
+        pool = WorkflowWorkerPool(1)
+        pool.start(asyncio.get_running_loop())
+        monkeypatch.setattr(main, "worker_pool", pool)
+        monkeypatch.setattr(main, "progress_writer", ProgressWriter(store))
+        store.create("wf", {"status": "queued", "request_key": "k"})
+        try:
+            await asyncio.wait_for(
+                main.execute_workflow_background("wf", "Write", manager=object(), configs=failing_configs(tmp_path)),
+                timeout=120
+            )
+        finally:
+            await asyncio.to_thread(pool.shutdown)
+
+    asyncio.run(scenario())
+
+    record = store.get("wf")
+    assert record["status"] == "failed"
+    assert "Invalid fake response template" in record["error"]
+    # A failed run is not handed out to identical submissions
+    assert store.find_by_request_key("k", ("completed",)) is None